@@ -27,6 +27,7 @@
 import sqlite3
 import urllib.request
 import urllib.error
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
@@ -34,6 +35,11 @@
 from enum import Enum
 from typing import List, Dict, Optional, Any, Callable
 
+from v1.bandwidth_partitions import latest_rows
+from v1.db_pool import get_connection
+from v1.entity_names import EntityNames, entity_names
+from v1.migrations import ensure_schema, execute_script
+
 logger = logging.getLogger(__name__)
 
 
@@ -128,6 +134,78 @@ def to_dict(self) -> dict:
         }
 
 
+ALERTING_SCHEMA = """
+    -- Alert rules
+    CREATE TABLE IF NOT EXISTS alert_rule (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        alert_type TEXT NOT NULL,
+        severity TEXT NOT NULL DEFAULT 'warning',
+        threshold_value INTEGER NOT NULL,
+        threshold_unit TEXT NOT NULL,
+        entity_filter TEXT,
+        enabled INTEGER NOT NULL DEFAULT 1,
+        cooldown_minutes INTEGER NOT NULL DEFAULT 60,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Notification channels
+    CREATE TABLE IF NOT EXISTS notification_channel (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        channel_type TEXT NOT NULL,
+        config TEXT NOT NULL,
+        enabled INTEGER NOT NULL DEFAULT 1,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Rule-channel associations
+    CREATE TABLE IF NOT EXISTS rule_channel (
+        rule_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        PRIMARY KEY (rule_id, channel_id),
+        FOREIGN KEY (rule_id) REFERENCES alert_rule(id),
+        FOREIGN KEY (channel_id) REFERENCES notification_channel(id)
+    );
+
+    -- Alert history
+    CREATE TABLE IF NOT EXISTS alert_event (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        rule_id INTEGER NOT NULL,
+        alert_type TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        entity_type TEXT,
+        entity_id INTEGER,
+        entity_name TEXT,
+        message TEXT NOT NULL,
+        details TEXT,
+        triggered_at TEXT NOT NULL,
+        resolved_at TEXT,
+        acknowledged INTEGER NOT NULL DEFAULT 0,
+        notified_channels TEXT,
+        FOREIGN KEY (rule_id) REFERENCES alert_rule(id)
+    );
+
+    -- Last alert time per rule/entity for cooldown
+    CREATE TABLE IF NOT EXISTS alert_cooldown (
+        rule_id INTEGER NOT NULL,
+        entity_key TEXT NOT NULL,
+        last_alert_at TEXT NOT NULL,
+        PRIMARY KEY (rule_id, entity_key)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_alert_event_time
+        ON alert_event(triggered_at);
+    CREATE INDEX IF NOT EXISTS idx_alert_event_resolved
+        ON alert_event(resolved_at);
+"""
+
+
+def create_alerting_schema(cursor):
+    """Migration 5: alert rules, channels, events and cooldowns"""
+    execute_script(cursor, ALERTING_SCHEMA)
+
+
 class AlertManager:
     """
     Manages alert rules, notifications, and alert lifecycle.
@@ -192,85 +270,10 @@ class AlertManager:
 
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self._init_tables()
+        ensure_schema(self.db_path)
 
     def _get_conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-
-    def _init_tables(self):
-        """Create alerting tables."""
-        conn = self._get_conn()
-        try:
-            conn.executescript("""
-                -- Alert rules
-                CREATE TABLE IF NOT EXISTS alert_rule (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL,
-                    alert_type TEXT NOT NULL,
-                    severity TEXT NOT NULL DEFAULT 'warning',
-                    threshold_value INTEGER NOT NULL,
-                    threshold_unit TEXT NOT NULL,
-                    entity_filter TEXT,
-                    enabled INTEGER NOT NULL DEFAULT 1,
-                    cooldown_minutes INTEGER NOT NULL DEFAULT 60,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                );
-
-                -- Notification channels
-                CREATE TABLE IF NOT EXISTS notification_channel (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL,
-                    channel_type TEXT NOT NULL,
-                    config TEXT NOT NULL,
-                    enabled INTEGER NOT NULL DEFAULT 1,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                );
-
-                -- Rule-channel associations
-                CREATE TABLE IF NOT EXISTS rule_channel (
-                    rule_id INTEGER NOT NULL,
-                    channel_id INTEGER NOT NULL,
-                    PRIMARY KEY (rule_id, channel_id),
-                    FOREIGN KEY (rule_id) REFERENCES alert_rule(id),
-                    FOREIGN KEY (channel_id) REFERENCES notification_channel(id)
-                );
-
-                -- Alert history
-                CREATE TABLE IF NOT EXISTS alert_event (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    rule_id INTEGER NOT NULL,
-                    alert_type TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-                    entity_type TEXT,
-                    entity_id INTEGER,
-                    entity_name TEXT,
-                    message TEXT NOT NULL,
-                    details TEXT,
-                    triggered_at TEXT NOT NULL,
-                    resolved_at TEXT,
-                    acknowledged INTEGER NOT NULL DEFAULT 0,
-                    notified_channels TEXT,
-                    FOREIGN KEY (rule_id) REFERENCES alert_rule(id)
-                );
-
-                -- Last alert time per rule/entity for cooldown
-                CREATE TABLE IF NOT EXISTS alert_cooldown (
-                    rule_id INTEGER NOT NULL,
-                    entity_key TEXT NOT NULL,
-                    last_alert_at TEXT NOT NULL,
-                    PRIMARY KEY (rule_id, entity_key)
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_alert_event_time
-                    ON alert_event(triggered_at);
-                CREATE INDEX IF NOT EXISTS idx_alert_event_resolved
-                    ON alert_event(resolved_at);
-            """)
-            conn.commit()
-        finally:
-            conn.close()
+        return get_connection(self.db_path)
 
     def create_rule(self, name: str, alert_type: AlertType,
                    severity: AlertSeverity = AlertSeverity.WARNING,
@@ -415,21 +418,21 @@ def _check_peer_offline(self, rule: AlertRule) -> List[AlertEvent]:
         conn = self._get_conn()
 
         try:
-            # Check bandwidth_sample for last seen times
-            threshold_time = datetime.now() - timedelta(minutes=rule.threshold_value)
+            # Last seen = newest bandwidth sample (Unix epoch seconds),
+            # found from the newest day partition backwards
+            threshold_time = int(time.time()) - int(rule.threshold_value * 60)
 
             try:
-                rows = conn.execute("""
-                    SELECT r.id, r.hostname,
-                           MAX(bs.sampled_at) as last_seen
-                    FROM remote r
-                    LEFT JOIN bandwidth_sample bs
-                        ON bs.entity_type = 'remote' AND bs.entity_id = r.id
-                    GROUP BY r.id
-                    HAVING last_seen IS NULL OR last_seen < ?
-                """, (threshold_time.isoformat(),)).fetchall()
+                last_seen = {sample['entity_id']: sample['sampled_at'] for sample in latest_rows(conn)
+                             if sample['entity_type'] == 'remote'}
+                rows = [
+                    {'id': remote['id'], 'hostname': remote['hostname'], 'last_seen': last_seen.get(remote['id'])}
+                    for remote in conn.execute("SELECT id, hostname FROM remote ORDER BY id")
+                ]
 
                 for row in rows:
+                    if row['last_seen'] is not None and row['last_seen'] >= threshold_time:
+                        continue
                     alerts.append(AlertEvent(
                         id=None,
                         rule_id=rule.id,
@@ -440,7 +443,8 @@ def _check_peer_offline(self, rule: AlertRule) -> List[AlertEvent]:
                         entity_id=row['id'],
                         entity_name=row['hostname'],
                         message=f"Peer '{row['hostname']}' has not been seen in {rule.threshold_value} minutes",
-                        details={"last_seen": row['last_seen']},
+                        details={"last_seen": datetime.utcfromtimestamp(row['last_seen']).isoformat()
+                                 if row['last_seen'] is not None else None},
                         triggered_at=datetime.now(),
                         resolved_at=None,
                         acknowledged=False,
@@ -625,26 +629,27 @@ def _check_bandwidth_spike(self, rule: AlertRule) -> List[AlertEvent]:
 
         try:
             try:
-                # Compare recent bandwidth against baseline
+                # Compare the last 24 hours against the average day
+                cutoff = (datetime.utcnow() - timedelta(hours=24)).isoformat()
                 rows = conn.execute("""
                     SELECT
                         ba.entity_type, ba.entity_id,
-                        SUM(ba.bytes_received + ba.bytes_sent) as recent_total,
-                        bb.baseline_bytes
+                        SUM(ba.total_rx_bytes + ba.total_tx_bytes) as recent_total,
+                        bb.avg_daily_bytes as baseline_bytes
                     FROM bandwidth_aggregate ba
                     LEFT JOIN bandwidth_baseline bb
                         ON bb.entity_type = ba.entity_type
                         AND bb.entity_id = ba.entity_id
                     WHERE ba.period_type = 'hourly'
-                    AND ba.period_start > datetime('now', '-24 hours')
+                    AND ba.period_start > ?
                     GROUP BY ba.entity_type, ba.entity_id
-                    HAVING bb.baseline_bytes IS NOT NULL
-                        AND recent_total > bb.baseline_bytes * ?
-                """, (rule.threshold_value / 100.0,)).fetchall()
+                    HAVING baseline_bytes > 0
+                        AND recent_total > baseline_bytes * ?
+                """, (cutoff, rule.threshold_value / 100.0)).fetchall()
 
+                names = entity_names(conn)
                 for row in rows:
-                    # Get entity name
-                    entity_name = self._get_entity_name(conn, row['entity_type'], row['entity_id'])
+                    entity_name = self._get_entity_name(names, row['entity_type'], row['entity_id'])
                     spike_percent = int((row['recent_total'] / row['baseline_bytes']) * 100)
 
                     alerts.append(AlertEvent(
@@ -675,20 +680,9 @@ def _check_bandwidth_spike(self, rule: AlertRule) -> List[AlertEvent]:
 
         return alerts
 
-    def _get_entity_name(self, conn, entity_type: str, entity_id: int) -> str:
+    def _get_entity_name(self, names: EntityNames, entity_type: str, entity_id: int) -> str:
         """Get entity hostname."""
-        table_map = {
-            'cs': 'coordination_server',
-            'sr': 'subnet_router',
-            'remote': 'remote',
-            'exit_node': 'exit_node',
-        }
-        table = table_map.get(entity_type)
-        if table:
-            row = conn.execute(f"SELECT hostname FROM {table} WHERE id = ?", (entity_id,)).fetchone()
-            if row:
-                return row['hostname']
-        return f"{entity_type}-{entity_id}"
+        return names.name(entity_type, entity_id) or f"{entity_type}-{entity_id}"
 
     def _check_cooldown(self, rule: AlertRule, alert: AlertEvent) -> bool:
         """Check if alert is within cooldown period."""
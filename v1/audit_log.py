@@ -46,6 +46,9 @@
 from typing import Optional, List, Dict, Any, Tuple
 from dataclasses import dataclass, asdict
 
+from v1.db_pool import get_connection
+from v1.migrations import ensure_schema
+
 logger = logging.getLogger(__name__)
 
 
@@ -147,6 +150,91 @@ class AuditEntry:
     client_version: str
 
 
+def create_audit_schema(cursor):
+    """Migration 4: audit log with hash chain and Merkle checkpoints"""
+    # Main audit log table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY,
+
+            -- What happened
+            event_type TEXT NOT NULL,
+            event_category TEXT NOT NULL,
+            severity TEXT NOT NULL,
+
+            -- Who/what it affected
+            entity_type TEXT,
+            entity_id INTEGER,
+            entity_permanent_guid TEXT,
+
+            -- Who did it
+            operator TEXT NOT NULL,
+            operator_ip TEXT,
+            operator_source TEXT NOT NULL,
+
+            -- Details
+            details TEXT NOT NULL,
+
+            -- When
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            -- Cryptographic integrity (hash chain)
+            entry_hash TEXT NOT NULL,
+            previous_hash TEXT,
+
+            -- Merkle tree positioning
+            merkle_root TEXT,
+            merkle_tree_index INTEGER,
+
+            -- Metadata
+            client_version TEXT NOT NULL,
+            schema_version INTEGER DEFAULT 1
+        )
+    """)
+
+    # Merkle tree checkpoints
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS audit_checkpoint (
+            id INTEGER PRIMARY KEY,
+            start_entry_id INTEGER NOT NULL,
+            end_entry_id INTEGER NOT NULL,
+            entry_count INTEGER NOT NULL,
+            merkle_root TEXT NOT NULL,
+            checkpoint_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (start_entry_id) REFERENCES audit_log(id),
+            FOREIGN KEY (end_entry_id) REFERENCES audit_log(id)
+        )
+    """)
+
+    # Indexes for efficient queries
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_timestamp
+        ON audit_log(timestamp DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_entity
+        ON audit_log(entity_type, entity_id, timestamp DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_operator
+        ON audit_log(operator, timestamp DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_category
+        ON audit_log(event_category, severity, timestamp DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_guid
+        ON audit_log(entity_permanent_guid, timestamp DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_event_type
+        ON audit_log(event_type, timestamp DESC)
+    """)
+
+    logger.debug("Audit log schema initialized")
+
+
 class AuditLogger:
     """
     Tamper-evident audit logging with hash chain integrity.
@@ -165,106 +253,11 @@ class AuditLogger:
 
     def __init__(self, db_path: Path | str):
         self.db_path = Path(db_path) if isinstance(db_path, str) else db_path
-        self._init_schema()
+        ensure_schema(self.db_path)
 
     def _get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
-
-    def _init_schema(self):
-        """Initialize audit log schema"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        try:
-            # Main audit log table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS audit_log (
-                    id INTEGER PRIMARY KEY,
-
-                    -- What happened
-                    event_type TEXT NOT NULL,
-                    event_category TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-
-                    -- Who/what it affected
-                    entity_type TEXT,
-                    entity_id INTEGER,
-                    entity_permanent_guid TEXT,
-
-                    -- Who did it
-                    operator TEXT NOT NULL,
-                    operator_ip TEXT,
-                    operator_source TEXT NOT NULL,
-
-                    -- Details
-                    details TEXT NOT NULL,
-
-                    -- When
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                    -- Cryptographic integrity (hash chain)
-                    entry_hash TEXT NOT NULL,
-                    previous_hash TEXT,
-
-                    -- Merkle tree positioning
-                    merkle_root TEXT,
-                    merkle_tree_index INTEGER,
-
-                    -- Metadata
-                    client_version TEXT NOT NULL,
-                    schema_version INTEGER DEFAULT 1
-                )
-            """)
-
-            # Merkle tree checkpoints
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS audit_checkpoint (
-                    id INTEGER PRIMARY KEY,
-                    start_entry_id INTEGER NOT NULL,
-                    end_entry_id INTEGER NOT NULL,
-                    entry_count INTEGER NOT NULL,
-                    merkle_root TEXT NOT NULL,
-                    checkpoint_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (start_entry_id) REFERENCES audit_log(id),
-                    FOREIGN KEY (end_entry_id) REFERENCES audit_log(id)
-                )
-            """)
-
-            # Indexes for efficient queries
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_audit_timestamp
-                ON audit_log(timestamp DESC)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_audit_entity
-                ON audit_log(entity_type, entity_id, timestamp DESC)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_audit_operator
-                ON audit_log(operator, timestamp DESC)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_audit_category
-                ON audit_log(event_category, severity, timestamp DESC)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_audit_guid
-                ON audit_log(entity_permanent_guid, timestamp DESC)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_audit_event_type
-                ON audit_log(event_type, timestamp DESC)
-            """)
-
-            conn.commit()
-            logger.debug("Audit log schema initialized")
-
-        finally:
-            conn.close()
+        """Get pooled database connection (close() returns it to the pool)"""
+        return get_connection(self.db_path)
 
     def _compute_entry_hash(
         self,
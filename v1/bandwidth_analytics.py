@@ -0,0 +1,319 @@
+"""
+Bandwidth Analytics - Rates, Peaks, Percentiles and Baselines per Peer
+
+Reads each peer's samples as columns (sampled_at, rx, tx, connected) and
+computes everything in array operations rather than per-pair Python loops:
+
+- Counter-reset-aware deltas: a counter that went backwards (interface
+  restart) contributes its new value
+- Per-interval rates, peak and 95th percentile rates
+- Daily traffic (rx + tx per UTC day, silent days counted as 0) with its
+  mean, standard deviation and 95th percentile
+
+update_baselines() fills bandwidth_baseline for every peer in one pass
+over the sample table, which is what the bandwidth spike alert compares
+against.
+
+Samples are read a few peers at a time (each day partition is clustered
+by entity, so a chunk is one range scan per day in the window, merged in
+order) to bound memory at any history length. NumPy is optional: without
+it the same figures are computed in pure Python, only slower.
+
+Usage:
+    from v1.bandwidth_analytics import analyze, update_baselines
+
+    for stats in analyze(conn, since=epoch_start):
+        print(stats.entity_id, stats.peak_rx_rate, stats.p95_daily_bytes)
+
+    update_baselines(conn, days=30)
+"""
+
+import itertools
+import math
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.bandwidth_partitions import COLUMNS, partitions, union_all
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+DAY = 86400
+
+# Peers read per query; ~43k rows each for 30 days of one-minute samples
+ENTITY_CHUNK = 25
+
+
+@dataclass
+class EntityStats:
+    """Traffic figures of one peer over the analyzed window"""
+    entity_type: str
+    entity_id: int
+    entity_guid: str
+    samples: int
+    connected_samples: int
+    rx_bytes: int                   # reset-aware totals
+    tx_bytes: int
+    counter_resets: int
+    peak_rx_rate: float             # bytes/second between consecutive samples
+    peak_tx_rate: float
+    p95_rx_rate: float
+    p95_tx_rate: float
+    days: int                       # UTC days from first to last sample
+    avg_daily_bytes: float          # rx + tx
+    stddev_daily_bytes: float
+    p95_daily_bytes: float
+
+
+# =============================================================================
+# LOADING
+# =============================================================================
+
+def _entities(conn) -> List[Tuple[int, str, int, str]]:
+    return [tuple(row) for row in conn.execute(
+        "SELECT id, entity_type, entity_id, entity_permanent_guid FROM bandwidth_entity ORDER BY id")]
+
+
+def _chunks(conn, since: int, until: int, chunk: int) -> Iterator[Tuple[list, Iterator[tuple]]]:
+    """
+    (entities, rows ordered by entity and time) for a few entities at a time.
+
+    Each entity's rows start with its last sample before `since` from the
+    preceding day, if any: the seed the first delta in the window is taken
+    from.
+    """
+    window = partitions(conn, since, until)
+    seeds = partitions(conn, since - DAY, since)
+    if not window:
+        return
+
+    # One arm per day partition, each already in (entity, time) order:
+    # SQLite merges the arms instead of sorting
+    arms = []
+    if seeds:
+        seed_source = union_all([f"SELECT {COLUMNS} FROM {name}" for name in seeds])
+        arms.append(f"""
+            SELECT entity, MAX(sampled_at), rx_bytes, tx_bytes, connected
+            FROM ({seed_source})
+            WHERE entity BETWEEN :low AND :high AND sampled_at < :since
+            GROUP BY entity""")
+    for name in window:
+        arms.append(f"""
+            SELECT entity, sampled_at, rx_bytes, tx_bytes, connected
+            FROM {name}
+            WHERE entity BETWEEN :low AND :high AND sampled_at >= :since AND sampled_at < :until""")
+    query = union_all(arms) + " ORDER BY 1, 2"
+
+    entities = _entities(conn)
+    for i in range(0, len(entities), chunk):
+        group = entities[i:i + chunk]
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, {'low': group[0][0], 'high': group[-1][0], 'since': since, 'until': until})
+        yield group, cursor
+
+
+# =============================================================================
+# NUMPY
+# =============================================================================
+
+def _segment_percentile(values, segments, count: int, q: float):
+    """Percentile of values per segment id; segments ascending (NaN for empty segments)"""
+    result = np.full(count, np.nan)
+    bounds = np.searchsorted(segments, np.arange(count + 1))
+    for i in np.flatnonzero(bounds[1:] > bounds[:-1]):
+        # np.percentile partitions rather than sorts each peer's rates
+        result[i] = np.percentile(values[bounds[i]:bounds[i + 1]], q)
+    return result
+
+
+def _analyze_numpy(group: list, rows: Iterator[tuple], since: int) -> List[EntityStats]:
+    data = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64)
+    if data.size == 0:
+        return []
+    data = data.reshape(-1, 5)
+    entity, t, rx, tx, connected = data.T
+    inside = t >= since          # False only for seed rows
+
+    starts = np.flatnonzero(np.concatenate(([True], entity[1:] != entity[:-1])))
+    count = starts.size
+    segment = np.repeat(np.arange(count), np.diff(np.concatenate((starts, [entity.size]))))
+
+    # Delta of each sample from the previous one of the same entity (0 at a segment start)
+    first = np.zeros(entity.size, dtype=bool)
+    first[starts] = True
+    drx = np.diff(rx, prepend=0)
+    dtx = np.diff(tx, prepend=0)
+    reset_rx = (drx < 0) & ~first
+    reset_tx = (dtx < 0) & ~first
+    drx = np.where(reset_rx, rx, drx)
+    dtx = np.where(reset_tx, tx, dtx)
+    drx[first] = 0
+    dtx[first] = 0
+
+    dt = np.diff(t, prepend=0)
+    timed = ~first & (dt > 0)
+    rate_rx = drx[timed] / dt[timed]
+    rate_tx = dtx[timed] / dt[timed]
+    rated = segment[timed]
+    peak_rx = np.zeros(count)
+    peak_tx = np.zeros(count)
+    np.maximum.at(peak_rx, rated, rate_rx)
+    np.maximum.at(peak_tx, rated, rate_tx)
+    p95_rx = _segment_percentile(rate_rx, rated, count, 95)
+    p95_tx = _segment_percentile(rate_tx, rated, count, 95)
+
+    # Daily traffic as an entities x days matrix, days counted from each entity's first
+    day = np.maximum(t, since) // DAY
+    first_day = day[starts]
+    span = (day[np.concatenate((starts[1:], [entity.size])) - 1] - first_day) + 1
+    width = int(span.max())
+    daily = np.bincount(segment * width + (day - first_day[segment]),
+                        weights=(drx + dtx).astype(np.float64),
+                        minlength=count * width).reshape(count, width)
+    daily[np.arange(width) >= span[:, None]] = np.nan
+    avg_daily = np.nanmean(daily, axis=1)
+    std_daily = np.nanstd(daily, axis=1)
+    p95_daily = np.nanpercentile(daily, 95, axis=1)
+
+    totals_rx = np.add.reduceat(drx, starts)
+    totals_tx = np.add.reduceat(dtx, starts)
+    resets = np.add.reduceat((reset_rx | reset_tx).astype(np.int64), starts)
+    connected_samples = np.add.reduceat(connected * inside, starts)
+    sizes = np.add.reduceat(inside.astype(np.int64), starts)
+
+    info = {e[0]: e for e in group}
+    return [
+        EntityStats(
+            entity_type=info[key][1], entity_id=info[key][2], entity_guid=info[key][3],
+            samples=int(sizes[i]), connected_samples=int(connected_samples[i]),
+            rx_bytes=int(totals_rx[i]), tx_bytes=int(totals_tx[i]), counter_resets=int(resets[i]),
+            peak_rx_rate=float(peak_rx[i]), peak_tx_rate=float(peak_tx[i]),
+            p95_rx_rate=0.0 if math.isnan(p95_rx[i]) else float(p95_rx[i]),
+            p95_tx_rate=0.0 if math.isnan(p95_tx[i]) else float(p95_tx[i]),
+            days=int(span[i]), avg_daily_bytes=float(avg_daily[i]),
+            stddev_daily_bytes=float(std_daily[i]), p95_daily_bytes=float(p95_daily[i]),
+        )
+        for i, key in enumerate(entity[starts].tolist())
+        if sizes[i]         # only a seed: no samples in the window
+    ]
+
+
+# =============================================================================
+# PURE PYTHON
+# =============================================================================
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    """numpy.percentile's default (linear) interpolation"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100.0
+    low, high = math.floor(position), math.ceil(position)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def _analyze_python(group: list, rows: Iterator[tuple], since: int) -> List[EntityStats]:
+    info = {e[0]: e for e in group}
+    results = []
+    for key, samples in itertools.groupby(rows, key=lambda row: row[0]):
+        samples = list(samples)
+        window = [s for s in samples if s[1] >= since]
+        if not window:
+            continue
+        rx_total = tx_total = resets = 0
+        rates_rx, rates_tx = [], []
+        first_day = max(samples[0][1], since) // DAY
+        daily = [0.0] * (samples[-1][1] // DAY - first_day + 1)
+        for (_, t0, rx0, tx0, _), (_, t1, rx1, tx1, _) in zip(samples, samples[1:]):
+            drx = rx1 - rx0 if rx1 >= rx0 else rx1
+            dtx = tx1 - tx0 if tx1 >= tx0 else tx1
+            resets += rx1 < rx0 or tx1 < tx0
+            rx_total += drx
+            tx_total += dtx
+            daily[t1 // DAY - first_day] += drx + dtx
+            if t1 > t0:
+                rates_rx.append(drx / (t1 - t0))
+                rates_tx.append(dtx / (t1 - t0))
+        mean = sum(daily) / len(daily)
+        results.append(EntityStats(
+            entity_type=info[key][1], entity_id=info[key][2], entity_guid=info[key][3],
+            samples=len(window), connected_samples=sum(s[4] for s in window),
+            rx_bytes=rx_total, tx_bytes=tx_total, counter_resets=resets,
+            peak_rx_rate=max(rates_rx, default=0.0), peak_tx_rate=max(rates_tx, default=0.0),
+            p95_rx_rate=_percentile(rates_rx, 95), p95_tx_rate=_percentile(rates_tx, 95),
+            days=len(daily), avg_daily_bytes=mean,
+            stddev_daily_bytes=math.sqrt(sum((d - mean) ** 2 for d in daily) / len(daily)),
+            p95_daily_bytes=_percentile(daily, 95),
+        ))
+    return results
+
+
+# =============================================================================
+# API
+# =============================================================================
+
+def analyze(conn: sqlite3.Connection, since: int = 0, until: Optional[int] = None,
+            chunk: int = ENTITY_CHUNK, use_numpy: Optional[bool] = None) -> List[EntityStats]:
+    """
+    Traffic figures for every peer with samples in [since, until).
+
+    The first delta in the window is taken from the sample just before it,
+    so traffic across the window start is not lost.
+
+    Args:
+        conn: Open connection to the main database
+        since: Window start, Unix epoch seconds
+        until: Window end, Unix epoch seconds (default: no limit)
+        chunk: Peers read per query
+        use_numpy: Force the NumPy (True) or pure Python (False) path
+
+    Returns:
+        EntityStats in bandwidth_entity order
+    """
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    elif use_numpy and not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy is not installed (pip install numpy)")
+    compute = _analyze_numpy if use_numpy else _analyze_python
+
+    results = []
+    for group, rows in _chunks(conn, since, until if until is not None else 2 ** 62, chunk):
+        results.extend(compute(group, rows, since))
+    return results
+
+
+def update_baselines(conn: sqlite3.Connection, days: int = 30, now: Optional[float] = None) -> int:
+    """
+    Recompute bandwidth_baseline for every peer from its last `days`
+    complete UTC days of samples.
+
+    Returns:
+        Number of baselines written
+    """
+    today = int(now if now is not None else time.time()) // DAY * DAY
+    stats = analyze(conn, since=today - days * DAY, until=today)
+    conn.executemany("""
+        INSERT OR REPLACE INTO bandwidth_baseline (
+            entity_type, entity_id, entity_permanent_guid,
+            avg_daily_bytes, stddev_daily_bytes, p95_daily_bytes,
+            computed_at, samples_count
+        ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+    """, [
+        (s.entity_type, s.entity_id, s.entity_guid,
+         round(s.avg_daily_bytes), round(s.stddev_daily_bytes), round(s.p95_daily_bytes),
+         s.samples)
+        for s in stats
+    ])
+    conn.commit()
+    return len(stats)
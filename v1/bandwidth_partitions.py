@@ -0,0 +1,208 @@
+"""
+Bandwidth Partitions - One Sample Table per UTC Day
+
+Raw samples are the only unbounded table in the database. Retention used
+to be a `DELETE ... WHERE sampled_at < ?` over millions of rows, holding
+the write lock for the whole delete (collection and the Prometheus
+exporter stall behind it) and leaving the file fragmented.
+
+Samples now live in one table per UTC day, `bandwidth_sample_YYYYMMDD`,
+each with the compact layout (WITHOUT ROWID, clustered by entity and
+time). `bandwidth_partition` lists them, and `bandwidth_sample` is a
+UNION ALL view over all of them for ad-hoc reads.
+
+- Writes go straight to the day's partition, created on first use
+- Retention drops whole partitions: DROP TABLE frees the day's pages in
+  one short transaction, and later partitions reuse them
+- Windowed reads (reports, rollup, analytics) name only the partitions
+  overlapping the window instead of going through the view
+- SQLite rejects a compound SELECT of more than 500 terms, so unions over
+  many partitions (the view after 500 days of retention, long windows)
+  are built by union_all(), which nests them in groups of COMPOUND_LIMIT
+
+Usage:
+    from v1.bandwidth_partitions import partitions, sample_source
+
+    names = partitions(conn, since, until)          # oldest first
+    conn.execute(f"SELECT COUNT(*) FROM {sample_source(conn, since)}")
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.migrations import execute_script
+
+DAY = 86400
+
+# Terms per compound SELECT; SQLite's default maximum is 500
+COMPOUND_LIMIT = 400
+
+COLUMNS = "entity, sampled_at, rx_bytes, tx_bytes, latest_handshake, endpoint, connected"
+
+PARTITION_SCHEMA = """
+    -- Day partitions of the raw samples, oldest first by day
+    CREATE TABLE IF NOT EXISTS bandwidth_partition (
+        day INTEGER PRIMARY KEY,            -- Unix epoch seconds of 00:00 UTC
+        name TEXT NOT NULL UNIQUE
+    )
+"""
+
+PARTITION_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        entity INTEGER NOT NULL,          -- bandwidth_entity.id
+        sampled_at INTEGER NOT NULL,      -- Unix epoch seconds
+        rx_bytes INTEGER NOT NULL,        -- cumulative
+        tx_bytes INTEGER NOT NULL,        -- cumulative
+        latest_handshake INTEGER,         -- Unix epoch seconds, NULL = never
+        endpoint TEXT,
+        connected INTEGER NOT NULL,
+        PRIMARY KEY (entity, sampled_at)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS {name}_time ON {name}(sampled_at)
+"""
+
+# The view over no partitions: right columns, no rows
+EMPTY_SOURCE = ("SELECT NULL AS entity, NULL AS sampled_at, NULL AS rx_bytes, NULL AS tx_bytes, "
+                "NULL AS latest_handshake, NULL AS endpoint, NULL AS connected WHERE 0")
+
+
+def partition_name(day: int) -> str:
+    """bandwidth_sample_YYYYMMDD for the UTC day starting at `day`"""
+    return 'bandwidth_sample_' + time.strftime('%Y%m%d', time.gmtime(day))
+
+
+def _registered(conn) -> Dict[int, str]:
+    return {row[0]: row[1] for row in conn.execute("SELECT day, name FROM bandwidth_partition ORDER BY day")}
+
+
+def union_all(selects: List[str]) -> str:
+    """
+    UNION ALL of `selects`, nested in subqueries so that no compound SELECT
+    has more than COMPOUND_LIMIT terms.
+    """
+    while len(selects) > COMPOUND_LIMIT:
+        selects = [f"SELECT * FROM ({' UNION ALL '.join(selects[i:i + COMPOUND_LIMIT])})"
+                   for i in range(0, len(selects), COMPOUND_LIMIT)]
+    return " UNION ALL ".join(selects)
+
+
+def rebuild_view(conn):
+    """Recreate bandwidth_sample as the UNION ALL of every partition"""
+    names = list(_registered(conn).values())
+    body = union_all([f"SELECT {COLUMNS} FROM {name}" for name in names]) or EMPTY_SOURCE
+    conn.execute("DROP VIEW IF EXISTS bandwidth_sample")
+    conn.execute(f"CREATE VIEW bandwidth_sample AS\n{body}")
+
+
+def ensure_partitions(conn, epochs: Iterable[int]) -> Dict[int, str]:
+    """
+    Partitions for the days holding `epochs`, creating missing ones inside
+    the caller's transaction.
+
+    Returns:
+        day -> partition name
+    """
+    days = {epoch - epoch % DAY for epoch in set(epochs)}
+    known = _registered(conn)
+    missing = sorted(days - known.keys())
+    for day in missing:
+        name = partition_name(day)
+        # The INSERT opens the transaction the DDL then joins
+        conn.execute("INSERT OR IGNORE INTO bandwidth_partition (day, name) VALUES (?, ?)", (day, name))
+        execute_script(conn, PARTITION_TABLE.format(name=name))
+        known[day] = name
+    if missing:
+        rebuild_view(conn)
+    return {day: known[day] for day in days}
+
+
+def partitions(conn, since: Optional[int] = None, until: Optional[int] = None) -> List[str]:
+    """Names of the partitions overlapping [since, until), oldest first"""
+    lower = since - since % DAY if since is not None else -2 ** 62
+    upper = until if until is not None else 2 ** 62
+    return [row[0] for row in conn.execute(
+        "SELECT name FROM bandwidth_partition WHERE day >= ? AND day < ? ORDER BY day", (lower, upper))]
+
+
+def sample_source(conn, since: Optional[int] = None, until: Optional[int] = None) -> str:
+    """
+    FROM-clause source with the samples of the partitions overlapping
+    [since, until); the caller still filters on sampled_at.
+    """
+    names = partitions(conn, since, until)
+    if len(names) == 1:
+        return names[0]
+    body = union_all([f"SELECT {COLUMNS} FROM {name}" for name in names]) or EMPTY_SOURCE
+    return f"({body})"
+
+
+def latest_rows(conn) -> list:
+    """
+    Newest sample of every entity, with its entity_type, entity_id and
+    entity_permanent_guid.
+
+    Partitions are searched newest first and the search stops once every
+    entity is found; each partition lookup is one key seek per entity.
+    """
+    total = conn.execute("SELECT COUNT(*) FROM bandwidth_entity").fetchone()[0]
+    found = {}
+    for name in reversed(partitions(conn)):
+        for row in conn.execute(f"""
+            SELECT e.entity_type, e.entity_id, e.entity_permanent_guid, s.*
+            FROM bandwidth_entity e
+            JOIN {name} s
+                ON s.entity = e.id
+               AND s.sampled_at = (SELECT MAX(sampled_at) FROM {name} WHERE entity = e.id)
+        """):
+            found.setdefault(row['entity'], row)
+        if len(found) == total:
+            break
+    return list(found.values())
+
+
+def drop_partitions_before(conn, cutoff: int) -> int:
+    """
+    Drop every partition whose whole day ends at or before `cutoff`
+    (epoch seconds); the caller commits.
+
+    Returns:
+        Number of partitions dropped
+    """
+    old = partitions(conn, until=cutoff - DAY + 1)
+    if not old:
+        return 0
+    for name in old:
+        conn.execute("DELETE FROM bandwidth_partition WHERE name = ?", (name,))
+        conn.execute(f"DROP TABLE IF EXISTS {name}")
+    rebuild_view(conn)
+    return len(old)
+
+
+def partition_samples(cursor):
+    """Migration 14: split bandwidth_sample into day partitions behind a view"""
+    execute_script(cursor, PARTITION_SCHEMA)
+    kind = cursor.execute("SELECT type FROM sqlite_master WHERE name = 'bandwidth_sample'").fetchone()
+    if kind is None or kind[0] != 'table':
+        # Already partitioned (baseline re-run on an adopted database)
+        rebuild_view(cursor)
+        return
+
+    # The view takes over the name; copy out of the old table day by day
+    cursor.execute("DROP INDEX IF EXISTS idx_bandwidth_sample_time")
+    cursor.execute("ALTER TABLE bandwidth_sample RENAME TO bandwidth_sample_unpartitioned")
+    rebuild_view(cursor)
+    days = [row[0] for row in cursor.execute(
+        "SELECT DISTINCT sampled_at - sampled_at % 86400 FROM bandwidth_sample_unpartitioned").fetchall()]
+    for day, name in sorted(ensure_partitions(cursor, days).items()):
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO {name} ({COLUMNS})
+            SELECT {COLUMNS} FROM bandwidth_sample_unpartitioned
+            WHERE sampled_at >= ? AND sampled_at < ?
+            ORDER BY entity, sampled_at
+        """, (day, day + DAY))
+    cursor.execute("DROP TABLE bandwidth_sample_unpartitioned")
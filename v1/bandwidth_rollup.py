@@ -0,0 +1,319 @@
+"""
+Bandwidth Rollup - Incremental, Watermark-Driven Aggregation
+
+compute_aggregates() used to rescan the raw samples of exactly the
+previous hour/day/week/month on every run, so a missed cron run left a
+permanent gap, and daily/weekly/monthly figures re-read days of raw rows.
+
+rollup() instead:
+- Folds only samples newer than the hourly watermark into running hourly
+  buckets. Each sample contributes its delta from the entity's previous
+  sample (kept in bandwidth_rollup_cursor, so deltas don't break at run or
+  bucket boundaries). A counter that went backwards (interface restart)
+  counts from zero.
+- Rebuilds daily from hourly, weekly from daily and monthly from daily
+  aggregates (weeks straddle months, so months are summed from days).
+  Each level recomputes only from the parent period its watermark points
+  at - the one still open at the previous run.
+- Backfills by construction: with no watermark a level starts from the
+  oldest sample or child aggregate, and after missed runs it catches up
+  on every period since.
+
+Watermarks live in bandwidth_rollup (epoch seconds). Aggregate rows keep
+the existing bandwidth_aggregate layout (ISO period bounds), with a
+connected_samples column so open buckets can be extended exactly.
+
+Usage:
+    from v1.bandwidth_rollup import rollup
+
+    conn = get_connection(db_path)
+    try:
+        written = rollup(conn)      # {'hourly': 12, 'daily': 3, ...}
+    finally:
+        conn.close()
+"""
+
+import itertools
+import sqlite3
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.bandwidth_partitions import partitions
+from v1.bandwidth_tracking import _epoch, _utc
+from v1.migrations import execute_script
+
+# Parent level -> level it is summed from
+CASCADE = [
+    ('daily', 'hourly'),
+    ('weekly', 'daily'),
+    ('monthly', 'daily'),
+]
+
+
+ROLLUP_SCHEMA = """
+    -- Per level: hourly = last raw sampled_at folded in; other levels =
+    -- start of the newest (possibly still open) period written
+    CREATE TABLE IF NOT EXISTS bandwidth_rollup (
+        period_type TEXT PRIMARY KEY,
+        watermark INTEGER NOT NULL          -- Unix epoch seconds
+    );
+
+    -- Last sample folded in per entity, for the delta to the next one
+    CREATE TABLE IF NOT EXISTS bandwidth_rollup_cursor (
+        entity INTEGER PRIMARY KEY,         -- bandwidth_entity.id
+        sampled_at INTEGER NOT NULL,
+        rx_bytes INTEGER NOT NULL,
+        tx_bytes INTEGER NOT NULL
+    );
+"""
+
+
+def create_rollup_schema(cursor):
+    """Migration 13: watermarks for incremental bandwidth aggregation"""
+    execute_script(cursor, ROLLUP_SCHEMA)
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(bandwidth_aggregate)").fetchall()]
+    if 'connected_samples' not in columns:
+        cursor.execute("ALTER TABLE bandwidth_aggregate ADD COLUMN connected_samples INTEGER")
+
+
+@dataclass
+class Bucket:
+    """Running totals of one entity over one period"""
+    entity_type: str
+    entity_id: int
+    guid: str
+    period_type: str
+    start: datetime
+    end: datetime
+    rx_bytes: int = 0
+    tx_bytes: int = 0
+    peak_rx_rate: int = 0
+    peak_tx_rate: int = 0
+    sample_count: int = 0
+    connected_samples: int = 0
+
+    def add(self, other: 'Bucket'):
+        self.rx_bytes += other.rx_bytes
+        self.tx_bytes += other.tx_bytes
+        self.peak_rx_rate = max(self.peak_rx_rate, other.peak_rx_rate)
+        self.peak_tx_rate = max(self.peak_tx_rate, other.peak_tx_rate)
+        self.sample_count += other.sample_count
+        self.connected_samples += other.connected_samples
+
+    def row(self) -> tuple:
+        """Values for the bandwidth_aggregate INSERT"""
+        seconds = (self.end - self.start).total_seconds()
+        availability = self.connected_samples / self.sample_count * 100 if self.sample_count else 0.0
+        uptime = int(seconds * availability / 100)
+        return (
+            self.entity_type, self.entity_id, self.guid,
+            self.period_type, self.start.isoformat(), self.end.isoformat(),
+            self.rx_bytes, self.tx_bytes,
+            self.peak_rx_rate, self.peak_tx_rate,
+            int(self.rx_bytes / seconds), int(self.tx_bytes / seconds),
+            uptime, int(seconds - uptime), round(availability, 1),
+            self.sample_count, self.connected_samples,
+        )
+
+
+def period_bounds(period_type: str, moment: datetime) -> Tuple[datetime, datetime]:
+    """(start, end) of the hourly/daily/weekly/monthly period containing moment (naive UTC)"""
+    if period_type == 'hourly':
+        start = moment.replace(minute=0, second=0, microsecond=0)
+        return start, start + timedelta(hours=1)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period_type == 'daily':
+        return day, day + timedelta(days=1)
+    if period_type == 'weekly':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(weeks=1)
+    start = day.replace(day=1)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+
+def _watermarks(conn) -> Dict[str, int]:
+    return {row[0]: row[1] for row in conn.execute("SELECT period_type, watermark FROM bandwidth_rollup")}
+
+
+def _bucket_from_row(row) -> Bucket:
+    connected = row['connected_samples']
+    if connected is None:
+        # Written by the old full-rescan compute_aggregates
+        connected = round(row['availability_percent'] * row['sample_count'] / 100)
+    return Bucket(
+        row['entity_type'], row['entity_id'], row['entity_permanent_guid'], row['period_type'],
+        datetime.fromisoformat(row['period_start']), datetime.fromisoformat(row['period_end']),
+        row['total_rx_bytes'], row['total_tx_bytes'],
+        row['peak_rx_rate'] or 0, row['peak_tx_rate'] or 0,
+        row['sample_count'], connected,
+    )
+
+
+def _write(conn, buckets: List[Bucket]):
+    conn.executemany("""
+        INSERT OR REPLACE INTO bandwidth_aggregate (
+            entity_type, entity_id, entity_permanent_guid,
+            period_type, period_start, period_end,
+            total_rx_bytes, total_tx_bytes,
+            peak_rx_rate, peak_tx_rate, avg_rx_rate, avg_tx_rate,
+            uptime_seconds, downtime_seconds, availability_percent,
+            sample_count, connected_samples
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [b.row() for b in buckets])
+
+
+def fold_samples(conn) -> int:
+    """
+    Fold samples newer than the hourly watermark into hourly aggregates.
+
+    Returns:
+        Number of hourly rows written
+    """
+    watermark = _watermarks(conn).get('hourly')
+    entities = {
+        row[0]: (row[1], row[2], row[3])
+        for row in conn.execute("SELECT id, entity_type, entity_id, entity_permanent_guid FROM bandwidth_entity")
+    }
+    last = {
+        row[0]: (row[1], row[2], row[3])
+        for row in conn.execute("SELECT entity, sampled_at, rx_bytes, tx_bytes FROM bandwidth_rollup_cursor")
+    }
+
+    since = watermark + 1 if watermark is not None else None
+    # Day partitions in order, each by entity and time: every entity's
+    # samples still arrive oldest first
+    rows = itertools.chain.from_iterable(
+        conn.execute(f"""
+            SELECT entity, sampled_at, rx_bytes, tx_bytes, connected
+            FROM {name}
+            WHERE sampled_at > ?
+            ORDER BY entity, sampled_at
+        """, (watermark if watermark is not None else -1,))
+        for name in partitions(conn, since=since)
+    )
+
+    buckets: Dict[Tuple[int, int], Bucket] = {}
+    newest = watermark
+    for entity, sampled_at, rx, tx, connected in rows:
+        hour = sampled_at - sampled_at % 3600
+        bucket = buckets.get((entity, hour))
+        if bucket is None:
+            entity_type, entity_id, guid = entities[entity]
+            start = _utc(hour)
+            bucket = buckets[(entity, hour)] = Bucket(entity_type, entity_id, guid, 'hourly',
+                                                      start, start + timedelta(hours=1))
+
+        previous = last.get(entity)
+        if previous is not None and sampled_at > previous[0]:
+            # A counter that went backwards was reset: count from zero
+            rx_delta = rx - previous[1] if rx >= previous[1] else rx
+            tx_delta = tx - previous[2] if tx >= previous[2] else tx
+            dt = sampled_at - previous[0]
+            bucket.rx_bytes += rx_delta
+            bucket.tx_bytes += tx_delta
+            bucket.peak_rx_rate = max(bucket.peak_rx_rate, rx_delta // dt)
+            bucket.peak_tx_rate = max(bucket.peak_tx_rate, tx_delta // dt)
+        bucket.sample_count += 1
+        bucket.connected_samples += connected
+        last[entity] = (sampled_at, rx, tx)
+        newest = sampled_at if newest is None else max(newest, sampled_at)
+
+    if not buckets:
+        return 0
+
+    # The hour holding the old watermark was written as an open bucket: extend it
+    if watermark is not None:
+        open_hour = watermark - watermark % 3600
+        existing = {
+            (row['entity_type'], row['entity_id']): _bucket_from_row(row)
+            for row in conn.execute("""
+                SELECT * FROM bandwidth_aggregate WHERE period_type = 'hourly' AND period_start = ?
+            """, (_utc(open_hour).isoformat(),))
+        }
+        for (entity, hour), bucket in buckets.items():
+            previous = existing.get((bucket.entity_type, bucket.entity_id)) if hour == open_hour else None
+            if previous is not None:
+                previous.add(bucket)
+                buckets[(entity, hour)] = previous
+
+    _write(conn, list(buckets.values()))
+    conn.executemany("""
+        INSERT OR REPLACE INTO bandwidth_rollup_cursor (entity, sampled_at, rx_bytes, tx_bytes)
+        VALUES (?, ?, ?, ?)
+    """, [(entity, *state) for entity, state in last.items()])
+    conn.execute("INSERT OR REPLACE INTO bandwidth_rollup (period_type, watermark) VALUES ('hourly', ?)",
+                 (newest,))
+    return len(buckets)
+
+
+def cascade(conn, period_type: str, child_type: str) -> int:
+    """
+    Rebuild period_type aggregates from child_type aggregates, starting at
+    the period its watermark points at (or the oldest child).
+
+    Returns:
+        Number of rows written
+    """
+    watermark = _watermarks(conn).get(period_type)
+    if watermark is None:
+        oldest = conn.execute("SELECT MIN(period_start) FROM bandwidth_aggregate WHERE period_type = ?",
+                              (child_type,)).fetchone()[0]
+        if oldest is None:
+            return 0
+        since = period_bounds(period_type, datetime.fromisoformat(oldest))[0]
+    else:
+        since = _utc(watermark)
+
+    parents: Dict[Tuple[str, int, datetime], Bucket] = {}
+    for row in conn.execute("""
+        SELECT * FROM bandwidth_aggregate
+        WHERE period_type = ? AND period_start >= ?
+        ORDER BY period_start
+    """, (child_type, since.isoformat())):
+        child = _bucket_from_row(row)
+        start, end = period_bounds(period_type, child.start)
+        key = (child.entity_type, child.entity_id, start)
+        parent = parents.get(key)
+        if parent is None:
+            parent = parents[key] = Bucket(child.entity_type, child.entity_id, child.guid,
+                                           period_type, start, end)
+        parent.add(child)
+
+    if not parents:
+        return 0
+    _write(conn, list(parents.values()))
+    newest = max(parent.start for parent in parents.values())
+    conn.execute("INSERT OR REPLACE INTO bandwidth_rollup (period_type, watermark) VALUES (?, ?)",
+                 (period_type, _epoch(newest)))
+    return len(parents)
+
+
+def rollup(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Bring every aggregate level up to date in one transaction.
+
+    Args:
+        conn: Open connection to the main database (sqlite3.Row factory)
+
+    Returns:
+        Rows written per period type
+    """
+    try:
+        written = {'hourly': fold_samples(conn)}
+        watermarks = _watermarks(conn)
+        for period_type, child_type in CASCADE:
+            if written[child_type] or period_type not in watermarks:
+                written[period_type] = cascade(conn, period_type, child_type)
+            else:
+                written[period_type] = 0        # nothing below changed
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return written
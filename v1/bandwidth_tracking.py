@@ -6,10 +6,16 @@
 
 Features:
 - Raw sample collection (5-second granularity)
-- Hourly/daily/weekly/monthly aggregation
-- Statistical baselines for anomaly detection
+- Hourly/daily/weekly/monthly aggregation (incremental, see bandwidth_rollup)
+- Statistical baselines for anomaly detection (vectorized, see bandwidth_analytics)
 - Per-entity and network-wide metrics
-- SSH-based remote collection
+- SSH-based remote collection (one shared `wg show all dump` snapshot, see wg_dump)
+- Compact sample storage: integer entity keys and epoch timestamps in a
+  WITHOUT ROWID table clustered by (entity, time); one transaction per sweep
+- One sample table per UTC day (see bandwidth_partitions): retention drops
+  whole days, windowed reads touch only the days they cover
+- Public keys and hostnames resolved from the shared entity cache (see
+  entity_names) instead of one lookup per row
 
 Collection Modes:
 1. Manual: Run `wg-friend bandwidth collect` to sample now
@@ -31,16 +37,24 @@
     top = tracker.get_top_consumers(days=7, limit=10)
 """
 
+import calendar
 import sqlite3
 import json
 import logging
-import subprocess
 import re
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple
 from dataclasses import dataclass, field
 
+from v1.bandwidth_partitions import (
+    drop_partitions_before, ensure_partitions, latest_rows, partitions, sample_source
+)
+from v1.db_pool import get_connection
+from v1.entity_names import EntityNames, entity_names
+from v1.migrations import ensure_schema, execute_script
+from v1.wg_dump import DEFAULT_MAX_AGE, get_snapshot
+
 logger = logging.getLogger(__name__)
 
 
@@ -78,101 +92,201 @@ class BandwidthAggregate:
     availability_pct: float
 
 
-@dataclass
-class PeerBandwidthInfo:
-    """Parsed output from wg show"""
-    public_key: str
-    endpoint: Optional[str]
-    allowed_ips: str
-    latest_handshake: Optional[datetime]
-    transfer_rx: int        # bytes received
-    transfer_tx: int        # bytes transmitted
+def create_bandwidth_schema(cursor):
+    """Migration 3: bandwidth samples, aggregates and baselines"""
+    # Raw bandwidth samples
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bandwidth_sample (
+            id INTEGER PRIMARY KEY,
+            entity_type TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            entity_permanent_guid TEXT NOT NULL,
+            sampled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            rx_bytes INTEGER NOT NULL,
+            tx_bytes INTEGER NOT NULL,
+            latest_handshake TIMESTAMP,
+            endpoint TEXT,
+            connected BOOLEAN NOT NULL
+        )
+    """)
+
+    # Aggregated bandwidth
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bandwidth_aggregate (
+            id INTEGER PRIMARY KEY,
+            entity_type TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            entity_permanent_guid TEXT NOT NULL,
+            period_type TEXT NOT NULL,
+            period_start TIMESTAMP NOT NULL,
+            period_end TIMESTAMP NOT NULL,
+            total_rx_bytes INTEGER NOT NULL,
+            total_tx_bytes INTEGER NOT NULL,
+            peak_rx_rate INTEGER,
+            peak_tx_rate INTEGER,
+            avg_rx_rate INTEGER,
+            avg_tx_rate INTEGER,
+            uptime_seconds INTEGER NOT NULL,
+            downtime_seconds INTEGER NOT NULL,
+            availability_percent REAL NOT NULL,
+            sample_count INTEGER NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(entity_type, entity_id, period_type, period_start)
+        )
+    """)
+
+    # Baseline statistics for anomaly detection
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bandwidth_baseline (
+            entity_type TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            entity_permanent_guid TEXT NOT NULL,
+            avg_daily_bytes INTEGER NOT NULL,
+            stddev_daily_bytes INTEGER NOT NULL,
+            p95_daily_bytes INTEGER NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            samples_count INTEGER NOT NULL,
+            PRIMARY KEY (entity_type, entity_id)
+        )
+    """)
 
+    # Indexes (the compact layout from migration 12 has its own)
+    if 'entity_type' in _sample_columns(cursor):
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_bandwidth_sample_entity
+            ON bandwidth_sample(entity_type, entity_id, sampled_at DESC)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_bandwidth_sample_time
+            ON bandwidth_sample(sampled_at)
+        """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_bandwidth_aggregate_entity
+        ON bandwidth_aggregate(entity_type, entity_id, period_type, period_start DESC)
+    """)
+
+    logger.debug("Bandwidth tracking schema initialized")
+
+
+def _sample_columns(cursor) -> List[str]:
+    return [row[1] for row in cursor.execute("PRAGMA table_info(bandwidth_sample)").fetchall()]
+
+
+COMPACT_SAMPLE_SCHEMA = """
+    -- Entity dictionary: samples carry a small integer instead of the type
+    -- string and the 44-char permanent GUID
+    CREATE TABLE IF NOT EXISTS bandwidth_entity (
+        id INTEGER PRIMARY KEY,
+        entity_type TEXT NOT NULL,
+        entity_id INTEGER NOT NULL,
+        entity_permanent_guid TEXT NOT NULL,
+        UNIQUE (entity_type, entity_id)
+    );
+
+    -- One row per entity per sweep, stored in (entity, time) order
+    CREATE TABLE bandwidth_sample_compact (
+        entity INTEGER NOT NULL,          -- bandwidth_entity.id
+        sampled_at INTEGER NOT NULL,      -- Unix epoch seconds
+        rx_bytes INTEGER NOT NULL,        -- cumulative
+        tx_bytes INTEGER NOT NULL,        -- cumulative
+        latest_handshake INTEGER,         -- Unix epoch seconds, NULL = never
+        endpoint TEXT,
+        connected INTEGER NOT NULL,
+        PRIMARY KEY (entity, sampled_at)
+    ) WITHOUT ROWID;
+
+    -- Existing samples: ISO text -> epoch (latest_handshake was local time)
+    INSERT OR IGNORE INTO bandwidth_entity (entity_type, entity_id, entity_permanent_guid)
+    SELECT entity_type, entity_id, entity_permanent_guid
+    FROM bandwidth_sample
+    ORDER BY id DESC;
+
+    INSERT OR REPLACE INTO bandwidth_sample_compact
+    SELECT e.id,
+           CAST(strftime('%s', s.sampled_at) AS INTEGER),
+           s.rx_bytes, s.tx_bytes,
+           CAST(strftime('%s', s.latest_handshake, 'utc') AS INTEGER),
+           s.endpoint,
+           s.connected
+    FROM bandwidth_sample s
+    JOIN bandwidth_entity e ON e.entity_type = s.entity_type AND e.entity_id = s.entity_id
+    WHERE s.sampled_at IS NOT NULL
+    ORDER BY s.id;
+
+    DROP INDEX IF EXISTS idx_bandwidth_sample_entity;
+    DROP INDEX IF EXISTS idx_bandwidth_sample_time;
+    DROP TABLE bandwidth_sample;
+    ALTER TABLE bandwidth_sample_compact RENAME TO bandwidth_sample;
+
+    -- Time-window reads and retention across all entities
+    CREATE INDEX idx_bandwidth_sample_time ON bandwidth_sample(sampled_at);
+"""
 
-def parse_wg_show_output(output: str) -> Dict[str, PeerBandwidthInfo]:
-    """
-    Parse output from `wg show wg0 dump` command.
 
-    Returns dict mapping public_key -> PeerBandwidthInfo
-    """
-    peers = {}
-
-    # wg show dump format:
-    # private_key public_key listen_port fwmark
-    # public_key preshared_key endpoint allowed_ips latest_handshake transfer_rx transfer_tx persistent_keepalive
-
-    lines = output.strip().split('\n')
-    if len(lines) < 2:
-        return peers
-
-    # Skip interface line (first line)
-    for line in lines[1:]:
-        parts = line.split('\t')
-        if len(parts) < 8:
-            continue
-
-        public_key = parts[0]
-        endpoint = parts[2] if parts[2] != '(none)' else None
-        allowed_ips = parts[3]
-
-        # Parse handshake timestamp (Unix epoch or 0)
-        handshake_ts = int(parts[4]) if parts[4] != '0' else None
-        latest_handshake = datetime.fromtimestamp(handshake_ts) if handshake_ts else None
-
-        # Transfer stats (bytes)
-        transfer_rx = int(parts[5])
-        transfer_tx = int(parts[6])
-
-        peers[public_key] = PeerBandwidthInfo(
-            public_key=public_key,
-            endpoint=endpoint,
-            allowed_ips=allowed_ips,
-            latest_handshake=latest_handshake,
-            transfer_rx=transfer_rx,
-            transfer_tx=transfer_tx
-        )
+def migrate_compact_samples(cursor):
+    """Migration 12: compact bandwidth samples (entity dictionary, epoch times, WITHOUT ROWID)"""
+    if 'entity' in _sample_columns(cursor):
+        return      # already compact (baseline re-run on an adopted database)
+    execute_script(cursor, COMPACT_SAMPLE_SCHEMA)
 
-    return peers
 
+def _epoch(moment: datetime) -> int:
+    """Naive UTC datetime -> Unix epoch seconds"""
+    return calendar.timegm(moment.utctimetuple())
 
-def run_wg_show(interface: str = 'wg0') -> str:
-    """Run wg show command locally"""
-    try:
-        result = subprocess.run(
-            ['wg', 'show', interface, 'dump'],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        return result.stdout
-    except subprocess.TimeoutExpired:
-        logger.error("wg show command timed out")
-        return ""
-    except FileNotFoundError:
-        logger.error("wg command not found")
-        return ""
-    except Exception as e:
-        logger.error(f"Failed to run wg show: {e}")
-        return ""
-
-
-def run_wg_show_remote(ssh_host: str, ssh_user: str = 'root', ssh_port: int = 22, interface: str = 'wg0') -> str:
-    """Run wg show command on remote host via SSH"""
-    try:
-        result = subprocess.run(
-            ['ssh', '-p', str(ssh_port), '-o', 'ConnectTimeout=5', '-o', 'BatchMode=yes',
-             f'{ssh_user}@{ssh_host}', f'wg show {interface} dump'],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        return result.stdout
-    except subprocess.TimeoutExpired:
-        logger.error(f"SSH to {ssh_host} timed out")
-        return ""
-    except Exception as e:
-        logger.error(f"Failed to run remote wg show on {ssh_host}: {e}")
-        return ""
+
+def _utc(epoch: int) -> datetime:
+    """Unix epoch seconds -> naive UTC datetime"""
+    return datetime(1970, 1, 1) + timedelta(seconds=epoch)
+
+
+def _entity_keys(conn, samples: List[BandwidthSample]) -> Dict[Tuple[str, int], int]:
+    """(entity_type, entity_id) -> bandwidth_entity.id, adding new entities"""
+    def load():
+        rows = conn.execute("SELECT id, entity_type, entity_id FROM bandwidth_entity").fetchall()
+        return {(row[1], row[2]): row[0] for row in rows}
+
+    keys = load()
+    missing = {(s.entity_type, s.entity_id): s.entity_guid for s in samples
+               if (s.entity_type, s.entity_id) not in keys}
+    if missing:
+        conn.executemany("""
+            INSERT OR IGNORE INTO bandwidth_entity (entity_type, entity_id, entity_permanent_guid)
+            VALUES (?, ?, ?)
+        """, [(etype, eid, guid) for (etype, eid), guid in missing.items()])
+        keys = load()
+    return keys
+
+
+def write_samples(conn, samples: List[BandwidthSample]):
+    """
+    Write one sweep with executemany into its day partition; the caller
+    commits.
+
+    A second sample for the same entity and second replaces the first.
+    """
+    if not samples:
+        return
+    keys = _entity_keys(conn, samples)
+    # A sweep shares one sampled_at: convert each distinct time once
+    epochs = {moment: _epoch(moment) for moment in {s.sampled_at for s in samples}}
+    by_day: Dict[int, list] = {}
+    for s in samples:
+        epoch = epochs[s.sampled_at]
+        by_day.setdefault(epoch - epoch % 86400, []).append((
+            keys[(s.entity_type, s.entity_id)],
+            epoch, s.rx_bytes, s.tx_bytes,
+            int(s.latest_handshake.timestamp()) if s.latest_handshake else None,
+            s.endpoint, int(s.connected)
+        ))
+    names = ensure_partitions(conn, by_day)
+    for day, rows in by_day.items():
+        conn.executemany(f"""
+            INSERT OR REPLACE INTO {names[day]} (
+                entity, sampled_at, rx_bytes, tx_bytes,
+                latest_handshake, endpoint, connected
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
 
 
 class BandwidthTracker:
@@ -190,138 +304,19 @@ class BandwidthTracker:
 
     def __init__(self, db_path: Path | str):
         self.db_path = Path(db_path) if isinstance(db_path, str) else db_path
-        self._init_schema()
+        ensure_schema(self.db_path)
 
     def _get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
-
-    def _init_schema(self):
-        """Initialize bandwidth tracking schema"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        try:
-            # Raw bandwidth samples
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS bandwidth_sample (
-                    id INTEGER PRIMARY KEY,
-                    entity_type TEXT NOT NULL,
-                    entity_id INTEGER NOT NULL,
-                    entity_permanent_guid TEXT NOT NULL,
-                    sampled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    rx_bytes INTEGER NOT NULL,
-                    tx_bytes INTEGER NOT NULL,
-                    latest_handshake TIMESTAMP,
-                    endpoint TEXT,
-                    connected BOOLEAN NOT NULL
-                )
-            """)
-
-            # Aggregated bandwidth
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS bandwidth_aggregate (
-                    id INTEGER PRIMARY KEY,
-                    entity_type TEXT NOT NULL,
-                    entity_id INTEGER NOT NULL,
-                    entity_permanent_guid TEXT NOT NULL,
-                    period_type TEXT NOT NULL,
-                    period_start TIMESTAMP NOT NULL,
-                    period_end TIMESTAMP NOT NULL,
-                    total_rx_bytes INTEGER NOT NULL,
-                    total_tx_bytes INTEGER NOT NULL,
-                    peak_rx_rate INTEGER,
-                    peak_tx_rate INTEGER,
-                    avg_rx_rate INTEGER,
-                    avg_tx_rate INTEGER,
-                    uptime_seconds INTEGER NOT NULL,
-                    downtime_seconds INTEGER NOT NULL,
-                    availability_percent REAL NOT NULL,
-                    sample_count INTEGER NOT NULL,
-                    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(entity_type, entity_id, period_type, period_start)
-                )
-            """)
-
-            # Baseline statistics for anomaly detection
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS bandwidth_baseline (
-                    entity_type TEXT NOT NULL,
-                    entity_id INTEGER NOT NULL,
-                    entity_permanent_guid TEXT NOT NULL,
-                    avg_daily_bytes INTEGER NOT NULL,
-                    stddev_daily_bytes INTEGER NOT NULL,
-                    p95_daily_bytes INTEGER NOT NULL,
-                    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    samples_count INTEGER NOT NULL,
-                    PRIMARY KEY (entity_type, entity_id)
-                )
-            """)
-
-            # Indexes
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_bandwidth_sample_entity
-                ON bandwidth_sample(entity_type, entity_id, sampled_at DESC)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_bandwidth_sample_time
-                ON bandwidth_sample(sampled_at)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_bandwidth_aggregate_entity
-                ON bandwidth_aggregate(entity_type, entity_id, period_type, period_start DESC)
-            """)
-
-            conn.commit()
-            logger.debug("Bandwidth tracking schema initialized")
-
-        finally:
-            conn.close()
-
-    def _get_entity_mapping(self, conn) -> Dict[str, Tuple[str, int, str, str]]:
-        """
-        Build mapping from public_key to entity info.
-
-        Returns dict: public_key -> (entity_type, entity_id, permanent_guid, hostname)
-        """
-        cursor = conn.cursor()
-        mapping = {}
-
-        # Map all entity types
-        tables = [
-            ('coordination_server', 'coordination_server'),
-            ('subnet_router', 'subnet_router'),
-            ('remote', 'remote'),
-            ('exit_node', 'exit_node')
-        ]
-
-        for table, entity_type in tables:
-            try:
-                cursor.execute(f"""
-                    SELECT id, current_public_key, permanent_guid, hostname
-                    FROM {table}
-                """)
-                for row in cursor.fetchall():
-                    mapping[row['current_public_key']] = (
-                        entity_type,
-                        row['id'],
-                        row['permanent_guid'],
-                        row['hostname'] or row['permanent_guid'][:16]
-                    )
-            except sqlite3.OperationalError:
-                continue  # Table might not exist
-
-        return mapping
+        """Get pooled database connection (close() returns it to the pool)"""
+        return get_connection(self.db_path)
 
     def collect_samples(
         self,
         ssh_host: Optional[str] = None,
         ssh_user: str = 'root',
         ssh_port: int = 22,
-        interface: str = 'wg0'
+        interface: str = 'wg0',
+        max_age: float = DEFAULT_MAX_AGE
     ) -> List[BandwidthSample]:
         """
         Collect bandwidth samples from wg show.
@@ -331,80 +326,58 @@ def collect_samples(
             ssh_user: SSH username
             ssh_port: SSH port
             interface: WireGuard interface name
+            max_age: Reuse a `wg show all dump` snapshot up to this many
+                seconds old (0 = always run wg)
 
         Returns:
             List of collected samples
         """
-        # Get wg show output
-        if ssh_host:
-            output = run_wg_show_remote(ssh_host, ssh_user, ssh_port, interface)
-        else:
-            output = run_wg_show(interface)
-
-        if not output:
+        snapshot = get_snapshot(ssh_host, ssh_user, ssh_port or 22, max_age=max_age)
+        if snapshot is None:
             logger.warning("No wg show output available")
             return []
 
-        # Parse output
-        peer_data = parse_wg_show_output(output)
+        peer_data = snapshot.by_key(interface)
 
         if not peer_data:
             logger.warning("No peers found in wg show output")
             return []
 
         conn = self._get_connection()
-        cursor = conn.cursor()
 
         try:
-            # Get entity mapping
-            entity_map = self._get_entity_mapping(conn)
+            # Public key -> entity, cached until an entity changes
+            names = entity_names(conn)
 
             samples = []
-            now = datetime.utcnow()
+            now = _utc(int(snapshot.taken_at))
 
             for public_key, info in peer_data.items():
                 # Look up entity
-                entity_info = entity_map.get(public_key)
-                if not entity_info:
+                identity = names.by_public_key(public_key)
+                if not identity:
                     logger.debug(f"Unknown public key: {public_key[:16]}...")
                     continue
 
-                entity_type, entity_id, guid, hostname = entity_info
+                # Connected: handshake within the last 3 minutes (compared
+                # in epoch seconds, independent of the local timezone)
+                connected = info.is_up(snapshot.taken_at)
+                latest_handshake = info.handshake_time
 
-                # Determine if connected (handshake within last 3 minutes)
-                connected = False
-                if info.latest_handshake:
-                    age = now - info.latest_handshake
-                    connected = age.total_seconds() < 180
-
-                sample = BandwidthSample(
-                    entity_type=entity_type,
-                    entity_id=entity_id,
-                    entity_guid=guid,
-                    hostname=hostname,
+                samples.append(BandwidthSample(
+                    entity_type=identity.entity_type,
+                    entity_id=identity.entity_id,
+                    entity_guid=identity.permanent_guid,
+                    hostname=identity.name,
                     sampled_at=now,
-                    rx_bytes=info.transfer_rx,
-                    tx_bytes=info.transfer_tx,
-                    latest_handshake=info.latest_handshake,
+                    rx_bytes=info.rx_bytes,
+                    tx_bytes=info.tx_bytes,
+                    latest_handshake=latest_handshake,
                     endpoint=info.endpoint,
                     connected=connected
-                )
-                samples.append(sample)
-
-                # Store sample
-                cursor.execute("""
-                    INSERT INTO bandwidth_sample (
-                        entity_type, entity_id, entity_permanent_guid,
-                        sampled_at, rx_bytes, tx_bytes,
-                        latest_handshake, endpoint, connected
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    entity_type, entity_id, guid,
-                    now.isoformat(), info.transfer_rx, info.transfer_tx,
-                    info.latest_handshake.isoformat() if info.latest_handshake else None,
-                    info.endpoint, connected
                 ))
 
+            write_samples(conn, samples)
             conn.commit()
             logger.info(f"Collected {len(samples)} bandwidth samples")
             return samples
@@ -412,36 +385,41 @@ def collect_samples(
         finally:
             conn.close()
 
+    def store_samples(self, samples: List[BandwidthSample]) -> int:
+        """
+        Store one sweep of samples in a single transaction.
+
+        Returns:
+            Number of samples written
+        """
+        conn = self._get_connection()
+        try:
+            write_samples(conn, samples)
+            conn.commit()
+            return len(samples)
+        finally:
+            conn.close()
+
     def get_latest_samples(self) -> List[BandwidthSample]:
         """Get most recent sample for each entity"""
         conn = self._get_connection()
-        cursor = conn.cursor()
 
         try:
-            cursor.execute("""
-                SELECT bs.*
-                FROM bandwidth_sample bs
-                INNER JOIN (
-                    SELECT entity_type, entity_id, MAX(sampled_at) as max_time
-                    FROM bandwidth_sample
-                    GROUP BY entity_type, entity_id
-                ) latest ON bs.entity_type = latest.entity_type
-                           AND bs.entity_id = latest.entity_id
-                           AND bs.sampled_at = latest.max_time
-                ORDER BY bs.rx_bytes + bs.tx_bytes DESC
-            """)
+            # Newest day partitions first; one key seek per entity each
+            rows = sorted(latest_rows(conn), key=lambda row: row['rx_bytes'] + row['tx_bytes'], reverse=True)
+            names = entity_names(conn)
 
             samples = []
-            for row in cursor.fetchall():
+            for row in rows:
                 samples.append(BandwidthSample(
                     entity_type=row['entity_type'],
                     entity_id=row['entity_id'],
                     entity_guid=row['entity_permanent_guid'],
-                    hostname=self._get_hostname(cursor, row['entity_type'], row['entity_id']),
-                    sampled_at=datetime.fromisoformat(row['sampled_at']),
+                    hostname=self._get_hostname(names, row['entity_type'], row['entity_id']),
+                    sampled_at=_utc(row['sampled_at']),
                     rx_bytes=row['rx_bytes'],
                     tx_bytes=row['tx_bytes'],
-                    latest_handshake=datetime.fromisoformat(row['latest_handshake']) if row['latest_handshake'] else None,
+                    latest_handshake=datetime.fromtimestamp(row['latest_handshake']) if row['latest_handshake'] else None,
                     endpoint=row['endpoint'],
                     connected=bool(row['connected'])
                 ))
@@ -451,24 +429,9 @@ def get_latest_samples(self) -> List[BandwidthSample]:
         finally:
             conn.close()
 
-    def _get_hostname(self, cursor, entity_type: str, entity_id: int) -> str:
+    def _get_hostname(self, names: EntityNames, entity_type: str, entity_id: int) -> str:
         """Get hostname for entity"""
-        table_map = {
-            'coordination_server': 'coordination_server',
-            'subnet_router': 'subnet_router',
-            'remote': 'remote',
-            'exit_node': 'exit_node'
-        }
-        table = table_map.get(entity_type)
-        if not table:
-            return f"{entity_type}:{entity_id}"
-
-        try:
-            cursor.execute(f"SELECT hostname, permanent_guid FROM {table} WHERE id = ?", (entity_id,))
-            row = cursor.fetchone()
-            return row['hostname'] or row['permanent_guid'][:16] if row else f"{entity_type}:{entity_id}"
-        except:
-            return f"{entity_type}:{entity_id}"
+        return names.name(entity_type, entity_id) or f"{entity_type}:{entity_id}"
 
     def get_bandwidth_report(
         self,
@@ -486,35 +449,37 @@ def get_bandwidth_report(
         cursor = conn.cursor()
 
         try:
-            cutoff = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
+            cutoff = _epoch(datetime.utcnow() - timedelta(hours=hours))
 
-            # Build query
-            query = """
+            # Build query over the day partitions the window covers
+            query = f"""
                 SELECT
-                    entity_type, entity_id, entity_permanent_guid,
-                    MIN(sampled_at) as first_sample,
-                    MAX(sampled_at) as last_sample,
-                    MIN(rx_bytes) as min_rx,
-                    MAX(rx_bytes) as max_rx,
-                    MIN(tx_bytes) as min_tx,
-                    MAX(tx_bytes) as max_tx,
-                    SUM(connected) as connected_samples,
+                    e.entity_type, e.entity_id, e.entity_permanent_guid,
+                    MIN(bs.sampled_at) as first_sample,
+                    MAX(bs.sampled_at) as last_sample,
+                    MIN(bs.rx_bytes) as min_rx,
+                    MAX(bs.rx_bytes) as max_rx,
+                    MIN(bs.tx_bytes) as min_tx,
+                    MAX(bs.tx_bytes) as max_tx,
+                    SUM(bs.connected) as connected_samples,
                     COUNT(*) as total_samples
-                FROM bandwidth_sample
-                WHERE sampled_at >= ?
+                FROM {sample_source(conn, since=cutoff)} bs
+                JOIN bandwidth_entity e ON e.id = bs.entity
+                WHERE bs.sampled_at >= ?
             """
             params = [cutoff]
 
             if entity_type:
-                query += " AND entity_type = ?"
+                query += " AND e.entity_type = ?"
                 params.append(entity_type)
 
             if entity_id:
-                query += " AND entity_id = ?"
+                query += " AND e.entity_id = ?"
                 params.append(entity_id)
 
-            query += " GROUP BY entity_type, entity_id"
+            query += " GROUP BY bs.entity"
 
+            names = entity_names(conn)
             cursor.execute(query, params)
 
             entities = []
@@ -532,7 +497,7 @@ def get_bandwidth_report(
                 if tx_delta < 0:
                     tx_delta = row['max_tx']
 
-                hostname = self._get_hostname(cursor, row['entity_type'], row['entity_id'])
+                hostname = self._get_hostname(names, row['entity_type'], row['entity_id'])
 
                 availability = (row['connected_samples'] / row['total_samples'] * 100) if row['total_samples'] > 0 else 0
 
@@ -571,130 +536,59 @@ def get_top_consumers(self, days: int = 7, limit: int = 10) -> List[Dict[str, An
         report = self.get_bandwidth_report(hours=days * 24)
         return report['entities'][:limit]
 
-    def compute_aggregates(self, period_type: str = 'hourly'):
+    def compute_aggregates(self) -> Dict[str, int]:
         """
-        Compute aggregated bandwidth metrics.
+        Bring hourly/daily/weekly/monthly aggregates up to date.
 
-        Args:
-            period_type: 'hourly', 'daily', 'weekly', 'monthly'
+        Only samples newer than the last run are read; periods missed by
+        earlier runs are filled in (see bandwidth_rollup).
+
+        Returns:
+            Rows written per period type
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        from v1.bandwidth_rollup import rollup
 
+        conn = self._get_connection()
         try:
-            now = datetime.utcnow()
-
-            # Determine period boundaries
-            if period_type == 'hourly':
-                period_start = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
-                period_end = period_start + timedelta(hours=1)
-            elif period_type == 'daily':
-                period_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
-                period_end = period_start + timedelta(days=1)
-            elif period_type == 'weekly':
-                # Start of previous week
-                days_since_monday = now.weekday()
-                period_start = (now - timedelta(days=days_since_monday + 7)).replace(hour=0, minute=0, second=0, microsecond=0)
-                period_end = period_start + timedelta(weeks=1)
-            else:  # monthly
-                # Previous month
-                if now.month == 1:
-                    period_start = now.replace(year=now.year - 1, month=12, day=1, hour=0, minute=0, second=0, microsecond=0)
-                else:
-                    period_start = now.replace(month=now.month - 1, day=1, hour=0, minute=0, second=0, microsecond=0)
-                period_end = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-            # Get samples in period
-            cursor.execute("""
-                SELECT entity_type, entity_id, entity_permanent_guid,
-                       sampled_at, rx_bytes, tx_bytes, connected
-                FROM bandwidth_sample
-                WHERE sampled_at >= ? AND sampled_at < ?
-                ORDER BY entity_type, entity_id, sampled_at
-            """, (period_start.isoformat(), period_end.isoformat()))
-
-            # Group by entity
-            entity_samples = {}
-            for row in cursor.fetchall():
-                key = (row['entity_type'], row['entity_id'], row['entity_permanent_guid'])
-                if key not in entity_samples:
-                    entity_samples[key] = []
-                entity_samples[key].append(row)
-
-            # Compute aggregates for each entity
-            for (entity_type, entity_id, guid), samples in entity_samples.items():
-                if len(samples) < 2:
-                    continue
-
-                # Calculate metrics
-                rx_delta = samples[-1]['rx_bytes'] - samples[0]['rx_bytes']
-                tx_delta = samples[-1]['tx_bytes'] - samples[0]['tx_bytes']
+            written = rollup(conn)
+            logger.info(f"Computed aggregates: {written}")
+            return written
+        finally:
+            conn.close()
 
-                # Handle counter wrap
-                if rx_delta < 0:
-                    rx_delta = samples[-1]['rx_bytes']
-                if tx_delta < 0:
-                    tx_delta = samples[-1]['tx_bytes']
-
-                # Calculate rates
-                period_seconds = (period_end - period_start).total_seconds()
-                avg_rx_rate = int(rx_delta / period_seconds) if period_seconds > 0 else 0
-                avg_tx_rate = int(tx_delta / period_seconds) if period_seconds > 0 else 0
-
-                # Peak rates (between consecutive samples)
-                peak_rx_rate = 0
-                peak_tx_rate = 0
-                for i in range(1, len(samples)):
-                    t1 = datetime.fromisoformat(samples[i-1]['sampled_at'])
-                    t2 = datetime.fromisoformat(samples[i]['sampled_at'])
-                    dt = (t2 - t1).total_seconds()
-                    if dt > 0:
-                        rx_rate = (samples[i]['rx_bytes'] - samples[i-1]['rx_bytes']) / dt
-                        tx_rate = (samples[i]['tx_bytes'] - samples[i-1]['tx_bytes']) / dt
-                        peak_rx_rate = max(peak_rx_rate, int(rx_rate))
-                        peak_tx_rate = max(peak_tx_rate, int(tx_rate))
-
-                # Uptime calculation
-                connected_samples = sum(1 for s in samples if s['connected'])
-                uptime_pct = connected_samples / len(samples) * 100
-                uptime_seconds = int(period_seconds * uptime_pct / 100)
-                downtime_seconds = int(period_seconds - uptime_seconds)
-
-                # Insert/update aggregate
-                cursor.execute("""
-                    INSERT OR REPLACE INTO bandwidth_aggregate (
-                        entity_type, entity_id, entity_permanent_guid,
-                        period_type, period_start, period_end,
-                        total_rx_bytes, total_tx_bytes,
-                        peak_rx_rate, peak_tx_rate, avg_rx_rate, avg_tx_rate,
-                        uptime_seconds, downtime_seconds, availability_percent,
-                        sample_count
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    entity_type, entity_id, guid,
-                    period_type, period_start.isoformat(), period_end.isoformat(),
-                    rx_delta, tx_delta,
-                    peak_rx_rate, peak_tx_rate, avg_rx_rate, avg_tx_rate,
-                    uptime_seconds, downtime_seconds, round(uptime_pct, 1),
-                    len(samples)
-                ))
+    def update_baselines(self, days: int = 30) -> int:
+        """
+        Recompute every peer's daily-traffic baseline (mean, stddev, p95)
+        from the last `days` complete days (see bandwidth_analytics).
 
-            conn.commit()
-            logger.info(f"Computed {period_type} aggregates for {len(entity_samples)} entities")
+        Returns:
+            Number of baselines written
+        """
+        from v1.bandwidth_analytics import update_baselines
 
+        conn = self._get_connection()
+        try:
+            count = update_baselines(conn, days)
+            logger.info(f"Updated {count} bandwidth baselines")
+            return count
         finally:
             conn.close()
 
     def cleanup_old_samples(self):
-        """Remove old samples based on retention policy"""
+        """
+        Remove old samples based on retention policy.
+
+        Raw samples go a whole day partition at a time, once the entire day
+        is past retention, so a day is kept up to 24 hours longer than
+        RAW_SAMPLE_RETENTION_DAYS.
+        """
         conn = self._get_connection()
         cursor = conn.cursor()
 
         try:
             # Raw samples
-            cutoff = (datetime.utcnow() - timedelta(days=self.RAW_SAMPLE_RETENTION_DAYS)).isoformat()
-            cursor.execute("DELETE FROM bandwidth_sample WHERE sampled_at < ?", (cutoff,))
-            deleted_samples = cursor.rowcount
+            cutoff = _epoch(datetime.utcnow() - timedelta(days=self.RAW_SAMPLE_RETENTION_DAYS))
+            dropped_days = drop_partitions_before(conn, cutoff)
 
             # Hourly aggregates
             cutoff = (datetime.utcnow() - timedelta(days=self.HOURLY_RETENTION_DAYS)).isoformat()
@@ -713,7 +607,7 @@ def cleanup_old_samples(self):
             deleted_daily = cursor.rowcount
 
             conn.commit()
-            logger.info(f"Cleanup: {deleted_samples} samples, {deleted_hourly} hourly, {deleted_daily} daily aggregates")
+            logger.info(f"Cleanup: {dropped_days} days of samples, {deleted_hourly} hourly, {deleted_daily} daily aggregates")
 
         finally:
             conn.close()
@@ -727,14 +621,18 @@ def get_statistics(self) -> Dict[str, Any]:
             stats = {}
 
             # Sample counts
-            cursor.execute("SELECT COUNT(*) FROM bandwidth_sample")
-            stats['total_samples'] = cursor.fetchone()[0]
-
-            # Time range
-            cursor.execute("SELECT MIN(sampled_at), MAX(sampled_at) FROM bandwidth_sample")
-            row = cursor.fetchone()
-            stats['oldest_sample'] = row[0]
-            stats['newest_sample'] = row[1]
+            names = partitions(conn)
+            stats['total_samples'] = sum(
+                cursor.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0] for name in names)
+            stats['sample_days'] = len(names)
+
+            # Time range: the oldest and newest partitions, via their time index
+            oldest = newest = None
+            if names:
+                oldest = cursor.execute(f"SELECT MIN(sampled_at) FROM {names[0]}").fetchone()[0]
+                newest = cursor.execute(f"SELECT MAX(sampled_at) FROM {names[-1]}").fetchone()[0]
+            stats['oldest_sample'] = _utc(oldest).isoformat() if oldest is not None else None
+            stats['newest_sample'] = _utc(newest).isoformat() if newest is not None else None
 
             # Aggregate counts
             cursor.execute("""
@@ -803,37 +701,20 @@ def format_bytes(bytes_val: int) -> str:
 
         tracker = BandwidthTracker(db_path)
 
-        # Insert some mock samples
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
+        # Insert some mock samples, one sweep per hour
         now = datetime.utcnow()
         for i in range(10):
-            sample_time = (now - timedelta(hours=i)).isoformat()
-            # Alice: increasing traffic
-            cursor.execute("""
-                INSERT INTO bandwidth_sample (
-                    entity_type, entity_id, entity_permanent_guid,
-                    sampled_at, rx_bytes, tx_bytes, connected
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, ('remote', 1, 'guid-alice', sample_time,
-                  1000000000 + (10-i) * 100000000,
-                  500000000 + (10-i) * 50000000,
-                  1))
-
-            # Bob: less traffic
-            cursor.execute("""
-                INSERT INTO bandwidth_sample (
-                    entity_type, entity_id, entity_permanent_guid,
-                    sampled_at, rx_bytes, tx_bytes, connected
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, ('remote', 2, 'guid-bob', sample_time,
-                  200000000 + (10-i) * 20000000,
-                  100000000 + (10-i) * 10000000,
-                  1 if i < 8 else 0))
-
-        conn.commit()
-        conn.close()
+            sample_time = now - timedelta(hours=i)
+            tracker.store_samples([
+                # Alice: increasing traffic
+                BandwidthSample('remote', 1, 'guid-alice', 'alice-laptop', sample_time,
+                                1000000000 + (10-i) * 100000000, 500000000 + (10-i) * 50000000,
+                                None, None, True),
+                # Bob: less traffic
+                BandwidthSample('remote', 2, 'guid-bob', 'bob-phone', sample_time,
+                                200000000 + (10-i) * 20000000, 100000000 + (10-i) * 10000000,
+                                None, None, i < 8),
+            ])
 
         # Generate report
         print("24-Hour Bandwidth Report:")
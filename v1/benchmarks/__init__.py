@@ -0,0 +1 @@
+"""WireGuard Friend benchmarks (run as scripts, not collected by pytest)"""
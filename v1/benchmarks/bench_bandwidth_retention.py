@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Bandwidth Retention Benchmark - DELETE vs Dropping a Day Partition
+
+Builds one-minute samples (default: 8 days for 500 peers, 5.8 million
+rows) twice, as one table and as day partitions, and expires the oldest
+day in each:
+
+  delete     - DELETE FROM <table> WHERE sampled_at < cutoff
+  partition  - drop_partitions_before(): DROP TABLE of the day
+
+While retention runs, a second connection writes one collection sweep and
+records how long it waited for the write lock.
+
+Run with: python3 -m v1.benchmarks.bench_bandwidth_retention [--peers 500] [--days 8]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from v1.bandwidth_partitions import DAY, drop_partitions_before, partition_samples
+from v1.bandwidth_tracking import create_bandwidth_schema, migrate_compact_samples
+
+START = 1_767_225_600       # 2026-01-01 UTC
+
+
+def build(db_path, peers, days):
+    """One-minute samples for every peer in the single-table layout"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    create_bandwidth_schema(conn.cursor())
+    migrate_compact_samples(conn.cursor())
+    conn.executemany(
+        "INSERT INTO bandwidth_entity (id, entity_type, entity_id, entity_permanent_guid) VALUES (?, 'remote', ?, ?)",
+        [(i, i, f'guid-{i}') for i in range(1, peers + 1)])
+    conn.execute("""
+        WITH RECURSIVE minute(m) AS (SELECT 0 UNION ALL SELECT m + 1 FROM minute WHERE m + 1 < ?)
+        INSERT INTO bandwidth_sample (entity, sampled_at, rx_bytes, tx_bytes, latest_handshake, endpoint, connected)
+        SELECT e.id, ? + m * 60, m * 1000 + e.id, m * 100 + e.id, ? + m * 60 - 30, NULL, 1
+        FROM bandwidth_entity e, minute
+        ORDER BY e.id, m
+    """, (days * 1440, START, START))
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+
+def run(db_path, expire, sweep_table, peers, days):
+    """(retention seconds, sweep wait seconds, file MB, free pages) for one layout"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    writer = sqlite3.connect(db_path, timeout=600)
+    now = START + days * DAY
+    sweep = [(i, now, 1, 1, now, None, 1) for i in range(1, peers + 1)]
+    started = threading.Event()
+    timings = {}
+
+    def retention():
+        begin = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        started.set()
+        expire(conn, START + DAY)
+        conn.commit()
+        timings['retention'] = time.perf_counter() - begin
+
+    thread = threading.Thread(target=retention)
+    thread.start()
+    started.wait()
+    begin = time.perf_counter()
+    writer.executemany(f"INSERT OR REPLACE INTO {sweep_table(writer, now)} VALUES (?, ?, ?, ?, ?, ?, ?)", sweep)
+    writer.commit()
+    timings['wait'] = time.perf_counter() - begin
+    thread.join()
+
+    writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    free = writer.execute("PRAGMA freelist_count").fetchone()[0]
+    writer.close()
+    conn.close()
+    return timings['retention'], timings['wait'], os.path.getsize(db_path) / 2**20, free
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bandwidth retention benchmark')
+    parser.add_argument('--peers', type=int, default=500, help='Peers')
+    parser.add_argument('--days', type=int, default=8, help='Days of one-minute samples')
+    args = parser.parse_args()
+    rows = args.peers * args.days * 1440
+
+    with tempfile.TemporaryDirectory() as tmp:
+        single = os.path.join(tmp, 'single.db')
+        build(single, args.peers, args.days)
+        partitioned = os.path.join(tmp, 'partitioned.db')
+        shutil.copy(single, partitioned)
+        conn = sqlite3.connect(partitioned)
+        partition_samples(conn.cursor())
+        conn.commit()
+        conn.close()
+
+        def delete(conn, cutoff):
+            conn.execute("DELETE FROM bandwidth_sample WHERE sampled_at < ?", (cutoff,))
+
+        def day_table(conn, now):
+            name = conn.execute("SELECT name FROM bandwidth_partition WHERE day = ?", (now - now % DAY,)).fetchone()
+            if name is None:
+                # As ensure_partitions would: create the new day first
+                from v1.bandwidth_partitions import ensure_partitions
+                return ensure_partitions(conn, [now])[now - now % DAY]
+            return name[0]
+
+        results = [
+            ('delete', run(single, delete, lambda conn, now: 'bandwidth_sample', args.peers, args.days)),
+            ('partition', run(partitioned, drop_partitions_before, day_table, args.peers, args.days)),
+        ]
+
+    print("=" * 64)
+    print(f"BANDWIDTH RETENTION: {args.peers} PEERS x {args.days} DAYS ({rows:,} rows), EXPIRE 1 DAY")
+    print("=" * 64)
+    print(f"{'layout':>10}  {'retention':>10}  {'sweep waited':>12}  {'file':>8}  {'free pages':>10}")
+    for name, (retention, wait, size, free) in results:
+        print(f"{name:>10}  {retention:9.3f}s  {wait:11.3f}s  {size:6.1f}MB  {free:10,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Bandwidth Sample Storage Benchmark - Compact vs Legacy Layout
+
+Writes the same sweeps (default: 60 sweeps of 3,000 peers) into two
+databases and reports insert throughput and bytes on disk per sample:
+
+  legacy   - rowid table with entity_type/guid text and ISO timestamps on
+             every row, two secondary indexes, one execute() per sample
+  compact  - entity dictionary + WITHOUT ROWID (entity, sampled_at) with
+             epoch integers, one executemany() per sweep
+
+Both layouts commit once per sweep, so the difference is row size and
+per-statement overhead, not fsyncs.
+
+Run with: python3 -m v1.benchmarks.bench_bandwidth_storage [--peers 3000] [--sweeps 60]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from v1.bandwidth_tracking import (
+    BandwidthSample, create_bandwidth_schema, migrate_compact_samples, write_samples
+)
+
+
+def make_sweeps(peers, sweeps):
+    """One list of samples per minute, counters growing"""
+    start = datetime(2026, 1, 1)
+    for n in range(sweeps):
+        sampled_at = start + timedelta(minutes=n)
+        yield [
+            BandwidthSample('remote', i, f'{i:08x}-guid-0000-0000-000000000000', f'remote-{i}',
+                            sampled_at, (n + 1) * 1_000_000 + i, (n + 1) * 250_000 + i,
+                            sampled_at - timedelta(seconds=30), f'203.0.113.{i % 250}:51820', True)
+            for i in range(peers)
+        ]
+
+
+def write_legacy(conn, samples):
+    cursor = conn.cursor()
+    for s in samples:
+        cursor.execute("""
+            INSERT INTO bandwidth_sample (
+                entity_type, entity_id, entity_permanent_guid,
+                sampled_at, rx_bytes, tx_bytes, latest_handshake,
+                endpoint, connected
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            s.entity_type, s.entity_id, s.entity_guid,
+            s.sampled_at.isoformat(), s.rx_bytes, s.tx_bytes,
+            s.latest_handshake.isoformat(), s.endpoint, s.connected
+        ))
+
+
+def run(db_path, compact, peers, sweeps):
+    """Write every sweep; return (seconds, file bytes)"""
+    conn = sqlite3.connect(db_path)
+    create_bandwidth_schema(conn.cursor())
+    if compact:
+        migrate_compact_samples(conn.cursor())
+    conn.commit()
+
+    write = write_samples if compact else write_legacy
+    elapsed = 0.0
+    for samples in make_sweeps(peers, sweeps):
+        start = time.perf_counter()
+        write(conn, samples)
+        conn.commit()
+        elapsed += time.perf_counter() - start
+
+    conn.execute("VACUUM")
+    conn.close()
+    return elapsed, os.path.getsize(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bandwidth sample storage benchmark')
+    parser.add_argument('--peers', type=int, default=3000, help='Peers per sweep')
+    parser.add_argument('--sweeps', type=int, default=60, help='Number of sweeps')
+    args = parser.parse_args()
+    rows = args.peers * args.sweeps
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, compact in (('legacy', False), ('compact', True)):
+            elapsed, size = run(os.path.join(tmp, f'{name}.db'), compact, args.peers, args.sweeps)
+            results.append((name, elapsed, size))
+
+    print("=" * 64)
+    print(f"BANDWIDTH SAMPLES: {args.sweeps} SWEEPS x {args.peers} PEERS ({rows:,} rows)")
+    print("=" * 64)
+    print(f"{'layout':>8}  {'file':>8}  {'bytes/row':>9}  {'insert':>8}  {'rows/s':>10}")
+    for name, elapsed, size in results:
+        print(f"{name:>8}  {size / 2**20:6.1f}MB  {size / rows:9.1f}  "
+              f"{elapsed:7.2f}s  {rows / elapsed:10,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
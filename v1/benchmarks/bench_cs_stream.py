@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Coordination Server Config Benchmark - Streaming vs In-Memory
+
+Writes the CS config of synthetic networks (default: 5,000, 20,000 and
+50,000 remotes) two ways and reports wall time and peak Python memory
+(tracemalloc) for each:
+
+  in-memory  - load_topology() + render_cs_config() + write_text()
+  streaming  - stream_cs_config(), peers read from DB cursors one at a time
+
+The in-memory peak grows with the number of peers; the streaming peak
+should stay roughly flat. Both files are compared for byte identity.
+
+Run with: python3 -m v1.benchmarks.bench_cs_stream [--remotes 5000,20000,50000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from v1.db_pool import close_pools
+from v1.generation_engine import load_topology, render_cs_config, stream_cs_config
+from v1.benchmarks.synthetic import build_synthetic_network
+
+
+def measure(func):
+    """Run func() and return (seconds, peak traced bytes)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming CS config benchmark')
+    parser.add_argument('--remotes', default='5000,20000,50000',
+                        help='Comma-separated network sizes')
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.remotes.split(',')]
+
+    results = []
+    for remotes in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            db = build_synthetic_network(db_path, remotes=remotes)
+            memory_path = Path(tmp) / 'memory.conf'
+            stream_path = Path(tmp) / 'stream.conf'
+
+            def in_memory():
+                memory_path.write_text(render_cs_config(load_topology(db)))
+
+            # Warm the connection pool so neither run pays for opening it
+            stream_cs_config(db, stream_path)
+
+            memory_s, memory_peak = measure(in_memory)
+            stream_s, stream_peak = measure(lambda: stream_cs_config(db, stream_path))
+
+            identical = memory_path.read_bytes() == stream_path.read_bytes()
+            size = stream_path.stat().st_size
+            results.append((remotes, size, memory_s, memory_peak, stream_s, stream_peak, identical))
+            close_pools(db_path)
+
+    print("=" * 72)
+    print("COORDINATION SERVER CONFIG: STREAMING VS IN-MEMORY")
+    print("=" * 72)
+    print(f"{'remotes':>8}  {'file':>8}  {'in-memory':>18}  {'streaming':>18}  {'identical':>9}")
+    for remotes, size, memory_s, memory_peak, stream_s, stream_peak, identical in results:
+        print(f"{remotes:>8}  {size / 2**20:6.1f}MB  "
+              f"{memory_s * 1000:6.0f}ms {memory_peak / 2**20:6.1f}MB  "
+              f"{stream_s * 1000:6.0f}ms {stream_peak / 2**20:6.1f}MB  "
+              f"{'yes' if identical else 'NO':>9}")
+
+    return 0 if all(r[-1] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Key Decryption Microbenchmark
+
+Decrypts N encrypted keys (default: 20,000) several ways:
+
+  per-value, new cipher  - AESGCM(key) built for every value (the old
+                           SecureColumn behaviour)
+  per-value, cached      - SecureColumn.decrypt() with its cached cipher
+  decrypt_many           - EncryptionManager.decrypt_many()
+  decrypt_many, cached   - second pass with the plaintext cache enabled
+
+No Scrypt derivation is done: a random 32-byte key stands in for the
+derived one.
+
+Run with: python3 -m v1.benchmarks.bench_decrypt [--values N]
+"""
+
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from v1.encryption import ENCRYPTED_PREFIX, EncryptionManager, SecureColumn
+from v1.benchmarks.synthetic import fake_key
+
+
+def decrypt_with_new_cipher(key: bytes, values):
+    """The pre-batching code path: one AESGCM setup per value"""
+    results = []
+    for value in values:
+        data = base64.b64decode(value[len(ENCRYPTED_PREFIX):])
+        results.append(AESGCM(key).decrypt(data[:12], data[12:], None).decode('utf-8'))
+    return results
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def unlocked_manager(db_path: str, key: bytes) -> EncryptionManager:
+    """A manager unlocked with `key` directly (skips Scrypt)"""
+    manager = EncryptionManager(db_path)
+    manager._secure_column = SecureColumn(key)
+    manager._is_unlocked = True
+    return manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Key decryption microbenchmark')
+    parser.add_argument('--values', type=int, default=20000)
+    args = parser.parse_args()
+
+    key = os.urandom(32)
+    column = SecureColumn(key)
+    plaintexts = [fake_key() for _ in range(args.values)]
+    encrypted = column.encrypt_many(plaintexts)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Decryption never touches the database; the manager only needs a path
+        manager = unlocked_manager(os.path.join(tmp, 'bench.db'), key)
+
+        rows = [
+            ("per-value, new cipher", *timed(lambda: decrypt_with_new_cipher(key, encrypted))),
+            ("per-value, cached", *timed(lambda: [column.decrypt(v) for v in encrypted])),
+            ("decrypt_many", *timed(lambda: manager.decrypt_many(encrypted))),
+        ]
+        manager.enable_plaintext_cache(max_entries=args.values, ttl=60)
+        manager.decrypt_many(encrypted)
+        rows.append(("decrypt_many, cached", *timed(lambda: manager.decrypt_many(encrypted))))
+        manager.lock()
+
+    for name, _, result in rows:
+        assert result == plaintexts, f"{name} returned wrong plaintexts"
+
+    print("=" * 60)
+    print("KEY DECRYPTION")
+    print("=" * 60)
+    print(f"Values: {args.values}")
+    print()
+    print(f"{'method':<24} {'total':>10} {'per value':>12} {'speedup':>8}")
+    base = rows[0][1]
+    for name, seconds, _ in rows:
+        print(f"{name:<24} {seconds * 1000:8.1f}ms {seconds / args.values * 1e6:10.2f}us "
+              f"{base / seconds:7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
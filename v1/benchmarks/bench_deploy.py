@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Fleet Deploy Benchmark - Rollouts Against Simulated Hosts
+
+Deploys generated configs to N simulated hosts (transport.LocalTransport)
+with the real deploy path (cli.deploy.deploy_host via deploy_engine), and
+times the whole rollout at several --parallel values:
+
+  first   - every host gets a new config and a WireGuard restart
+  repeat  - the same configs again (every host is skipped as unchanged)
+
+Each simulated operation costs --latency seconds (plus up to --jitter),
+standing in for the network round trip; --failure-rate makes a share of
+operations fail like an unreachable host. With --wave-size the first
+rollout goes through run_waves (canary first, no health gate).
+
+Run with: python3 -m v1.benchmarks.bench_deploy [--hosts N] [--parallel 4,16,64]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from v1.cli.deploy import deploy_host
+from v1.deploy_engine import DeployTarget, run_deployments, run_waves
+from v1.transport import LocalTransport, set_transport
+from v1.benchmarks.synthetic import fake_key
+
+
+def write_configs(output_dir: Path, hosts: int, peers: int):
+    """A hub config with every host as a peer, and one config per host"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    hub_key = fake_key()
+    keys = [fake_key() for _ in range(hosts)]
+    hub = ["[Interface]", "Address = 10.64.0.1/10", f"PrivateKey = {fake_key()}", "ListenPort = 51820", ""]
+    targets = []
+    for i, key in enumerate(keys):
+        ip = f"10.64.{1 + i // 250}.{1 + i % 250}"
+        hub += ["[Peer]", f"# host-{i:04d}", f"PublicKey = {key}", f"AllowedIPs = {ip}/32", ""]
+        lines = ["[Interface]", f"Address = {ip}/10", f"PrivateKey = {fake_key()}", "",
+                 "[Peer]", "# hub", f"PublicKey = {hub_key}", "Endpoint = vpn.example.com:51820",
+                 "AllowedIPs = 10.64.0.0/10", "PersistentKeepalive = 25", ""]
+        # Extra remotes, so configs have realistic sizes
+        for n in range(peers):
+            lines += ["[Peer]", f"# remote-{n}", f"PublicKey = {fake_key()}",
+                      f"AllowedIPs = 10.65.{n // 250}.{n % 250}/32", ""]
+        config = output_dir / f"host-{i:04d}.conf"
+        config.write_text("\n".join(lines))
+        targets.append(DeployTarget('subnet_router', f'host-{i:04d}', config, f'host-{i:04d}.sim'))
+    config = output_dir / "coordination.conf"
+    config.write_text("\n".join(hub))
+    targets.insert(0, DeployTarget('coordination_server', 'hub', config, 'hub.sim'))
+    return targets
+
+
+def rollout(targets, parallel: int, wave_size: int = 0):
+    """Deploy every target (output discarded); returns (seconds, results)"""
+    def deploy(target, deadline):
+        return deploy_host(target, restart=True, deadline=deadline)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if wave_size:
+            results, _ = run_waves(targets, deploy, None, lambda t: (False, "not rolled back"),
+                                   wave_size=wave_size, parallel=parallel)
+        else:
+            results = run_deployments(targets, deploy, parallel=parallel)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fleet deploy benchmark (simulated hosts)')
+    parser.add_argument('--hosts', type=int, default=500)
+    parser.add_argument('--peers', type=int, default=20, help='Extra peers per host config')
+    parser.add_argument('--parallel', default='4,16,64', help='Comma-separated worker counts')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds per remote operation')
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--wave-size', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    worker_counts = [int(p) for p in args.parallel.split(',')]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        targets = write_configs(Path(tmp) / 'generated', args.hosts, args.peers)
+
+        for parallel in worker_counts:
+            transport = LocalTransport(Path(tmp) / f'hosts-{parallel}', latency=args.latency,
+                                       jitter=args.jitter, failure_rate=args.failure_rate,
+                                       seed=args.seed)
+            previous = set_transport(transport)
+            try:
+                first_s, results = rollout(targets, parallel, args.wave_size)
+                ops = transport.stats()['operations']
+                repeat_s, repeat = rollout(targets, parallel)
+            finally:
+                set_transport(previous)
+
+            counts = {}
+            for r in results:
+                counts[r.status] = counts.get(r.status, 0) + 1
+            unchanged = sum(1 for r in repeat if r.status == 'unchanged')
+            rows.append((parallel, first_s, repeat_s, counts, ops, unchanged))
+
+    print("=" * 72)
+    print("FLEET DEPLOY (SIMULATED HOSTS)")
+    print("=" * 72)
+    print(f"Hosts:              {args.hosts} + hub")
+    print(f"Latency:            {args.latency * 1000:.0f} ms (+ up to {args.jitter * 1000:.0f} ms)")
+    print(f"Failure rate:       {args.failure_rate:.1%}")
+    print(f"Waves:              {f'canary + {args.wave_size} per wave' if args.wave_size else 'off'}")
+    print()
+    print(f"{'parallel':>8}  {'first':>9}  {'hosts/s':>8}  {'ops':>6}  {'repeat':>9}  "
+          f"{'deployed':>8}  {'failed':>6}  {'skipped':>7}")
+    serial = rows[0][1]
+    for parallel, first_s, repeat_s, counts, ops, unchanged in rows:
+        print(f"{parallel:>8}  {first_s:8.2f}s  {(args.hosts + 1) / first_s:8.1f}  {ops:>6}  "
+              f"{repeat_s:8.2f}s  {counts.get('deployed', 0):>8}  "
+              f"{counts.get('failed', 0) + counts.get('timeout', 0):>6}  {counts.get('skipped', 0):>7}"
+              f"   ({serial / first_s:.2f}x, {unchanged} unchanged on repeat)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
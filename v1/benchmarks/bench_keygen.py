@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Key Generation Benchmark - Subprocess vs In-Process
+
+Generates N WireGuard keypairs (default: 500) three ways:
+
+  subprocess     - one `wg genkey` per key plus public key derivation (the
+                   old generate_keypair()); without wg installed, one
+                   `true` process per key stands in for the fork/exec cost
+  in-process     - generate_keypair() N times (X25519 via PyNaCl)
+  batched        - generate_keypairs(N): one urandom read for all keys
+
+and, separately, taking N keys from a pre-filled KeyPool.
+
+Run with: python3 -m v1.benchmarks.bench_keygen [--keys N]
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from v1.keygen import KeyPool, derive_public_key, generate_keypair, generate_keypairs
+
+
+def subprocess_keypairs(n: int, command):
+    """The pre-batching code path: a process per key"""
+    keypairs = []
+    for _ in range(n):
+        output = subprocess.run(command, capture_output=True, check=True).stdout.decode().strip()
+        if command[0] != 'wg':
+            output = generate_keypair()[0]   # `true` prints nothing
+        keypairs.append((output, derive_public_key(output)))
+    return keypairs
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Key generation benchmark')
+    parser.add_argument('--keys', type=int, default=500)
+    args = parser.parse_args()
+    n = args.keys
+
+    command = ['wg', 'genkey'] if shutil.which('wg') else ['true']
+    label = "subprocess (wg)" if command[0] == 'wg' else "subprocess (true)"
+
+    rows = [
+        (label, *timed(lambda: subprocess_keypairs(n, command))),
+        ("in-process", *timed(lambda: [generate_keypair() for _ in range(n)])),
+        ("batched", *timed(lambda: generate_keypairs(n))),
+    ]
+
+    pool = KeyPool(size=n)
+    pool.fill()
+    rows.append(("key pool (pre-filled)", *timed(lambda: pool.take(n))))
+    pool.clear()
+
+    for name, _, keypairs in rows:
+        assert len({private for private, _ in keypairs}) == n, f"{name}: duplicate keys"
+
+    print("=" * 60)
+    print("KEY GENERATION")
+    print("=" * 60)
+    print(f"Keys: {n}")
+    print()
+    print(f"{'method':<24} {'total':>10} {'per key':>12} {'keys/s':>10} {'speedup':>8}")
+    base = rows[0][1]
+    for name, seconds, _ in rows:
+        print(f"{name:<24} {seconds * 1000:8.1f}ms {seconds / n * 1e6:10.1f}us "
+              f"{n / seconds:10.0f} {base / seconds:7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - Database Open Time
+
+Measures how long it takes to open an existing database the way the TUI and
+REST API do: WireGuardDBv2 plus the manager classes that used to run their
+own CREATE TABLE/INDEX IF NOT EXISTS batches in every constructor.
+
+Compares:
+  legacy     - every migration's DDL re-executed on each open (old behaviour)
+  versioned  - ensure_schema(): one PRAGMA user_version read when current
+
+Run with: python3 -m v1.benchmarks.bench_startup [--iterations N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from v1.db_pool import get_connection, close_pools
+from v1.migrations import MIGRATIONS, ensure_schema
+from v1.schema_semantic import WireGuardDBv2
+from v1.bandwidth_tracking import BandwidthTracker
+from v1.audit_log import AuditLogger
+from v1.alerting import AlertManager
+from v1.webhook_notifications import WebhookNotifier
+from v1.exit_failover import ExitFailoverManager
+from v1.rotation_policies import RotationPolicyManager
+from v1.drift_detection import DriftDetector
+
+
+def open_legacy(db_path: str):
+    """Re-run every migration's DDL, as each constructor used to"""
+    conn = get_connection(db_path)
+    try:
+        cursor = conn.cursor()
+        for migration in MIGRATIONS:
+            migration.resolve()(cursor)
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def open_versioned(db_path: str):
+    """Open the way the application now does"""
+    WireGuardDBv2(db_path)
+    BandwidthTracker(db_path)
+    AuditLogger(db_path)
+    AlertManager(db_path)
+    WebhookNotifier(db_path)
+    ExitFailoverManager(db_path)
+    RotationPolicyManager(db_path)
+    DriftDetector(db_path)
+
+
+def time_it(func, db_path: str, iterations: int) -> float:
+    """Average milliseconds per call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(db_path)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Database open-time benchmark')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        ensure_schema(db_path)
+
+        # Warm up imports and the connection pool
+        open_versioned(db_path)
+
+        legacy_ms = time_it(open_legacy, db_path, args.iterations)
+        versioned_ms = time_it(open_versioned, db_path, args.iterations)
+        pragma_ms = time_it(ensure_schema, db_path, args.iterations)
+
+        close_pools(db_path)
+
+    print("=" * 60)
+    print("DATABASE OPEN TIME (existing, current database)")
+    print("=" * 60)
+    print(f"Iterations:                      {args.iterations}")
+    print(f"Legacy DDL on every open:        {legacy_ms:8.3f} ms")
+    print(f"Versioned (DB + 7 managers):     {versioned_ms:8.3f} ms")
+    print(f"ensure_schema() alone:           {pragma_ms:8.3f} ms")
+    if versioned_ms > 0:
+        print(f"Speedup:                         {legacy_ms / versioned_ms:8.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Synthetic networks for benchmarks.
+
+Builds a realistic-looking database (CS, routers with advertised networks,
+exit nodes, N remotes) with bulk inserts, so a 20k-remote network takes a
+second or two to create. Keys are random base64 strings, not real X25519
+keys - rendering never validates them.
+"""
+
+import base64
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from v1.schema_semantic import WireGuardDBv2
+
+
+def fake_key() -> str:
+    """Random 32-byte key in WireGuard's base64 format"""
+    return base64.b64encode(os.urandom(32)).decode('ascii')
+
+
+def build_synthetic_network(db_path: str, remotes: int = 20000, routers: int = 20,
+                            exit_nodes: int = 4) -> WireGuardDBv2:
+    """
+    Create a database with a hub, `routers` subnet routers (two LANs each),
+    `exit_nodes` exit nodes and `remotes` remotes.
+
+    Every 4th remote routes through an exit node; every other remote has a
+    preshared key.
+    """
+    db = WireGuardDBv2(db_path)
+    with db._connection() as conn:
+        cs_key = fake_key()
+        conn.execute("""
+            INSERT INTO coordination_server (
+                permanent_guid, current_public_key, hostname, endpoint, listen_port,
+                network_ipv4, network_ipv6, ipv4_address, ipv6_address, private_key
+            ) VALUES (?, ?, 'hub', 'vpn.example.com', 51820,
+                      '10.64.0.0/10', 'fd66::/64', '10.64.0.1/10', 'fd66::1/64', ?)
+        """, (cs_key, cs_key, fake_key()))
+
+        router_rows = []
+        for i in range(1, routers + 1):
+            key = fake_key()
+            router_rows.append((key, key, f'router-{i:03d}', f'10.64.1.{i}/32',
+                                f'fd66::1:{i:x}/128', fake_key()))
+        conn.executemany("""
+            INSERT INTO subnet_router (
+                cs_id, permanent_guid, current_public_key, hostname,
+                ipv4_address, ipv6_address, private_key
+            ) VALUES (1, ?, ?, ?, ?, ?, ?)
+        """, router_rows)
+        conn.executemany("""
+            INSERT INTO advertised_network (subnet_router_id, network_cidr) VALUES (?, ?)
+        """, [(i, f'192.168.{(i * 2 + n) % 256}.0/24')
+              for i in range(1, routers + 1) for n in range(2)])
+        conn.executemany("""
+            INSERT INTO command_pair (
+                entity_type, entity_id, pattern_name, rationale, scope,
+                up_commands, down_commands, execution_order
+            ) VALUES (?, ?, 'nat_masquerade_ipv4', 'NAT', 'environment-wide', ?, ?, 1)
+        """, [('coordination_server', 1,
+               json.dumps(['iptables -t nat -A POSTROUTING -o eth0 -j MASQUERADE']),
+               json.dumps(['iptables -t nat -D POSTROUTING -o eth0 -j MASQUERADE']))] + [
+              ('subnet_router', i,
+               json.dumps(['iptables -A FORWARD -i wg0 -j ACCEPT']),
+               json.dumps(['iptables -D FORWARD -i wg0 -j ACCEPT']))
+              for i in range(1, routers + 1)])
+
+        exit_rows = []
+        for i in range(1, exit_nodes + 1):
+            key = fake_key()
+            exit_rows.append((key, key, f'exit-{i:02d}', f'exit{i}.example.com',
+                              f'10.64.2.{i}/32', f'fd66::2:{i:x}/128', fake_key()))
+        conn.executemany("""
+            INSERT INTO exit_node (
+                cs_id, permanent_guid, current_public_key, hostname, endpoint,
+                ipv4_address, ipv6_address, private_key
+            ) VALUES (1, ?, ?, ?, ?, ?, ?, ?)
+        """, exit_rows)
+
+        def remote_row(i):
+            key = fake_key()
+            exit_id = (i // 4) % exit_nodes + 1 if exit_nodes and i % 4 == 0 else None
+            return (key, key, f'remote-{i:06d}',
+                    f'10.{65 + i // 65536}.{(i // 256) % 256}.{i % 256}/32', f'fd66::10:{i:x}/128',
+                    fake_key(), fake_key() if i % 2 == 0 else None, exit_id)
+
+        conn.executemany("""
+            INSERT INTO remote (
+                cs_id, permanent_guid, current_public_key, hostname,
+                ipv4_address, ipv6_address, private_key, preshared_key,
+                access_level, exit_node_id
+            ) VALUES (1, ?, ?, ?, ?, ?, ?, ?, 'full_access', ?)
+        """, (remote_row(i) for i in range(1, remotes + 1)))
+
+    return db
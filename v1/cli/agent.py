@@ -0,0 +1,116 @@
+"""
+Unlock Agent CLI
+
+wg-friend agent start|stop|status|add|lock - manage the local daemon that
+caches derived database keys (see v1/unlock_agent.py).
+"""
+
+import getpass
+import sys
+from pathlib import Path
+
+from v1.encryption import EncryptionManager
+from v1.unlock_agent import (
+    AgentClient,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_TTL,
+    default_socket_path,
+    start_agent,
+)
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{(seconds % 3600) // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+def agent_start(args) -> int:
+    client = AgentClient()
+    if client.status():
+        print(f"Agent already running ({client.socket_path})")
+        return 0
+
+    pid = start_agent(ttl=args.ttl, idle_timeout=args.idle, foreground=args.foreground)
+    if not args.foreground:
+        print(f"✓ Unlock agent started (pid {pid})")
+        print(f"  Socket: {default_socket_path()}")
+        print(f"  Keys expire after {_format_duration(args.ttl)}, "
+              f"or {_format_duration(args.idle)} unused")
+        print(f"\n💡 Run 'wg-friend agent add' to cache this database's key")
+    return 0
+
+
+def agent_stop(args) -> int:
+    if AgentClient().stop():
+        print("✓ Unlock agent stopped (all keys forgotten)")
+        return 0
+    print("Agent not running")
+    return 1
+
+
+def agent_status(args) -> int:
+    client = AgentClient()
+    status = client.status()
+    if not status:
+        print("Agent not running")
+        return 1
+
+    print(f"Unlock agent running (pid {status['pid']})")
+    print(f"  Socket:       {client.socket_path}")
+    print(f"  Keys held:    {status['keys']}")
+    print(f"  Key TTL:      {_format_duration(status['ttl'])}")
+    print(f"  Idle timeout: {_format_duration(status['idle_timeout'])}")
+    print(f"  Uptime:       {_format_duration(status['uptime'])}")
+    return 0
+
+
+def agent_add(args) -> int:
+    """Unlock the database once and hand its derived key to the agent"""
+    client = AgentClient()
+    if not client.status():
+        print("Agent not running - start it with 'wg-friend agent start'")
+        return 1
+
+    manager = EncryptionManager(Path(args.db))
+    if not manager.is_encrypted:
+        print(f"{args.db} is not encrypted - nothing to cache")
+        return 1
+
+    if not manager.unlock_from_agent(client):
+        passphrase = getpass.getpass("Database passphrase: ")
+        if not manager.unlock(passphrase):
+            print("✗ Incorrect passphrase")
+            return 1
+
+    if not manager.add_to_agent(ttl=args.ttl, idle_timeout=args.idle, client=client):
+        print("✗ Agent refused the key")
+        return 1
+    print(f"✓ Key for {args.db} cached by the agent")
+    return 0
+
+
+def agent_lock(args) -> int:
+    if AgentClient().forget():
+        print("✓ Agent forgot all keys")
+        return 0
+    print("Agent not running")
+    return 1
+
+
+def run_agent_command(args) -> int:
+    commands = {
+        'start': agent_start,
+        'stop': agent_stop,
+        'status': agent_status,
+        'add': agent_add,
+        'lock': agent_lock,
+    }
+    handler = commands.get(args.agent_command)
+    if handler is None:
+        print("Usage: wg-friend agent {start|stop|status|add|lock}", file=sys.stderr)
+        return 1
+    return handler(args)
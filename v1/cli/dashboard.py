@@ -15,6 +15,10 @@
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 
+from v1.db_pool import get_connection, get_read_connection
+from v1.entity_names import EntityNames, entity_names
+from v1.topology_query import NetworkTopology, fetch_topology
+
 try:
     from rich.console import Console
     from rich.panel import Panel
@@ -82,9 +86,7 @@ def __init__(self, db_path: str):
         self._init_tables()
 
     def _get_conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_connection(self.db_path)
 
     def _init_tables(self):
         """Create alert tables if needed."""
@@ -313,84 +315,55 @@ def check_and_generate_alerts(self):
 
 def render_topology_tree(db_path: str) -> str:
     """Render network topology as an ASCII tree."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-
+    conn = get_read_connection(db_path)
     try:
-        # Get coordination server
-        cs = conn.execute("""
-            SELECT hostname, ipv4_address, endpoint FROM coordination_server LIMIT 1
-        """).fetchone()
-
-        if not cs:
-            return "No coordination server found."
+        topology = fetch_topology(conn)
+    finally:
+        conn.close()
 
-        if not RICH_AVAILABLE:
-            return _render_topology_plain(conn, cs)
+    cs = topology.cs
+    if not cs:
+        return "No coordination server found."
 
-        # Build Rich tree
-        tree = Tree(
-            f"[bold cyan]{cs['hostname']}[/bold cyan] [dim]({cs['endpoint']})[/dim]",
-            guide_style="cyan"
+    if not RICH_AVAILABLE:
+        return _render_topology_plain(topology)
+
+    # Build Rich tree
+    tree = Tree(
+        f"[bold cyan]{cs['hostname']}[/bold cyan] [dim]({cs['endpoint']})[/dim]",
+        guide_style="cyan"
+    )
+
+    # Add subnet routers
+    for router in topology.routers:
+        router_node = tree.add(
+            f"[green]{router['hostname']}[/green] [dim]{router['ipv4_address']}[/dim]"
         )
 
-        # Add subnet routers
-        routers = conn.execute("""
-            SELECT id, hostname, ipv4_address, endpoint FROM subnet_router ORDER BY hostname
-        """).fetchall()
+        # Advertised networks for this router
+        for net in router['advertised_networks']:
+            router_node.add(f"[dim]LAN: {net['network_cidr']}[/dim]")
 
-        for router in routers:
-            router_node = tree.add(
-                f"[green]{router['hostname']}[/green] [dim]{router['ipv4_address']}[/dim]"
-            )
+    # Add all remotes under CS
+    for remote in topology.remotes:
+        access_icon = _get_access_icon(remote['access_level'])
+        exit_indicator = " [yellow]->[/yellow]exit" if remote['exit_node_id'] else ""
+        tree.add(
+            f"{access_icon} {remote['hostname']} [dim]{remote['ipv4_address']}{exit_indicator}[/dim]"
+        )
 
-            # Get advertised networks for this router
-            networks = conn.execute("""
-                SELECT network_cidr FROM advertised_network WHERE subnet_router_id = ?
-            """, (router['id'],)).fetchall()
-
-            if networks:
-                for net in networks:
-                    router_node.add(f"[dim]LAN: {net['network_cidr']}[/dim]")
-
-        # Add all remotes under CS
-        remotes = conn.execute("""
-            SELECT hostname, ipv4_address, access_level, exit_node_id
-            FROM remote
-            ORDER BY hostname
-        """).fetchall()
-
-        for remote in remotes:
-            access_icon = _get_access_icon(remote['access_level'])
-            exit_indicator = " [yellow]->[/yellow]exit" if remote['exit_node_id'] else ""
-            tree.add(
-                f"{access_icon} {remote['hostname']} [dim]{remote['ipv4_address']}{exit_indicator}[/dim]"
+    # Add exit nodes
+    if topology.exit_nodes:
+        exit_branch = tree.add("[bold yellow]Exit Nodes[/bold yellow]")
+        for en in topology.exit_nodes:
+            exit_branch.add(
+                f"[yellow]{en['hostname']}[/yellow] [dim]{en['ipv4_address']} ({en['remote_count']} clients)[/dim]"
             )
 
-        # Add exit nodes
-        exit_nodes = conn.execute("""
-            SELECT id, hostname, ipv4_address FROM exit_node ORDER BY hostname
-        """).fetchall()
-
-        if exit_nodes:
-            exit_branch = tree.add("[bold yellow]Exit Nodes[/bold yellow]")
-            for en in exit_nodes:
-                # Count clients
-                client_count = conn.execute("""
-                    SELECT COUNT(*) FROM remote WHERE exit_node_id = ?
-                """, (en['id'],)).fetchone()[0]
-
-                exit_branch.add(
-                    f"[yellow]{en['hostname']}[/yellow] [dim]{en['ipv4_address']} ({client_count} clients)[/dim]"
-                )
-
-        # Render to string
-        with console.capture() as capture:
-            console.print(tree)
-        return capture.get()
-
-    finally:
-        conn.close()
+    # Render to string
+    with console.capture() as capture:
+        console.print(tree)
+    return capture.get()
 
 
 def _get_access_icon(access_level: str) -> str:
@@ -405,26 +378,21 @@ def _get_access_icon(access_level: str) -> str:
     return icons.get(access_level, '[white]?[/white]')
 
 
-def _render_topology_plain(conn, cs) -> str:
+def _render_topology_plain(topology: NetworkTopology) -> str:
     """Plain text topology for non-Rich environments."""
+    cs = topology.cs
     lines = []
     lines.append(f"{cs['hostname']} ({cs['endpoint']})")
     lines.append("|")
 
-    routers = conn.execute("""
-        SELECT id, hostname, ipv4_address FROM subnet_router ORDER BY hostname
-    """).fetchall()
-
+    routers = topology.routers
     for i, router in enumerate(routers):
         is_last_router = (i == len(routers) - 1)
         prefix = "\\--" if is_last_router else "+--"
         lines.append(f"{prefix} {router['hostname']} ({router['ipv4_address']})")
 
     # Add all remotes
-    remotes = conn.execute("""
-        SELECT hostname, ipv4_address FROM remote ORDER BY hostname
-    """).fetchall()
-
+    remotes = topology.remotes
     for j, remote in enumerate(remotes):
         is_last = (j == len(remotes) - 1)
         prefix = "\\--" if is_last else "+--"
@@ -439,8 +407,7 @@ def _render_topology_plain(conn, cs) -> str:
 
 def render_bandwidth_table(db_path: str, hours: int = 24) -> str:
     """Render bandwidth usage table."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = get_read_connection(db_path)
 
     try:
         # Try to get bandwidth data
@@ -465,8 +432,9 @@ def render_bandwidth_table(db_path: str, hours: int = 24) -> str:
         if not rows:
             return "No bandwidth data available yet."
 
+        names = entity_names(conn)
         if not RICH_AVAILABLE:
-            return _render_bandwidth_plain(conn, rows)
+            return _render_bandwidth_plain(names, rows)
 
         table = Table(title=f"Bandwidth Usage (Last {hours}h)", box=box.ROUNDED)
         table.add_column("Entity", style="cyan")
@@ -476,8 +444,7 @@ def render_bandwidth_table(db_path: str, hours: int = 24) -> str:
         table.add_column("Total", justify="right", style="bold")
 
         for row in rows:
-            # Get entity name
-            entity_name = _get_entity_name(conn, row['entity_type'], row['entity_id'])
+            entity_name = _get_entity_name(names, row['entity_type'], row['entity_id'])
 
             table.add_row(
                 entity_name,
@@ -495,20 +462,9 @@ def render_bandwidth_table(db_path: str, hours: int = 24) -> str:
         conn.close()
 
 
-def _get_entity_name(conn, entity_type: str, entity_id: int) -> str:
+def _get_entity_name(names: EntityNames, entity_type: str, entity_id: int) -> str:
     """Get entity hostname from type and ID."""
-    table_map = {
-        'cs': 'coordination_server',
-        'sr': 'subnet_router',
-        'remote': 'remote',
-        'exit_node': 'exit_node',
-    }
-    table = table_map.get(entity_type)
-    if table:
-        row = conn.execute(f"SELECT hostname FROM {table} WHERE id = ?", (entity_id,)).fetchone()
-        if row:
-            return row['hostname']
-    return f"{entity_type}-{entity_id}"
+    return names.name(entity_type, entity_id) or f"{entity_type}-{entity_id}"
 
 
 def _format_bytes(num_bytes: int) -> str:
@@ -523,13 +479,13 @@ def _format_bytes(num_bytes: int) -> str:
     return f"{num_bytes:.1f} PB"
 
 
-def _render_bandwidth_plain(conn, rows) -> str:
+def _render_bandwidth_plain(names: EntityNames, rows) -> str:
     """Plain text bandwidth table."""
     lines = ["Entity               Type      Received    Sent       Total"]
     lines.append("-" * 65)
 
     for row in rows:
-        entity_name = _get_entity_name(conn, row['entity_type'], row['entity_id'])
+        entity_name = _get_entity_name(names, row['entity_type'], row['entity_id'])
         lines.append(
             f"{entity_name:20} {row['entity_type']:8} "
             f"{_format_bytes(row['total_rx']):>10} "
@@ -543,8 +499,7 @@ def _render_bandwidth_plain(conn, rows) -> str:
 def render_bandwidth_sparkline(db_path: str, entity_type: str,
                                 entity_id: int, hours: int = 24) -> str:
     """Render simple sparkline for entity bandwidth."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = get_read_connection(db_path)
 
     try:
         rows = conn.execute("""
@@ -595,8 +550,7 @@ def render_dashboard(db_path: str) -> str:
     parts.append("")
 
     # Network summary
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = get_read_connection(db_path)
     try:
         cs_count = conn.execute("SELECT COUNT(*) FROM coordination_server").fetchone()[0]
         sr_count = conn.execute("SELECT COUNT(*) FROM subnet_router").fetchone()[0]
@@ -650,8 +604,7 @@ def render_status_bar(db_path: str) -> str:
     if not RICH_AVAILABLE:
         return ""
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = get_read_connection(db_path)
 
     try:
         # Count entities
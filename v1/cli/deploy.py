@@ -5,8 +5,9 @@
 """
 
 import sys
-import subprocess
+import hashlib
 import shutil
+import subprocess
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
@@ -14,7 +15,14 @@
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from v1.schema_semantic import WireGuardDBv2
-from v1.network_utils import is_local_host
+from v1.deploy_engine import (
+    DEFAULT_CANARY, DEFAULT_HOST_TIMEOUT, OK_STATUSES, Deadline, DeployTarget, HostResult,
+    WaveResult, capturing, emit, format_results, remaining, run_deployments, run_waves,
+)
+from v1.deploy_health import DEFAULT_SETTLE, DriftCheck, ExitNodeCheck, HandshakeCheck, HealthGate
+from v1.ssh_sessions import SSHTarget
+from v1.transport import BATCH_MARKER, batch_script, get_transport, split_batch
+from v1.config_diff import ConfigDiff, diff_configs
 
 # Rich imports for spinners
 try:
@@ -22,6 +30,7 @@
     from rich.live import Live
     from rich.spinner import Spinner
     from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
+    from rich.table import Table
     RICH_AVAILABLE = True
     console = Console()
 except ImportError:
@@ -39,52 +48,59 @@ def prompt_yes_no(question: str, default: bool = False) -> bool:
     return response in ('y', 'yes')
 
 
-def ssh_command(host: str, command: str, user: str = 'root', dry_run: bool = False) -> Tuple[int, str, str]:
+def ssh_command(host: str, command: str, user: str = 'root', dry_run: bool = False,
+                timeout: Optional[float] = None) -> Tuple[int, str, str]:
     """
     Execute command on remote host via SSH.
 
+    Runs over the active transport (see transport) - by default the shared
+    multiplexed SSH session for the host.
+
     Args:
-        host: Hostname or IP
+        host: Hostname or IP, optionally with :port
         command: Command to execute
         user: SSH user (default: root)
         dry_run: If True, print command but don't execute
+        timeout: Seconds before subprocess.TimeoutExpired (None = no limit)
 
     Returns:
         (returncode, stdout, stderr)
     """
-    ssh_cmd = ['ssh', f'{user}@{host}', command]
+    target = SSHTarget.parse(host, user)
 
     if dry_run:
-        print(f"  [DRY RUN] {' '.join(ssh_cmd)}")
+        emit(f"  [DRY RUN] ssh -p {target.port} {target.destination} {command}")
         return 0, "", ""
 
-    result = subprocess.run(ssh_cmd, capture_output=True, text=True)
+    result = get_transport().exec(target, command, timeout=timeout)
     return result.returncode, result.stdout, result.stderr
 
 
-def scp_file(local_path: Path, host: str, remote_path: str, user: str = 'root', dry_run: bool = False) -> int:
+def scp_file(local_path: Path, host: str, remote_path: str, user: str = 'root', dry_run: bool = False,
+             timeout: Optional[float] = None) -> int:
     """
     Copy file to remote host via SCP.
 
     Args:
         local_path: Local file path
-        host: Hostname or IP
+        host: Hostname or IP, optionally with :port
         remote_path: Remote file path
         user: SSH user (default: root)
         dry_run: If True, print command but don't execute
+        timeout: Seconds before subprocess.TimeoutExpired (None = no limit)
 
     Returns:
         Return code (0 = success)
     """
-    scp_cmd = ['scp', str(local_path), f'{user}@{host}:{remote_path}']
+    target = SSHTarget.parse(host, user)
 
     if dry_run:
-        print(f"  [DRY RUN] {' '.join(scp_cmd)}")
+        emit(f"  [DRY RUN] scp -P {target.port} {local_path} {target.destination}:{remote_path}")
         return 0
 
-    result = subprocess.run(scp_cmd, capture_output=True, text=True)
+    result = get_transport().put(local_path, target, remote_path, timeout=timeout)
     if result.returncode != 0:
-        print(f"  Error: {result.stderr}")
+        emit(f"  Error: {result.stderr}")
     return result.returncode
 
 
@@ -101,7 +117,7 @@ def run_with_spinner(message: str, operation, success_msg: str = None, error_msg
     Returns:
         Result from operation
     """
-    if RICH_AVAILABLE:
+    if RICH_AVAILABLE and not capturing():
         with Live(Spinner("dots", text=f"[cyan]{message}[/cyan]"), console=console, refresh_per_second=10) as live:
             success, result = operation()
             if success:
@@ -110,16 +126,53 @@ def run_with_spinner(message: str, operation, success_msg: str = None, error_msg
                 live.update(f"[red]✗ {error_msg or message}[/red]")
             return success, result
     else:
-        print(f"  {message}...")
+        emit(f"  {message}...")
         success, result = operation()
         if success:
-            print(f"  ✓ {success_msg or 'Done'}")
+            emit(f"  ✓ {success_msg or 'Done'}")
         else:
-            print(f"  ✗ {error_msg or 'Failed'}")
+            emit(f"  ✗ {error_msg or 'Failed'}")
         return success, result
 
 
-def backup_remote_config(host: str, remote_path: str, user: str = 'root', dry_run: bool = False) -> bool:
+def file_sha256(path: Path) -> Optional[str]:
+    """sha256 of a local file, or None if it can't be read"""
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def remote_config_hash(host: str, remote_path: str, user: str = 'root',
+                       deadline: Optional[Deadline] = None) -> Optional[str]:
+    """
+    sha256 of the config on a remote host, in a single SSH command.
+
+    Returns:
+        Hex digest, '' if the file doesn't exist, None if it couldn't be
+        determined (SSH error, no permission, no sha256sum)
+    """
+    returncode, stdout, stderr = ssh_command(
+        host,
+        f'if [ -f {remote_path} ]; then sha256sum {remote_path}; else echo notfound; fi',
+        user=user,
+        dry_run=False,
+        timeout=remaining(deadline)
+    )
+    if returncode != 0:
+        return None
+    output = stdout.strip()
+    if output == 'notfound':
+        return ''
+    digest = output.split()[0] if output else ''
+    if len(digest) != 64:
+        return None
+    return digest.lower()
+
+
+def backup_remote_config(host: str, remote_path: str, user: str = 'root', dry_run: bool = False,
+                         deadline: Optional[Deadline] = None, exists: Optional[bool] = None,
+                         timestamp: Optional[str] = None) -> bool:
     """
     Backup existing config on remote host.
 
@@ -128,15 +181,20 @@ def backup_remote_config(host: str, remote_path: str, user: str = 'root', dry_ru
         remote_path: Remote config path (e.g., /etc/wireguard/wg0.conf)
         user: SSH user
         dry_run: If True, don't actually backup
+        deadline: Time budget of the host's deployment
+        exists: Whether the remote config exists, if already known
+            (skips the check)
+        timestamp: Backup suffix (default: now); a rollout passes its id so
+            it can find the backups again for rollback
 
     Returns:
         True if backup succeeded (or file doesn't exist), False on error
     """
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_path = f"{remote_path}.backup.{timestamp}"
 
     if dry_run:
-        print(f"  [DRY RUN] Would backup {remote_path} to {backup_path}")
+        emit(f"  [DRY RUN] Would backup {remote_path} to {backup_path}")
         return True
 
     # Check if file exists
@@ -145,24 +203,28 @@ def check_exists():
             host,
             f'test -f {remote_path} && echo exists || echo notfound',
             user=user,
-            dry_run=False
+            dry_run=False,
+            timeout=remaining(deadline)
         )
         if returncode != 0:
             return False, stderr
         return True, stdout
 
-    success, result = run_with_spinner(
-        "Checking for existing config",
-        check_exists,
-        success_msg="Config check complete"
-    )
+    if exists is None:
+        success, result = run_with_spinner(
+            "Checking for existing config",
+            check_exists,
+            success_msg="Config check complete"
+        )
 
-    if not success:
-        print(f"  Error checking for existing config: {result}")
-        return False
+        if not success:
+            emit(f"  Error checking for existing config: {result}")
+            return False
+    else:
+        result = 'exists' if exists else 'notfound'
 
     if 'notfound' in result:
-        print(f"  No existing config to backup")
+        emit(f"  No existing config to backup")
         return True
 
     # File exists, back it up
@@ -171,7 +233,8 @@ def do_backup():
             host,
             f'cp {remote_path} {backup_path}',
             user=user,
-            dry_run=False
+            dry_run=False,
+            timeout=remaining(deadline)
         )
         if returncode != 0:
             return False, stderr
@@ -184,13 +247,89 @@ def do_backup():
     )
 
     if not success:
-        print(f"  Error backing up config: {result}")
+        emit(f"  Error backing up config: {result}")
         return False
 
     return True
 
 
-def restart_wireguard(host: str, interface: str = 'wg0', user: str = 'root', dry_run: bool = False) -> bool:
+def run_on_host(host: str, command: str, user: str = 'root',
+                deadline: Optional[Deadline] = None) -> Tuple[int, str, str]:
+    """Run a shell command on a host - locally if it is this machine"""
+    if get_transport().is_local(SSHTarget.parse(host).host):
+        result = subprocess.run(['sh', '-c', command], capture_output=True, text=True,
+                                timeout=remaining(deadline))
+        return result.returncode, result.stdout, result.stderr
+    return ssh_command(host, command, user=user, dry_run=False, timeout=remaining(deadline))
+
+
+def fetch_interface_state(host: str, remote_path: str, interface: str = 'wg0', user: str = 'root',
+                          deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Installed config file and running config (`wg showconf`), in one command.
+
+    Returns:
+        (installed, running) - '' for a missing file / interface that isn't
+        up, (None, None) if the host couldn't be queried
+    """
+    commands = [f"cat {remote_path} 2>/dev/null", f"wg showconf {interface} 2>/dev/null"]
+    returncode, stdout, stderr = run_on_host(host, batch_script(commands), user=user,
+                                             deadline=deadline)
+    if returncode != 0 or stdout.count(BATCH_MARKER) != len(commands):
+        return None, None
+    installed, running = split_batch(
+        subprocess.CompletedProcess([], returncode, stdout, stderr), len(commands))
+    return (installed.stdout if installed.returncode == 0 else '',
+            running.stdout if running.returncode == 0 else '')
+
+
+def plan_live_apply(host: str, config_file: Path, remote_path: str, interface: str = 'wg0',
+                    user: str = 'root', deadline: Optional[Deadline] = None) -> ConfigDiff:
+    """Diff the host's running peers against the generated config and report it"""
+    installed, running = fetch_interface_state(host, remote_path, interface, user=user,
+                                               deadline=deadline)
+    diff = diff_configs(installed, running, config_file.read_text())
+    if installed is None:
+        diff.restart_reasons = ["couldn't read running config"]
+
+    emit(f"  Peers: {diff.summary()}")
+    for line in diff.report_lines():
+        emit(f"    {line}")
+    return diff
+
+
+def apply_live(host: str, interface: str = 'wg0', user: str = 'root',
+               deadline: Optional[Deadline] = None) -> bool:
+    """
+    Apply the installed config's peers to the running interface.
+
+    `wg syncconf` adds, removes and updates peers in place; tunnels of
+    unchanged peers are not interrupted.
+    """
+    def do_sync():
+        returncode, stdout, stderr = run_on_host(
+            host,
+            f"bash -c 'wg syncconf {interface} <(wg-quick strip {interface})'",
+            user=user,
+            deadline=deadline
+        )
+        if returncode != 0:
+            return False, stderr
+        return True, None
+
+    success, result = run_with_spinner(
+        f"Applying peer changes live (wg syncconf {interface})",
+        do_sync,
+        success_msg="Peers updated without restart"
+    )
+
+    if not success:
+        emit(f"  Error applying config: {result}")
+    return success
+
+
+def restart_wireguard(host: str, interface: str = 'wg0', user: str = 'root', dry_run: bool = False,
+                      deadline: Optional[Deadline] = None) -> bool:
     """
     Restart WireGuard on remote host.
 
@@ -199,24 +338,27 @@ def restart_wireguard(host: str, interface: str = 'wg0', user: str = 'root', dry
         interface: WireGuard interface name (default: wg0)
         user: SSH user
         dry_run: If True, don't actually restart
+        deadline: Time budget of the host's deployment
 
     Returns:
         True if restart succeeded, False on error
     """
     if dry_run:
-        print(f"  [DRY RUN] Would restart WireGuard ({interface})")
+        emit(f"  [DRY RUN] Would restart WireGuard ({interface})")
         return True
 
     def do_restart():
         # Try wg-quick down first (may not be running)
-        ssh_command(host, f'wg-quick down {interface}', user=user, dry_run=False)
+        ssh_command(host, f'wg-quick down {interface}', user=user, dry_run=False,
+                    timeout=remaining(deadline))
 
         # Bring it up
         returncode, stdout, stderr = ssh_command(
             host,
             f'wg-quick up {interface}',
             user=user,
-            dry_run=False
+            dry_run=False,
+            timeout=remaining(deadline)
         )
 
         if returncode != 0:
@@ -230,82 +372,118 @@ def do_restart():
     )
 
     if not success:
-        print(f"  Error restarting WireGuard: {result}")
+        emit(f"  Error restarting WireGuard: {result}")
         return False
 
     return True
 
 
-def deploy_to_host(
-    hostname: str,
-    config_file: Path,
-    endpoint: str,
+def deploy_host(
+    target: DeployTarget,
     interface: str = 'wg0',
-    user: str = 'root',
     restart: bool = False,
-    dry_run: bool = False
-) -> bool:
+    dry_run: bool = False,
+    deadline: Optional[Deadline] = None,
+    force: bool = False,
+    hot: bool = False,
+    backup_id: Optional[str] = None
+) -> Tuple[str, str]:
     """
-    Deploy config to a single host.
+    Deploy config to a single host within its deadline.
 
-    Args:
-        hostname: Human-readable hostname (for display)
-        config_file: Local config file to deploy
-        endpoint: SSH target (hostname or IP)
-        interface: WireGuard interface name
-        user: SSH user
-        restart: Whether to restart WireGuard after deploy
-        dry_run: If True, print what would be done
+    The remote config's sha256 is fetched first; a host already running
+    the generated config is left alone (no backup, upload or restart)
+    unless `force` is set.
+
+    With `hot`, peer changes are applied to the running interface with
+    `wg syncconf` instead of a restart; WireGuard is only restarted when
+    [Interface] fields or routes change (see config_diff).
+
+    `backup_id` names the backup of the installed config
+    (<config>.backup.<backup_id>); see rollback_host().
+
+    Output goes through emit(), so the deploy engine can run this on a
+    worker thread.
 
     Returns:
-        True if deploy succeeded, False on error
+        (status, message) - status is 'deployed', 'unchanged' or 'failed'
     """
+    config_file = target.config_file
+    endpoint = target.endpoint
+    user = target.user
     remote_path = f'/etc/wireguard/{interface}.conf'
 
-    print(f"\n{'─' * 70}")
-    print(f"Deploy: {hostname} ({endpoint})")
-    print(f"{'─' * 70}")
-    print(f"  Local:  {config_file}")
-    print(f"  Remote: {remote_path}")
+    emit(f"\n{'─' * 70}")
+    emit(f"Deploy: {target.hostname} ({endpoint})")
+    emit(f"{'─' * 70}")
+    emit(f"  Local:  {config_file}")
+    emit(f"  Remote: {remote_path}")
 
     if not config_file.exists():
-        print(f"  Error: Config file not found: {config_file}")
-        return False
+        emit(f"  Error: Config file not found: {config_file}")
+        return 'failed', f"config file not found: {config_file}"
+
+    local_hash = None if force else file_sha256(config_file)
+    diff = None
 
     # Check if target is localhost
-    if is_local_host(endpoint.split(':')[0]):  # Strip port if present
-        print(f"  Detected localhost - using direct file copy")
+    if get_transport().is_local(endpoint.split(':')[0]):  # Strip port if present
+        emit(f"  Detected localhost - using direct file copy")
+
+        if local_hash and local_hash == file_sha256(Path(remote_path)):
+            emit(f"  ✓ Unchanged - installed config is identical, skipping")
+            return 'unchanged', "identical config"
+
+        if hot and not dry_run:
+            diff = plan_live_apply(endpoint, config_file, remote_path, interface, user=user,
+                                   deadline=deadline)
 
         if dry_run:
-            print(f"  [DRY RUN] Would copy {config_file} to {remote_path}")
+            emit(f"  [DRY RUN] Would copy {config_file} to {remote_path}")
         else:
             # Backup existing config
             remote_path_obj = Path(remote_path)
             if remote_path_obj.exists():
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                timestamp = backup_id or datetime.now().strftime('%Y%m%d_%H%M%S')
                 backup_path = f"{remote_path}.backup.{timestamp}"
-                print(f"  Backing up to {backup_path}")
+                emit(f"  Backing up to {backup_path}")
                 shutil.copy2(remote_path_obj, backup_path)
 
             # Copy new config
-            print(f"  Copying config...")
+            emit(f"  Copying config...")
             try:
                 shutil.copy2(config_file, remote_path_obj)
-                print(f"  ✓ Config deployed")
+                emit(f"  ✓ Config deployed")
             except Exception as e:
-                print(f"  ✗ Deploy failed: {e}")
-                return False
+                emit(f"  ✗ Deploy failed: {e}")
+                return 'failed', f"copy failed: {e}"
     else:
+        # Compare with the installed config (one SSH round trip)
+        remote_hash = None
+        if local_hash and not dry_run:
+            remote_hash = remote_config_hash(endpoint, remote_path, user=user, deadline=deadline)
+            if remote_hash == local_hash:
+                emit(f"  ✓ Unchanged - installed config is identical, skipping")
+                return 'unchanged', "identical config"
+
+        if hot and not dry_run:
+            diff = plan_live_apply(endpoint, config_file, remote_path, interface, user=user,
+                                   deadline=deadline)
+
         # Backup existing config
-        if not backup_remote_config(endpoint, remote_path, user=user, dry_run=dry_run):
-            print(f"  Warning: Backup failed, continuing anyway...")
+        if not backup_remote_config(endpoint, remote_path, user=user, dry_run=dry_run,
+                                    deadline=deadline,
+                                    exists=None if remote_hash is None else remote_hash != '',
+                                    timestamp=backup_id):
+            emit(f"  Warning: Backup failed, continuing anyway...")
 
         # Deploy new config
         if dry_run:
-            print(f"  [DRY RUN] Would deploy config via SCP")
+            emit(f"  [DRY RUN] Would deploy config via SCP")
         else:
             def do_scp():
-                result = scp_file(config_file, endpoint, remote_path, user=user, dry_run=False)
+                result = scp_file(config_file, endpoint, remote_path, user=user, dry_run=False,
+                                  timeout=remaining(deadline))
                 if result != 0:
                     return False, "SCP failed"
                 return True, None
@@ -317,38 +495,119 @@ def do_scp():
             )
 
             if not success:
-                print(f"  ✗ Deploy failed")
-                return False
+                emit(f"  ✗ Deploy failed")
+                return 'failed', "SCP failed"
+
+    # Live apply: syncconf unless the interface itself changed
+    if hot:
+        if dry_run:
+            emit(f"  [DRY RUN] Would apply peer changes live (wg syncconf {interface})")
+        elif diff.needs_restart:
+            emit(f"  Restart required: {'; '.join(diff.restart_reasons)}")
+            if not restart_wireguard(endpoint, interface=interface, user=user, dry_run=False,
+                                     deadline=deadline):
+                emit(f"  ✗ Restart failed")
+                return 'failed', "restart failed"
+            emit(f"  ✓ Deploy complete")
+            return 'deployed', f"restarted: {'; '.join(diff.restart_reasons)}"
+        else:
+            if diff.has_peer_changes and not apply_live(endpoint, interface=interface, user=user,
+                                                        deadline=deadline):
+                emit(f"  ✗ Live apply failed")
+                return 'failed', "wg syncconf failed"
+            emit(f"  ✓ Deploy complete")
+            return 'deployed', f"live: {diff.summary()}"
 
     # Restart if requested
     if restart:
-        if not restart_wireguard(endpoint, interface=interface, user=user, dry_run=dry_run):
-            print(f"  ✗ Restart failed")
-            return False
+        if not restart_wireguard(endpoint, interface=interface, user=user, dry_run=dry_run,
+                                 deadline=deadline):
+            emit(f"  ✗ Restart failed")
+            return 'failed', "restart failed"
 
-    print(f"  ✓ Deploy complete")
-    return True
+    emit(f"  ✓ Deploy complete")
+    return 'deployed', "dry run" if dry_run else ("restarted" if restart else "")
 
 
-def deploy_all(db: WireGuardDBv2, output_dir: Path, user: str = 'root', restart: bool = False, dry_run: bool = False) -> int:
+def rollback_host(target: DeployTarget, backup_id: str, interface: str = 'wg0',
+                  restart: bool = False) -> Tuple[bool, str]:
     """
-    Deploy all configs to their respective hosts.
+    Put back the config a rollout replaced, from <config>.backup.<backup_id>.
 
     Args:
-        db: Database connection
-        output_dir: Directory containing generated configs
+        target: Host to roll back
+        backup_id: Backup suffix the rollout deployed with
+        interface: WireGuard interface name
+        restart: Restart WireGuard so the restored config takes effect
+
+    Returns:
+        (success, message)
+    """
+    remote_path = f'/etc/wireguard/{interface}.conf'
+    backup_path = f'{remote_path}.backup.{backup_id}'
+    emit(f"  Rolling back {target.hostname} from {backup_path}")
+
+    try:
+        returncode, stdout, stderr = run_on_host(
+            target.endpoint,
+            f'if [ -f {backup_path} ]; then cp {backup_path} {remote_path} && echo restored; '
+            f'else echo nobackup; fi',
+            user=target.user
+        )
+    except Exception as e:
+        return False, str(e)
+    if returncode != 0:
+        return False, stderr.strip() or "restore failed"
+    if 'nobackup' in stdout:
+        return False, "no backup to restore"
+
+    if restart and not restart_wireguard(target.endpoint, interface=interface, user=target.user):
+        return False, "restored, but restart failed"
+    return True, f"rolled back to backup {backup_id}"
+
+
+def deploy_to_host(
+    hostname: str,
+    config_file: Path,
+    endpoint: str,
+    interface: str = 'wg0',
+    user: str = 'root',
+    restart: bool = False,
+    dry_run: bool = False,
+    force: bool = False,
+    hot: bool = False
+) -> bool:
+    """
+    Deploy config to a single host.
+
+    Args:
+        hostname: Human-readable hostname (for display)
+        config_file: Local config file to deploy
+        endpoint: SSH target (hostname or IP)
+        interface: WireGuard interface name
         user: SSH user
-        restart: Whether to restart WireGuard
+        restart: Whether to restart WireGuard after deploy
         dry_run: If True, print what would be done
+        force: Deploy even if the installed config is identical
+        hot: Apply peer changes live, restart only if [Interface] changed
 
     Returns:
-        Number of failed deployments
+        True if deploy succeeded (or the host was up to date), False on error
     """
-    print("\n" + "=" * 70)
-    print("DEPLOY ALL CONFIGS")
-    print("=" * 70)
+    target = DeployTarget('host', hostname, config_file, endpoint, user)
+    status, _ = deploy_host(target, interface=interface, restart=restart, dry_run=dry_run,
+                            force=force, hot=hot)
+    return status in OK_STATUSES
 
-    deployments = []
+
+def collect_targets(db: WireGuardDBv2, output_dir: Path, user: str = 'root') -> List[DeployTarget]:
+    """
+    Deployable hosts, coordination server first.
+
+    Remotes (clients) are not targets: they have no endpoints - they're
+    behind NAT and initiate connections TO the coordination server.
+    """
+    targets = []
 
     with db._connection() as conn:
         cursor = conn.cursor()
@@ -361,15 +620,11 @@ def deploy_all(db: WireGuardDBv2, output_dir: Path, user: str = 'root', restart:
         row = cursor.fetchone()
         if row:
             hostname, endpoint = row
-            config_file = output_dir / 'coordination.conf'
             if endpoint and endpoint != 'UNKNOWN':
-                deployments.append({
-                    'entity_type': 'Coordination Server',
-                    'hostname': hostname,
-                    'config_file': config_file,
-                    'endpoint': endpoint,
-                    'user': user  # Use command-line user
-                })
+                targets.append(DeployTarget(
+                    'coordination_server', hostname, output_dir / 'coordination.conf',
+                    endpoint, user  # Use command-line user
+                ))
             else:
                 print(f"\nWARNING:  Skipping {hostname}: No endpoint configured")
 
@@ -381,14 +636,10 @@ def deploy_all(db: WireGuardDBv2, output_dir: Path, user: str = 'root', restart:
             ORDER BY hostname
         """)
         for hostname, endpoint in cursor.fetchall():
-            config_file = output_dir / f'{hostname}.conf'
-            deployments.append({
-                'entity_type': 'Subnet Router',
-                'hostname': hostname,
-                'config_file': config_file,
-                'endpoint': endpoint,
-                'user': user  # Use command-line user
-            })
+            targets.append(DeployTarget(
+                'subnet_router', hostname, output_dir / f'{hostname}.conf',
+                endpoint, user  # Use command-line user
+            ))
 
         # Exit Nodes
         cursor.execute("""
@@ -398,20 +649,131 @@ def deploy_all(db: WireGuardDBv2, output_dir: Path, user: str = 'root', restart:
             ORDER BY hostname
         """)
         for hostname, ssh_host, ssh_user, ssh_port in cursor.fetchall():
-            config_file = output_dir / f'{hostname}.conf'
             # Use ssh_host:ssh_port as the endpoint for SSH
             ssh_endpoint = f"{ssh_host}:{ssh_port}" if ssh_port and ssh_port != 22 else ssh_host
-            deployments.append({
-                'entity_type': 'Exit Node',
-                'hostname': hostname,
-                'config_file': config_file,
-                'endpoint': ssh_endpoint,
-                'user': ssh_user or 'root'  # Use DB-stored user
-            })
-
-        # Note: Remotes (clients) don't have endpoints - they're behind NAT
-        # and initiate connections TO the coordination server, not vice versa.
-        # Deployment targets are: coordination server, subnet routers, exit nodes.
+            targets.append(DeployTarget(
+                'exit_node', hostname, output_dir / f'{hostname}.conf',
+                ssh_endpoint, ssh_user or 'root'  # Use DB-stored user
+            ))
+
+    return targets
+
+
+def build_health_gate(db: WireGuardDBv2, targets: List[DeployTarget], applied: bool = True,
+                      interface: str = 'wg0', settle: float = DEFAULT_SETTLE) -> HealthGate:
+    """
+    Health gate for a wave rollout.
+
+    Drift is only checked when the new config was applied (restart or hot
+    apply); a plain copy leaves the old peers running by design.
+    """
+    hub = next((t for t in targets if t.is_coordination_server), None)
+    checks = [HandshakeCheck(db.db_path, hub, interface), ExitNodeCheck(db.db_path)]
+    if applied:
+        remote_path = f'/etc/wireguard/{interface}.conf'
+        checks.append(DriftCheck(
+            lambda t: fetch_interface_state(t.endpoint, remote_path, interface, user=t.user)[1]))
+    return HealthGate(checks, settle=settle)
+
+
+def print_wave(wave: WaveResult):
+    """One line per finished wave, plus its health findings"""
+    mark = '✓' if wave.ok else '✗'
+    hosts = ', '.join(t.hostname for t in wave.targets)
+    print(f"  {mark} {wave.label}: {hosts}")
+    for problem in wave.problems:
+        print(f"      {problem}")
+    if wave.rolled_back:
+        print(f"      Rolled back: {', '.join(wave.rolled_back)}")
+
+
+ENTITY_LABELS = {
+    'coordination_server': 'Coordination Server',
+    'subnet_router': 'Subnet Router',
+    'exit_node': 'Exit Node',
+}
+
+STATUS_STYLES = {
+    'deployed': 'green',
+    'unchanged': 'dim',
+    'failed': 'red',
+    'timeout': 'red',
+    'skipped': 'yellow',
+    'rolled_back': 'yellow',
+}
+
+
+def print_results(results: List[HostResult]):
+    """Per-host result table, then the captured output of failed hosts"""
+    if RICH_AVAILABLE:
+        table = Table(title="Deployment Results")
+        table.add_column("Host")
+        table.add_column("Type")
+        table.add_column("Status")
+        table.add_column("Time", justify="right")
+        table.add_column("Message")
+        for r in results:
+            style = STATUS_STYLES.get(r.status, 'white')
+            table.add_row(r.target.hostname, ENTITY_LABELS.get(r.target.entity_type, r.target.entity_type),
+                          f"[{style}]{r.status}[/{style}]", f"{r.duration:.1f}s", r.message)
+        console.print(table)
+    else:
+        print(format_results(results))
+
+    for r in results:
+        if not r.ok and r.log:
+            print(f"\nOutput from {r.target.hostname}:")
+            for line in r.log:
+                print(line)
+
+
+def deploy_all(
+    db: WireGuardDBv2,
+    output_dir: Path,
+    user: str = 'root',
+    restart: bool = False,
+    dry_run: bool = False,
+    parallel: int = 1,
+    timeout: Optional[float] = DEFAULT_HOST_TIMEOUT,
+    force: bool = False,
+    hot: bool = False,
+    wave_size: int = 0,
+    canary: int = DEFAULT_CANARY,
+    settle: float = DEFAULT_SETTLE
+) -> int:
+    """
+    Deploy all configs to their respective hosts.
+
+    Peers (subnet routers, exit nodes) are deployed first, up to `parallel`
+    at a time; the coordination server last, once they all succeeded.
+
+    With `wave_size`, the rollout goes in waves: `canary` hosts, then
+    batches of `wave_size`, then the coordination server. Each wave must
+    pass the health gates (handshakes, exit node health, drift) within
+    `settle` seconds, or it is rolled back and the rollout stops.
+
+    Args:
+        db: Database connection
+        output_dir: Directory containing generated configs
+        user: SSH user
+        restart: Whether to restart WireGuard
+        dry_run: If True, print what would be done
+        parallel: Hosts deployed concurrently
+        timeout: Per-host timeout in seconds (None = no limit)
+        force: Redeploy hosts whose installed config is already identical
+        hot: Apply peer changes live, restart only if [Interface] changed
+        wave_size: Hosts per wave after the canary (0 = no waves)
+        canary: Hosts in the first wave
+        settle: Seconds each wave gets to pass the health gates
+
+    Returns:
+        Number of failed deployments
+    """
+    print("\n" + "=" * 70)
+    print("DEPLOY ALL CONFIGS")
+    print("=" * 70)
+
+    deployments = collect_targets(db, output_dir, user)
 
     if not deployments:
         print("\nWARNING:  No deployable hosts found (endpoints not configured)")
@@ -420,7 +782,12 @@ def deploy_all(db: WireGuardDBv2, output_dir: Path, user: str = 'root', restart:
     # Summary
     print(f"\nFound {len(deployments)} deployable host(s):")
     for d in deployments:
-        print(f"  - {d['hostname']:30} ({d['entity_type']:20}) → {d['endpoint']}")
+        print(f"  - {d.hostname:30} ({ENTITY_LABELS[d.entity_type]:20}) → {d.endpoint}")
+    if parallel > 1:
+        print(f"\nDeploying up to {parallel} hosts at a time; coordination server last")
+    if wave_size:
+        print(f"\nRolling out in waves: {canary} canary host(s), then {wave_size} at a time, "
+              f"health-gated ({settle:.0f}s settle)")
 
     print()
     if dry_run:
@@ -429,9 +796,27 @@ def deploy_all(db: WireGuardDBv2, output_dir: Path, user: str = 'root', restart:
         print("Cancelled.")
         return 0
 
-    # Deploy with progress indicator
-    failures = 0
+    rollout_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    def deploy_one(target: DeployTarget, deadline: Deadline) -> Tuple[str, str]:
+        return deploy_host(target, restart=restart, dry_run=dry_run, deadline=deadline,
+                           force=force, hot=hot, backup_id=rollout_id)
+
+    def deploy(on_progress):
+        if not wave_size or dry_run:
+            return run_deployments(deployments, deploy_one, parallel=parallel,
+                                   timeout=timeout, on_progress=on_progress)
+        gate = build_health_gate(db, deployments, applied=restart or hot, settle=settle)
+        gate.baseline()
+        results, waves = run_waves(
+            deployments, deploy_one, gate.check,
+            lambda target: rollback_host(target, rollout_id, restart=restart or hot),
+            canary=canary, wave_size=wave_size, parallel=parallel, timeout=timeout,
+            on_progress=on_progress, on_wave=print_wave
+        )
+        return results
 
+    # Deploy with progress indicator
     if RICH_AVAILABLE and len(deployments) > 1 and not dry_run:
         # Show overall progress bar for multiple deployments
         print()
@@ -445,40 +830,39 @@ def deploy_all(db: WireGuardDBv2, output_dir: Path, user: str = 'root', restart:
         ) as progress:
             task = progress.add_task("[cyan]Deploying configs...", total=len(deployments))
 
-            for d in deployments:
-                progress.update(task, description=f"[cyan]Deploying to {d['hostname']}...")
-                success = deploy_to_host(
-                    hostname=d['hostname'],
-                    config_file=d['config_file'],
-                    endpoint=d['endpoint'],
-                    user=d['user'],
-                    restart=restart,
-                    dry_run=dry_run
-                )
-                if not success:
-                    failures += 1
-                progress.advance(task)
+            def on_progress(state, result):
+                progress.update(task, completed=state.done,
+                                description=f"[cyan]Deploying configs ({state.summary()})")
+
+            results = deploy(on_progress)
     else:
-        # No progress bar for single deployment or dry run
-        for d in deployments:
-            success = deploy_to_host(
-                hostname=d['hostname'],
-                config_file=d['config_file'],
-                endpoint=d['endpoint'],
-                user=d['user'],
-                restart=restart,
-                dry_run=dry_run
-            )
-            if not success:
-                failures += 1
+        def on_progress(state, result):
+            if result is not None and parallel > 1:
+                mark = '✓' if result.ok else '✗'
+                print(f"  [{state.done}/{state.total}] {mark} {result.target.hostname} "
+                      f"{result.status} ({result.duration:.1f}s)")
+
+        results = deploy(on_progress)
+
+    failures = sum(1 for r in results if not r.ok)
+    unchanged = sum(1 for r in results if r.status == 'unchanged')
 
     # Summary
     print(f"\n{'=' * 70}")
     print("DEPLOYMENT SUMMARY")
     print(f"{'=' * 70}")
-    print(f"  Total:   {len(deployments)}")
-    print(f"  Success: {len(deployments) - failures}")
+    print_results(results)
+    print()
+    print(f"  Total:   {len(results)}")
+    print(f"  Updated: {len(results) - failures - unchanged}")
+    print(f"  Skipped: {unchanged} (unchanged)")
+    rolled_back = sum(1 for r in results if r.status == 'rolled_back')
+    if rolled_back:
+        print(f"  Rolled back: {rolled_back}")
     print(f"  Failed:  {failures}")
+    if not dry_run:
+        transport = get_transport()
+        print(f"  {transport.name + ':':<9}{transport.summary()}")
     print()
 
     return failures
@@ -490,7 +874,9 @@ def deploy_single(
     target: str,
     user: str = 'root',
     restart: bool = False,
-    dry_run: bool = False
+    dry_run: bool = False,
+    force: bool = False,
+    hot: bool = False
 ) -> int:
     """
     Deploy config to a single host by hostname.
@@ -502,6 +888,8 @@ def deploy_single(
         user: SSH user
         restart: Whether to restart WireGuard
         dry_run: If True, print what would be done
+        force: Deploy even if the installed config is identical
+        hot: Apply peer changes live, restart only if [Interface] changed
 
     Returns:
         0 on success, 1 on failure
@@ -529,7 +917,9 @@ def deploy_single(
                 endpoint=endpoint,
                 user=user,
                 restart=restart,
-                dry_run=dry_run
+                dry_run=dry_run,
+                force=force,
+                hot=hot
             )
             return 0 if success else 1
 
@@ -553,7 +943,9 @@ def deploy_single(
                 endpoint=endpoint,
                 user=user,
                 restart=restart,
-                dry_run=dry_run
+                dry_run=dry_run,
+                force=force,
+                hot=hot
             )
             return 0 if success else 1
 
@@ -577,7 +969,9 @@ def deploy_single(
                 endpoint=endpoint,
                 user=user,
                 restart=restart,
-                dry_run=dry_run
+                dry_run=dry_run,
+                force=force,
+                hot=hot
             )
             return 0 if success else 1
 
@@ -605,7 +999,9 @@ def deploy_single(
                 endpoint=ssh_endpoint,
                 user=exit_user,
                 restart=restart,
-                dry_run=dry_run
+                dry_run=dry_run,
+                force=force,
+                hot=hot
             )
             return 0 if success else 1
 
@@ -626,13 +1022,23 @@ def deploy_configs(args) -> int:
     user = getattr(args, 'user', 'root')
     restart = getattr(args, 'restart', False)
     dry_run = getattr(args, 'dry_run', False)
+    parallel = getattr(args, 'parallel', 1) or 1
+    timeout = getattr(args, 'timeout', DEFAULT_HOST_TIMEOUT)
+    force = getattr(args, 'force', False)
+    hot = getattr(args, 'hot', False)
+    wave_size = getattr(args, 'wave_size', 0) or 0
+    canary = getattr(args, 'canary', DEFAULT_CANARY)
+    settle = getattr(args, 'settle', DEFAULT_SETTLE)
 
     # Deploy to specific host or all hosts?
     entity = getattr(args, 'entity', None) or getattr(args, 'host', None)
     if entity:
-        return deploy_single(db, output_dir, entity, user=user, restart=restart, dry_run=dry_run)
+        return deploy_single(db, output_dir, entity, user=user, restart=restart, dry_run=dry_run,
+                             force=force, hot=hot)
     else:
-        failures = deploy_all(db, output_dir, user=user, restart=restart, dry_run=dry_run)
+        failures = deploy_all(db, output_dir, user=user, restart=restart, dry_run=dry_run,
+                              parallel=parallel, timeout=timeout, force=force,
+                              hot=hot, wave_size=wave_size, canary=canary, settle=settle)
         return 1 if failures > 0 else 0
 
 
@@ -646,6 +1052,13 @@ def deploy_configs(args) -> int:
     parser.add_argument('--user', default='root', help='SSH user')
     parser.add_argument('--restart', action='store_true', help='Restart WireGuard after deploy')
     parser.add_argument('--dry-run', dest='dry_run', action='store_true', help='Show what would be done')
+    parser.add_argument('--parallel', type=int, default=1, help='Hosts to deploy concurrently')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_HOST_TIMEOUT, help='Per-host timeout (seconds)')
+    parser.add_argument('--force', action='store_true', help='Deploy even if the installed config is identical')
+    parser.add_argument('--hot', action='store_true', help='Apply peer changes live (wg syncconf)')
+    parser.add_argument('--wave-size', dest='wave_size', type=int, default=0, help='Roll out in health-gated waves')
+    parser.add_argument('--canary', type=int, default=DEFAULT_CANARY, help='Hosts in the canary wave')
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE, help='Seconds per wave to pass health gates')
 
     args = parser.parse_args()
     sys.exit(deploy_configs(args))
@@ -144,7 +144,6 @@ def generate_sysinfo() -> str:
         ("rich", "Terminal UI"),
         ("nacl", "Cryptography (PyNaCl)"),
         ("qrcode", "QR code generation"),
-        ("paramiko", "SSH deployment"),
     ]
 
     for module_name, description in deps:
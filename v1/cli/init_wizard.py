@@ -11,6 +11,7 @@
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from v1.schema_semantic import WireGuardDBv2
+from v1.ipam import IPAM
 from v1.keygen import generate_keypair
 
 
@@ -109,11 +110,8 @@ def setup_subnet_router(cs_config: Dict, router_num: int) -> Optional[Dict]:
     lan_interface = prompt("LAN interface name", default="eth0")
 
     # Auto-assign VPN IP
-    base_ip = cs_config['network_ipv4'].split('/')[0].rsplit('.', 1)[0]
-    router_ip = f"{base_ip}.{20 + router_num}/32"
-
-    ipv6_base = cs_config['network_ipv6'].split('/')[0].rstrip(':')
-    router_ipv6 = f"{ipv6_base}::{20 + router_num:x}/128"
+    ipam = IPAM(cs_config['network_ipv4'], cs_config['network_ipv6'])
+    router_ip, router_ipv6 = ipam.address_at('router', router_num)
 
     print(f"\nAssigned VPN addresses:")
     print(f"  IPv4: {router_ip}")
@@ -149,11 +147,8 @@ def setup_remote(cs_config: Dict, remote_num: int) -> Dict:
     device_type = prompt("  Device type [mobile/laptop/server]", default="mobile")
 
     # Auto-assign VPN IP
-    base_ip = cs_config['network_ipv4'].split('/')[0].rsplit('.', 1)[0]
-    remote_ip = f"{base_ip}.{30 + remote_num}/32"
-
-    ipv6_base = cs_config['network_ipv6'].split('/')[0].rstrip(':')
-    remote_ipv6 = f"{ipv6_base}::{30 + remote_num:x}/128"
+    ipam = IPAM(cs_config['network_ipv4'], cs_config['network_ipv6'])
+    remote_ip, remote_ipv6 = ipam.address_at('remote', remote_num)
 
     has_static_endpoint = device_type == 'server'
     endpoint = None
@@ -192,12 +187,9 @@ def setup_exit_node(cs_config: Dict, exit_num: int) -> Dict:
     listen_port = prompt_int("Listen port", default=51820, min_val=1, max_val=65535)
     wan_interface = prompt("WAN interface for NAT", default="eth0")
 
-    # Auto-assign VPN IP in 100-119 range
-    base_ip = cs_config['network_ipv4'].split('/')[0].rsplit('.', 1)[0]
-    exit_ip = f"{base_ip}.{100 + exit_num}/32"
-
-    ipv6_base = cs_config['network_ipv6'].split('/')[0].rstrip(':')
-    exit_ipv6 = f"{ipv6_base}::{100 + exit_num:x}/128"
+    # Auto-assign VPN IP from the exit node pool (.100-.119)
+    ipam = IPAM(cs_config['network_ipv4'], cs_config['network_ipv6'])
+    exit_ip, exit_ipv6 = ipam.address_at('exit_node', exit_num)
 
     print(f"\nAssigned VPN addresses:")
     print(f"  IPv4: {exit_ip}")
@@ -13,6 +13,7 @@
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from v1.schema_semantic import WireGuardDBv2
+from v1.topology_query import fetch_topology
 
 # Rich imports
 try:
@@ -54,168 +55,118 @@ def get_all_peers(db: WireGuardDBv2) -> List[PeerInfo]:
     peers = []
 
     with db._connection() as conn:
-        cursor = conn.cursor()
-
-        # Coordination Server
-        cursor.execute("""
-            SELECT hostname, ipv4_address, ipv6_address, current_public_key,
-                   endpoint, listen_port, mtu, network_ipv4, network_ipv6,
-                   ssh_host, ssh_user, ssh_port, private_key,
-                   created_at, updated_at
-            FROM coordination_server WHERE id = 1
-        """)
-        row = cursor.fetchone()
-        if row:
-            peers.append(PeerInfo(
-                peer_type='cs',
-                peer_id=1,
-                hostname=row['hostname'] or 'coordination-server',
-                ipv4_address=row['ipv4_address'],
-                ipv6_address=row['ipv6_address'] or '',
-                public_key=row['current_public_key'],
-                extras={
-                    'endpoint': row['endpoint'],
-                    'listen_port': row['listen_port'],
-                    'mtu': row['mtu'],
-                    'network_ipv4': row['network_ipv4'],
-                    'network_ipv6': row['network_ipv6'],
-                    'ssh_host': row['ssh_host'],
-                    'ssh_user': row['ssh_user'],
-                    'ssh_port': row['ssh_port'],
-                    'private_key': row['private_key'],
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at'],
-                }
-            ))
+        topology = fetch_topology(conn)
+
+    # Coordination Server
+    cs = topology.cs
+    if cs:
+        peers.append(PeerInfo(
+            peer_type='cs',
+            peer_id=1,
+            hostname=cs['hostname'] or 'coordination-server',
+            ipv4_address=cs['ipv4_address'],
+            ipv6_address=cs['ipv6_address'] or '',
+            public_key=cs['current_public_key'],
+            extras={
+                'endpoint': cs['endpoint'],
+                'listen_port': cs['listen_port'],
+                'mtu': cs['mtu'],
+                'network_ipv4': cs['network_ipv4'],
+                'network_ipv6': cs['network_ipv6'],
+                'ssh_host': cs['ssh_host'],
+                'ssh_user': cs['ssh_user'],
+                'ssh_port': cs['ssh_port'],
+                'private_key': cs['private_key'],
+                'created_at': cs['created_at'],
+                'updated_at': cs['updated_at'],
+            }
+        ))
 
-        # Subnet Routers
-        cursor.execute("""
-            SELECT id, hostname, ipv4_address, ipv6_address, current_public_key,
-                   endpoint, mtu, persistent_keepalive, lan_interface,
-                   ssh_host, ssh_user, ssh_port, private_key, preshared_key,
-                   created_at, updated_at
-            FROM subnet_router ORDER BY hostname
-        """)
-        for row in cursor.fetchall():
-            # Get advertised networks
-            cursor.execute("""
-                SELECT network_cidr, description
-                FROM advertised_network
-                WHERE subnet_router_id = ?
-            """, (row['id'],))
-            networks = [(r['network_cidr'], r['description']) for r in cursor.fetchall()]
-
-            peers.append(PeerInfo(
-                peer_type='router',
-                peer_id=row['id'],
-                hostname=row['hostname'] or f"router-{row['id']}",
-                ipv4_address=row['ipv4_address'],
-                ipv6_address=row['ipv6_address'] or '',
-                public_key=row['current_public_key'],
-                extras={
-                    'endpoint': row['endpoint'],
-                    'mtu': row['mtu'],
-                    'persistent_keepalive': row['persistent_keepalive'],
-                    'lan_interface': row['lan_interface'],
-                    'ssh_host': row['ssh_host'],
-                    'ssh_user': row['ssh_user'],
-                    'ssh_port': row['ssh_port'],
-                    'private_key': row['private_key'],
-                    'preshared_key': row['preshared_key'],
-                    'advertised_networks': networks,
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at'],
-                }
-            ))
+    # Subnet Routers
+    for row in topology.routers:
+        networks = [(n['network_cidr'], n['description']) for n in row['advertised_networks']]
+
+        peers.append(PeerInfo(
+            peer_type='router',
+            peer_id=row['id'],
+            hostname=row['hostname'] or f"router-{row['id']}",
+            ipv4_address=row['ipv4_address'],
+            ipv6_address=row['ipv6_address'] or '',
+            public_key=row['current_public_key'],
+            extras={
+                'endpoint': row['endpoint'],
+                'mtu': row['mtu'],
+                'persistent_keepalive': row['persistent_keepalive'],
+                'lan_interface': row['lan_interface'],
+                'ssh_host': row['ssh_host'],
+                'ssh_user': row['ssh_user'],
+                'ssh_port': row['ssh_port'],
+                'private_key': row['private_key'],
+                'preshared_key': row['preshared_key'],
+                'advertised_networks': networks,
+                'created_at': row['created_at'],
+                'updated_at': row['updated_at'],
+            }
+        ))
 
-        # Remote Clients
-        cursor.execute("""
-            SELECT id, hostname, ipv4_address, ipv6_address, current_public_key,
-                   dns_servers, persistent_keepalive, access_level, allowed_ips,
-                   private_key, preshared_key, created_at, updated_at,
-                   permanent_guid, exit_node_id
-            FROM remote ORDER BY hostname
-        """)
-        for row in cursor.fetchall():
-            # Fetch comments for this peer
-            cursor.execute("""
-                SELECT category, text FROM comment
-                WHERE entity_permanent_guid = ? AND entity_type = 'remote'
-                ORDER BY display_order
-            """, (row['permanent_guid'],))
-            comments = [(r['category'], r['text']) for r in cursor.fetchall()]
-
-            # Get exit node info if assigned
-            exit_node_info = None
-            if row['exit_node_id']:
-                cursor.execute("""
-                    SELECT hostname, endpoint FROM exit_node WHERE id = ?
-                """, (row['exit_node_id'],))
-                exit_row = cursor.fetchone()
-                if exit_row:
-                    exit_node_info = {
-                        'hostname': exit_row['hostname'],
-                        'endpoint': exit_row['endpoint']
-                    }
-
-            peers.append(PeerInfo(
-                peer_type='remote',
-                peer_id=row['id'],
-                hostname=row['hostname'] or f"remote-{row['id']}",
-                ipv4_address=row['ipv4_address'],
-                ipv6_address=row['ipv6_address'] or '',
-                public_key=row['current_public_key'],
-                extras={
-                    'dns_servers': row['dns_servers'],
-                    'persistent_keepalive': row['persistent_keepalive'],
-                    'access_level': row['access_level'],
-                    'allowed_ips': row['allowed_ips'],
-                    'private_key': row['private_key'],
-                    'preshared_key': row['preshared_key'],
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at'],
-                    'is_provisional': row['private_key'] is None,
-                    'comments': comments,
-                    'exit_node_id': row['exit_node_id'],
-                    'exit_node_info': exit_node_info,
-                }
-            ))
+    # Remote Clients
+    for row in topology.remotes:
+        comments = [(c['category'], c['text'])
+                    for c in topology.comments_for('remote', row['permanent_guid'])]
+
+        exit_node = row['exit_node']
+        exit_node_info = None
+        if exit_node:
+            exit_node_info = {
+                'hostname': exit_node['hostname'],
+                'endpoint': exit_node['endpoint']
+            }
+
+        peers.append(PeerInfo(
+            peer_type='remote',
+            peer_id=row['id'],
+            hostname=row['hostname'] or f"remote-{row['id']}",
+            ipv4_address=row['ipv4_address'],
+            ipv6_address=row['ipv6_address'] or '',
+            public_key=row['current_public_key'],
+            extras={
+                'dns_servers': row['dns_servers'],
+                'persistent_keepalive': row['persistent_keepalive'],
+                'access_level': row['access_level'],
+                'allowed_ips': row['allowed_ips'],
+                'private_key': row['private_key'],
+                'preshared_key': row['preshared_key'],
+                'created_at': row['created_at'],
+                'updated_at': row['updated_at'],
+                'is_provisional': row['private_key'] is None,
+                'comments': comments,
+                'exit_node_id': row['exit_node_id'],
+                'exit_node_info': exit_node_info,
+            }
+        ))
 
-        # Exit Nodes
-        cursor.execute("""
-            SELECT id, hostname, ipv4_address, ipv6_address, current_public_key,
-                   endpoint, listen_port, wan_interface,
-                   ssh_host, ssh_user, ssh_port, private_key,
-                   created_at, updated_at, permanent_guid
-            FROM exit_node ORDER BY hostname
-        """)
-        for row in cursor.fetchall():
-            # Count remotes using this exit node
-            cursor.execute("""
-                SELECT COUNT(*) as cnt FROM remote WHERE exit_node_id = ?
-            """, (row['id'],))
-            remote_count = cursor.fetchone()['cnt']
-
-            peers.append(PeerInfo(
-                peer_type='exit_node',
-                peer_id=row['id'],
-                hostname=row['hostname'] or f"exit-{row['id']}",
-                ipv4_address=row['ipv4_address'],
-                ipv6_address=row['ipv6_address'] or '',
-                public_key=row['current_public_key'],
-                extras={
-                    'endpoint': row['endpoint'],
-                    'listen_port': row['listen_port'],
-                    'wan_interface': row['wan_interface'],
-                    'ssh_host': row['ssh_host'],
-                    'ssh_user': row['ssh_user'],
-                    'ssh_port': row['ssh_port'],
-                    'private_key': row['private_key'],
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at'],
-                    'remote_count': remote_count,
-                }
-            ))
+    # Exit Nodes
+    for row in topology.exit_nodes:
+        peers.append(PeerInfo(
+            peer_type='exit_node',
+            peer_id=row['id'],
+            hostname=row['hostname'] or f"exit-{row['id']}",
+            ipv4_address=row['ipv4_address'],
+            ipv6_address=row['ipv6_address'] or '',
+            public_key=row['current_public_key'],
+            extras={
+                'endpoint': row['endpoint'],
+                'listen_port': row['listen_port'],
+                'wan_interface': row['wan_interface'],
+                'ssh_host': row['ssh_host'],
+                'ssh_user': row['ssh_user'],
+                'ssh_port': row['ssh_port'],
+                'private_key': row['private_key'],
+                'created_at': row['created_at'],
+                'updated_at': row['updated_at'],
+                'remote_count': row['remote_count'],
+            }
+        ))
 
     return peers
 
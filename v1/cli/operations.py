@@ -215,6 +215,7 @@ def show_encryption_menu(db_path: str):
         if is_encrypted:
             print("  1. Change passphrase")
             print("  2. Disable encryption")
+            print("  3. Rotate data key")
         else:
             print("  1. Enable encryption")
 
@@ -275,6 +276,25 @@ def show_encryption_menu(db_path: str):
                 except Exception as e:
                     print(f"\n  Error: {e}")
 
+        elif is_encrypted and action == '3':
+            # Replace the data key; resumes an interrupted rotation
+            import getpass
+            pending = mgr.dek_rotation_status()
+            if pending:
+                print(f"\n  Resuming rotation ({pending.rows_done} rows already done)")
+            passphrase = getpass.getpass("  Passphrase: ")
+            if not mgr.unlock(passphrase):
+                print("\n  Incorrect passphrase.")
+            else:
+                try:
+                    progress = mgr.rotate_dek(
+                        pause=0.05,
+                        progress_callback=lambda p: print(f"\r  Re-encrypted {p.rows_done} rows",
+                                                          end='', flush=True))
+                    print(f"\n  Data key rotated ({progress.rows_done} rows).")
+                except Exception as e:
+                    print(f"\n  Error: {e} - run again to resume")
+
     except Exception as e:
         print(f"\nError: {e}")
 
@@ -12,6 +12,7 @@
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from v1.schema_semantic import WireGuardDBv2
+from v1.ipam import IPAM
 from v1.keygen import generate_keypair, generate_preshared_key
 from v1.cli.config_generator import generate_remote_config
 from v1.state_tracker import record_add_remote, record_add_router, record_remove_peer, record_rotate_keys
@@ -141,63 +142,7 @@ def get_next_available_ip(db: WireGuardDBv2, entity_type: str) -> Tuple[str, str
     Returns:
         (ipv4_address, ipv6_address) with CIDR notation
     """
-    with db._connection() as conn:
-        cursor = conn.cursor()
-
-        # Get network info from coordination server
-        cursor.execute("SELECT network_ipv4, network_ipv6 FROM coordination_server LIMIT 1")
-        row = cursor.fetchone()
-        if not row:
-            raise ValueError("No coordination server found in database")
-
-        network_ipv4, network_ipv6 = row
-
-        # Extract base IPs
-        ipv4_base = network_ipv4.split('/')[0].rsplit('.', 1)[0]
-        ipv6_base = network_ipv6.split('/')[0].rstrip(':')
-
-        # Get existing IPs
-        existing_ips = set()
-
-        # Coordination server
-        cursor.execute("SELECT ipv4_address FROM coordination_server")
-        for row in cursor.fetchall():
-            ip = row[0].split('/')[0].split('.')[-1]
-            existing_ips.add(int(ip))
-
-        # Subnet routers
-        cursor.execute("SELECT ipv4_address FROM subnet_router")
-        for row in cursor.fetchall():
-            ip = row[0].split('/')[0].split('.')[-1]
-            existing_ips.add(int(ip))
-
-        # Remotes
-        cursor.execute("SELECT ipv4_address FROM remote")
-        for row in cursor.fetchall():
-            ip = row[0].split('/')[0].split('.')[-1]
-            existing_ips.add(int(ip))
-
-        # Find next available
-        if entity_type == 'router':
-            # Routers: 20-29
-            start, end = 20, 29
-        else:
-            # Remotes: 30-254
-            start, end = 30, 254
-
-        next_ip = None
-        for i in range(start, end + 1):
-            if i not in existing_ips:
-                next_ip = i
-                break
-
-        if next_ip is None:
-            raise ValueError(f"No available IPs in range {start}-{end}")
-
-        ipv4_address = f"{ipv4_base}.{next_ip}/32"
-        ipv6_address = f"{ipv6_base}::{next_ip:x}/128"
-
-        return ipv4_address, ipv6_address
+    return IPAM.from_db(db).allocate(entity_type)
 
 
 def prompt(question: str, default: Optional[str] = None) -> str:
@@ -14,6 +14,7 @@
 
 from v1.schema_semantic import WireGuardDBv2
 from v1.network_utils import is_local_host
+from v1.ssh_sessions import ssh_run
 
 
 def prompt_yes_no(question: str, default: bool = False) -> bool:
@@ -174,13 +175,8 @@ def test_ssh_connection(host: str, user: str = 'root') -> bool:
     print(f"\nTesting SSH connection to {user}@{host}...")
 
     try:
-        result = subprocess.run(
-            ['ssh', '-o', 'ConnectTimeout=10', '-o', 'BatchMode=yes',
-             f'{user}@{host}', 'echo "Connection successful"'],
-            capture_output=True,
-            text=True,
-            timeout=15
-        )
+        result = ssh_run(host, 'echo "Connection successful"', user=user,
+                         connect_timeout=10, batch_mode=True, timeout=15)
 
         if result.returncode == 0 and 'Connection successful' in result.stdout:
             print(f"✓ SSH connection to {user}@{host} successful")
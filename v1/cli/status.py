@@ -5,7 +5,6 @@
 """
 
 import sys
-import subprocess
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
@@ -13,7 +12,10 @@
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from v1.schema_semantic import WireGuardDBv2
-from v1.network_utils import is_local_host
+from v1.bandwidth_tracking import format_bytes
+from v1.wg_dump import get_snapshot
+from v1.topology_query import fetch_topology
+from v1.live_status import DEFAULT_TIMEOUT, collect_live_status, discover_targets
 from v1.system_state import SystemStateDB
 
 
@@ -24,64 +26,40 @@ def show_network_overview(db: WireGuardDBv2):
     print("=" * 70)
 
     with db._connection() as conn:
-        cursor = conn.cursor()
-
-        # Coordination Server
-        cursor.execute("""
-            SELECT hostname, endpoint, listen_port, network_ipv4, network_ipv6,
-                   ipv4_address, ipv6_address, current_public_key, permanent_guid
-            FROM coordination_server
-        """)
-        row = cursor.fetchone()
-        if row:
-            hostname, endpoint, port, net4, net6, ip4, ip6, pubkey, guid = row
-            print(f"\nCoordination Server:")
-            print(f"  Hostname:      {hostname}")
-            print(f"  Endpoint:      {endpoint}:{port}")
-            print(f"  VPN Network:   {net4}, {net6}")
-            print(f"  VPN Address:   {ip4}, {ip6}")
-            print(f"  Public Key:    {pubkey[:30]}...")
-            print(f"  Permanent ID:  {guid[:30]}...")
-
-        # Subnet Routers
-        cursor.execute("""
-            SELECT id, hostname, ipv4_address, ipv6_address, endpoint,
-                   lan_interface, current_public_key, permanent_guid
-            FROM subnet_router
-            ORDER BY hostname
-        """)
-        routers = cursor.fetchall()
-        if routers:
-            print(f"\nSubnet Routers ({len(routers)}):")
-            for router_id, hostname, ip4, ip6, endpoint, lan_if, pubkey, guid in routers:
-                print(f"\n  [{router_id}] {hostname}")
-                print(f"      VPN Address:   {ip4}, {ip6}")
-                print(f"      Endpoint:      {endpoint or 'Dynamic'}")
-                print(f"      LAN Interface: {lan_if}")
-                print(f"      Public Key:    {pubkey[:30]}...")
-
-                # Advertised networks
-                cursor.execute("""
-                    SELECT network_cidr
-                    FROM advertised_network
-                    WHERE subnet_router_id = ?
-                """, (router_id,))
-                networks = [row[0] for row in cursor.fetchall()]
-                if networks:
-                    print(f"      Advertises:    {', '.join(networks)}")
-
-        # Remotes
-        cursor.execute("""
-            SELECT id, hostname, ipv4_address, ipv6_address, access_level,
-                   current_public_key, permanent_guid
-            FROM remote
-            ORDER BY hostname
-        """)
-        remotes = cursor.fetchall()
-        if remotes:
-            print(f"\nRemote Clients ({len(remotes)}):")
-            for remote_id, hostname, ip4, ip6, access, pubkey, guid in remotes:
-                print(f"  [{remote_id:2}] {hostname:25} {ip4:18} {access:15} {pubkey[:20]}...")
+        topology = fetch_topology(conn)
+
+    # Coordination Server
+    cs = topology.cs
+    if cs:
+        print(f"\nCoordination Server:")
+        print(f"  Hostname:      {cs['hostname']}")
+        print(f"  Endpoint:      {cs['endpoint']}:{cs['listen_port']}")
+        print(f"  VPN Network:   {cs['network_ipv4']}, {cs['network_ipv6']}")
+        print(f"  VPN Address:   {cs['ipv4_address']}, {cs['ipv6_address']}")
+        print(f"  Public Key:    {cs['current_public_key'][:30]}...")
+        print(f"  Permanent ID:  {cs['permanent_guid'][:30]}...")
+
+    # Subnet Routers
+    if topology.routers:
+        print(f"\nSubnet Routers ({len(topology.routers)}):")
+        for router in topology.routers:
+            print(f"\n  [{router['id']}] {router['hostname']}")
+            print(f"      VPN Address:   {router['ipv4_address']}, {router['ipv6_address']}")
+            print(f"      Endpoint:      {router['endpoint'] or 'Dynamic'}")
+            print(f"      LAN Interface: {router['lan_interface']}")
+            print(f"      Public Key:    {router['current_public_key'][:30]}...")
+
+            # Advertised networks
+            networks = [n['network_cidr'] for n in router['advertised_networks']]
+            if networks:
+                print(f"      Advertises:    {', '.join(networks)}")
+
+    # Remotes
+    if topology.remotes:
+        print(f"\nRemote Clients ({len(topology.remotes)}):")
+        for remote in topology.remotes:
+            print(f"  [{remote['id']:2}] {remote['hostname']:25} {remote['ipv4_address']:18} "
+                  f"{remote['access_level']:15} {remote['current_public_key'][:20]}...")
 
     print()
 
@@ -164,134 +142,22 @@ def show_command_patterns(db: WireGuardDBv2):
     print()
 
 
-def parse_wg_show(output: str) -> Dict[str, Dict[str, str]]:
-    """
-    Parse output from 'wg show' command.
-
-    Returns:
-        Dict mapping public keys to peer status info:
-        {
-            'pubkey': {
-                'endpoint': '1.2.3.4:51820',
-                'allowed_ips': '10.0.0.2/32, fd00::2/128',
-                'latest_handshake': '1234567890',  # Unix timestamp
-                'transfer_rx': '12345',  # bytes
-                'transfer_tx': '67890',  # bytes
-            }
-        }
-    """
-    peers = {}
-    current_peer = None
-
-    for line in output.splitlines():
-        line = line.strip()
-
-        if line.startswith('peer:'):
-            # New peer section
-            pubkey = line.split(':', 1)[1].strip()
-            current_peer = pubkey
-            peers[pubkey] = {}
-
-        elif current_peer and ':' in line:
-            # Peer attribute
-            key, value = line.split(':', 1)
-            key = key.strip()
-            value = value.strip()
-
-            if key == 'endpoint':
-                peers[current_peer]['endpoint'] = value
-            elif key == 'allowed ips':
-                peers[current_peer]['allowed_ips'] = value
-            elif key == 'latest handshake':
-                # Convert "X seconds ago" to timestamp
-                # Format can be: "5 seconds ago", "2 minutes, 30 seconds ago", "never"
-                if value == '(none)':
-                    peers[current_peer]['latest_handshake'] = None
-                else:
-                    # For simplicity, store the raw string
-                    # In production, parse to get actual timestamp
-                    peers[current_peer]['latest_handshake'] = value
-            elif key == 'transfer':
-                # Format: "12.34 KiB received, 56.78 MiB sent"
-                parts = value.split(',')
-                if len(parts) >= 2:
-                    rx = parts[0].replace('received', '').strip()
-                    tx = parts[1].replace('sent', '').strip()
-                    peers[current_peer]['transfer_rx'] = rx
-                    peers[current_peer]['transfer_tx'] = tx
-
-    return peers
-
-
-def run_wg_show(cs_endpoint: str, interface: str = 'wg0', user: str = 'root') -> Optional[str]:
-    """
-    Run 'wg show' on coordination server.
-
-    Args:
-        cs_endpoint: Coordination server endpoint (hostname or IP)
-        interface: WireGuard interface name
-        user: SSH user
-
-    Returns:
-        Output from wg show, or None on error
-    """
-    # Strip port from endpoint if present
-    host = cs_endpoint.split(':')[0] if cs_endpoint else None
-
-    if not host:
-        print("Error: No coordination server endpoint configured")
-        return None
-
-    # Check if target is localhost
-    if is_local_host(host):
-        # Run locally
-        try:
-            result = subprocess.run(
-                ['sudo', 'wg', 'show', interface],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-
-            if result.returncode != 0:
-                print(f"Error running wg show: {result.stderr}")
-                return None
-
-            return result.stdout
-
-        except subprocess.TimeoutExpired:
-            print("Error: wg show command timed out")
-            return None
-        except FileNotFoundError:
-            print("Error: wg command not found")
-            return None
-    else:
-        # Run via SSH
-        try:
-            result = subprocess.run(
-                ['ssh', f'{user}@{host}', f'wg show {interface}'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-
-            if result.returncode != 0:
-                print(f"Error running wg show via SSH: {result.stderr}")
-                return None
-
-            return result.stdout
-
-        except subprocess.TimeoutExpired:
-            print("Error: SSH command timed out")
-            return None
-        except FileNotFoundError:
-            print("Error: ssh command not found")
-            return None
+def _format_age(seconds: float) -> str:
+    """Handshake age like `wg show` prints it, shortened: 45s, 3m 12s, 2h 5m, 3d 4h"""
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60}s"
+    if seconds < 86400:
+        return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+    return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
 
 
 def show_live_peer_status(db: WireGuardDBv2, interface: str = 'wg0', user: str = 'root'):
     """
-    Show live peer connection status by running wg show on coordination server.
+    Show live peer connection status from a `wg show all dump` snapshot of
+    the coordination server.
 
     Args:
         db: Database connection
@@ -324,14 +190,15 @@ def show_live_peer_status(db: WireGuardDBv2, interface: str = 'wg0', user: str =
 
     print(f"\nQuerying {cs_hostname} ({cs_endpoint})...")
 
-    # Run wg show
-    wg_output = run_wg_show(cs_endpoint, interface=interface, user=user)
+    # The endpoint's port is WireGuard's, not SSH's
+    host = cs_endpoint.split(':')[0]
+    snapshot = get_snapshot(host, user=user, sudo=True)
 
-    if not wg_output:
+    if snapshot is None:
+        print(f"Error: could not run wg show on {host}")
         return
 
-    # Parse output
-    peer_status = parse_wg_show(wg_output)
+    peer_status = snapshot.by_key(interface)
 
     if not peer_status:
         print("\nNo peers connected")
@@ -374,7 +241,7 @@ def show_live_peer_status(db: WireGuardDBv2, interface: str = 'wg0', user: str =
     print(f"{'Hostname':<30} {'Type':<10} {'Endpoint':<22} {'Handshake':<20} {'RX/TX':<30}")
     print("─" * 70)
 
-    for pubkey, status in peer_status.items():
+    for pubkey, peer in peer_status.items():
         # Get peer info from database
         db_info = peer_db_info.get(pubkey, {
             'hostname': f'Unknown ({pubkey[:10]}...)',
@@ -384,13 +251,13 @@ def show_live_peer_status(db: WireGuardDBv2, interface: str = 'wg0', user: str =
 
         hostname = db_info['hostname']
         peer_type = db_info['type']
-        endpoint = status.get('endpoint', 'N/A')
-        handshake = status.get('latest_handshake', 'Never')
-        rx = status.get('transfer_rx', '0 B')
-        tx = status.get('transfer_tx', '0 B')
+        endpoint = peer.endpoint or 'N/A'
+        age = peer.handshake_age(snapshot.taken_at)
+        handshake = 'Never' if age is None else f"{_format_age(age)} ago"
+        rx = format_bytes(peer.rx_bytes)
+        tx = format_bytes(peer.tx_bytes)
 
-        # Determine online status
-        online = '●' if handshake and handshake != '(none)' and 'ago' in handshake else '○'
+        online = '●' if peer.is_up(snapshot.taken_at) else '○'
 
         print(f"{online} {hostname:<28} {peer_type:<10} {endpoint:<22} {handshake:<20} {rx} ↓ / {tx} ↑")
 
@@ -399,6 +266,64 @@ def show_live_peer_status(db: WireGuardDBv2, interface: str = 'wg0', user: str =
     print()
 
 
+def show_network_live_status(db_path: str, interface: Optional[str] = None, user: str = 'root',
+                             timeout: float = DEFAULT_TIMEOUT):
+    """
+    Show live status as seen from every SSH-reachable host at once.
+
+    Args:
+        db_path: Path to the database
+        interface: Only this interface's peers (None = all interfaces)
+        user: SSH user for hosts without one
+        timeout: Seconds each host gets
+    """
+    print("\n" + "=" * 70)
+    print("NETWORK LIVE STATUS")
+    print("=" * 70)
+
+    targets = discover_targets(db_path, default_user=user)
+    if not targets:
+        print("\nNo hosts with SSH access (set ssh_host on an entity, or its endpoint)")
+        return
+
+    print(f"\nQuerying {len(targets)} host(s)...")
+    view = collect_live_status(db_path, timeout=timeout, interface=interface, targets=targets)
+
+    print(f"\nHosts ({len(view.reachable)}/{len(view.hosts)} reachable, {view.elapsed:.1f}s):")
+    for host in view.hosts:
+        target = host.target
+        if host.ok:
+            detail = f"{len(host.snapshot.peers_on(interface))} peers"
+        else:
+            detail = host.error
+        mark = '✓' if host.ok else '✗'
+        print(f"  {mark} {target.name:<24} {target.entity_type:<20} {host.elapsed:5.1f}s  {detail}")
+
+    if not view.peers:
+        print("\nNo peers reported")
+        print()
+        return
+
+    print(f"\nPeers ({sum(1 for p in view.peers if p.is_up)}/{len(view.peers)} online):")
+    print()
+    print(f"{'Peer':<30} {'Type':<16} {'Handshake':<12} {'RX/TX':<24} {'Seen by'}")
+    print("─" * 70)
+    for peer in view.peers:
+        latest = peer.latest
+        age = latest.handshake_age(view.taken_at)
+        handshake = 'Never' if age is None else f"{_format_age(age)} ago"
+        rx = sum(r.rx_bytes for r in peer.records)
+        tx = sum(r.tx_bytes for r in peer.records)
+        seen_by = ', '.join(t.name for t in peer.seen_by)
+        online = '●' if peer.is_up else '○'
+        print(f"{online} {peer.name:<28} {peer.entity_type:<16} {handshake:<12} "
+              f"{format_bytes(rx) + ' ↓ / ' + format_bytes(tx) + ' ↑':<24} {seen_by}")
+
+    print()
+    print("Legend: ● = Online on at least one host  ○ = Offline/Never connected")
+    print()
+
+
 def show_state_history(db_path: str, limit: int = 20, state_id: int = None):
     """
     Display state history timeline.
@@ -684,9 +609,13 @@ def show_status(args) -> int:
 
     # Show live peer status if requested
     if getattr(args, 'live', False):
-        interface = getattr(args, 'interface', 'wg0')
+        interface = getattr(args, 'interface', None)
         user = getattr(args, 'user', 'root')
-        show_live_peer_status(db, interface=interface, user=user)
+        if getattr(args, 'all_hosts', False):
+            show_network_live_status(args.db, interface=interface, user=user,
+                                     timeout=getattr(args, 'timeout', DEFAULT_TIMEOUT))
+        else:
+            show_live_peer_status(db, interface=interface or 'wg0', user=user)
         return 0
 
     # Network overview
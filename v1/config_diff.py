@@ -0,0 +1,217 @@
+"""
+Config Diff - Peer-Level Changes Between Running and Generated Configs
+
+Decides whether a new config can be applied to a live interface with
+`wg syncconf` (existing tunnels stay up) or needs a full wg-quick restart.
+
+- Peers are compared between the running interface (`wg showconf`) and the
+  generated config, both parsed with drift_detection.parse_wg_config.
+- [Interface] fields are compared between the installed config file and the
+  generated one: the running side doesn't show wg-quick fields such as
+  Address, DNS or PostUp.
+- wg-quick adds a route for every AllowedIPs prefix outside the interface
+  addresses at `up`; syncconf doesn't touch routes. When that route set
+  changes, a restart is required as well.
+
+Usage:
+    diff = diff_configs(installed_text, running_text, new_text)
+    if diff.needs_restart:
+        restart(...)            # diff.restart_reasons says why
+    elif diff.has_peer_changes:
+        syncconf(...)           # diff.summary(): "1 added, 0 removed, 2 changed"
+"""
+
+import ipaddress
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.drift_detection import parse_wg_config
+
+# Peer fields that syncconf applies
+PEER_FIELDS = ('allowedips', 'endpoint', 'persistentkeepalive', 'presharedkey')
+
+
+@dataclass
+class PeerChange:
+    """A peer that differs between running and generated config"""
+    public_key: str
+    name: str = ''
+    fields: List[str] = field(default_factory=list)   # changed fields (changed peers only)
+
+    @property
+    def label(self) -> str:
+        return self.name or f"{self.public_key[:10]}..."
+
+
+@dataclass
+class ConfigDiff:
+    """Peer-level diff plus the reasons a live apply isn't enough"""
+    added: List[PeerChange] = field(default_factory=list)
+    removed: List[PeerChange] = field(default_factory=list)
+    changed: List[PeerChange] = field(default_factory=list)
+    restart_reasons: List[str] = field(default_factory=list)
+
+    @property
+    def needs_restart(self) -> bool:
+        return bool(self.restart_reasons)
+
+    @property
+    def has_peer_changes(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+
+    def report_lines(self) -> List[str]:
+        """One line per peer: '+ name', '- name', '~ name (fields)'"""
+        lines = [f"+ {p.label}" for p in self.added]
+        lines += [f"- {p.label}" for p in self.removed]
+        lines += [f"~ {p.label} ({', '.join(p.fields)})" for p in self.changed]
+        return lines
+
+
+def peer_names(config_text: str) -> Dict[str, str]:
+    """Public key -> name, from the comment line generated after [Peer]"""
+    names = {}
+    name = None
+    in_peer = False
+    for line in config_text.splitlines():
+        line = line.strip()
+        if line == '[Peer]':
+            in_peer, name = True, None
+        elif line.startswith('['):
+            in_peer = False
+        elif in_peer and line.startswith('#') and name is None:
+            name = line.lstrip('#').strip()
+        elif in_peer and line.lower().replace(' ', '').startswith('publickey='):
+            if name:
+                names[line.split('=', 1)[1].strip()] = name
+    return names
+
+
+def _allowed_ips(value: Optional[str]) -> Set[str]:
+    """Normalized AllowedIPs ('10.0.0.2/32, fd66::2/128' -> set of networks)"""
+    result = set()
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            result.add(str(ipaddress.ip_network(item, strict=False)))
+        except ValueError:
+            result.add(item)
+    return result
+
+
+def _is_ip_endpoint(endpoint: str) -> bool:
+    host = endpoint.rsplit(':', 1)[0].strip('[]')
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def _peer_fields_changed(running: dict, new: dict) -> List[str]:
+    changed = []
+    if _allowed_ips(running.get('allowedips')) != _allowed_ips(new.get('allowedips')):
+        changed.append('allowed-ips')
+
+    # The running side shows the endpoint a peer last roamed from, and a
+    # resolved address for hostnames: only a configured IP endpoint that
+    # differs counts
+    new_endpoint = new.get('endpoint')
+    if new_endpoint and _is_ip_endpoint(new_endpoint) and running.get('endpoint') != new_endpoint:
+        changed.append('endpoint')
+
+    def keepalive(peer):
+        value = peer.get('persistentkeepalive', 'off')
+        return 'off' if value in ('0', 'off') else value
+
+    if keepalive(running) != keepalive(new):
+        changed.append('persistent-keepalive')
+    if running.get('presharedkey') != new.get('presharedkey'):
+        changed.append('preshared-key')
+    return changed
+
+
+def _interface_networks(interface: dict) -> List:
+    networks = []
+    for item in interface.get('address', '').split(','):
+        item = item.strip()
+        if item:
+            try:
+                networks.append(ipaddress.ip_interface(item).network)
+            except ValueError:
+                pass
+    return networks
+
+
+def wg_quick_routes(config: dict) -> Set[str]:
+    """AllowedIPs prefixes wg-quick adds routes for (outside the interface addresses)"""
+    if config['interface'].get('table', '').lower() == 'off':
+        return set()
+    networks = _interface_networks(config['interface'])
+    routes = set()
+    for peer in config['peers'].values():
+        for prefix in _allowed_ips(peer.get('allowedips')):
+            try:
+                net = ipaddress.ip_network(prefix)
+            except ValueError:
+                continue
+            if not any(net.version == n.version and net.subnet_of(n) for n in networks):
+                routes.add(prefix)
+    return routes
+
+
+def diff_configs(installed_text: Optional[str], running_text: Optional[str],
+                 new_text: str) -> ConfigDiff:
+    """
+    Compare a host's installed and running config with the generated one.
+
+    Args:
+        installed_text: Config file currently on the host (None/'' = none)
+        running_text: `wg showconf` output (None/'' = interface not running)
+        new_text: Generated config
+
+    Returns:
+        ConfigDiff - peers to add/remove/change, and restart reasons
+    """
+    new = parse_wg_config(new_text)
+    names = peer_names(new_text)
+    diff = ConfigDiff()
+
+    if not running_text or not running_text.strip():
+        diff.restart_reasons.append("interface not running")
+        running = {"interface": {}, "peers": {}}
+    else:
+        running = parse_wg_config(running_text)
+
+    if not installed_text or not installed_text.strip():
+        diff.restart_reasons.append("no installed config")
+    else:
+        installed = parse_wg_config(installed_text)
+        names = {**peer_names(installed_text), **names}
+        changed_fields = sorted(k for k in set(installed['interface']) | set(new['interface'])
+                                if installed['interface'].get(k) != new['interface'].get(k))
+        if changed_fields:
+            diff.restart_reasons.append(f"[Interface] changed ({', '.join(changed_fields)})")
+        if wg_quick_routes(installed) != wg_quick_routes(new):
+            diff.restart_reasons.append("routes changed")
+
+    for key, peer in new['peers'].items():
+        if key not in running['peers']:
+            diff.added.append(PeerChange(key, names.get(key, '')))
+        else:
+            fields = _peer_fields_changed(running['peers'][key], peer)
+            if fields:
+                diff.changed.append(PeerChange(key, names.get(key, ''), fields))
+    for key in running['peers']:
+        if key not in new['peers']:
+            diff.removed.append(PeerChange(key, names.get(key, '')))
+
+    return diff
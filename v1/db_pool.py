@@ -0,0 +1,396 @@
+"""
+SQLite Connection Pool
+
+Per-thread persistent connections shared by WireGuardDBv2 and the manager
+classes (bandwidth, alerting, audit, drift, failover, webhooks, dashboard,
+REST API). Opening a connection and re-applying pragmas on every call adds
+up quickly - a single dashboard refresh used to open dozens of them.
+
+Design:
+- One pool per (database file, mode). Each thread gets its own connection,
+  created on first use and reused afterwards (sqlite3 connections must not
+  be shared between threads).
+- Read-write connections run in WAL mode with tuned pragmas, so readers
+  never block the writer and vice versa.
+- Read-only connections (mode=ro, query_only) serve query-only paths such
+  as the dashboard and the Prometheus exporter.
+- PooledConnection.close() returns the connection to the pool instead of
+  closing it, so existing `conn.close()` call sites keep working. Uncommitted
+  work is rolled back on the outermost release, matching the old
+  close-without-commit semantics.
+- Nested acquires on the same thread share the connection. When the outer
+  caller has a transaction open, the inner caller runs inside a SAVEPOINT:
+  its commit() releases the savepoint and its rollback() or close() undoes
+  only its own work, never the outer caller's.
+- A connection whose database file was replaced or deleted (restore,
+  tests) is transparently discarded and reopened.
+
+Usage:
+    from v1.db_pool import get_connection, get_read_connection
+
+    conn = get_connection(db_path)
+    try:
+        conn.execute("UPDATE ...")
+        conn.commit()
+    finally:
+        conn.close()   # returns to pool
+
+    with pooled_connection(db_path) as conn:   # commit/rollback handled
+        conn.execute("INSERT ...")
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import weakref
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Pragmas applied once when a pooled connection is opened
+WAL_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",     # Safe with WAL, avoids fsync per commit
+    "PRAGMA cache_size = -16000",      # 16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",    # 256 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+)
+
+READ_ONLY_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Seconds to wait for a lock before raising "database is locked"
+BUSY_TIMEOUT = 10.0
+
+# Run a PASSIVE checkpoint when a read-write connection is released by its
+# outermost user. Committed pages then land in the main file right away, so
+# `cp wireguard.db backup.db` (see docs/BACKUP_RESTORE.md) keeps working while
+# a pooled connection is open. A no-op checkpoint costs a few microseconds.
+CHECKPOINT_ON_RELEASE = True
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection owned by a ConnectionPool.
+
+    close() releases the connection back to its pool; use really_close()
+    to actually close the underlying handle.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool: Optional["ConnectionPool"] = None
+        self._depth = 0
+        self._saved_factories: list = []
+        # One entry per acquire: the savepoint a nested user runs in, or None
+        self._savepoints: List[Optional[str]] = []
+        self._file_id: Optional[Tuple[int, int]] = None
+
+    def commit(self):
+        """Commit, or for a nested user keep its work in the outer transaction"""
+        savepoint = self._savepoints[-1] if self._savepoints else None
+        if savepoint is None:
+            super().commit()
+        else:
+            self.execute(f"RELEASE SAVEPOINT {savepoint}")
+            self.execute(f"SAVEPOINT {savepoint}")
+
+    def rollback(self):
+        """Roll back, or for a nested user undo only its own work"""
+        savepoint = self._savepoints[-1] if self._savepoints else None
+        if savepoint is None:
+            super().rollback()
+        else:
+            self.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+
+    def close(self):
+        """Release to the pool (rolls back uncommitted work on last release)"""
+        if self._pool is None:
+            super().close()
+        else:
+            self._pool.release(self)
+
+    def really_close(self):
+        """Close the underlying SQLite handle"""
+        self._pool = None
+        try:
+            super().close()
+        except sqlite3.ProgrammingError:
+            pass
+
+
+@dataclass
+class PoolStats:
+    """Counters for a single pool"""
+    hits: int = 0            # acquire() served by an existing connection
+    misses: int = 0          # acquire() had to open a new connection
+    releases: int = 0
+    invalidations: int = 0   # connections discarded because the file changed
+    open_connections: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _file_id(path: str) -> Optional[Tuple[int, int]]:
+    """(device, inode) of the database file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+class ConnectionPool:
+    """
+    Per-thread persistent connections to one SQLite database.
+
+    Args:
+        db_path: Database file
+        read_only: Open connections with mode=ro and PRAGMA query_only
+    """
+
+    def __init__(self, db_path: Path | str, read_only: bool = False):
+        self.db_path = os.path.abspath(str(db_path))
+        self.read_only = read_only
+        self.stats = PoolStats()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Every live connection, so close_all() can reach other threads' handles
+        self._connections: "weakref.WeakSet[PooledConnection]" = weakref.WeakSet()
+
+    def _open(self) -> PooledConnection:
+        if self.read_only:
+            uri = Path(self.db_path).as_uri() + "?mode=ro"
+            conn = sqlite3.connect(
+                uri, uri=True, timeout=BUSY_TIMEOUT,
+                factory=PooledConnection, check_same_thread=False,
+            )
+            pragmas = READ_ONLY_PRAGMAS
+        else:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path, timeout=BUSY_TIMEOUT,
+                factory=PooledConnection, check_same_thread=False,
+            )
+            pragmas = WAL_PRAGMAS
+
+        for pragma in pragmas:
+            conn.execute(pragma)
+
+        conn._pool = self
+        conn._file_id = _file_id(self.db_path)
+        with self._lock:
+            self._connections.add(conn)
+            self.stats.open_connections = len(self._connections)
+        return conn
+
+    def acquire(self, row_factory=sqlite3.Row) -> PooledConnection:
+        """
+        Get this thread's connection, opening it on first use.
+
+        Args:
+            row_factory: Row factory to set on the connection (None for tuples)
+        """
+        conn: Optional[PooledConnection] = getattr(self._local, "conn", None)
+
+        if conn is not None and conn._file_id != _file_id(self.db_path):
+            # File was deleted or replaced underneath us - drop the stale handle
+            self._discard(conn)
+            self.stats.invalidations += 1
+            conn = None
+
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+
+        # Nested acquires on the same thread share the connection; remember
+        # the outer caller's row factory so release() can restore it, and
+        # fence the outer caller's open transaction off with a savepoint
+        savepoint = None
+        if conn._depth > 0 and conn.in_transaction:
+            savepoint = f"pool_{conn._depth}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+        conn._savepoints.append(savepoint)
+        conn._saved_factories.append(conn.row_factory)
+        conn._depth += 1
+        conn.row_factory = row_factory
+        return conn
+
+    def release(self, conn: PooledConnection):
+        """Return a connection obtained from acquire()"""
+        self.stats.releases += 1
+        if conn._depth > 0:
+            conn._depth -= 1
+            conn.row_factory = conn._saved_factories.pop()
+            savepoint = conn._savepoints.pop()
+            if savepoint is not None:
+                # A nested user's uncommitted work is discarded, like close()
+                try:
+                    conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                    conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+                except sqlite3.OperationalError:
+                    pass    # the whole transaction already ended
+        if conn._depth == 0:
+            if conn.in_transaction:
+                # Matches sqlite3 close() semantics: uncommitted work is discarded
+                conn.rollback()
+            if CHECKPOINT_ON_RELEASE and not self.read_only:
+                conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def _discard(self, conn: PooledConnection):
+        with self._lock:
+            self._connections.discard(conn)
+            self.stats.open_connections = len(self._connections)
+        if getattr(self._local, "conn", None) is conn:
+            self._local.conn = None
+        if conn._depth == 0:
+            conn.really_close()
+        else:
+            # Still in use by an outer caller; detach and let it close normally
+            conn._pool = None
+
+    @contextmanager
+    def connection(self, row_factory=sqlite3.Row):
+        """Acquire a connection; commit on success, roll back on error"""
+        conn = self.acquire(row_factory)
+        try:
+            yield conn
+            if not self.read_only:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def checkpoint(self, mode: str = "TRUNCATE"):
+        """Flush the WAL into the main database file"""
+        if self.read_only:
+            return
+        conn = self.acquire()
+        try:
+            conn.execute(f"PRAGMA wal_checkpoint({mode})")
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Close every connection in this pool, across all threads"""
+        with self._lock:
+            conns = list(self._connections)
+            self._connections = weakref.WeakSet()
+            self.stats.open_connections = 0
+        for conn in conns:
+            conn.really_close()
+        self._local = threading.local()
+
+
+# =============================================================================
+# MODULE-LEVEL REGISTRY
+# =============================================================================
+
+_pools: Dict[Tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Path | str, read_only: bool = False) -> ConnectionPool:
+    """Get (or create) the shared pool for a database file"""
+    key = (os.path.abspath(str(db_path)), read_only)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(key[0], read_only=read_only)
+                _pools[key] = pool
+    return pool
+
+
+def get_connection(db_path: Path | str, row_factory=sqlite3.Row) -> PooledConnection:
+    """
+    Get a pooled read-write connection.
+
+    Callers keep their existing pattern: `conn.close()` releases it.
+    """
+    return get_pool(db_path).acquire(row_factory)
+
+
+def get_read_connection(db_path: Path | str, row_factory=sqlite3.Row) -> PooledConnection:
+    """
+    Get a pooled read-only connection for query-only paths.
+
+    Falls back to the read-write pool when the database does not exist yet
+    (mode=ro cannot create it).
+    """
+    if not os.path.exists(db_path):
+        return get_connection(db_path, row_factory)
+    return get_pool(db_path, read_only=True).acquire(row_factory)
+
+
+@contextmanager
+def pooled_connection(db_path: Path | str, read_only: bool = False, row_factory=sqlite3.Row):
+    """Context manager: pooled connection with commit/rollback"""
+    if read_only and os.path.exists(db_path):
+        pool = get_pool(db_path, read_only=True)
+    else:
+        pool = get_pool(db_path)
+    with pool.connection(row_factory) as conn:
+        yield conn
+
+
+def checkpoint(db_path: Path | str):
+    """
+    Flush the WAL into the main file.
+
+    Call before copying the database file (backups, tenant cloning), since
+    committed data may still live in the -wal file.
+    """
+    get_pool(db_path).checkpoint()
+
+
+def close_pools(db_path: Optional[Path | str] = None):
+    """
+    Close pooled connections for one database (or all of them).
+
+    Call before replacing the database file on disk, e.g. during restore.
+    """
+    with _pools_lock:
+        if db_path is None:
+            pools = list(_pools.values())
+        else:
+            path = os.path.abspath(str(db_path))
+            pools = [p for (p_path, _), p in _pools.items() if p_path == path]
+    for pool in pools:
+        pool.close_all()
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """Hit/miss statistics for every pool, keyed by 'path[:ro]'"""
+    stats = {}
+    for (path, read_only), pool in list(_pools.items()):
+        entry = asdict(pool.stats)
+        entry["hit_ratio"] = round(pool.stats.hit_ratio, 4)
+        stats[path + (":ro" if read_only else "")] = entry
+    return stats
+
+
+# Closing the last connection checkpoints the WAL and removes the -wal/-shm
+# files, leaving a single self-contained database file behind
+atexit.register(close_pools)
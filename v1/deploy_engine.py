@@ -0,0 +1,374 @@
+"""
+Deploy Engine - Fleet Deployment with Bounded Parallelism
+
+Runs per-host deployments on a worker pool so a rollout takes about as long
+as its slowest hosts rather than the sum of all of them.
+
+- At most `parallel` hosts are deployed at once.
+- Every host gets a deadline (`timeout` seconds). Remote commands are
+  started with the time remaining, and a host that overruns is reported as
+  'timeout' instead of holding up the run.
+- The coordination server always goes last, and only once every peer
+  deployed successfully: peers must know the new config before the hub does.
+- Host output is captured per host (see emit()) so parallel workers don't
+  interleave their lines; the caller shows aggregated progress and a
+  result table instead.
+- Large fleets can roll out in waves (run_waves): a canary first, then
+  batches, with a health gate after each wave. A failed or degraded wave
+  is rolled back and the rollout stops there.
+
+Usage:
+    results = run_deployments(targets, deploy_host, parallel=8, timeout=120)
+    print(format_results(results))
+
+    results, waves = run_waves(targets, deploy_host, gate.check, rollback_host,
+                               canary=1, wave_size=20, parallel=8)
+"""
+
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Per-host deadline used when the caller doesn't give one
+DEFAULT_HOST_TIMEOUT = 300.0
+
+# Statuses that count as success
+OK_STATUSES = ('deployed', 'unchanged')
+
+# Hosts in a canary wave (when waves are used)
+DEFAULT_CANARY = 1
+
+
+@dataclass
+class DeployTarget:
+    """A host to deploy one generated config to"""
+    entity_type: str          # 'coordination_server', 'subnet_router' or 'exit_node'
+    hostname: str
+    config_file: Path
+    endpoint: str             # SSH target: host or host:port
+    user: str = 'root'
+
+    @property
+    def is_coordination_server(self) -> bool:
+        return self.entity_type == 'coordination_server'
+
+
+@dataclass
+class HostResult:
+    """Outcome of deploying to one host"""
+    target: DeployTarget
+    status: str               # 'deployed', 'unchanged', 'failed', 'timeout', 'skipped' or 'rolled_back'
+    duration: float = 0.0
+    message: str = ''
+    log: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.status in OK_STATUSES
+
+
+@dataclass
+class DeployProgress:
+    """Aggregated state of a running deployment"""
+    total: int
+    done: int = 0
+    running: int = 0
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, result: HostResult):
+        self.done += 1
+        self.counts[result.status] = self.counts.get(result.status, 0) + 1
+
+    def summary(self) -> str:
+        parts = [f"{self.done}/{self.total} done"]
+        if self.running:
+            parts.append(f"{self.running} running")
+        parts.extend(f"{count} {status}" for status, count in sorted(self.counts.items()))
+        return ", ".join(parts)
+
+
+class DeployTimeout(Exception):
+    """A host ran past its deadline"""
+
+
+class Deadline:
+    """Time budget for one host, shared by all of its remote commands"""
+
+    def __init__(self, seconds: Optional[float]):
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (None = no limit); raises DeployTimeout once expired"""
+        if self.expires_at is None:
+            return None
+        left = self.expires_at - time.monotonic()
+        if left <= 0:
+            raise DeployTimeout("deadline exceeded")
+        return left
+
+
+def remaining(deadline: Optional[Deadline]) -> Optional[float]:
+    """Timeout for the next subprocess of a host (None = no deadline)"""
+    return deadline.remaining() if deadline is not None else None
+
+
+# =============================================================================
+# OUTPUT CAPTURE
+# =============================================================================
+
+_capture = threading.local()
+
+
+def emit(message: str):
+    """
+    Print a line of host output - or, inside a parallel worker, add it to
+    that host's log.
+    """
+    lines = getattr(_capture, 'lines', None)
+    if lines is None:
+        print(message)
+    else:
+        lines.append(message)
+
+
+def capturing() -> bool:
+    """Whether emit() is collecting output for a worker (no spinners then)"""
+    return getattr(_capture, 'lines', None) is not None
+
+
+# =============================================================================
+# ENGINE
+# =============================================================================
+
+HostDeployer = Callable[[DeployTarget, Deadline], Tuple[str, str]]
+
+
+def _run_host(target: DeployTarget, deploy_host: HostDeployer, timeout: Optional[float],
+              capture: bool) -> HostResult:
+    lines: List[str] = []
+    if capture:
+        _capture.lines = lines
+    start = time.monotonic()
+    try:
+        status, message = deploy_host(target, Deadline(timeout))
+    except (DeployTimeout, subprocess.TimeoutExpired):
+        status, message = 'timeout', f"no result within {timeout or 0:.0f}s"
+    except Exception as e:
+        status, message = 'failed', str(e)
+    finally:
+        _capture.lines = None
+    return HostResult(target, status, time.monotonic() - start, message, lines)
+
+
+def run_deployments(
+    targets: List[DeployTarget],
+    deploy_host: HostDeployer,
+    parallel: int = 1,
+    timeout: Optional[float] = DEFAULT_HOST_TIMEOUT,
+    on_progress: Optional[Callable[[DeployProgress, Optional[HostResult]], None]] = None,
+) -> List[HostResult]:
+    """
+    Deploy to every target; the coordination server last.
+
+    Args:
+        targets: Hosts to deploy to
+        deploy_host: Deploys one host within its deadline and returns
+            (status, message); exceptions count as 'failed'
+        parallel: Hosts deployed concurrently. With 1, hosts run in order
+            and their output is printed live instead of captured.
+        timeout: Per-host deadline in seconds (None = no limit)
+        on_progress: Called (from this thread) as hosts start and finish
+
+    Returns:
+        One HostResult per target, in target order
+    """
+    peers = [t for t in targets if not t.is_coordination_server]
+    hubs = [t for t in targets if t.is_coordination_server]
+    progress = DeployProgress(total=len(targets))
+    results: Dict[int, HostResult] = {}
+    capture = parallel > 1
+
+    def finished(target: DeployTarget, result: HostResult):
+        results[id(target)] = result
+        progress.record(result)
+        if on_progress:
+            on_progress(progress, result)
+
+    if on_progress:
+        on_progress(progress, None)
+
+    if parallel <= 1:
+        for target in peers:
+            finished(target, _run_host(target, deploy_host, timeout, capture))
+    else:
+        with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix='deploy') as pool:
+            pending = {}
+            queue = list(peers)
+            while queue or pending:
+                while queue and len(pending) < parallel:
+                    target = queue.pop(0)
+                    pending[pool.submit(_run_host, target, deploy_host, timeout, capture)] = target
+                progress.running = len(pending)
+                if on_progress:
+                    on_progress(progress, None)
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    target = pending.pop(future)
+                    progress.running = len(pending)
+                    finished(target, future.result())
+
+    # Coordination server last, and only if every peer made it
+    failed_peers = [r for r in results.values() if not r.ok]
+    for target in hubs:
+        if failed_peers:
+            finished(target, HostResult(
+                target, 'skipped',
+                message=f"{len(failed_peers)} peer deployment(s) failed"))
+        else:
+            finished(target, _run_host(target, deploy_host, timeout, capture=False))
+
+    return [results[id(t)] for t in targets]
+
+
+def format_results(results: List[HostResult]) -> str:
+    """Plain-text result table, one row per host"""
+    lines = [f"  {'HOST':<28} {'TYPE':<20} {'STATUS':<10} {'TIME':>7}  MESSAGE"]
+    for r in results:
+        lines.append(f"  {r.target.hostname:<28} {r.target.entity_type:<20} "
+                     f"{r.status:<10} {r.duration:6.1f}s  {r.message}")
+    return "\n".join(lines)
+
+
+# =============================================================================
+# WAVES
+# =============================================================================
+
+HealthCheck = Callable[[List[HostResult], datetime], List[str]]
+HostRollback = Callable[[DeployTarget], Tuple[bool, str]]
+
+
+@dataclass
+class WaveResult:
+    """Outcome of one rollout wave"""
+    index: int
+    targets: List[DeployTarget]
+    results: List[HostResult] = field(default_factory=list)
+    problems: List[str] = field(default_factory=list)   # failed hosts and health gate findings
+    rolled_back: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+    @property
+    def label(self) -> str:
+        if self.index == 0:
+            return "canary"
+        if any(t.is_coordination_server for t in self.targets):
+            return "coordination server"
+        return f"wave {self.index}"
+
+
+def plan_waves(targets: List[DeployTarget], canary: int = DEFAULT_CANARY,
+               wave_size: int = 10) -> List[List[DeployTarget]]:
+    """
+    Split targets into waves: `canary` peers, then batches of `wave_size`,
+    then the coordination server on its own.
+    """
+    peers = [t for t in targets if not t.is_coordination_server]
+    hubs = [t for t in targets if t.is_coordination_server]
+    wave_size = max(1, wave_size)
+
+    waves = []
+    if canary > 0 and peers:
+        waves.append(peers[:canary])
+        peers = peers[canary:]
+    elif peers:
+        waves.append([])   # keep index 0 for the canary
+    for i in range(0, len(peers), wave_size):
+        waves.append(peers[i:i + wave_size])
+    if hubs:
+        waves.append(hubs)
+    return waves
+
+
+def run_waves(
+    targets: List[DeployTarget],
+    deploy_host: HostDeployer,
+    health_check: Optional[HealthCheck],
+    rollback_host: Optional[HostRollback],
+    canary: int = DEFAULT_CANARY,
+    wave_size: int = 10,
+    parallel: int = 1,
+    timeout: Optional[float] = DEFAULT_HOST_TIMEOUT,
+    on_progress: Optional[Callable[[DeployProgress, Optional[HostResult]], None]] = None,
+    on_wave: Optional[Callable[[WaveResult], None]] = None,
+) -> Tuple[List[HostResult], List[WaveResult]]:
+    """
+    Canary rollout: deploy wave by wave, gating each on health.
+
+    After each wave, `health_check(wave_results, wave_start)` returns a list
+    of problems (empty = healthy). A wave with failed hosts or problems has
+    its deployed hosts rolled back with `rollback_host`, and every later
+    target is skipped.
+
+    Returns:
+        (one HostResult per target in target order, the waves that ran)
+    """
+    results: Dict[int, HostResult] = {}
+    waves: List[WaveResult] = []
+    stopped_at: Optional[WaveResult] = None
+
+    for index, wave_targets in enumerate(plan_waves(targets, canary, wave_size)):
+        if not wave_targets:
+            continue
+        wave = WaveResult(index, wave_targets)
+        waves.append(wave)
+
+        if stopped_at is not None:
+            for target in wave_targets:
+                results[id(target)] = HostResult(
+                    target, 'skipped', message=f"rollout stopped after {stopped_at.label}")
+            continue
+
+        wave_start = datetime.now()
+        wave.results = run_deployments(wave_targets, deploy_host, parallel=parallel,
+                                       timeout=timeout, on_progress=on_progress)
+        for result in wave.results:
+            results[id(result.target)] = result
+
+        wave.problems = [f"{r.target.hostname}: {r.status} {r.message}".rstrip()
+                         for r in wave.results if not r.ok]
+        if not wave.problems and health_check:
+            wave.problems = health_check(wave.results, wave_start)
+
+        if wave.problems:
+            stopped_at = wave
+            if rollback_host:
+                # Failed hosts too: the new config may be on disk already
+                for result in wave.results:
+                    if result.status not in ('deployed', 'failed', 'timeout'):
+                        continue
+                    ok, message = rollback_host(result.target)
+                    if not ok:
+                        result.message = f"{result.message}; rollback failed: {message}".lstrip('; ')
+                        continue
+                    wave.rolled_back.append(result.target.hostname)
+                    if result.status == 'deployed':
+                        result.status, result.message = 'rolled_back', message
+                    else:
+                        result.message = f"{result.message}; rolled back".lstrip('; ')
+
+        if on_wave:
+            on_wave(wave)
+
+    return [results[id(t)] for t in targets], waves
@@ -0,0 +1,204 @@
+"""
+Deploy Health Gates - Health Signals Between Rollout Waves
+
+A wave of a canary rollout (deploy_engine.run_waves) only proceeds if the
+hosts it touched are still healthy, judged by signals the project already
+collects:
+
+- HandshakeCheck: peers that were connected before the rollout must still
+  be connected as seen from the coordination server (`wg show dump` via the
+  bandwidth tracker). A restarted peer must have handshaked again since its
+  wave started.
+- ExitNodeCheck: exit nodes in the wave must not start failing the
+  failover manager's health checks.
+- DriftCheck: the running config of a host must match what was deployed.
+
+Checks are polled until they pass or the settle time runs out, since a
+restarted tunnel takes a few seconds to re-handshake.
+
+Usage:
+    gate = HealthGate([HandshakeCheck(db_path, hub), ExitNodeCheck(db_path)])
+    gate.baseline()
+    results, waves = run_waves(targets, deploy_host, gate.check, rollback_host)
+"""
+
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.bandwidth_tracking import BandwidthSample, BandwidthTracker
+from v1.config_diff import diff_configs
+from v1.deploy_engine import DeployTarget, HostResult
+from v1.exit_failover import ExitFailoverManager
+from v1.ssh_sessions import SSHTarget
+from v1.transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+# Seconds a wave gets to become healthy
+DEFAULT_SETTLE = 60.0
+DEFAULT_POLL_INTERVAL = 5.0
+
+# Entities expected to keep their tunnel up (remotes connect on demand)
+ALWAYS_ON_TYPES = ('subnet_router', 'exit_node')
+
+
+def _restarted(result: HostResult) -> bool:
+    return result.message.startswith('restarted')
+
+
+class HandshakeCheck:
+    """Previously connected peers stay connected, as seen from the hub"""
+
+    def __init__(self, db_path: Path | str, hub: Optional[DeployTarget], interface: str = 'wg0'):
+        self.db_path = db_path
+        self.hub = hub
+        self.interface = interface
+        self.connected: Set[Tuple[str, str]] = set()
+
+    def samples(self) -> Optional[Dict[Tuple[str, str], BandwidthSample]]:
+        """(entity_type, hostname) -> latest sample, None if the hub can't be read"""
+        if self.hub is None:
+            return None
+        target = SSHTarget.parse(self.hub.endpoint, self.hub.user)
+        remote = not get_transport().is_local(target.host)
+        samples = BandwidthTracker(self.db_path).collect_samples(
+            ssh_host=target.host if remote else None,
+            ssh_user=target.user,
+            ssh_port=target.port,
+            interface=self.interface,
+            max_age=0           # polled: every reading must be fresh
+        )
+        if not samples:
+            return None
+        return {(s.entity_type, s.hostname): s for s in samples}
+
+    def baseline(self):
+        samples = self.samples() or {}
+        self.connected = {key for key, sample in samples.items() if sample.connected}
+
+    def problems(self, results: List[HostResult], since: datetime) -> List[str]:
+        if not self.connected:
+            return []
+
+        hub_wave = any(r.target.is_coordination_server for r in results)
+        if hub_wave:
+            # The hub changed: every always-on peer must come back
+            watched = {key: any(_restarted(r) for r in results)
+                       for key in self.connected if key[0] in ALWAYS_ON_TYPES}
+        else:
+            watched = {(r.target.entity_type, r.target.hostname): _restarted(r)
+                       for r in results if r.status == 'deployed'}
+            watched = {key: restarted for key, restarted in watched.items() if key in self.connected}
+        if not watched:
+            return []
+
+        samples = self.samples()
+        if samples is None:
+            return ["no handshake data from the coordination server"]
+
+        problems = []
+        for (entity_type, hostname), restarted in sorted(watched.items()):
+            sample = samples.get((entity_type, hostname))
+            if sample is None or not sample.connected:
+                problems.append(f"{hostname}: no recent handshake")
+            elif restarted and (sample.latest_handshake is None or sample.latest_handshake < since):
+                problems.append(f"{hostname}: no handshake since restart")
+        return problems
+
+
+class ExitNodeCheck:
+    """Exit nodes in a wave keep passing the failover manager's health checks"""
+
+    def __init__(self, db_path: Path | str):
+        self.manager = ExitFailoverManager(db_path)
+        self.healthy: Set[str] = set()
+
+    def _passing(self) -> Set[str]:
+        return {h.hostname for h in self.manager.run_health_checks() if h.consecutive_failures == 0}
+
+    def baseline(self):
+        self.healthy = self._passing()
+
+    def problems(self, results: List[HostResult], since: datetime) -> List[str]:
+        watched = {r.target.hostname for r in results
+                   if r.target.entity_type == 'exit_node' and r.status == 'deployed'} & self.healthy
+        if not watched:
+            return []
+        passing = self._passing()
+        return [f"{hostname}: exit node health check failing" for hostname in sorted(watched - passing)]
+
+
+class DriftCheck:
+    """A deployed host runs the peers it was given"""
+
+    def __init__(self, fetch_running: Callable[[DeployTarget], Optional[str]]):
+        self.fetch_running = fetch_running
+
+    def baseline(self):
+        pass
+
+    def problems(self, results: List[HostResult], since: datetime) -> List[str]:
+        problems = []
+        for r in results:
+            if r.status != 'deployed':
+                continue
+            running = self.fetch_running(r.target)
+            if running is None:
+                problems.append(f"{r.target.hostname}: unreachable after deploy")
+                continue
+            if not running.strip():
+                problems.append(f"{r.target.hostname}: interface not running")
+                continue
+            generated = r.target.config_file.read_text()
+            diff = diff_configs(generated, running, generated)
+            if diff.has_peer_changes:
+                problems.append(f"{r.target.hostname}: running peers differ ({diff.summary()})")
+        return problems
+
+
+class HealthGate:
+    """
+    Polls a set of checks after each wave.
+
+    A check that raises is logged and ignored: a broken signal source
+    should not block every rollout.
+    """
+
+    def __init__(self, checks: List, settle: float = DEFAULT_SETTLE,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, sleep: Callable[[float], None] = time.sleep):
+        self.checks = checks
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.sleep = sleep
+
+    def baseline(self):
+        for check in self.checks:
+            try:
+                check.baseline()
+            except Exception as e:
+                logger.warning(f"{type(check).__name__} baseline failed: {e}")
+
+    def _problems(self, results: List[HostResult], since: datetime) -> List[str]:
+        problems = []
+        for check in self.checks:
+            try:
+                problems.extend(check.problems(results, since))
+            except Exception as e:
+                logger.warning(f"{type(check).__name__} failed: {e}")
+        return problems
+
+    def check(self, results: List[HostResult], since: datetime) -> List[str]:
+        """Problems that persisted through the settle time (empty = healthy)"""
+        deadline = time.monotonic() + self.settle
+        while True:
+            problems = self._problems(results, since)
+            left = deadline - time.monotonic()
+            if not problems or left <= 0:
+                return problems
+            self.sleep(min(self.poll_interval, left))
@@ -37,13 +37,12 @@
 except ImportError:
     NACL_AVAILABLE = False
 
-try:
-    import paramiko
-    PARAMIKO_AVAILABLE = True
-except ImportError:
-    PARAMIKO_AVAILABLE = False
-
-from v1.encryption import decrypt_value
+from v1.db_pool import checkpoint, close_pools, get_connection
+from v1.encryption import decrypt_many, decrypt_value
+from v1.generation_engine import map_parallel
+from v1.migrations import ensure_schema, execute_script
+from v1.ssh_sessions import SSHTarget
+from v1.transport import get_transport
 
 
 class BackupType(Enum):
@@ -110,6 +109,66 @@ class RestoreResult:
     error: Optional[str] = None
 
 
+RECOVERY_SCHEMA = """
+    -- Backup history
+    CREATE TABLE IF NOT EXISTS backup_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        backup_id TEXT UNIQUE NOT NULL,
+        backup_type TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        file_size INTEGER,
+        db_hash TEXT NOT NULL,
+        is_encrypted INTEGER NOT NULL DEFAULT 0,
+        is_remote INTEGER NOT NULL DEFAULT 0,
+        remote_path TEXT,
+        entity_counts TEXT,
+        notes TEXT
+    );
+
+    -- Restore history
+    CREATE TABLE IF NOT EXISTS restore_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        backup_id TEXT NOT NULL,
+        restored_at TEXT NOT NULL,
+        restore_mode TEXT NOT NULL,
+        entities_restored TEXT,
+        success INTEGER NOT NULL,
+        error TEXT
+    );
+
+    -- Backup schedules
+    CREATE TABLE IF NOT EXISTS backup_schedule (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        backup_type TEXT NOT NULL,
+        cron_expression TEXT NOT NULL,
+        retention_days INTEGER NOT NULL DEFAULT 30,
+        is_encrypted INTEGER NOT NULL DEFAULT 1,
+        remote_destination TEXT,
+        is_active INTEGER NOT NULL DEFAULT 1,
+        last_run TEXT,
+        next_run TEXT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_backup_created
+        ON backup_history(created_at);
+    CREATE INDEX IF NOT EXISTS idx_restore_time
+        ON restore_history(restored_at);
+"""
+
+
+def create_recovery_schema(cursor):
+    """Migration 8: backup/restore history and backup schedules"""
+    execute_script(cursor, RECOVERY_SCHEMA)
+
+
+def _build_export_config(snapshot: dict, task: tuple) -> str:
+    """Worker entry point for config export: task is (filename, entity_type, entity)"""
+    _, entity_type, entity = task
+    return DisasterRecovery._build_config(snapshot, entity_type, entity)
+
+
 class DisasterRecovery:
     """
     Comprehensive backup and restore for WireGuard Friend.
@@ -136,67 +195,10 @@ def __init__(self, db_path: str, backup_dir: str = None):
             os.path.dirname(db_path), "backups"
         )
         os.makedirs(self.backup_dir, exist_ok=True)
-        self._init_tables()
+        ensure_schema(self.db_path)
 
     def _get_conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-
-    def _init_tables(self):
-        """Create backup tracking tables."""
-        conn = self._get_conn()
-        try:
-            conn.executescript("""
-                -- Backup history
-                CREATE TABLE IF NOT EXISTS backup_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    backup_id TEXT UNIQUE NOT NULL,
-                    backup_type TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    file_path TEXT NOT NULL,
-                    file_size INTEGER,
-                    db_hash TEXT NOT NULL,
-                    is_encrypted INTEGER NOT NULL DEFAULT 0,
-                    is_remote INTEGER NOT NULL DEFAULT 0,
-                    remote_path TEXT,
-                    entity_counts TEXT,
-                    notes TEXT
-                );
-
-                -- Restore history
-                CREATE TABLE IF NOT EXISTS restore_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    backup_id TEXT NOT NULL,
-                    restored_at TEXT NOT NULL,
-                    restore_mode TEXT NOT NULL,
-                    entities_restored TEXT,
-                    success INTEGER NOT NULL,
-                    error TEXT
-                );
-
-                -- Backup schedules
-                CREATE TABLE IF NOT EXISTS backup_schedule (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL,
-                    backup_type TEXT NOT NULL,
-                    cron_expression TEXT NOT NULL,
-                    retention_days INTEGER NOT NULL DEFAULT 30,
-                    is_encrypted INTEGER NOT NULL DEFAULT 1,
-                    remote_destination TEXT,
-                    is_active INTEGER NOT NULL DEFAULT 1,
-                    last_run TEXT,
-                    next_run TEXT
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_backup_created
-                    ON backup_history(created_at);
-                CREATE INDEX IF NOT EXISTS idx_restore_time
-                    ON restore_history(restored_at);
-            """)
-            conn.commit()
-        finally:
-            conn.close()
+        return get_connection(self.db_path)
 
     def _hash_file(self, file_path: str) -> str:
         """Calculate SHA-256 hash of file."""
@@ -212,7 +214,7 @@ def _hash_database(self) -> str:
         try:
             # Get all table data in deterministic order
             tables = conn.execute("""
-                SELECT name FROM sqlite_master
+                SELECT name, sql FROM sqlite_master
                 WHERE type='table' AND name NOT LIKE 'sqlite_%'
                 ORDER BY name
             """).fetchall()
@@ -225,7 +227,13 @@ def _hash_database(self) -> str:
                 if table_name in ('backup_history', 'restore_history', 'backup_schedule'):
                     continue
 
-                rows = conn.execute(f"SELECT * FROM {table_name} ORDER BY rowid").fetchall()
+                order = 'rowid'
+                if 'WITHOUT ROWID' in (table['sql'] or '').upper():
+                    # No rowid: order by the primary key instead
+                    columns = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+                    order = ', '.join(c['name'] for c in sorted(columns, key=lambda c: c['pk']) if c['pk'])
+
+                rows = conn.execute(f"SELECT * FROM {table_name} ORDER BY {order}").fetchall()
                 for row in rows:
                     hasher.update(str(dict(row)).encode())
 
@@ -303,7 +311,7 @@ def _decrypt_data(self, encrypted_data: bytes, password: str) -> bytes:
         return box.decrypt(ciphertext)
 
     def create_backup(self, backup_type: BackupType = BackupType.FULL,
-                      password: str = None, notes: str = None) -> str:
+                      password: str = None, notes: str = None, jobs: int = 1) -> str:
         """
         Create a backup archive.
 
@@ -311,6 +319,7 @@ def create_backup(self, backup_type: BackupType = BackupType.FULL,
             backup_type: Type of backup to create
             password: Optional password for encryption
             notes: Optional notes about this backup
+            jobs: Worker processes for rendering exported configs
 
         Returns:
             Path to created backup file
@@ -325,6 +334,8 @@ def create_backup(self, backup_type: BackupType = BackupType.FULL,
             # Copy database
             if backup_type in (BackupType.FULL, BackupType.INCREMENTAL):
                 db_backup = temp_path / "wireguard_friend.db"
+                # Committed pages may still be in the WAL; flush them first
+                checkpoint(self.db_path)
                 shutil.copy2(self.db_path, db_backup)
 
                 # Verify copy integrity
@@ -333,7 +344,7 @@ def create_backup(self, backup_type: BackupType = BackupType.FULL,
 
             # Export configs
             if backup_type in (BackupType.FULL, BackupType.CONFIG_ONLY):
-                self._export_configs(temp_path / "configs")
+                self._export_configs(temp_path / "configs", jobs=jobs)
 
             # Export keys only (always encrypted)
             if backup_type == BackupType.KEYS_ONLY:
@@ -393,42 +404,102 @@ def _create_tar(self, source_dir: Path) -> bytes:
         finally:
             os.unlink(tmp_path)
 
-    def _export_configs(self, output_dir: Path):
-        """Export all WireGuard configurations."""
+    def _export_configs(self, output_dir: Path, jobs: int = 1):
+        """
+        Export all WireGuard configurations.
+
+        Args:
+            output_dir: Directory to write configs to
+            jobs: Render in this many worker processes (same output as 1)
+        """
         output_dir.mkdir(parents=True, exist_ok=True)
 
         conn = self._get_conn()
         try:
-            # Export coordination servers
-            cs_rows = conn.execute("SELECT * FROM coordination_server").fetchall()
-            for cs in cs_rows:
-                config = self._build_config(conn, 'cs', dict(cs))
-                config_path = output_dir / f"cs-{cs['hostname']}.conf"
-                with open(config_path, 'w') as f:
-                    f.write(config)
-
-            # Export subnet routers
-            sr_rows = conn.execute("SELECT * FROM subnet_router").fetchall()
-            for sr in sr_rows:
-                config = self._build_config(conn, 'sr', dict(sr))
-                config_path = output_dir / f"sr-{sr['hostname']}.conf"
-                with open(config_path, 'w') as f:
-                    f.write(config)
-
-            # Export remotes
-            remote_rows = conn.execute("SELECT * FROM remote").fetchall()
-            for remote in remote_rows:
-                config = self._build_config(conn, 'remote', dict(remote))
+            snapshot = self._load_export_snapshot(conn)
+
+            tasks = []
+            for cs in conn.execute("SELECT * FROM coordination_server").fetchall():
+                tasks.append((f"cs-{cs['hostname']}.conf", 'cs', dict(cs)))
+            for sr in conn.execute("SELECT * FROM subnet_router").fetchall():
+                tasks.append((f"sr-{sr['hostname']}.conf", 'sr', dict(sr)))
+            for remote in conn.execute("SELECT * FROM remote").fetchall():
                 hostname = remote['hostname'] or f"remote-{remote['id']}"
-                config_path = output_dir / f"remote-{hostname}.conf"
-                with open(config_path, 'w') as f:
-                    f.write(config)
-
+                tasks.append((f"remote-{hostname}.conf", 'remote', dict(remote)))
         finally:
             conn.close()
 
-    def _build_config(self, conn: sqlite3.Connection,
-                      entity_type: str, entity: dict) -> str:
+        configs = map_parallel(_build_export_config, snapshot, tasks, jobs=jobs)
+        for (filename, _, _), config in zip(tasks, configs):
+            with open(output_dir / filename, 'w') as f:
+                f.write(config)
+
+    @staticmethod
+    def _load_export_snapshot(conn: sqlite3.Connection) -> dict:
+        """
+        Read peer and command data for every entity in one pass.
+
+        Replaces per-entity queries, and lets worker processes build configs
+        without a database connection.
+        """
+        snapshot = {
+            'command_pairs': {},     # (entity_type, entity_id) -> [(up, down)]
+            'cs_peers': {},          # cs id -> {public_key, endpoint}
+            'remotes_by_cs': {},     # cs_id -> [peer]
+            'routers_by_cs': {},     # cs_id -> [peer]
+        }
+
+        try:
+            for row in conn.execute("""
+                SELECT entity_type, entity_id, up_commands, down_commands
+                FROM command_pair ORDER BY id
+            """):
+                key = (row['entity_type'], row['entity_id'])
+                snapshot['command_pairs'].setdefault(key, []).append(
+                    (row['up_commands'], row['down_commands']))
+        except sqlite3.Error:
+            pass  # Command pair table structure may vary
+
+        try:
+            for row in conn.execute("""
+                SELECT id, current_public_key as public_key, endpoint
+                FROM coordination_server
+            """):
+                snapshot['cs_peers'][row['id']] = {
+                    'public_key': row['public_key'],
+                    'endpoint': row['endpoint'],
+                }
+
+            for row in conn.execute("""
+                SELECT cs_id, current_public_key as public_key, ipv4_address as vpn_ip,
+                       persistent_keepalive as keepalive
+                FROM remote ORDER BY id
+            """):
+                snapshot['remotes_by_cs'].setdefault(row['cs_id'], []).append({
+                    'public_key': row['public_key'],
+                    'vpn_ip': row['vpn_ip'],
+                    'endpoint': None,
+                    'keepalive': row['keepalive'],
+                })
+
+            for row in conn.execute("""
+                SELECT cs_id, current_public_key as public_key, ipv4_address as vpn_ip,
+                       endpoint
+                FROM subnet_router ORDER BY id
+            """):
+                snapshot['routers_by_cs'].setdefault(row['cs_id'], []).append({
+                    'public_key': row['public_key'],
+                    'vpn_ip': row['vpn_ip'],
+                    'endpoint': row['endpoint'],
+                    'keepalive': None,
+                })
+        except sqlite3.Error:
+            pass  # Schema mismatch - skip peers
+
+        return snapshot
+
+    @staticmethod
+    def _build_config(snapshot: dict, entity_type: str, entity: dict) -> str:
         """Build WireGuard config for entity."""
         lines = []
 
@@ -446,75 +517,42 @@ def _build_config(self, conn: sqlite3.Connection,
         # Get PostUp/PostDown
         if entity_type in ('cs', 'sr'):
             table = 'coordination_server' if entity_type == 'cs' else 'subnet_router'
-            try:
-                commands = conn.execute(f"""
-                    SELECT up_commands, down_commands FROM command_pair
-                    WHERE entity_type = ? AND entity_id = ?
-                """, (table, entity['id'])).fetchall()
-
-                for cmd in commands:
-                    if cmd['up_commands']:
-                        for up_cmd in cmd['up_commands'].split('\n'):
-                            if up_cmd.strip():
-                                lines.append(f"PostUp = {up_cmd.strip()}")
-                    if cmd['down_commands']:
-                        for down_cmd in cmd['down_commands'].split('\n'):
-                            if down_cmd.strip():
-                                lines.append(f"PostDown = {down_cmd.strip()}")
-            except:
-                pass  # Command pair table structure may vary
+            for up_commands, down_commands in snapshot['command_pairs'].get((table, entity['id']), []):
+                if up_commands:
+                    for up_cmd in up_commands.split('\n'):
+                        if up_cmd.strip():
+                            lines.append(f"PostUp = {up_cmd.strip()}")
+                if down_commands:
+                    for down_cmd in down_commands.split('\n'):
+                        if down_cmd.strip():
+                            lines.append(f"PostDown = {down_cmd.strip()}")
 
         lines.append("")
 
-        # Peer sections - use actual column names
+        # Peer sections
         peers = []
-        try:
-            if entity_type == 'cs':
-                # CS has remotes and subnet routers as peers
-                peers = conn.execute("""
-                    SELECT current_public_key as public_key, ipv4_address as vpn_ip,
-                           NULL as endpoint, persistent_keepalive as keepalive
-                    FROM remote WHERE cs_id = ?
-                    UNION ALL
-                    SELECT current_public_key as public_key, ipv4_address as vpn_ip,
-                           endpoint, NULL as keepalive
-                    FROM subnet_router WHERE cs_id = ?
-                """, (entity['id'], entity['id'])).fetchall()
-
-            elif entity_type == 'sr':
-                # SR has CS and its remotes as peers
-                cs = conn.execute("""
-                    SELECT current_public_key as public_key, endpoint
-                    FROM coordination_server WHERE id = ?
-                """, (entity.get('cs_id'),)).fetchone()
-
-                if cs:
-                    peers.append({
-                        'public_key': cs['public_key'],
-                        'endpoint': cs['endpoint'],
-                        'allowed_ips': '0.0.0.0/0, ::/0'
-                    })
-
-                remotes = conn.execute("""
-                    SELECT current_public_key as public_key, ipv4_address as vpn_ip,
-                           persistent_keepalive as keepalive
-                    FROM remote WHERE cs_id = ?
-                """, (entity['id'],)).fetchall()
-                peers.extend(remotes)
-
-            elif entity_type == 'remote':
-                # Remote has its CS as peer
-                sponsor = conn.execute("""
-                    SELECT current_public_key as public_key, endpoint
-                    FROM coordination_server WHERE id = ?
-                """, (entity.get('cs_id'),)).fetchone()
-                peers = [sponsor] if sponsor else []
-
-        except Exception:
-            pass  # Schema mismatch - skip peers
+        if entity_type == 'cs':
+            # CS has remotes and subnet routers as peers
+            peers = (snapshot['remotes_by_cs'].get(entity['id'], []) +
+                     snapshot['routers_by_cs'].get(entity['id'], []))
+
+        elif entity_type == 'sr':
+            # SR has CS and its remotes as peers
+            cs = snapshot['cs_peers'].get(entity.get('cs_id'))
+            if cs:
+                peers.append({
+                    'public_key': cs['public_key'],
+                    'endpoint': cs['endpoint'],
+                    'allowed_ips': '0.0.0.0/0, ::/0'
+                })
+            peers.extend(snapshot['remotes_by_cs'].get(entity['id'], []))
+
+        elif entity_type == 'remote':
+            # Remote has its CS as peer
+            sponsor = snapshot['cs_peers'].get(entity.get('cs_id'))
+            peers = [sponsor] if sponsor else []
 
         for peer in peers:
-            peer = dict(peer) if hasattr(peer, 'keys') else peer
             lines.append("[Peer]")
             lines.append(f"PublicKey = {peer['public_key']}")
             if peer.get('endpoint'):
@@ -548,17 +586,18 @@ def _export_keys(self, output_dir: Path, password: str):
                 ('remote', 'remote')
             ]:
                 rows = conn.execute(f"""
-                    SELECT id, hostname, private_key, guid
+                    SELECT id, hostname, private_key, permanent_guid AS guid
                     FROM {table} WHERE private_key IS NOT NULL
                 """).fetchall()
+                private_keys = decrypt_many(row['private_key'] for row in rows)
 
-                for row in rows:
+                for row, private_key in zip(rows, private_keys):
                     key_id = f"{entity_type}-{row['hostname'] or row['id']}"
                     keys[key_id] = {
                         "entity_type": entity_type,
                         "hostname": row['hostname'],
                         "guid": row['guid'],
-                        "private_key": decrypt_value(row['private_key']),
+                        "private_key": private_key,
                     }
 
             # Encrypt and save
@@ -644,10 +683,12 @@ def restore_backup(self, backup_path: str, password: str = None,
                     if db_backup.exists():
                         # Backup current db first
                         current_backup = f"{self.db_path}.pre-restore"
+                        checkpoint(self.db_path)
                         shutil.copy2(self.db_path, current_backup)
                         warnings.append(f"Current DB backed up to {current_backup}")
 
-                        # Replace
+                        # Replace (pooled handles would keep serving the old pages)
+                        close_pools(self.db_path)
                         shutil.copy2(db_backup, self.db_path)
                         entities_restored = metadata.entity_counts
                     else:
@@ -724,7 +765,7 @@ def _restore_keys(self, keys_file: Path, password: str) -> dict:
                 # Update by GUID if available
                 if guid:
                     conn.execute(f"""
-                        UPDATE {table} SET private_key = ? WHERE guid = ?
+                        UPDATE {table} SET private_key = ? WHERE permanent_guid = ?
                     """, (private_key, guid))
                     restored["keys_restored"] += 1
 
@@ -993,35 +1034,23 @@ def cleanup_old_backups(self, retention_days: int = 30) -> int:
 
     def upload_to_remote(self, backup_path: str, ssh_host: str, ssh_port: int,
                          ssh_user: str, ssh_key: str, remote_dir: str) -> bool:
-        """Upload backup to remote SSH destination."""
-        if not PARAMIKO_AVAILABLE:
-            raise RuntimeError("Paramiko not available for SSH")
-
+        """Upload backup to remote SSH destination (shared session per host)."""
         try:
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(
-                hostname=ssh_host,
-                port=ssh_port,
-                username=ssh_user,
-                key_filename=ssh_key,
-                timeout=30
-            )
-
-            sftp = client.open_sftp()
+            transport = get_transport()
+            target = SSHTarget(ssh_host, ssh_port or 22, ssh_user or 'root')
 
             # Ensure remote directory exists
-            try:
-                sftp.stat(remote_dir)
-            except FileNotFoundError:
-                sftp.mkdir(remote_dir)
+            result = transport.exec(target, f"mkdir -p '{remote_dir}'", key_path=ssh_key,
+                                    batch_mode=True, timeout=30)
+            if result.returncode != 0:
+                return False
 
             # Upload
             remote_path = f"{remote_dir}/{os.path.basename(backup_path)}"
-            sftp.put(backup_path, remote_path)
-
-            sftp.close()
-            client.close()
+            result = transport.put(backup_path, target, remote_path, key_path=ssh_key,
+                                   batch_mode=True, timeout=300)
+            if result.returncode != 0:
+                return False
 
             # Update history with remote path
             conn = self._get_conn()
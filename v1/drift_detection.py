@@ -22,10 +22,10 @@
 from enum import Enum
 from typing import Optional
 
-try:
-    import paramiko
-except ImportError:
-    paramiko = None
+from v1.db_pool import get_connection
+from v1.migrations import ensure_schema, execute_script
+from v1.ssh_sessions import SSHTarget
+from v1.transport import get_transport
 
 
 class DriftType(Enum):
@@ -106,6 +106,111 @@ def to_dict(self) -> dict:
         }
 
 
+DRIFT_SCHEMA = """
+    -- Drift scan history
+    CREATE TABLE IF NOT EXISTS drift_scan (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        entity_type TEXT NOT NULL,
+        entity_id INTEGER NOT NULL,
+        entity_name TEXT NOT NULL,
+        scan_time TEXT NOT NULL,
+        config_hash_expected TEXT,
+        config_hash_actual TEXT,
+        is_drifted INTEGER NOT NULL DEFAULT 0,
+        drift_count INTEGER NOT NULL DEFAULT 0,
+        critical_count INTEGER NOT NULL DEFAULT 0,
+        warning_count INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        UNIQUE(entity_type, entity_id, scan_time)
+    );
+
+    -- Individual drift items
+    CREATE TABLE IF NOT EXISTS drift_item (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scan_id INTEGER NOT NULL,
+        drift_type TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        peer_public_key TEXT,
+        expected_value TEXT,
+        actual_value TEXT,
+        description TEXT NOT NULL,
+        FOREIGN KEY (scan_id) REFERENCES drift_scan(id)
+    );
+
+    -- Drift baselines (acknowledged drift that should be ignored)
+    CREATE TABLE IF NOT EXISTS drift_baseline (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        entity_type TEXT NOT NULL,
+        entity_id INTEGER NOT NULL,
+        drift_type TEXT NOT NULL,
+        peer_public_key TEXT,
+        acknowledged_at TEXT NOT NULL,
+        acknowledged_by TEXT,
+        reason TEXT,
+        expires_at TEXT,
+        UNIQUE(entity_type, entity_id, drift_type, peer_public_key)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_drift_scan_entity
+        ON drift_scan(entity_type, entity_id);
+    CREATE INDEX IF NOT EXISTS idx_drift_scan_time
+        ON drift_scan(scan_time);
+    CREATE INDEX IF NOT EXISTS idx_drift_item_scan
+        ON drift_item(scan_id);
+"""
+
+
+def create_drift_schema(cursor):
+    """Migration 10: drift scan history and drift items"""
+    execute_script(cursor, DRIFT_SCHEMA)
+
+
+def parse_wg_config(config_text: str) -> dict:
+    """
+    Parse WireGuard config into structured dict.
+
+    Keys are lower-cased; peers are keyed by public key. Works for both
+    wg-quick files and `wg showconf` output.
+    """
+    result = {
+        "interface": {},
+        "peers": {}  # keyed by public key
+    }
+
+    current_section = None
+    current_peer_key = None
+
+    for line in config_text.strip().split('\n'):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        if line == '[Interface]':
+            current_section = 'interface'
+            current_peer_key = None
+            continue
+        elif line == '[Peer]':
+            current_section = 'peer'
+            current_peer_key = None
+            continue
+
+        if '=' in line:
+            key, value = line.split('=', 1)
+            key = key.strip().lower()
+            value = value.strip()
+
+            if current_section == 'interface':
+                result['interface'][key] = value
+            elif current_section == 'peer':
+                if key == 'publickey':
+                    current_peer_key = value
+                    result['peers'][value] = {}
+                elif current_peer_key:
+                    result['peers'][current_peer_key][key] = value
+
+    return result
+
+
 class DriftDetector:
     """
     Detects configuration drift between database and deployed configs.
@@ -120,94 +225,25 @@ class DriftDetector:
 
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self._init_tables()
+        ensure_schema(self.db_path)
 
     def _get_conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-
-    def _init_tables(self):
-        """Create drift detection tables."""
-        conn = self._get_conn()
-        try:
-            conn.executescript("""
-                -- Drift scan history
-                CREATE TABLE IF NOT EXISTS drift_scan (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    entity_type TEXT NOT NULL,
-                    entity_id INTEGER NOT NULL,
-                    entity_name TEXT NOT NULL,
-                    scan_time TEXT NOT NULL,
-                    config_hash_expected TEXT,
-                    config_hash_actual TEXT,
-                    is_drifted INTEGER NOT NULL DEFAULT 0,
-                    drift_count INTEGER NOT NULL DEFAULT 0,
-                    critical_count INTEGER NOT NULL DEFAULT 0,
-                    warning_count INTEGER NOT NULL DEFAULT 0,
-                    error TEXT,
-                    UNIQUE(entity_type, entity_id, scan_time)
-                );
-
-                -- Individual drift items
-                CREATE TABLE IF NOT EXISTS drift_item (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    scan_id INTEGER NOT NULL,
-                    drift_type TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-                    peer_public_key TEXT,
-                    expected_value TEXT,
-                    actual_value TEXT,
-                    description TEXT NOT NULL,
-                    FOREIGN KEY (scan_id) REFERENCES drift_scan(id)
-                );
-
-                -- Drift baselines (acknowledged drift that should be ignored)
-                CREATE TABLE IF NOT EXISTS drift_baseline (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    entity_type TEXT NOT NULL,
-                    entity_id INTEGER NOT NULL,
-                    drift_type TEXT NOT NULL,
-                    peer_public_key TEXT,
-                    acknowledged_at TEXT NOT NULL,
-                    acknowledged_by TEXT,
-                    reason TEXT,
-                    expires_at TEXT,
-                    UNIQUE(entity_type, entity_id, drift_type, peer_public_key)
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_drift_scan_entity
-                    ON drift_scan(entity_type, entity_id);
-                CREATE INDEX IF NOT EXISTS idx_drift_scan_time
-                    ON drift_scan(scan_time);
-                CREATE INDEX IF NOT EXISTS idx_drift_item_scan
-                    ON drift_item(scan_id);
-            """)
-            conn.commit()
-        finally:
-            conn.close()
+        return get_connection(self.db_path)
 
     def _fetch_live_config(self, host: str, port: int, user: str,
                            key_path: str, interface: str = "wg0") -> Optional[str]:
-        """Fetch live WireGuard config via SSH."""
-        if paramiko is None:
-            return None
-
+        """Fetch live WireGuard config over the active transport (SSH by default)."""
         try:
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(
-                hostname=host,
-                port=port,
-                username=user,
-                key_filename=key_path,
-                timeout=10
-            )
-
             # Get running config with wg showconf
-            stdin, stdout, stderr = client.exec_command(f"sudo wg showconf {interface}")
-            config = stdout.read().decode('utf-8')
-            client.close()
+            result = get_transport().exec(
+                SSHTarget(host, port or 22, user or 'root'),
+                f"sudo wg showconf {interface}",
+                key_path=key_path,
+                connect_timeout=10,
+                batch_mode=True,
+                timeout=30
+            )
+            config = result.stdout
 
             return config if config.strip() else None
 
@@ -216,43 +252,7 @@ def _fetch_live_config(self, host: str, port: int, user: str,
 
     def _parse_wg_config(self, config_text: str) -> dict:
         """Parse WireGuard config into structured dict."""
-        result = {
-            "interface": {},
-            "peers": {}  # keyed by public key
-        }
-
-        current_section = None
-        current_peer_key = None
-
-        for line in config_text.strip().split('\n'):
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-
-            if line == '[Interface]':
-                current_section = 'interface'
-                current_peer_key = None
-                continue
-            elif line == '[Peer]':
-                current_section = 'peer'
-                current_peer_key = None
-                continue
-
-            if '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip().lower()
-                value = value.strip()
-
-                if current_section == 'interface':
-                    result['interface'][key] = value
-                elif current_section == 'peer':
-                    if key == 'publickey':
-                        current_peer_key = value
-                        result['peers'][value] = {}
-                    elif current_peer_key:
-                        result['peers'][current_peer_key][key] = value
-
-        return result
+        return parse_wg_config(config_text)
 
     def _hash_config(self, config_dict: dict) -> str:
         """Generate deterministic hash of config."""
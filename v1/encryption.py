@@ -27,23 +27,111 @@
     # Check if database is encrypted
     if manager.is_encrypted:
         manager.unlock("my-secure-passphrase")
+
+    # Bulk operations reuse one cipher; optional short-lived plaintext cache
+    keys = manager.decrypt_many(encrypted_values)
+    manager.enable_plaintext_cache(max_entries=1024, ttl=60)
+    manager.lock()   # forgets the key and wipes the cache
 """
 
 import os
+import sys
 import base64
 import hashlib
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.db_pool import get_connection
+from v1.migrations import execute_script
+
 logger = logging.getLogger(__name__)
 
 # Encryption marker prefix for encrypted values
 ENCRYPTED_PREFIX = "enc:v1:"
 
+# Every column holding key material, by table (tables may be absent)
+SENSITIVE_COLUMNS = [
+    ('coordination_server', ('private_key',)),
+    ('subnet_router', ('private_key', 'preshared_key')),
+    ('exit_node', ('private_key',)),
+    ('remote', ('private_key', 'preshared_key')),
+    ('key_rotation_history', ('new_private_key',)),
+    ('extramural_config', ('local_private_key',)),
+    ('extramural_peer', ('preshared_key',)),
+]
+
+# Rows re-encrypted per transaction during a data key rotation
+DEK_ROTATION_BATCH = 500
+
+# Data key changes committed by this process. Managers share the pooled
+# connection, whose PRAGMA data_version ignores its own commits
+_key_changes = 0
+
+ENVELOPE_SCHEMA = """
+    -- Data encryption keys (DEKs), each wrapped by the passphrase-derived
+    -- key (KEK). Column values are encrypted with the active DEK, so a
+    -- passphrase change only rewraps these rows.
+    CREATE TABLE IF NOT EXISTS encryption_key (
+        generation INTEGER PRIMARY KEY,
+        wrapped_key TEXT NOT NULL,          -- enc:v1: AES-GCM(KEK, base64(DEK))
+        state TEXT NOT NULL,                -- 'active' or 'retiring' (rotation in progress)
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Progress of a data key rotation (at most one)
+    CREATE TABLE IF NOT EXISTS encryption_rotation (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        target_generation INTEGER NOT NULL,
+        table_name TEXT,                    -- table being re-encrypted (NULL = not started)
+        last_id INTEGER NOT NULL DEFAULT 0, -- last row id re-encrypted in table_name
+        rows_done INTEGER NOT NULL DEFAULT 0,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP
+    );
+
+    -- Rows whose keys were written while a rotation was in progress: a
+    -- writer may have encrypted them with the retiring DEK behind the
+    -- rotation's cursor, so only these are re-checked before it is deleted
+    CREATE TABLE IF NOT EXISTS encryption_rewrite (
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        PRIMARY KEY (table_name, row_id)
+    ) WITHOUT ROWID;
+"""
+
+# Log writes to a table's sensitive columns during a DEK rotation
+REWRITE_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS {table}_rotation_insert AFTER INSERT ON {table}
+    BEGIN
+        INSERT OR IGNORE INTO encryption_rewrite (table_name, row_id) VALUES ('{table}', NEW.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {table}_rotation_update AFTER UPDATE OF {columns} ON {table}
+    BEGIN
+        INSERT OR IGNORE INTO encryption_rewrite (table_name, row_id) VALUES ('{table}', NEW.id);
+    END
+"""
+
+
+@dataclass
+class DEKRotationProgress:
+    """State of a data key rotation"""
+    target_generation: int
+    table_name: Optional[str]
+    last_id: int
+    rows_done: int
+    done: bool = False
+
 
 @dataclass
 class EncryptionMetadata:
@@ -70,11 +158,38 @@ class SecureColumn:
     - 16-byte authentication tag
     """
 
-    def __init__(self, key: bytes):
-        """Initialize with derived key (32 bytes for AES-256)"""
+    def __init__(self, key: bytes, fallback_keys: Iterable[bytes] = ()):
+        """
+        Initialize with a 32-byte AES-256 key.
+
+        fallback_keys are tried, in order, for values the primary key can't
+        decrypt (values not yet re-encrypted during a data key rotation).
+        Encryption always uses the primary key.
+        """
         if len(key) != 32:
             raise ValueError("Key must be 32 bytes for AES-256")
         self._key = key
+        self._cipher = None
+        self._fallbacks = [SecureColumn(k) for k in fallback_keys]
+
+    def __getstate__(self):
+        # AESGCM objects can't be pickled; rebuilt lazily after unpickling
+        state = self.__dict__.copy()
+        state['_cipher'] = None
+        return state
+
+    def _get_cipher(self):
+        """AES-GCM cipher for this key, built once and reused"""
+        if self._cipher is None:
+            try:
+                from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+            except ImportError:
+                raise ImportError(
+                    "cryptography package required for encryption. "
+                    "Install with: pip install cryptography"
+                )
+            self._cipher = AESGCM(self._key)
+        return self._cipher
 
     def encrypt(self, plaintext: str) -> str:
         """
@@ -87,20 +202,11 @@ def encrypt(self, plaintext: str) -> str:
         if not plaintext:
             return plaintext
 
-        try:
-            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-        except ImportError:
-            raise ImportError(
-                "cryptography package required for encryption. "
-                "Install with: pip install cryptography"
-            )
-
         # Generate unique 96-bit nonce for each encryption
         nonce = os.urandom(12)
 
         # Encrypt with AES-256-GCM (includes authentication tag)
-        cipher = AESGCM(self._key)
-        ciphertext = cipher.encrypt(nonce, plaintext.encode('utf-8'), None)
+        ciphertext = self._get_cipher().encrypt(nonce, plaintext.encode('utf-8'), None)
 
         # Combine nonce + ciphertext (tag is appended by AESGCM)
         encrypted_data = nonce + ciphertext
@@ -123,14 +229,6 @@ def decrypt(self, encrypted: str) -> str:
             # Not encrypted - return as-is (backward compatibility)
             return encrypted
 
-        try:
-            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-        except ImportError:
-            raise ImportError(
-                "cryptography package required for decryption. "
-                "Install with: pip install cryptography"
-            )
-
         # Remove prefix and decode
         encoded_data = encrypted[len(ENCRYPTED_PREFIX):]
         encrypted_data = base64.b64decode(encoded_data)
@@ -140,12 +238,110 @@ def decrypt(self, encrypted: str) -> str:
         ciphertext = encrypted_data[12:]
 
         # Decrypt and verify authentication tag
-        cipher = AESGCM(self._key)
+        cipher = self._get_cipher()
         try:
             plaintext = cipher.decrypt(nonce, ciphertext, None)
             return plaintext.decode('utf-8')
         except Exception as e:
-            raise ValueError(f"Decryption failed (wrong passphrase?): {e}")
+            return self._decrypt_with_fallbacks(encrypted, e)
+
+    def _decrypt_with_fallbacks(self, encrypted: str, error: Exception) -> str:
+        for fallback in self._fallbacks:
+            try:
+                return fallback.decrypt(encrypted)
+            except ValueError:
+                continue
+        raise ValueError(f"Decryption failed (wrong passphrase?): {error}")
+
+    def encrypt_many(self, plaintexts: Iterable[str]) -> List[str]:
+        """Encrypt several values with one cipher (fresh nonce per value)"""
+        return [self.encrypt(value) for value in plaintexts]
+
+    def decrypt_many(self, values: Iterable[str]) -> List[str]:
+        """
+        Decrypt several values with one cipher, in input order.
+
+        Same rules as decrypt(): empty and unprefixed values pass through.
+        """
+        cipher = self._get_cipher()
+        prefix_len = len(ENCRYPTED_PREFIX)
+        results = []
+        for value in values:
+            if not value or not value.startswith(ENCRYPTED_PREFIX):
+                results.append(value)
+                continue
+            encrypted_data = base64.b64decode(value[prefix_len:])
+            try:
+                plaintext = cipher.decrypt(encrypted_data[:12], encrypted_data[12:], None)
+            except Exception as e:
+                results.append(self._decrypt_with_fallbacks(value, e))
+                continue
+            results.append(plaintext.decode('utf-8'))
+        return results
+
+
+class PlaintextCache:
+    """
+    Short-lived, size-bounded cache of decrypted values.
+
+    Keyed by ciphertext (every encryption uses a fresh nonce, so a given
+    ciphertext always maps to the same plaintext). Entries expire after
+    `ttl` seconds; beyond `max_entries` the least recently used entry is
+    evicted.
+
+    wipe() drops every entry. Python strings are immutable, so this removes
+    the cache's references rather than zeroing memory - the same guarantee
+    the rest of the process gets.
+
+    Contents are never pickled: a copy sent to a worker process starts empty.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()   # ciphertext -> (plaintext, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        return {'max_entries': self.max_entries, 'ttl': self.ttl}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_entries'], state['ttl'])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, ciphertext: str) -> Optional[str]:
+        """Cached plaintext, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(ciphertext)
+            if entry is None:
+                self.misses += 1
+                return None
+            plaintext, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[ciphertext]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(ciphertext)
+            self.hits += 1
+            return plaintext
+
+    def put(self, ciphertext: str, plaintext: str):
+        with self._lock:
+            self._entries[ciphertext] = (plaintext, time.monotonic() + self.ttl)
+            self._entries.move_to_end(ciphertext)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def wipe(self):
+        """Drop every cached plaintext"""
+        with self._lock:
+            self._entries.clear()
 
 
 class EncryptionManager:
@@ -157,6 +353,16 @@ class EncryptionManager:
     - Encryption metadata storage
     - Passphrase verification
     - Migration of existing keys to encrypted form
+
+    Envelope encryption: column values are encrypted with a random data key
+    (DEK), stored in `encryption_key` wrapped by the passphrase-derived key
+    (KEK). Changing the passphrase rewraps the DEK instead of re-encrypting
+    every row; rotate_dek() replaces the DEK itself, re-encrypting rows in
+    small resumable batches.
+
+    Databases encrypted before envelope encryption have no `encryption_key`
+    rows: their values are encrypted with the KEK directly, which becomes
+    their first DEK on the next passphrase change or DEK rotation.
     """
 
     # Canary value for passphrase verification
@@ -167,6 +373,10 @@ def __init__(self, db_path: Path | str):
         self._secure_column: Optional[SecureColumn] = None
         self._metadata: Optional[EncryptionMetadata] = None
         self._is_unlocked = False
+        self._plaintext_cache: Optional[PlaintextCache] = None
+        self._kek: Optional[bytes] = None
+        self._dek_generation: Optional[int] = None   # None: pre-envelope database
+        self._keys_checked_at = None    # pooled connection state of the last DEK check
 
     @property
     def is_encrypted(self) -> bool:
@@ -256,10 +466,10 @@ def enable_encryption(self, passphrase: str) -> dict:
 
         Steps:
         1. Generate random salt
-        2. Derive key from passphrase
+        2. Derive key from passphrase (KEK) and generate a data key (DEK)
         3. Create encryption metadata table
-        4. Store encrypted canary for verification
-        5. Encrypt all existing private keys
+        4. Store encrypted canary for verification and the wrapped DEK
+        5. Encrypt all existing private keys with the DEK
 
         Returns dict with migration statistics.
         """
@@ -274,12 +484,13 @@ def enable_encryption(self, passphrase: str) -> dict:
         # Generate salt
         salt = os.urandom(32)
 
-        # Derive key
-        key = self._derive_key(passphrase, salt)
-        secure_column = SecureColumn(key)
+        # Derive the key-encryption key; values get a random data key
+        kek = self._derive_key(passphrase, salt)
+        dek = os.urandom(32)
+        secure_column = SecureColumn(dek)
 
         # Encrypt canary for verification
-        encrypted_canary = secure_column.encrypt(self.CANARY_VALUE)
+        encrypted_canary = SecureColumn(kek).encrypt(self.CANARY_VALUE)
 
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
@@ -304,6 +515,15 @@ def enable_encryption(self, passphrase: str) -> dict:
                 VALUES (1, ?, ?)
             """, (salt, encrypted_canary))
 
+            # Store the wrapped data key
+            execute_script(cursor, ENVELOPE_SCHEMA)
+            cursor.execute("DELETE FROM encryption_key")
+            cursor.execute("DELETE FROM encryption_rotation")
+            cursor.execute("""
+                INSERT INTO encryption_key (generation, wrapped_key, state)
+                VALUES (1, ?, 'active')
+            """, (self._wrap_key(kek, dek),))
+
             # Migrate existing keys
             stats = self._migrate_to_encrypted(cursor, secure_column)
 
@@ -312,6 +532,8 @@ def enable_encryption(self, passphrase: str) -> dict:
             # Update internal state
             self._secure_column = secure_column
             self._is_unlocked = True
+            self._kek = kek
+            self._dek_generation = 1
             self._metadata = EncryptionMetadata(
                 salt=salt,
                 key_check=encrypted_canary,
@@ -452,16 +674,10 @@ def unlock(self, passphrase: str) -> bool:
 
         # Derive key from passphrase
         key = self._derive_key(passphrase, metadata.salt)
-        secure_column = SecureColumn(key)
 
-        # Verify by decrypting canary
         try:
-            decrypted_canary = secure_column.decrypt(metadata.key_check)
-            if decrypted_canary != self.CANARY_VALUE:
+            if not self.unlock_with_key(key):
                 return False
-
-            self._secure_column = secure_column
-            self._is_unlocked = True
             logger.info("Database unlocked successfully")
             return True
 
@@ -469,12 +685,425 @@ def unlock(self, passphrase: str) -> bool:
             logger.warning(f"Failed to unlock database: {e}")
             return False
 
+    def unlock_with_key(self, key: bytes) -> bool:
+        """
+        Unlock with an already-derived key (e.g. from the unlock agent).
+
+        The key is verified against the canary, like a passphrase, then
+        used to unwrap the data keys.
+        """
+        metadata = self._load_metadata()
+        if not metadata:
+            raise ValueError("Database is not encrypted")
+
+        try:
+            if SecureColumn(key).decrypt(metadata.key_check) != self.CANARY_VALUE:
+                return False
+        except ValueError:
+            return False
+
+        self._kek = key
+        self._load_data_keys()
+        self._is_unlocked = True
+        return True
+
+    # -------------------------------------------------------------------------
+    # Data keys (envelope encryption)
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _wrap_key(kek: bytes, dek: bytes) -> str:
+        return SecureColumn(kek).encrypt(base64.b64encode(dek).decode('ascii'))
+
+    @staticmethod
+    def _unwrap_key(kek: bytes, wrapped: str) -> bytes:
+        return base64.b64decode(SecureColumn(kek).decrypt(wrapped))
+
+    def _connect(self):
+        """This thread's pooled connection (close() returns it to the pool)"""
+        return get_connection(self.db_path)
+
+    @staticmethod
+    def _begin(conn):
+        """Take the write lock, or join the caller's open transaction"""
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+
+    @staticmethod
+    def _table_exists(cursor, table: str) -> bool:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        return cursor.fetchone() is not None
+
+    def _read_data_keys(self, cursor) -> list:
+        """encryption_key rows, newest first ([] for a pre-envelope database)"""
+        if not self._table_exists(cursor, 'encryption_key'):
+            return []
+        cursor.execute("""
+            SELECT generation, wrapped_key, state FROM encryption_key
+            ORDER BY generation DESC
+        """)
+        return cursor.fetchall()
+
+    def _load_data_keys(self, rows: Optional[list] = None):
+        """Unwrap the DEKs with the KEK and install them as the column cipher"""
+        if rows is None:
+            conn = self._connect()
+            try:
+                rows = self._read_data_keys(conn.cursor())
+            finally:
+                conn.close()
+        self._keys_checked_at = None
+
+        if not rows:
+            # Pre-envelope database: values are encrypted with the KEK
+            self._secure_column = SecureColumn(self._kek)
+            self._dek_generation = None
+            return
+
+        active = next(row for row in rows if row['state'] == 'active')
+        retiring = [row for row in rows if row['state'] == 'retiring']
+        self._secure_column = SecureColumn(
+            self._unwrap_key(self._kek, active['wrapped_key']),
+            fallback_keys=[self._unwrap_key(self._kek, row['wrapped_key']) for row in retiring],
+        )
+        self._dek_generation = active['generation']
+
+    def _refresh_data_keys(self) -> bool:
+        """
+        Reload the DEKs if another process rotated them since we unlocked.
+
+        Checked through this thread's pooled connection, inside the caller's
+        transaction if one is open. PRAGMA data_version only moves when
+        another connection commits, and _key_changes when a manager in this
+        process changes the keys, so until something else writes to the
+        database the check is that one pragma and encryption_key is not
+        read again.
+
+        Returns True if the active generation changed.
+        """
+        if self._kek is None:
+            return False
+        conn = get_connection(self.db_path)
+        try:
+            state = (id(conn), conn._file_id, conn.execute("PRAGMA data_version").fetchone()[0],
+                     _key_changes)
+            if state == self._keys_checked_at:
+                return False
+            rows = self._read_data_keys(conn.cursor())
+        finally:
+            conn.close()
+
+        active = next((row['generation'] for row in rows if row['state'] == 'active'), None)
+        changed = active != self._dek_generation
+        if changed:
+            self._load_data_keys(rows)
+            self.wipe_plaintext_cache()
+        self._keys_checked_at = state
+        return changed
+
+    def _ensure_envelope(self, cursor):
+        """
+        Create the DEK tables and, for a pre-envelope database, record the
+        KEK as DEK generation 1 (its values are already encrypted with it).
+        """
+        execute_script(cursor, ENVELOPE_SCHEMA)
+        if not self._read_data_keys(cursor):
+            cursor.execute("""
+                INSERT INTO encryption_key (generation, wrapped_key, state)
+                VALUES (1, ?, 'active')
+            """, (self._wrap_key(self._kek, self._kek),))
+
+    def dek_rotation_status(self) -> Optional[DEKRotationProgress]:
+        """Progress of an unfinished DEK rotation, or None"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            if not self._table_exists(cursor, 'encryption_rotation'):
+                return None
+            row = cursor.execute("SELECT * FROM encryption_rotation WHERE id = 1").fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return DEKRotationProgress(row['target_generation'], row['table_name'],
+                                   row['last_id'], row['rows_done'])
+
+    def begin_dek_rotation(self) -> int:
+        """
+        Start replacing the data key.
+
+        The new DEK is active at once, so new values use it; the old one is
+        kept as 'retiring' so rows not yet re-encrypted still decrypt. Call
+        rotate_dek_batch() (or rotate_dek()) to re-encrypt the rows.
+
+        Returns the new DEK generation.
+        """
+        if not self.is_unlocked:
+            raise ValueError("Database is locked - call unlock() first")
+
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            self._begin(conn)
+            self._ensure_envelope(cursor)
+            if cursor.execute("SELECT 1 FROM encryption_rotation").fetchone():
+                raise ValueError("A data key rotation is already in progress")
+
+            generation = self._read_data_keys(cursor)[0]['generation'] + 1
+            cursor.execute("UPDATE encryption_key SET state = 'retiring' WHERE state = 'active'")
+            cursor.execute("""
+                INSERT INTO encryption_key (generation, wrapped_key, state)
+                VALUES (?, ?, 'active')
+            """, (generation, self._wrap_key(self._kek, os.urandom(32))))
+            cursor.execute("""
+                INSERT INTO encryption_rotation (id, target_generation, table_name)
+                VALUES (1, ?, ?)
+            """, (generation, SENSITIVE_COLUMNS[0][0]))
+            self._log_rewrites(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        _note_key_change()
+
+        self._load_data_keys()
+        self.wipe_plaintext_cache()
+        logger.info(f"Data key rotation started (generation {generation})")
+        return generation
+
+    def rotate_dek_batch(self, batch_size: int = DEK_ROTATION_BATCH) -> DEKRotationProgress:
+        """
+        Re-encrypt up to `batch_size` rows with the new DEK and record how far
+        the rotation got, in one short transaction.
+
+        Readers are never blocked (WAL) and writers wait for one batch at
+        most. Safe to interrupt: the next call continues after the last
+        committed row, from this or any other process.
+        """
+        if not self.is_unlocked:
+            raise ValueError("Database is locked - call unlock() first")
+        self._refresh_data_keys()
+
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            self._begin(conn)
+            row = None
+            if self._table_exists(cursor, 'encryption_rotation'):
+                row = cursor.execute("SELECT * FROM encryption_rotation WHERE id = 1").fetchone()
+            if row is None:
+                raise ValueError("No data key rotation in progress")
+            if self._dek_generation != row['target_generation']:
+                self._load_data_keys(self._read_data_keys(cursor))
+
+            self._log_rewrites(cursor)
+
+            tables = [table for table, _ in SENSITIVE_COLUMNS]
+            columns_for = dict(SENSITIVE_COLUMNS)
+            table, last_id, rows_done = row['table_name'], row['last_id'], row['rows_done']
+            remaining = batch_size
+
+            # Rows written behind the cursor since the last batch
+            rows_done += self._reencrypt_stragglers(cursor, limit=batch_size)
+
+            while table is not None and remaining > 0:
+                columns = columns_for[table]
+                first_id = last_id
+                rows = []
+                if self._table_exists(cursor, table):
+                    rows = cursor.execute(f"""
+                        SELECT id, {', '.join(columns)} FROM {table}
+                        WHERE id > ? ORDER BY id LIMIT ?
+                    """, (last_id, remaining)).fetchall()
+
+                for r in rows:
+                    values = [r[c] for c in columns]
+                    encrypted = [c for c, v in zip(columns, values)
+                                 if v and v.startswith(ENCRYPTED_PREFIX)]
+                    if encrypted:
+                        plaintexts = self._secure_column.decrypt_many(r[c] for c in encrypted)
+                        cursor.execute(
+                            f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in encrypted)} "
+                            f"WHERE id = ?",
+                            [*self._secure_column.encrypt_many(plaintexts), r['id']])
+                    last_id = r['id']
+                if rows:
+                    # Our own updates (and earlier writes to these rows) are covered
+                    cursor.execute("""
+                        DELETE FROM encryption_rewrite
+                        WHERE table_name = ? AND row_id > ? AND row_id <= ?
+                    """, (table, first_id, last_id))
+                rows_done += len(rows)
+                remaining -= len(rows)
+
+                if remaining > 0:
+                    # Table finished: move on to the next one
+                    index = tables.index(table) + 1
+                    table = tables[index] if index < len(tables) else None
+                    last_id = 0
+
+            if table is None:
+                # A writer that encrypted with the old DEK before it saw the
+                # rotation may have committed behind the cursor. Nothing can
+                # commit while we hold the write lock, so re-encrypt the rows
+                # logged since the last batch; then every row uses the new
+                # DEK and the old one can go
+                rows_done += self._reencrypt_stragglers(cursor)
+                self._stop_logging_rewrites(cursor)
+                cursor.execute("DELETE FROM encryption_key WHERE state = 'retiring'")
+                cursor.execute("DELETE FROM encryption_rotation")
+            else:
+                cursor.execute("""
+                    UPDATE encryption_rotation
+                    SET table_name = ?, last_id = ?, rows_done = ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = 1
+                """, (table, last_id, rows_done))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        progress = DEKRotationProgress(row['target_generation'], table, last_id, rows_done,
+                                       done=table is None)
+        if progress.done:
+            _note_key_change()
+            self._load_data_keys()
+            logger.info(f"Data key rotation finished ({rows_done} rows)")
+        return progress
+
+    def _log_rewrites(self, cursor):
+        """Install the triggers that log sensitive-column writes during a rotation"""
+        execute_script(cursor, ENVELOPE_SCHEMA)
+        for table, columns in SENSITIVE_COLUMNS:
+            if self._table_exists(cursor, table):
+                execute_script(cursor, REWRITE_TRIGGERS.format(table=table, columns=', '.join(columns)))
+
+    def _stop_logging_rewrites(self, cursor):
+        for table, _ in SENSITIVE_COLUMNS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_rotation_insert")
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_rotation_update")
+        cursor.execute("DELETE FROM encryption_rewrite")
+
+    def _reencrypt_stragglers(self, cursor, limit: Optional[int] = None) -> int:
+        """
+        Re-encrypt the logged rows (up to `limit`) holding a value the active
+        DEK can't decrypt, i.e. written with a retiring DEK; returns the
+        number of rows updated. Work is bounded by the writes made during
+        the rotation, not by the size of the database.
+        """
+        active = SecureColumn(self._secure_column._key)
+        columns_for = dict(SENSITIVE_COLUMNS)
+        logged = cursor.execute(
+            "SELECT table_name, row_id FROM encryption_rewrite ORDER BY table_name, row_id LIMIT ?",
+            (-1 if limit is None else limit,)).fetchall()
+
+        updated = 0
+        for table, row_id in logged:
+            columns = columns_for.get(table)
+            r = None
+            if columns and self._table_exists(cursor, table):
+                r = cursor.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE id = ?",
+                                   (row_id,)).fetchone()
+            stale = []
+            for c in (columns if r is not None else ()):
+                if r[c] and r[c].startswith(ENCRYPTED_PREFIX):
+                    try:
+                        active.decrypt(r[c])
+                    except ValueError:
+                        stale.append(c)
+            if stale:
+                plaintexts = self._secure_column.decrypt_many(r[c] for c in stale)
+                cursor.execute(
+                    f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in stale)} WHERE id = ?",
+                    [*self._secure_column.encrypt_many(plaintexts), row_id])
+                updated += 1
+            # After the UPDATE, which logs the row again
+            cursor.execute("DELETE FROM encryption_rewrite WHERE table_name = ? AND row_id = ?",
+                           (table, row_id))
+        if updated:
+            logger.info(f"Re-encrypted {updated} rows written with the retiring data key")
+        return updated
+
+    def rotate_dek(self, batch_size: int = DEK_ROTATION_BATCH, pause: float = 0.0,
+                   progress_callback=None) -> DEKRotationProgress:
+        """
+        Replace the data key and re-encrypt every row, batch by batch.
+
+        Resumes an interrupted rotation rather than starting a new one.
+
+        Args:
+            batch_size: Rows re-encrypted per transaction
+            pause: Seconds to sleep between batches, to make room for writers
+            progress_callback: Called with a DEKRotationProgress after each batch
+        """
+        if self.dek_rotation_status() is None:
+            self.begin_dek_rotation()
+
+        while True:
+            progress = self.rotate_dek_batch(batch_size)
+            if progress_callback:
+                progress_callback(progress)
+            if progress.done:
+                return progress
+            if pause:
+                time.sleep(pause)
+
+    def rotate_dek_in_background(self, batch_size: int = DEK_ROTATION_BATCH,
+                                 pause: float = 0.05) -> threading.Thread:
+        """Run rotate_dek() in a thread; join() it to wait for completion"""
+        thread = threading.Thread(target=self.rotate_dek, args=(batch_size, pause),
+                                  name='dek-rotation')
+        thread.start()
+        return thread
+
+    def _agent_key_id(self) -> str:
+        from v1.unlock_agent import agent_key_id
+        return agent_key_id(self.db_path, self._load_metadata().salt)
+
+    def unlock_from_agent(self, client=None) -> bool:
+        """
+        Unlock with a key held by the unlock agent, skipping Scrypt.
+
+        Returns False if no agent is running or it has no (valid) key for
+        this database.
+        """
+        from v1.unlock_agent import AgentClient
+
+        if not self.is_encrypted:
+            return False
+        client = client or AgentClient()
+        key = client.get_key(self._agent_key_id())
+        if key is None:
+            return False
+        if not self.unlock_with_key(key):
+            client.forget(self._agent_key_id())
+            return False
+        logger.info("Database unlocked from agent")
+        return True
+
+    def add_to_agent(self, ttl: Optional[float] = None, idle_timeout: Optional[float] = None,
+                     client=None) -> bool:
+        """Hand the derived key (KEK) to the unlock agent (requires unlocked database)"""
+        from v1.unlock_agent import AgentClient
+
+        if not self.is_unlocked:
+            raise ValueError("Database is locked - call unlock() first")
+        client = client or AgentClient()
+        return client.add_key(self._agent_key_id(), self._kek,
+                              ttl=ttl, idle_timeout=idle_timeout)
+
     def encrypt(self, value: str) -> str:
         """Encrypt a value (requires unlocked database)"""
         if not self.is_unlocked:
             if not self.is_encrypted:
                 return value  # Not encrypted, return as-is
             raise ValueError("Database is locked - call unlock() first")
+        self._refresh_data_keys()
         return self._secure_column.encrypt(value)
 
     def decrypt(self, value: str) -> str:
@@ -489,7 +1118,105 @@ def decrypt(self, value: str) -> str:
         if not self.is_unlocked:
             raise ValueError("Database is locked - call unlock() first")
 
-        return self._secure_column.decrypt(value)
+        cache = self._plaintext_cache
+        if cache is None:
+            return self._decrypt_current(value)
+
+        plaintext = cache.get(value)
+        if plaintext is None:
+            plaintext = self._decrypt_current(value)
+            cache.put(value, plaintext)
+        return plaintext
+
+    def _decrypt_current(self, value: str) -> str:
+        """Decrypt, reloading DEKs once if another process rotated them"""
+        try:
+            return self._secure_column.decrypt(value)
+        except ValueError:
+            if not self._refresh_data_keys():
+                raise
+            return self._secure_column.decrypt(value)
+
+    def _decrypt_many_current(self, values: List[str]) -> List[str]:
+        try:
+            return self._secure_column.decrypt_many(values)
+        except ValueError:
+            if not self._refresh_data_keys():
+                raise
+            return self._secure_column.decrypt_many(values)
+
+    def encrypt_many(self, values: Iterable[str]) -> List[str]:
+        """Encrypt several values (requires unlocked database)"""
+        values = list(values)
+        if not self.is_unlocked:
+            if not self.is_encrypted:
+                return values
+            raise ValueError("Database is locked - call unlock() first")
+        self._refresh_data_keys()
+        return self._secure_column.encrypt_many(values)
+
+    def decrypt_many(self, values: Iterable[str]) -> List[str]:
+        """
+        Decrypt several values, in input order.
+
+        Plaintext and empty values pass through unchanged, as with decrypt().
+        """
+        values = list(values)
+        if not self.is_unlocked:
+            if any(value and value.startswith(ENCRYPTED_PREFIX) for value in values):
+                raise ValueError("Database is locked - call unlock() first")
+            return values
+
+        cache = self._plaintext_cache
+        if cache is None:
+            return self._decrypt_many_current(values)
+
+        # Serve what we can from the cache, decrypt the rest in one batch
+        results = list(values)
+        misses = []
+        for i, value in enumerate(values):
+            if value and value.startswith(ENCRYPTED_PREFIX):
+                plaintext = cache.get(value)
+                if plaintext is None:
+                    misses.append(i)
+                else:
+                    results[i] = plaintext
+
+        decrypted = self._decrypt_many_current([values[i] for i in misses])
+        for i, plaintext in zip(misses, decrypted):
+            results[i] = plaintext
+            cache.put(values[i], plaintext)
+        return results
+
+    def enable_plaintext_cache(self, max_entries: int = 1024, ttl: float = 60.0):
+        """
+        Cache decrypted values for up to `ttl` seconds (at most `max_entries`).
+
+        Off by default. The cache is wiped by lock(), disable_plaintext_cache()
+        and any passphrase change.
+        """
+        self.disable_plaintext_cache()
+        self._plaintext_cache = PlaintextCache(max_entries, ttl)
+
+    def disable_plaintext_cache(self):
+        """Wipe and remove the plaintext cache"""
+        if self._plaintext_cache is not None:
+            self._plaintext_cache.wipe()
+            self._plaintext_cache = None
+
+    def wipe_plaintext_cache(self):
+        """Drop cached plaintexts but keep the cache enabled"""
+        if self._plaintext_cache is not None:
+            self._plaintext_cache.wipe()
+
+    def lock(self):
+        """Forget the derived keys and wipe cached plaintexts"""
+        self.wipe_plaintext_cache()
+        self._secure_column = None
+        self._is_unlocked = False
+        self._kek = None
+        self._dek_generation = None
+        self._keys_checked_at = None
 
     def change_passphrase(self, old_passphrase: str, new_passphrase: str) -> bool:
         """
@@ -497,10 +1224,12 @@ def change_passphrase(self, old_passphrase: str, new_passphrase: str) -> bool:
 
         Steps:
         1. Verify old passphrase
-        2. Decrypt all keys with old passphrase
-        3. Generate new salt and derive new key
-        4. Re-encrypt all keys with new passphrase
-        5. Update metadata
+        2. Generate new salt and derive new key (KEK)
+        3. Rewrap the data keys with the new KEK
+        4. Update metadata
+
+        Rows are not touched: they stay encrypted with the same data key.
+        A pre-envelope database has its old KEK recorded as its data key.
         """
         if not self.is_encrypted:
             raise ValueError("Database is not encrypted")
@@ -512,24 +1241,27 @@ def change_passphrase(self, old_passphrase: str, new_passphrase: str) -> bool:
         if not self.unlock(old_passphrase):
             return False
 
-        old_secure_column = self._secure_column
-
         # Generate new salt and key
         new_salt = os.urandom(32)
-        new_key = self._derive_key(new_passphrase, new_salt)
-        new_secure_column = SecureColumn(new_key)
+        new_kek = self._derive_key(new_passphrase, new_salt)
 
         # Re-encrypt canary
-        new_encrypted_canary = new_secure_column.encrypt(self.CANARY_VALUE)
+        new_encrypted_canary = SecureColumn(new_kek).encrypt(self.CANARY_VALUE)
 
-        import sqlite3
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = self._connect()
         cursor = conn.cursor()
 
         try:
-            # Re-encrypt all keys
-            self._reencrypt_all(cursor, old_secure_column, new_secure_column)
+            self._begin(conn)
+            self._ensure_envelope(cursor)
+
+            # Rewrap every data key (including one still retiring)
+            for row in self._read_data_keys(cursor):
+                dek = self._unwrap_key(self._kek, row['wrapped_key'])
+                cursor.execute(
+                    "UPDATE encryption_key SET wrapped_key = ? WHERE generation = ?",
+                    (self._wrap_key(new_kek, dek), row['generation'])
+                )
 
             # Update metadata
             cursor.execute("""
@@ -541,7 +1273,8 @@ def change_passphrase(self, old_passphrase: str, new_passphrase: str) -> bool:
             conn.commit()
 
             # Update internal state
-            self._secure_column = new_secure_column
+            self.wipe_plaintext_cache()
+            self._kek = new_kek
             self._metadata = EncryptionMetadata(
                 salt=new_salt,
                 key_check=new_encrypted_canary,
@@ -549,6 +1282,7 @@ def change_passphrase(self, old_passphrase: str, new_passphrase: str) -> bool:
                 kdf='Scrypt-1048576-8-1',
                 created_at=datetime.now().isoformat()
             )
+            self._load_data_keys()
 
             logger.info("Passphrase changed successfully")
             return True
@@ -559,77 +1293,6 @@ def change_passphrase(self, old_passphrase: str, new_passphrase: str) -> bool:
         finally:
             conn.close()
 
-    def _reencrypt_all(self, cursor, old_secure: SecureColumn, new_secure: SecureColumn):
-        """Re-encrypt all values with new key"""
-        def reencrypt(value: str) -> str:
-            if not value or not value.startswith(ENCRYPTED_PREFIX):
-                return value
-            decrypted = old_secure.decrypt(value)
-            return new_secure.encrypt(decrypted)
-
-        # Coordination server
-        cursor.execute("SELECT id, private_key FROM coordination_server")
-        for row in cursor.fetchall():
-            if row['private_key']:
-                cursor.execute(
-                    "UPDATE coordination_server SET private_key = ? WHERE id = ?",
-                    (reencrypt(row['private_key']), row['id'])
-                )
-
-        # Subnet routers
-        cursor.execute("SELECT id, private_key, preshared_key FROM subnet_router")
-        for row in cursor.fetchall():
-            cursor.execute(
-                "UPDATE subnet_router SET private_key = ?, preshared_key = ? WHERE id = ?",
-                (reencrypt(row['private_key']), reencrypt(row['preshared_key']), row['id'])
-            )
-
-        # Exit nodes
-        cursor.execute("SELECT id, private_key FROM exit_node")
-        for row in cursor.fetchall():
-            if row['private_key']:
-                cursor.execute(
-                    "UPDATE exit_node SET private_key = ? WHERE id = ?",
-                    (reencrypt(row['private_key']), row['id'])
-                )
-
-        # Remotes
-        cursor.execute("SELECT id, private_key, preshared_key FROM remote")
-        for row in cursor.fetchall():
-            cursor.execute(
-                "UPDATE remote SET private_key = ?, preshared_key = ? WHERE id = ?",
-                (reencrypt(row['private_key']), reencrypt(row['preshared_key']), row['id'])
-            )
-
-        # Key rotation history
-        cursor.execute("SELECT id, new_private_key FROM key_rotation_history")
-        for row in cursor.fetchall():
-            if row['new_private_key']:
-                cursor.execute(
-                    "UPDATE key_rotation_history SET new_private_key = ? WHERE id = ?",
-                    (reencrypt(row['new_private_key']), row['id'])
-                )
-
-        # Extramural configs
-        try:
-            cursor.execute("SELECT id, local_private_key FROM extramural_config")
-            for row in cursor.fetchall():
-                if row['local_private_key']:
-                    cursor.execute(
-                        "UPDATE extramural_config SET local_private_key = ? WHERE id = ?",
-                        (reencrypt(row['local_private_key']), row['id'])
-                    )
-
-            cursor.execute("SELECT id, preshared_key FROM extramural_peer")
-            for row in cursor.fetchall():
-                if row['preshared_key']:
-                    cursor.execute(
-                        "UPDATE extramural_peer SET preshared_key = ? WHERE id = ?",
-                        (reencrypt(row['preshared_key']), row['id'])
-                    )
-        except Exception:
-            pass  # Extramural tables might not exist
-
     def disable_encryption(self, passphrase: str) -> dict:
         """
         Disable encryption and decrypt all keys.
@@ -651,14 +1314,15 @@ def disable_encryption(self, passphrase: str) -> dict:
         try:
             stats = self._decrypt_all(cursor)
 
-            # Remove encryption metadata
+            # Remove encryption metadata and data keys
             cursor.execute("DROP TABLE IF EXISTS encryption_metadata")
+            cursor.execute("DROP TABLE IF EXISTS encryption_key")
+            cursor.execute("DROP TABLE IF EXISTS encryption_rotation")
 
             conn.commit()
 
             # Update internal state
-            self._secure_column = None
-            self._is_unlocked = False
+            self.lock()
             self._metadata = None
 
             logger.info(f"Encryption disabled: {stats}")
@@ -755,16 +1419,57 @@ def get_encryption_manager(db_path: Path | str) -> EncryptionManager:
     return EncryptionManager(db_path)
 
 
+def _note_key_change():
+    global _key_changes
+    _key_changes += 1
+
+
 # Singleton for the active database
 _active_manager: Optional[EncryptionManager] = None
 
 
 def set_active_encryption_manager(manager: EncryptionManager):
-    """Set the active encryption manager for the session"""
+    """
+    Set the active encryption manager for the session.
+
+    A locked manager for an encrypted database is first unlocked from the
+    unlock agent, if one is running and holds the key.
+    """
     global _active_manager
+    if manager is not None and not manager.is_unlocked and manager.is_encrypted:
+        manager.unlock_from_agent()
     _active_manager = manager
 
 
+def unlock_database(db_path: Path | str, interactive: bool = True,
+                    attempts: int = 3) -> EncryptionManager:
+    """
+    Make a database's keys available to this process.
+
+    Tries the unlock agent first; only if that fails (and `interactive`)
+    prompts for the passphrase. The key is not handed to the agent: only an
+    explicit `wg-friend agent add` does that.
+
+    Returns the active manager (locked if the database could not be
+    unlocked; plain databases need no unlocking).
+    """
+    manager = EncryptionManager(db_path)
+    set_active_encryption_manager(manager)
+    if manager.is_unlocked or not manager.is_encrypted:
+        return manager
+    if not interactive or not sys.stdin.isatty():
+        logger.warning("Database is encrypted and locked; start 'wg-friend agent' to unlock")
+        return manager
+
+    import getpass
+    for _ in range(attempts):
+        passphrase = getpass.getpass("Database passphrase: ")
+        if manager.unlock(passphrase):
+            return manager
+        print("Incorrect passphrase.", file=sys.stderr)
+    return manager
+
+
 def get_active_encryption_manager() -> Optional[EncryptionManager]:
     """Get the active encryption manager"""
     return _active_manager
@@ -785,6 +1490,46 @@ def decrypt_value(value: str) -> str:
     return value
 
 
+def encrypt_many(values: Iterable[str]) -> List[str]:
+    """Encrypt several values using the active manager"""
+    if _active_manager and _active_manager.is_unlocked:
+        return _active_manager.encrypt_many(values)
+    return list(values)
+
+
+def decrypt_many(values: Iterable[str]) -> List[str]:
+    """Decrypt several values using the active manager (see decrypt_value)"""
+    if _active_manager and _active_manager.is_unlocked:
+        return _active_manager.decrypt_many(values)
+    return list(values)
+
+
+@contextmanager
+def plaintext_cache(max_entries: int = 1024, ttl: float = 60.0):
+    """
+    Cache decrypted values on the active manager for the duration of a block.
+
+    For jobs that decrypt the same value several times (e.g. a preshared key
+    appears in the CS config, the remote config and the exit node config).
+    The cache is wiped on exit. No-op if no manager is unlocked.
+
+    Usage:
+        with plaintext_cache(max_entries=len(remotes) * 2):
+            ...render configs...
+    """
+    manager = _active_manager
+    if manager is None or not manager.is_unlocked or manager._plaintext_cache is not None:
+        # Nothing to decrypt with, or a longer-lived cache is already active
+        yield
+        return
+
+    manager.enable_plaintext_cache(max_entries, ttl)
+    try:
+        yield
+    finally:
+        manager.disable_plaintext_cache()
+
+
 if __name__ == "__main__":
     # Demo/test
     import tempfile
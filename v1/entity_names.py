@@ -0,0 +1,201 @@
+"""
+Entity Names - Shared Identity Cache for Reports and Alerts
+
+Bandwidth reports, alert messages, the dashboard and the rotation schedule
+all turn (entity_type, entity_id) pairs into hostnames, and bandwidth
+collection turns public keys into entities. Each used to run one query per
+row (or, for collection, rebuild the full public-key map every sweep), so a
+report over 2,000 peers cost 2,000 hostname lookups.
+
+entity_names() reads the four entity tables once and keeps the result per
+database file. Triggers on those tables bump a counter in entity_change
+whenever an entity is added, removed, renamed or re-keyed; the cache is
+reloaded only when that counter moves. Checking it is a single-row read,
+so a warm lookup costs one query however many rows the caller names,
+and changes made by other processes are seen on the next call.
+
+Entity types are accepted both as table names ('coordination_server',
+'subnet_router') and in the short form used by alerting ('cs', 'sr').
+
+Usage:
+    from v1.entity_names import entity_names
+
+    names = entity_names(conn)
+    names.name('remote', 7)                 # hostname, or GUID prefix when unnamed
+    names.by_public_key(public_key)         # EntityIdentity or None
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.db_pool import _file_id
+from v1.migrations import execute_script
+
+# entity_type -> table, in both the long and the short spelling
+ENTITY_TABLES = {
+    'coordination_server': 'coordination_server',
+    'cs': 'coordination_server',
+    'subnet_router': 'subnet_router',
+    'sr': 'subnet_router',
+    'remote': 'remote',
+    'exit_node': 'exit_node',
+}
+
+# Columns whose change invalidates cached identities
+IDENTITY_COLUMNS = "hostname, current_public_key, permanent_guid"
+
+CHANGE_SCHEMA = """
+    -- Single-row counter bumped by triggers on every identity change
+    CREATE TABLE IF NOT EXISTS entity_change (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+
+    INSERT OR IGNORE INTO entity_change (id, version) VALUES (1, 0)
+"""
+
+CHANGE_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS {table}_insert_identity AFTER INSERT ON {table}
+    BEGIN
+        UPDATE entity_change SET version = version + 1 WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {table}_update_identity AFTER UPDATE OF {columns} ON {table}
+    BEGIN
+        UPDATE entity_change SET version = version + 1 WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {table}_delete_identity AFTER DELETE ON {table}
+    BEGIN
+        UPDATE entity_change SET version = version + 1 WHERE id = 1;
+    END
+"""
+
+
+@dataclass(frozen=True)
+class EntityIdentity:
+    """One network entity as reports and alerts name it"""
+    entity_type: str        # table name: coordination_server, subnet_router, remote, exit_node
+    entity_id: int
+    permanent_guid: str
+    public_key: str
+    hostname: Optional[str]
+
+    @property
+    def name(self) -> str:
+        """Hostname, or the GUID prefix for unnamed entities"""
+        return self.hostname or self.permanent_guid[:16]
+
+
+class EntityNames:
+    """Every entity, indexed by (type, id), public key and permanent GUID"""
+
+    def __init__(self, identities):
+        self._by_entity: Dict[Tuple[str, int], EntityIdentity] = {}
+        self._by_key: Dict[str, EntityIdentity] = {}
+        self._by_guid: Dict[str, EntityIdentity] = {}
+        for identity in identities:
+            self._by_entity[(identity.entity_type, identity.entity_id)] = identity
+            self._by_key[identity.public_key] = identity
+            self._by_guid[identity.permanent_guid] = identity
+
+    def __len__(self) -> int:
+        return len(self._by_entity)
+
+    def get(self, entity_type: str, entity_id: int) -> Optional[EntityIdentity]:
+        """Entity by type (long or short spelling) and id"""
+        table = ENTITY_TABLES.get(entity_type)
+        return self._by_entity.get((table, entity_id)) if table else None
+
+    def name(self, entity_type: str, entity_id: int) -> Optional[str]:
+        """Display name of an entity, None if it does not exist"""
+        identity = self.get(entity_type, entity_id)
+        return identity.name if identity else None
+
+    def by_public_key(self, public_key: str) -> Optional[EntityIdentity]:
+        """Entity currently holding a public key"""
+        return self._by_key.get(public_key)
+
+    def by_guid(self, permanent_guid: str) -> Optional[EntityIdentity]:
+        """Entity by permanent GUID"""
+        return self._by_guid.get(permanent_guid)
+
+
+def load_entity_names(conn) -> EntityNames:
+    """Read every entity table once (tables missing in older databases are skipped)"""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    identities = []
+    for table in dict.fromkeys(ENTITY_TABLES.values()):
+        try:
+            cursor.execute(f"SELECT id, permanent_guid, current_public_key, hostname FROM {table}")
+        except sqlite3.OperationalError:
+            continue
+        identities.extend(EntityIdentity(table, *row) for row in cursor.fetchall())
+    return EntityNames(identities)
+
+
+def change_version(conn) -> Optional[int]:
+    """Current identity change counter, None before the counter exists"""
+    try:
+        row = conn.execute("SELECT version FROM entity_change WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+# (database path, file id) -> (change version, names)
+_cache: Dict[Tuple[str, object], Tuple[int, EntityNames]] = {}
+_cache_lock = threading.Lock()
+
+
+def _cache_key(conn) -> Optional[Tuple[str, object]]:
+    """The main database file of a connection, None for in-memory databases"""
+    for _, name, path in conn.execute("PRAGMA database_list").fetchall():
+        if name == 'main' and path:
+            return (os.path.abspath(path), _file_id(path))
+    return None
+
+
+def entity_names(conn) -> EntityNames:
+    """
+    Shared EntityNames for the connection's database.
+
+    Reloaded only when the change counter moved since the last load. Names
+    read inside an open transaction are returned but not cached, since the
+    transaction may still roll back.
+    """
+    key = _cache_key(conn)
+    version = change_version(conn)
+    if key is None or version is None:
+        return load_entity_names(conn)
+
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    names = load_entity_names(conn)
+    if not conn.in_transaction:
+        with _cache_lock:
+            _cache[key] = (version, names)
+    return names
+
+
+def clear_entity_names():
+    """Drop every cached name table (tests, restores)"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def create_entity_change_schema(cursor):
+    """Migration 15: identity change counter and the triggers that bump it"""
+    execute_script(cursor, CHANGE_SCHEMA)
+    for table in dict.fromkeys(ENTITY_TABLES.values()):
+        execute_script(cursor, CHANGE_TRIGGERS.format(table=table, columns=IDENTITY_COLUMNS))
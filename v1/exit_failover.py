@@ -47,6 +47,9 @@
 from dataclasses import dataclass
 from threading import Lock
 
+from v1.db_pool import get_connection
+from v1.migrations import ensure_schema
+
 logger = logging.getLogger(__name__)
 
 
@@ -111,6 +114,108 @@ class FailoverEvent:
     error_message: Optional[str]
 
 
+def create_failover_schema(cursor):
+    """Migration 7: exit node groups, health state and failover history"""
+    # Exit node groups
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exit_node_group (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            failover_strategy TEXT NOT NULL DEFAULT 'priority',
+            health_check_interval INTEGER DEFAULT 30,
+            health_check_timeout INTEGER DEFAULT 5,
+            degraded_threshold_ms INTEGER DEFAULT 200,
+            failure_threshold INTEGER DEFAULT 5,
+            recovery_threshold INTEGER DEFAULT 2,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Group membership
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exit_node_group_member (
+            group_id INTEGER NOT NULL,
+            exit_node_id INTEGER NOT NULL,
+            static_priority INTEGER DEFAULT 100,
+            weight INTEGER DEFAULT 1,
+            enabled BOOLEAN DEFAULT 1,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (group_id, exit_node_id),
+            FOREIGN KEY (group_id) REFERENCES exit_node_group(id) ON DELETE CASCADE,
+            FOREIGN KEY (exit_node_id) REFERENCES exit_node(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Health state
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exit_node_health (
+            exit_node_id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'healthy',
+            latency_ms INTEGER,
+            last_check_at TIMESTAMP,
+            consecutive_failures INTEGER DEFAULT 0,
+            consecutive_successes INTEGER DEFAULT 0,
+            last_success_at TIMESTAMP,
+            last_failure_at TIMESTAMP,
+            failure_reason TEXT,
+            FOREIGN KEY (exit_node_id) REFERENCES exit_node(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Failover history
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exit_failover_history (
+            id INTEGER PRIMARY KEY,
+            remote_id INTEGER NOT NULL,
+            group_id INTEGER NOT NULL,
+            from_exit_id INTEGER,
+            to_exit_id INTEGER NOT NULL,
+            trigger_reason TEXT NOT NULL,
+            trigger_details TEXT,
+            triggered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            success BOOLEAN NOT NULL DEFAULT 1,
+            error_message TEXT,
+            FOREIGN KEY (remote_id) REFERENCES remote(id) ON DELETE CASCADE,
+            FOREIGN KEY (group_id) REFERENCES exit_node_group(id) ON DELETE CASCADE,
+            FOREIGN KEY (from_exit_id) REFERENCES exit_node(id) ON DELETE SET NULL,
+            FOREIGN KEY (to_exit_id) REFERENCES exit_node(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Add exit_group_id and active_exit_id to remote table if not exists
+    cursor.execute("PRAGMA table_info(remote)")
+    columns = [row[1] for row in cursor.fetchall()]
+
+    if 'exit_group_id' not in columns:
+        cursor.execute("""
+            ALTER TABLE remote ADD COLUMN exit_group_id INTEGER
+            REFERENCES exit_node_group(id) ON DELETE SET NULL
+        """)
+
+    if 'active_exit_id' not in columns:
+        cursor.execute("""
+            ALTER TABLE remote ADD COLUMN active_exit_id INTEGER
+            REFERENCES exit_node(id) ON DELETE SET NULL
+        """)
+
+    # Indexes
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_exit_health_status
+        ON exit_node_health(status, last_check_at)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_failover_remote
+        ON exit_failover_history(remote_id, triggered_at DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_failover_group
+        ON exit_failover_history(group_id, triggered_at DESC)
+    """)
+
+    logger.debug("Exit failover schema initialized")
+
+
 class ExitFailoverManager:
     """
     Manages exit node failover groups and automatic failover.
@@ -129,123 +234,11 @@ class ExitFailoverManager:
     def __init__(self, db_path: Path | str):
         self.db_path = Path(db_path) if isinstance(db_path, str) else db_path
         self._failover_lock = Lock()  # Prevent race conditions
-        self._init_schema()
+        ensure_schema(self.db_path)
 
     def _get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
-
-    def _init_schema(self):
-        """Initialize failover schema"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        try:
-            # Exit node groups
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS exit_node_group (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL UNIQUE,
-                    failover_strategy TEXT NOT NULL DEFAULT 'priority',
-                    health_check_interval INTEGER DEFAULT 30,
-                    health_check_timeout INTEGER DEFAULT 5,
-                    degraded_threshold_ms INTEGER DEFAULT 200,
-                    failure_threshold INTEGER DEFAULT 5,
-                    recovery_threshold INTEGER DEFAULT 2,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            # Group membership
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS exit_node_group_member (
-                    group_id INTEGER NOT NULL,
-                    exit_node_id INTEGER NOT NULL,
-                    static_priority INTEGER DEFAULT 100,
-                    weight INTEGER DEFAULT 1,
-                    enabled BOOLEAN DEFAULT 1,
-                    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (group_id, exit_node_id),
-                    FOREIGN KEY (group_id) REFERENCES exit_node_group(id) ON DELETE CASCADE,
-                    FOREIGN KEY (exit_node_id) REFERENCES exit_node(id) ON DELETE CASCADE
-                )
-            """)
-
-            # Health state
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS exit_node_health (
-                    exit_node_id INTEGER PRIMARY KEY,
-                    status TEXT NOT NULL DEFAULT 'healthy',
-                    latency_ms INTEGER,
-                    last_check_at TIMESTAMP,
-                    consecutive_failures INTEGER DEFAULT 0,
-                    consecutive_successes INTEGER DEFAULT 0,
-                    last_success_at TIMESTAMP,
-                    last_failure_at TIMESTAMP,
-                    failure_reason TEXT,
-                    FOREIGN KEY (exit_node_id) REFERENCES exit_node(id) ON DELETE CASCADE
-                )
-            """)
-
-            # Failover history
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS exit_failover_history (
-                    id INTEGER PRIMARY KEY,
-                    remote_id INTEGER NOT NULL,
-                    group_id INTEGER NOT NULL,
-                    from_exit_id INTEGER,
-                    to_exit_id INTEGER NOT NULL,
-                    trigger_reason TEXT NOT NULL,
-                    trigger_details TEXT,
-                    triggered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    success BOOLEAN NOT NULL DEFAULT 1,
-                    error_message TEXT,
-                    FOREIGN KEY (remote_id) REFERENCES remote(id) ON DELETE CASCADE,
-                    FOREIGN KEY (group_id) REFERENCES exit_node_group(id) ON DELETE CASCADE,
-                    FOREIGN KEY (from_exit_id) REFERENCES exit_node(id) ON DELETE SET NULL,
-                    FOREIGN KEY (to_exit_id) REFERENCES exit_node(id) ON DELETE CASCADE
-                )
-            """)
-
-            # Add exit_group_id and active_exit_id to remote table if not exists
-            cursor.execute("PRAGMA table_info(remote)")
-            columns = [row[1] for row in cursor.fetchall()]
-
-            if 'exit_group_id' not in columns:
-                cursor.execute("""
-                    ALTER TABLE remote ADD COLUMN exit_group_id INTEGER
-                    REFERENCES exit_node_group(id) ON DELETE SET NULL
-                """)
-
-            if 'active_exit_id' not in columns:
-                cursor.execute("""
-                    ALTER TABLE remote ADD COLUMN active_exit_id INTEGER
-                    REFERENCES exit_node(id) ON DELETE SET NULL
-                """)
-
-            # Indexes
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_exit_health_status
-                ON exit_node_health(status, last_check_at)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_failover_remote
-                ON exit_failover_history(remote_id, triggered_at DESC)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_failover_group
-                ON exit_failover_history(group_id, triggered_at DESC)
-            """)
-
-            conn.commit()
-            logger.debug("Exit failover schema initialized")
-
-        finally:
-            conn.close()
+        """Get pooled database connection (close() returns it to the pool)"""
+        return get_connection(self.db_path)
 
     def create_group(
         self,
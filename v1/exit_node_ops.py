@@ -21,6 +21,7 @@
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from v1.schema_semantic import WireGuardDBv2
+from v1.ipam import IPAM
 from v1.keygen import generate_keypair
 from v1.state_tracker import record_state
 
@@ -373,43 +374,13 @@ def get_next_exit_node_ip(self) -> Tuple[str, str]:
         """
         Get next available IP addresses for an exit node.
 
-        Exit nodes use IPs in the 100-119 range (reserving space for 20 exit nodes).
+        Exit nodes use offsets .100-.119 of each /24 block of the network
+        (see v1/ipam.py).
 
         Returns:
             (ipv4_address, ipv6_address) with CIDR notation
         """
-        with self.db._connection() as conn:
-            cursor = conn.cursor()
-
-            # Get network info from coordination server
-            cursor.execute("""
-                SELECT network_ipv4, network_ipv6 FROM coordination_server LIMIT 1
-            """)
-            row = cursor.fetchone()
-            if not row:
-                raise ValueError("No coordination server found in database")
-
-            network_ipv4, network_ipv6 = row
-
-            # Extract base IPs
-            ipv4_base = network_ipv4.split('/')[0].rsplit('.', 1)[0]
-            ipv6_base = network_ipv6.split('/')[0].rstrip(':')
-
-            # Get existing exit node IPs
-            existing_ips = set()
-            cursor.execute("SELECT ipv4_address FROM exit_node")
-            for row in cursor.fetchall():
-                ip = row[0].split('/')[0].split('.')[-1]
-                existing_ips.add(int(ip))
-
-            # Find next available in 100-119 range
-            for i in range(100, 120):
-                if i not in existing_ips:
-                    ipv4_address = f"{ipv4_base}.{i}/32"
-                    ipv6_address = f"{ipv6_base}::{i:x}/128"
-                    return ipv4_address, ipv6_address
-
-            raise ValueError("No available IPs in exit node range (100-119)")
+        return IPAM.from_db(self.db).allocate('exit_node')
 
     def validate_exit_only_remote(self, remote_id: int) -> bool:
         """
@@ -0,0 +1,791 @@
+"""
+Config Generation Engine
+
+Loads the whole network topology in a single pass and renders every
+WireGuard config from that in-memory snapshot.
+
+The per-entity generators used to open a connection per config and re-read
+the coordination server and every advertised network each time - with 2,000
+remotes that was ~6,000 redundant queries. Here the topology is read with a
+fixed number of queries (one per table) on one connection, and rendering is
+pure string building over plain dicts, so a Topology can also be pickled and
+handed to worker processes (render_targets(..., jobs=N)).
+
+Usage:
+    from v1.generation_engine import load_topology, render_all
+
+    topology = load_topology(db)
+    for config in render_all(topology):
+        (output_dir / config.filename).write_text(config.content)
+
+    # Large networks: render across 8 processes, same bytes as serial
+    targets = config_targets(topology)
+    contents = render_targets(topology, targets, jobs=8)
+"""
+
+import os
+import sys
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.db_pool import get_read_connection
+from v1.schema_semantic import WireGuardDBv2
+from v1.encryption import (
+    ENCRYPTED_PREFIX,
+    decrypt_many,
+    decrypt_value,
+    get_active_encryption_manager,
+    set_active_encryption_manager,
+)
+
+
+# Entity types, matching command_pair.entity_type
+CS = 'coordination_server'
+ROUTER = 'subnet_router'
+REMOTE = 'remote'
+EXIT_NODE = 'exit_node'
+
+CS_FILENAME = "coordination.conf"
+
+T = TypeVar('T')
+
+
+@dataclass
+class Topology:
+    """
+    Snapshot of everything config generation needs.
+
+    Rows are plain dicts (sqlite3.Row converted), in the same order the
+    per-entity queries used to return them.
+    """
+    cs: Dict[str, Any]
+    routers: List[Dict[str, Any]]            # each with 'advertised_networks': List[str]
+    remotes: List[Dict[str, Any]]
+    exit_nodes: List[Dict[str, Any]]
+    advertised_networks: List[str]           # distinct, network-wide
+    command_pairs: Dict[Tuple[str, int], List[Dict[str, Any]]] = field(default_factory=dict)
+    command_singletons: Dict[Tuple[str, int], List[Dict[str, Any]]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._routers_by_id = {r['id']: r for r in self.routers}
+        self._remotes_by_id = {r['id']: r for r in self.remotes}
+        self._exit_nodes_by_id = {e['id']: e for e in self.exit_nodes}
+        self._remotes_by_exit: Dict[int, List[Dict[str, Any]]] = {}
+        for remote in self.remotes:
+            if remote.get('exit_node_id'):
+                self._remotes_by_exit.setdefault(remote['exit_node_id'], []).append(remote)
+        for remotes in self._remotes_by_exit.values():
+            # SQLite ORDER BY hostname: NULLs first, then binary order
+            remotes.sort(key=lambda r: (r['hostname'] is not None, r['hostname'] or ''))
+
+    def router(self, router_id: int) -> Dict[str, Any]:
+        return self._routers_by_id[router_id]
+
+    def remote(self, remote_id: int) -> Dict[str, Any]:
+        return self._remotes_by_id[remote_id]
+
+    def exit_node(self, exit_node_id: int) -> Optional[Dict[str, Any]]:
+        return self._exit_nodes_by_id.get(exit_node_id)
+
+    def remotes_for_exit(self, exit_node_id: int) -> List[Dict[str, Any]]:
+        """Remotes routed through an exit node, ordered by hostname"""
+        return self._remotes_by_exit.get(exit_node_id, [])
+
+    def pairs_for(self, entity_type: str, entity_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Command pairs for an entity (all of that type when entity_id is None)"""
+        return _commands_for(self.command_pairs, entity_type, entity_id)
+
+    def singletons_for(self, entity_type: str, entity_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Command singletons for an entity (all of that type when entity_id is None)"""
+        return _commands_for(self.command_singletons, entity_type, entity_id)
+
+
+def _commands_for(commands: Dict[Tuple[str, int], List[Dict]], entity_type: str,
+                  entity_id: Optional[int]) -> List[Dict]:
+    if entity_id is not None:
+        return commands.get((entity_type, entity_id), [])
+    matching = [cmd for (etype, _), cmds in commands.items() if etype == entity_type for cmd in cmds]
+    matching.sort(key=lambda c: (c['execution_order'], c['id']))
+    return matching
+
+
+@dataclass(frozen=True)
+class ConfigTarget:
+    """One config file to generate (not yet rendered)"""
+    entity_type: str
+    entity_id: int
+    hostname: Optional[str]
+    filename: str
+
+
+@dataclass
+class RenderedConfig:
+    """One generated config file"""
+    entity_type: str
+    entity_id: int
+    hostname: Optional[str]
+    filename: str
+    content: str
+
+
+def load_topology(db: WireGuardDBv2, remote_ids: Optional[Iterable[int]] = None) -> Topology:
+    """
+    Read the network topology with one query per table.
+
+    Args:
+        db: Database
+        remote_ids: Only load these remotes (None = all). Used when rendering
+            a single remote config so the other remotes aren't read.
+    """
+    with db._connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT * FROM coordination_server WHERE id = 1")
+        cs = dict(cursor.fetchone())
+
+        cursor.execute("SELECT * FROM subnet_router")
+        routers = [dict(row) for row in cursor.fetchall()]
+
+        # Network-wide list keeps first-seen order; per-router lists are
+        # sorted, which is what the old GROUP_CONCAT join produced
+        cursor.execute("SELECT subnet_router_id, network_cidr FROM advertised_network ORDER BY id")
+        advertised_networks: Dict[str, None] = {}
+        by_router: Dict[int, List[str]] = {}
+        for row in cursor.fetchall():
+            advertised_networks.setdefault(row['network_cidr'])
+            by_router.setdefault(row['subnet_router_id'], []).append(row['network_cidr'])
+        for router in routers:
+            router['advertised_networks'] = sorted(by_router.get(router['id'], []))
+
+        if remote_ids is None:
+            cursor.execute("SELECT * FROM remote")
+            remotes = [dict(row) for row in cursor.fetchall()]
+        else:
+            ids = list(remote_ids)
+            placeholders = ','.join('?' * len(ids))
+            cursor.execute(f"SELECT * FROM remote WHERE id IN ({placeholders})", ids)
+            remotes = [dict(row) for row in cursor.fetchall()]
+
+        cursor.execute("SELECT * FROM exit_node")
+        exit_nodes = [dict(row) for row in cursor.fetchall()]
+
+        command_pairs = _load_commands(cursor, 'command_pair')
+        command_singletons = _load_commands(cursor, 'command_singleton')
+
+    return Topology(
+        cs=cs,
+        routers=routers,
+        remotes=remotes,
+        exit_nodes=exit_nodes,
+        advertised_networks=list(advertised_networks),
+        command_pairs=command_pairs,
+        command_singletons=command_singletons,
+    )
+
+
+def _load_commands(cursor, table: str) -> Dict[Tuple[str, int], List[Dict]]:
+    cursor.execute(f"SELECT * FROM {table} ORDER BY execution_order, id")
+    commands: Dict[Tuple[str, int], List[Dict]] = {}
+    for row in cursor.fetchall():
+        commands.setdefault((row['entity_type'], row['entity_id']), []).append(dict(row))
+    return commands
+
+
+# =============================================================================
+# RENDERING
+# =============================================================================
+
+def render_cs_config(topology: Topology) -> str:
+    """Render the coordination server config"""
+    lines = _cs_config_lines(
+        topology.cs, topology.pairs_for(CS), topology.singletons_for(CS),
+        topology.routers, topology.remotes, topology.exit_nodes,
+    )
+    return '\n'.join(lines) + '\n'
+
+
+def _cs_config_lines(cs: Dict[str, Any], command_pairs: List[Dict], command_singletons: List[Dict],
+                     routers: Iterable[Dict], remotes: Iterable[Dict],
+                     exit_nodes: Iterable[Dict]) -> Iterator[str]:
+    """
+    Lines of the coordination server config.
+
+    Peers are consumed lazily, so routers/remotes/exit_nodes may be DB
+    cursors (see stream_cs_config) as well as lists.
+    """
+    # [Interface]
+    yield "[Interface]"
+    yield f"Address = {cs['ipv4_address']}, {cs['ipv6_address']}"
+    yield f"PrivateKey = {decrypt_value(cs['private_key'])}"
+    yield f"ListenPort = {cs['listen_port']}"
+
+    if cs.get('mtu'):
+        yield f"MTU = {cs['mtu']}"
+
+    # Commands
+    if command_pairs or command_singletons:
+        yield ""
+
+        # PostUp (singletons first, then pairs)
+        for singleton in command_singletons:
+            for cmd in json.loads(singleton['up_commands']):
+                yield f"PostUp = {cmd}"
+
+        for pair in command_pairs:
+            for cmd in json.loads(pair['up_commands']):
+                yield f"PostUp = {cmd}"
+
+        # PostDown (pairs only)
+        for pair in command_pairs:
+            for cmd in json.loads(pair['down_commands']):
+                yield f"PostDown = {cmd}"
+
+    for router in routers:
+        yield from _cs_router_peer(router)
+
+    for remote in remotes:
+        yield from _cs_remote_peer(remote)
+
+    for exit_node in exit_nodes:
+        yield from _cs_exit_node_peer(exit_node)
+
+
+def _cs_router_peer(router: Dict[str, Any]) -> List[str]:
+    lines = ["", "[Peer]", f"# {router['hostname']}"]
+
+    # Role comment if initiates only
+    if router.get('endpoint') is None:
+        lines.append("# no endpoint == behind CGNAT == initiates connection")
+
+    lines.append(f"PublicKey = {router['current_public_key']}")
+
+    # AllowedIPs = router IP + advertised networks
+    allowed_ips = [router['ipv4_address'], router['ipv6_address']] + router['advertised_networks']
+    lines.append(f"AllowedIPs = {', '.join(allowed_ips)}")
+
+    if router.get('endpoint'):
+        lines.append(f"Endpoint = {router['endpoint']}")
+
+    if router.get('persistent_keepalive'):
+        lines.append(f"PersistentKeepalive = {router['persistent_keepalive']}")
+
+    return lines
+
+
+def _cs_remote_peer(remote: Dict[str, Any]) -> List[str]:
+    lines = ["", "[Peer]", f"# {remote['hostname']}"]
+
+    # Role comment for dynamic endpoints
+    if remote.get('endpoint') is None:
+        lines.append("# Endpoint will be dynamic (mobile device)")
+
+    lines.append(f"PublicKey = {remote['current_public_key']}")
+
+    if remote.get('preshared_key'):
+        lines.append(f"PresharedKey = {decrypt_value(remote['preshared_key'])}")
+
+    lines.append(f"AllowedIPs = {remote['ipv4_address']}, {remote['ipv6_address']}")
+
+    if remote.get('endpoint'):
+        lines.append(f"Endpoint = {remote['endpoint']}")
+
+    if remote.get('persistent_keepalive'):
+        lines.append(f"PersistentKeepalive = {remote['persistent_keepalive']}")
+
+    return lines
+
+
+def _cs_exit_node_peer(exit_node: Dict[str, Any]) -> List[str]:
+    return [
+        "",
+        "[Peer]",
+        f"# exit-node: {exit_node['hostname']}",
+        f"PublicKey = {exit_node['current_public_key']}",
+        # AllowedIPs = just the exit node's VPN address
+        f"AllowedIPs = {exit_node['ipv4_address']}, {exit_node['ipv6_address']}",
+        f"Endpoint = {exit_node['endpoint']}:{exit_node['listen_port']}",
+        "PersistentKeepalive = 25",
+    ]
+
+
+def render_router_config(topology: Topology, router: Dict[str, Any]) -> str:
+    """Render a subnet router config"""
+    cs = topology.cs
+    command_pairs = topology.pairs_for(ROUTER, router['id'])
+
+    lines = []
+
+    # [Interface]
+    lines.append("[Interface]")
+    lines.append(f"Address = {router['ipv4_address']}, {router['ipv6_address']}")
+    lines.append(f"PrivateKey = {decrypt_value(router['private_key'])}")
+
+    if router.get('mtu'):
+        lines.append(f"MTU = {router['mtu']}")
+
+    # Commands
+    if command_pairs:
+        lines.append("")
+
+        for pair in command_pairs:
+            for cmd in json.loads(pair['up_commands']):
+                lines.append(f"PostUp = {cmd}")
+
+        for pair in command_pairs:
+            for cmd in json.loads(pair['down_commands']):
+                lines.append(f"PostDown = {cmd}")
+
+    # [Peer] - CS
+    lines.append("")
+    lines.append("[Peer]")
+    lines.append("# coordination-server")
+    lines.append(f"PublicKey = {cs['current_public_key']}")
+    lines.append(f"Endpoint = {cs['endpoint']}:{cs['listen_port']}")
+
+    # AllowedIPs = VPN network (so router can reach all VPN clients)
+    lines.append(f"AllowedIPs = {cs['network_ipv4']}, {cs['network_ipv6']}")
+    lines.append("PersistentKeepalive = 25")
+
+    return '\n'.join(lines) + '\n'
+
+
+def render_remote_config(topology: Topology, remote: Dict[str, Any]) -> str:
+    """
+    Render a remote client config.
+
+    If the remote has an exit node assigned:
+    - For exit_only: Only the exit node peer (no CS)
+    - For other access levels: CS peer for VPN traffic + exit node peer for internet
+
+    If no exit node assigned: Standard split tunnel (only CS peer, no default route)
+    """
+    cs = topology.cs
+    advertised_networks = topology.advertised_networks
+    exit_node = topology.exit_node(remote['exit_node_id']) if remote.get('exit_node_id') else None
+
+    lines = []
+    access_level = remote.get('access_level', 'full_access')
+    is_exit_only = access_level == 'exit_only'
+
+    # [Interface]
+    lines.append("[Interface]")
+    lines.append(f"Address = {remote['ipv4_address']}, {remote['ipv6_address']}")
+    lines.append(f"PrivateKey = {decrypt_value(remote['private_key'])}")
+
+    if remote.get('dns_servers'):
+        lines.append(f"DNS = {remote['dns_servers']}")
+    elif exit_node:
+        # Use public DNS when routing through exit node
+        lines.append("DNS = 1.1.1.1, 8.8.8.8")
+
+    lines.append("MTU = 1280")
+
+    # [Peer] - CS (skip for exit_only)
+    if not is_exit_only:
+        lines.append("")
+        lines.append("[Peer]")
+        lines.append("# coordination-server")
+        lines.append(f"PublicKey = {cs['current_public_key']}")
+
+        # PresharedKey (symmetric - same key on both sides)
+        if remote.get('preshared_key'):
+            lines.append(f"PresharedKey = {decrypt_value(remote['preshared_key'])}")
+
+        lines.append(f"Endpoint = {cs['endpoint']}:{cs['listen_port']}")
+
+        # AllowedIPs for CS - VPN traffic only (not default route if using exit)
+        stored_allowed_ips = remote.get('allowed_ips')
+        if stored_allowed_ips and not exit_node:
+            # Use exactly what was imported (only if not using exit)
+            lines.append(f"AllowedIPs = {stored_allowed_ips}")
+        else:
+            # Compute from access_level
+            vpn_networks = [cs['network_ipv4'], cs['network_ipv6']]
+            if access_level == 'full_access':
+                allowed_ips = vpn_networks + advertised_networks
+            elif access_level == 'lan_only':
+                allowed_ips = advertised_networks if advertised_networks else vpn_networks
+            else:
+                allowed_ips = vpn_networks
+
+            lines.append(f"AllowedIPs = {', '.join(allowed_ips)}")
+        lines.append("PersistentKeepalive = 25")
+
+    # [Peer] - Exit Node (if assigned)
+    if exit_node:
+        lines.append("")
+        lines.append("[Peer]")
+        lines.append(f"# exit-node: {exit_node['hostname']}")
+        lines.append(f"PublicKey = {exit_node['current_public_key']}")
+        lines.append(f"Endpoint = {exit_node['endpoint']}:{exit_node['listen_port']}")
+
+        # Exit node gets default route (all internet traffic)
+        lines.append("AllowedIPs = 0.0.0.0/0, ::/0")
+        lines.append("PersistentKeepalive = 25")
+
+    return '\n'.join(lines) + '\n'
+
+
+def render_exit_node_config(topology: Topology, exit_node: Dict[str, Any]) -> str:
+    """
+    Render an exit node config.
+
+    Exit node config includes:
+    - Interface with NAT/masquerading for internet egress
+    - Peer entries for all remotes using this exit node
+    """
+    lines = []
+
+    # [Interface]
+    lines.append("[Interface]")
+    lines.append(f"Address = {exit_node['ipv4_address']}, {exit_node['ipv6_address']}")
+    lines.append(f"PrivateKey = {decrypt_value(exit_node['private_key'])}")
+    lines.append(f"ListenPort = {exit_node['listen_port']}")
+
+    # PostUp/PostDown for NAT and IP forwarding
+    wan = exit_node.get('wan_interface', 'eth0')
+    lines.append("")
+    lines.append("# Enable IP forwarding and NAT for internet egress")
+    lines.append("PostUp = sysctl -w net.ipv4.ip_forward=1")
+    lines.append("PostUp = sysctl -w net.ipv6.conf.all.forwarding=1")
+    lines.append("PostUp = iptables -A FORWARD -i %i -j ACCEPT")
+    lines.append(f"PostUp = iptables -t nat -A POSTROUTING -o {wan} -j MASQUERADE")
+    lines.append("PostUp = ip6tables -A FORWARD -i %i -j ACCEPT")
+    lines.append(f"PostUp = ip6tables -t nat -A POSTROUTING -o {wan} -j MASQUERADE")
+    lines.append("PostDown = iptables -D FORWARD -i %i -j ACCEPT")
+    lines.append(f"PostDown = iptables -t nat -D POSTROUTING -o {wan} -j MASQUERADE")
+    lines.append("PostDown = ip6tables -D FORWARD -i %i -j ACCEPT")
+    lines.append(f"PostDown = ip6tables -t nat -D POSTROUTING -o {wan} -j MASQUERADE")
+
+    # [Peer] entries for each remote using this exit
+    for remote in topology.remotes_for_exit(exit_node['id']):
+        lines.append("")
+        lines.append("[Peer]")
+        lines.append(f"# {remote['hostname']}")
+        lines.append(f"PublicKey = {remote['current_public_key']}")
+
+        if remote.get('preshared_key'):
+            lines.append(f"PresharedKey = {decrypt_value(remote['preshared_key'])}")
+
+        # AllowedIPs = just this remote's VPN addresses
+        lines.append(f"AllowedIPs = {remote['ipv4_address']}, {remote['ipv6_address']}")
+
+    return '\n'.join(lines) + '\n'
+
+
+def provisional_remotes(topology: Topology) -> List[Dict[str, Any]]:
+    """Remotes without a private key (present in the CS config, no local config)"""
+    return [r for r in topology.remotes if r.get('private_key') is None]
+
+
+def config_targets(topology: Topology) -> List[ConfigTarget]:
+    """
+    Every config file the network produces, without rendering them.
+
+    Order: coordination server, subnet routers, remotes (provisional remotes
+    are skipped - they have no private key), exit nodes.
+    """
+    targets = [ConfigTarget(CS, topology.cs['id'], topology.cs.get('hostname'), CS_FILENAME)]
+    targets.extend(ConfigTarget(ROUTER, r['id'], r['hostname'], f"{r['hostname']}.conf")
+                   for r in topology.routers)
+    targets.extend(ConfigTarget(REMOTE, r['id'], r['hostname'], f"{r['hostname']}.conf")
+                   for r in topology.remotes if r.get('private_key') is not None)
+    targets.extend(ConfigTarget(EXIT_NODE, e['id'], e['hostname'], f"{e['hostname']}.conf")
+                   for e in topology.exit_nodes)
+    return targets
+
+
+def render_target(topology: Topology, target: ConfigTarget) -> str:
+    """Render the config for one target"""
+    if target.entity_type == CS:
+        return render_cs_config(topology)
+    if target.entity_type == ROUTER:
+        return render_router_config(topology, topology.router(target.entity_id))
+    if target.entity_type == REMOTE:
+        return render_remote_config(topology, topology.remote(target.entity_id))
+    if target.entity_type == EXIT_NODE:
+        return render_exit_node_config(topology, topology.exit_node(target.entity_id))
+    raise ValueError(f"Unknown entity type: {target.entity_type}")
+
+
+# =============================================================================
+# STREAMING
+# =============================================================================
+
+# Write buffer for streamed configs
+STREAM_BUFFER_SIZE = 1024 * 1024
+
+# Rows fetched (and keys decrypted) per batch
+STREAM_BATCH_SIZE = 500
+
+
+def _iter_routers(cursor) -> Iterator[Dict[str, Any]]:
+    """Routers with their (sorted) advertised networks, one at a time"""
+    cursor.execute("""
+        SELECT sr.*, an.network_cidr AS _network_cidr
+        FROM subnet_router sr
+        LEFT JOIN advertised_network an ON an.subnet_router_id = sr.id
+        ORDER BY sr.id, an.network_cidr
+    """)
+    for _, rows in groupby(cursor, key=lambda row: row['id']):
+        rows = list(rows)
+        router = dict(rows[0])
+        del router['_network_cidr']
+        router['advertised_networks'] = [r['_network_cidr'] for r in rows if r['_network_cidr']]
+        yield router
+
+
+def _iter_rows(cursor, query: str, secret_columns: Tuple[str, ...] = ()) -> Iterator[Dict[str, Any]]:
+    """Rows in batches, with `secret_columns` decrypted a batch at a time"""
+    cursor.execute(query)
+    while True:
+        batch = [dict(row) for row in cursor.fetchmany(STREAM_BATCH_SIZE)]
+        if not batch:
+            return
+        for column in secret_columns:
+            plaintexts = decrypt_many(row[column] for row in batch)
+            for row, plaintext in zip(batch, plaintexts):
+                row[column] = plaintext
+        yield from batch
+
+
+def stream_cs_config(db: WireGuardDBv2, path: Path | str) -> str:
+    """
+    Write the coordination server config straight from DB cursors.
+
+    Peer rows are read one at a time and written to a buffered file, so
+    memory stays flat however many peers the hub has; the lists of dicts
+    and the joined config string that render_cs_config() builds are never
+    created. Output is byte-identical to render_cs_config().
+
+    The file is written to a temporary name (mode 600) in the same directory
+    and atomically renamed over `path`, so readers (and deploys) never see
+    a partial config.
+
+    Returns:
+        sha256 of the written content
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    digest = hashlib.sha256()
+
+    conn = get_read_connection(db.db_path)
+    try:
+        # One read transaction, so every cursor sees the same snapshot
+        conn.execute("BEGIN")
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT * FROM coordination_server WHERE id = 1")
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError("No coordination server found in database")
+        cs = dict(row)
+        command_pairs = _commands_for(_load_commands(cursor, 'command_pair'), CS, None)
+        command_singletons = _commands_for(_load_commands(cursor, 'command_singleton'), CS, None)
+
+        # Peer queries need their own cursors: the generator drains them in turn
+        lines = _cs_config_lines(
+            cs, command_pairs, command_singletons,
+            _iter_routers(conn.cursor()),
+            _iter_rows(conn.cursor(), "SELECT * FROM remote", secret_columns=('preshared_key',)),
+            _iter_rows(conn.cursor(), "SELECT * FROM exit_node"),
+        )
+
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, 'w', buffering=STREAM_BUFFER_SIZE) as f:
+                for line in lines:
+                    data = line + '\n'
+                    f.write(data)
+                    digest.update(data.encode())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.close()
+
+    return digest.hexdigest()
+
+
+def require_decryptable(topology: Topology):
+    """
+    Refuse to render keys that are still encrypted.
+
+    decrypt_value() passes ciphertext through while the database is locked,
+    which would write 'PrivateKey = enc:v1:...' into the configs - and the
+    manifest would then keep skipping them once the database is unlocked.
+
+    Raises:
+        ValueError: if any key is encrypted and no unlocked manager is active
+    """
+    manager = get_active_encryption_manager()
+    if manager is not None and manager.is_unlocked:
+        return
+    rows = [topology.cs, *topology.routers, *topology.remotes, *topology.exit_nodes]
+    if any(isinstance(row.get(column), str) and row[column].startswith(ENCRYPTED_PREFIX)
+           for row in rows for column in ('private_key', 'preshared_key')):
+        raise ValueError("Database is encrypted and locked; unlock it (or start "
+                         "'wg-friend agent') before generating configs")
+
+
+# =============================================================================
+# PARALLEL RENDERING
+# =============================================================================
+
+# Per-worker state, installed once by _init_worker instead of being pickled
+# with every task
+_worker_state: Any = None
+
+
+def _init_worker(state: Any, encryption_manager):
+    global _worker_state
+    _worker_state = state
+    if encryption_manager is not None:
+        # Workers decrypt keys themselves; hand them the unlocked manager
+        set_active_encryption_manager(encryption_manager)
+
+
+def _call_with_state(func: Callable, item: Any) -> Any:
+    return func(_worker_state, item)
+
+
+def map_parallel(func: Callable[[Any, Any], T], shared: Any, items: Iterable[Any],
+                 jobs: int = 1, chunksize: Optional[int] = None) -> List[T]:
+    """
+    Compute [func(shared, item) for item in items], optionally in a process pool.
+
+    `shared` (e.g. a Topology) is sent to each worker once and treated as
+    read-only. Results come back in input order, so output is identical to
+    the serial path. `func` must be a module-level function.
+
+    Args:
+        func: Pure function of (shared, item)
+        shared: Read-only state every call needs
+        items: Work items
+        jobs: Worker processes (1 = run in this process)
+        chunksize: Items per task (default: ~8 tasks per worker)
+    """
+    items = list(items)
+    if jobs <= 1 or len(items) <= 1:
+        return [func(shared, item) for item in items]
+
+    jobs = min(jobs, len(items))
+    if chunksize is None:
+        chunksize = max(1, len(items) // (jobs * 8))
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(shared, get_active_encryption_manager())) as pool:
+        return list(pool.map(partial(_call_with_state, func), items, chunksize=chunksize))
+
+
+def render_targets(topology: Topology, targets: Iterable[ConfigTarget],
+                   jobs: int = 1) -> List[str]:
+    """Render targets (in order), across `jobs` worker processes"""
+    return map_parallel(render_target, topology, targets, jobs=jobs)
+
+
+def render_all(topology: Topology) -> Iterator[RenderedConfig]:
+    """Render every config in the network from one snapshot"""
+    for target in config_targets(topology):
+        yield RenderedConfig(target.entity_type, target.entity_id, target.hostname,
+                             target.filename, render_target(topology, target))
+
+
+# =============================================================================
+# DEPENDENCIES
+# =============================================================================
+
+# Bump when rendering output changes, so recorded dependency hashes go stale
+RENDER_VERSION = 1
+
+# Whole-table dependency marker
+ALL_ROWS = '*'
+
+
+def config_dependencies(topology: Topology, target: ConfigTarget) -> List[Tuple[str, Any]]:
+    """
+    DB rows a config is rendered from, as (table, id) pairs.
+
+    (table, '*') means every row of the table. Advertised networks are
+    tracked through their subnet_router row for the CS config.
+    """
+    cs = ('coordination_server', topology.cs['id'])
+
+    if target.entity_type == CS:
+        return [cs, ('subnet_router', ALL_ROWS), ('advertised_network', ALL_ROWS),
+                ('remote', ALL_ROWS), ('exit_node', ALL_ROWS),
+                ('command_pair', CS), ('command_singleton', CS)]
+
+    if target.entity_type == ROUTER:
+        return [cs, ('subnet_router', target.entity_id),
+                ('command_pair', f"{ROUTER}:{target.entity_id}")]
+
+    if target.entity_type == REMOTE:
+        deps = [cs, ('remote', target.entity_id), ('advertised_network', ALL_ROWS)]
+        exit_node_id = topology.remote(target.entity_id).get('exit_node_id')
+        if exit_node_id:
+            deps.append(('exit_node', exit_node_id))
+        return deps
+
+    if target.entity_type == EXIT_NODE:
+        return [('exit_node', target.entity_id)] + [
+            ('remote', r['id']) for r in topology.remotes_for_exit(target.entity_id)
+        ]
+
+    raise ValueError(f"Unknown entity type: {target.entity_type}")
+
+
+def _dependency_rows(topology: Topology, table: str, key: Any) -> Any:
+    if table == 'coordination_server':
+        return topology.cs
+    if table == 'subnet_router':
+        return topology.routers if key == ALL_ROWS else topology.router(key)
+    if table == 'advertised_network':
+        return topology.advertised_networks
+    if table == 'remote':
+        return topology.remotes if key == ALL_ROWS else topology.remote(key)
+    if table == 'exit_node':
+        return topology.exit_nodes if key == ALL_ROWS else topology.exit_node(key)
+    if table in ('command_pair', 'command_singleton'):
+        commands = topology.command_pairs if table == 'command_pair' else topology.command_singletons
+        if key == CS:
+            return _commands_for(commands, CS, None)
+        entity_type, entity_id = key.split(':')
+        return commands.get((entity_type, int(entity_id)), [])
+    raise ValueError(f"Unknown dependency table: {table}")
+
+
+def dependency_hash(topology: Topology, target: ConfigTarget) -> str:
+    """
+    Fingerprint of everything a config depends on.
+
+    Equal hashes mean rendering would produce the same file, so the
+    renderer (and its key decryption) can be skipped.
+    """
+    digest = hashlib.sha256(f"render-v{RENDER_VERSION}|{target.filename}".encode())
+    for table, key in config_dependencies(topology, target):
+        rows = _dependency_rows(topology, table, key)
+        digest.update(f"|{table}:{key}|".encode())
+        digest.update(json.dumps(rows, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def content_hash(content: str) -> str:
+    """Hash of a rendered config file"""
+    return hashlib.sha256(content.encode()).hexdigest()
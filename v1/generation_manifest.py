@@ -0,0 +1,256 @@
+"""
+Incremental Config Generation
+
+Records, for every generated file, a content hash and the DB rows the config
+was rendered from. `wg-friend generate` then re-renders only the configs
+whose dependencies changed (or whose file went missing or was edited) and
+skips the rest.
+
+Dependencies per config (see generation_engine.config_dependencies):
+- coordination server: CS row, every router, advertised network, remote
+  and exit node, CS command pairs/singletons
+- subnet router: CS row, its own row and command pairs
+- remote: CS row, its own row, advertised networks, its exit node
+- exit node: its own row and the remotes routed through it
+
+So a change to one remote regenerates that remote, the coordination server
+and (if assigned) its exit node; everything else is skipped.
+
+Usage:
+    from v1.generation_manifest import GenerationManifest
+
+    manifest = GenerationManifest(db_path)
+    plan = manifest.plan(topology, output_dir)
+    for target in plan.regenerate:
+        ...write the file...
+    manifest.record(output_dir, entries)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from v1.db_pool import get_connection
+from v1.migrations import ensure_schema, execute_script
+from v1.generation_engine import (
+    ConfigTarget,
+    Topology,
+    config_dependencies,
+    config_targets,
+    dependency_hash,
+)
+
+
+MANIFEST_SCHEMA = """
+    -- One row per generated config file
+    CREATE TABLE IF NOT EXISTS generated_config (
+        output_dir TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        entity_type TEXT NOT NULL,
+        entity_id INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,       -- sha256 of the file contents
+        dependency_hash TEXT NOT NULL,    -- sha256 of the DB rows it was rendered from
+        dependencies TEXT NOT NULL,       -- JSON: [["remote", 5], ["exit_node", "*"], ...]
+        file_size INTEGER,
+        file_mtime_ns INTEGER,
+        generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (output_dir, filename)
+    );
+"""
+
+
+def create_manifest_schema(cursor):
+    """Migration 11: generated config manifest for incremental generation"""
+    execute_script(cursor, MANIFEST_SCHEMA)
+
+
+@dataclass
+class ManifestEntry:
+    """Recorded state of one generated file"""
+    filename: str
+    entity_type: str
+    entity_id: int
+    content_hash: str
+    dependency_hash: str
+    dependencies: list
+    file_size: Optional[int] = None
+    file_mtime_ns: Optional[int] = None
+
+
+@dataclass
+class GenerationPlan:
+    """Which configs need rendering and which are up to date"""
+    regenerate: List[ConfigTarget] = field(default_factory=list)
+    skipped: List[ConfigTarget] = field(default_factory=list)
+    dependency_hashes: Dict[str, str] = field(default_factory=dict)   # filename -> hash
+    stale: List[str] = field(default_factory=list)   # recorded files no entity produces anymore
+
+
+def _dir_key(output_dir: Path | str) -> str:
+    return str(Path(output_dir).resolve())
+
+
+def _sha256_file(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+class GenerationManifest:
+    """
+    Tracks generated files so unchanged configs can be skipped.
+
+    Usage:
+        manifest = GenerationManifest(db_path)
+        plan = manifest.plan(topology, "generated")
+        print(f"{len(plan.regenerate)} to write, {len(plan.skipped)} unchanged")
+    """
+
+    def __init__(self, db_path: Path | str):
+        self.db_path = db_path
+        ensure_schema(self.db_path)
+
+    def _get_conn(self) -> sqlite3.Connection:
+        return get_connection(self.db_path)
+
+    def load(self, output_dir: Path | str) -> Dict[str, ManifestEntry]:
+        """Recorded entries for an output directory, keyed by filename"""
+        conn = self._get_conn()
+        try:
+            rows = conn.execute("""
+                SELECT filename, entity_type, entity_id, content_hash, dependency_hash,
+                       dependencies, file_size, file_mtime_ns
+                FROM generated_config WHERE output_dir = ?
+            """, (_dir_key(output_dir),)).fetchall()
+        finally:
+            conn.close()
+
+        return {
+            row['filename']: ManifestEntry(
+                filename=row['filename'],
+                entity_type=row['entity_type'],
+                entity_id=row['entity_id'],
+                content_hash=row['content_hash'],
+                dependency_hash=row['dependency_hash'],
+                dependencies=json.loads(row['dependencies']),
+                file_size=row['file_size'],
+                file_mtime_ns=row['file_mtime_ns'],
+            )
+            for row in rows
+        }
+
+    def plan(self, topology: Topology, output_dir: Path | str,
+             force: bool = False) -> GenerationPlan:
+        """
+        Decide which configs to render.
+
+        A config is skipped when its dependency hash matches the recorded one
+        and the file on disk still has the recorded contents.
+
+        Args:
+            topology: Loaded topology
+            output_dir: Directory the configs are written to
+            force: Regenerate everything
+        """
+        output_dir = Path(output_dir)
+        entries = {} if force else self.load(output_dir)
+        plan = GenerationPlan()
+
+        for target in config_targets(topology):
+            dep_hash = dependency_hash(topology, target)
+            plan.dependency_hashes[target.filename] = dep_hash
+
+            entry = entries.pop(target.filename, None)
+            if (entry is not None
+                    and entry.entity_type == target.entity_type
+                    and entry.entity_id == target.entity_id
+                    and entry.dependency_hash == dep_hash
+                    and self._file_matches(output_dir / target.filename, entry)):
+                plan.skipped.append(target)
+            else:
+                plan.regenerate.append(target)
+
+        plan.stale = sorted(entries)
+        return plan
+
+    @staticmethod
+    def _file_matches(path: Path, entry: ManifestEntry) -> bool:
+        """Cheap stat check first, content hash only if the stat changed"""
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+        if st.st_size == entry.file_size and st.st_mtime_ns == entry.file_mtime_ns:
+            return True
+        return _sha256_file(path) == entry.content_hash
+
+    @staticmethod
+    def entry_for(topology: Topology, target: ConfigTarget, digest: str,
+                  dep_hash: str, path: Optional[Path] = None) -> ManifestEntry:
+        """
+        Build the manifest entry for a freshly written file.
+
+        Args:
+            digest: content_hash() of the written content
+            dep_hash: GenerationPlan.dependency_hashes[target.filename]
+            path: Written file, to record its size and mtime
+        """
+        size = mtime_ns = None
+        if path is not None:
+            st = os.stat(path)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        return ManifestEntry(
+            filename=target.filename,
+            entity_type=target.entity_type,
+            entity_id=target.entity_id,
+            content_hash=digest,
+            dependency_hash=dep_hash,
+            dependencies=[list(dep) for dep in config_dependencies(topology, target)],
+            file_size=size,
+            file_mtime_ns=mtime_ns,
+        )
+
+    def record(self, output_dir: Path | str, entries: Iterable[ManifestEntry],
+               forget: Iterable[str] = ()):
+        """
+        Store entries for written files and drop entries for stale ones.
+
+        Args:
+            output_dir: Directory the files were written to
+            entries: Entries for the files just written
+            forget: Filenames no longer produced (see GenerationPlan.stale)
+        """
+        key = _dir_key(output_dir)
+        conn = self._get_conn()
+        try:
+            conn.executemany("""
+                INSERT OR REPLACE INTO generated_config (
+                    output_dir, filename, entity_type, entity_id, content_hash,
+                    dependency_hash, dependencies, file_size, file_mtime_ns
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (key, e.filename, e.entity_type, e.entity_id, e.content_hash,
+                 e.dependency_hash, json.dumps(e.dependencies), e.file_size, e.file_mtime_ns)
+                for e in entries
+            ])
+            conn.executemany(
+                "DELETE FROM generated_config WHERE output_dir = ? AND filename = ?",
+                [(key, filename) for filename in forget],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self, output_dir: Path | str):
+        """Forget everything recorded for an output directory"""
+        conn = self._get_conn()
+        try:
+            conn.execute("DELETE FROM generated_config WHERE output_dir = ?", (_dir_key(output_dir),))
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,506 @@
+"""
+IP Address Management (IPAM)
+
+Allocates VPN addresses for new peers from per-role pools inside the
+coordination server's IPv4 and IPv6 networks, honouring their real prefix
+lengths.
+
+Layout: a network is divided into blocks of 256 addresses (a single block
+if it is smaller). Every block gives each role the same offsets:
+
+    .1-.19      reserved (coordination server, infrastructure)
+    .20-.29     subnet routers
+    .30-.99     remotes
+    .100-.119   exit nodes
+    .120-.254   remotes
+
+A /24 keeps the familiar numbering; a /20 has 16 times the room (160
+routers, 3280 remotes, 320 exit nodes) and a /16 256 times. A network
+smaller than a block gets the default layout scaled down to fit, keeping .1
+for the coordination server and at least one address per role (a /28 has
+one router, one exit node and eleven remotes). Pools are configurable per
+role.
+
+IPv6 uses the same layout inside its own prefix but is allocated
+independently: a peer's IPv6 address is the next free one in its IPv6 pool,
+not a copy of its IPv4 octet.
+
+Free addresses are kept per role and per touched block as sorted, disjoint
+intervals; untouched blocks cost nothing, so a /64 costs no more than a /24
+and reserving an address deep inside it touches a single block.
+
+IPAM.from_db() reads the address tables once per database file. Triggers
+log every address taken or freed in address_change, and later calls only
+replay the entries logged since.
+
+Usage:
+    ipam = IPAM.from_db(db)
+    ipv4, ipv6 = ipam.allocate('remote')      # ('10.66.0.30/32', 'fd66::1e/128')
+"""
+
+import copy
+import ipaddress
+import os
+import sqlite3
+import sys
+import threading
+from bisect import bisect_left, bisect_right, insort
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.db_pool import _file_id
+from v1.migrations import execute_script
+
+# Addresses per block; pool offsets repeat in every block
+BLOCK_SIZE = 256
+
+# Offsets (first, last) owned by each role within a block
+DEFAULT_POOLS: Dict[str, List[Tuple[int, int]]] = {
+    'router': [(20, 29)],
+    'remote': [(30, 99), (120, 254)],
+    'exit_node': [(100, 119)],
+}
+
+# Tables whose addresses are in use (all share the VPN networks)
+ADDRESS_TABLES = ('coordination_server', 'subnet_router', 'remote', 'exit_node')
+
+# Log entries kept; a cache further behind than this reloads from the tables
+ADDRESS_LOG_KEEP = 1000
+
+ADDRESS_LOG_SCHEMA = """
+    -- Addresses taken (1) and freed (0), appended by triggers on every entity table
+    CREATE TABLE IF NOT EXISTS address_change (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        ipv4_address TEXT,
+        ipv6_address TEXT,
+        taken INTEGER NOT NULL
+    );
+
+    CREATE TRIGGER IF NOT EXISTS address_change_prune AFTER INSERT ON address_change
+    BEGIN
+        DELETE FROM address_change WHERE seq <= NEW.seq - {keep};
+    END
+"""
+
+ADDRESS_LOG_TRIGGERS = """
+    CREATE INDEX IF NOT EXISTS idx_{table}_ipv4_address ON {table}(ipv4_address);
+    CREATE INDEX IF NOT EXISTS idx_{table}_ipv6_address ON {table}(ipv6_address);
+
+    CREATE TRIGGER IF NOT EXISTS {table}_insert_address AFTER INSERT ON {table}
+    BEGIN
+        INSERT INTO address_change (ipv4_address, ipv6_address, taken)
+        VALUES (NEW.ipv4_address, NEW.ipv6_address, 1);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {table}_update_address
+    AFTER UPDATE OF ipv4_address, ipv6_address ON {table}
+    BEGIN
+        INSERT INTO address_change (ipv4_address, ipv6_address, taken)
+        VALUES (OLD.ipv4_address, OLD.ipv6_address, 0);
+        INSERT INTO address_change (ipv4_address, ipv6_address, taken)
+        VALUES (NEW.ipv4_address, NEW.ipv6_address, 1);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {table}_delete_address AFTER DELETE ON {table}
+    BEGIN
+        INSERT INTO address_change (ipv4_address, ipv6_address, taken)
+        VALUES (OLD.ipv4_address, OLD.ipv6_address, 0);
+    END
+"""
+
+
+def scale_pools(pools: Dict[str, List[Tuple[int, int]]],
+                size: int) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Pool offsets for a block of `size` addresses instead of BLOCK_SIZE.
+
+    Ranges keep their order and proportions; each keeps at least one
+    offset and the first starts after the coordination server's .1.
+    """
+    ranges = sorted((first, last, role) for role, offsets in pools.items()
+                    for first, last in offsets)
+    scaled = {role: [] for role in pools}
+    floor = 2
+    for first, last, role in ranges:
+        start = max(first * size // BLOCK_SIZE, floor)
+        end = max((last + 1) * size // BLOCK_SIZE, start + 1)
+        scaled[role].append((start, end - 1))
+        floor = end
+    return scaled
+
+
+class AddressPool:
+    """
+    Free addresses of one role in one network.
+
+    Only blocks that have been reserved from or allocated in are stored,
+    each as sorted disjoint intervals of offsets from the network address;
+    every other block is wholly free. Interval lists are bounded by the
+    block size, so a reserve deep inside a /64 touches one small list.
+    """
+
+    def __init__(self, network, offsets: Sequence[Tuple[int, int]],
+                 block_size: int = BLOCK_SIZE):
+        self.network = network
+        self.block_size = min(block_size, network.num_addresses)
+        self.blocks = network.num_addresses // self.block_size
+
+        # Usable offsets: never the network address, nor IPv4 broadcast
+        self._first_usable = 1
+        self._last_usable = network.num_addresses - (2 if network.version == 4 else 1)
+        self._offsets = sorted((first, min(last, self.block_size - 1))
+                               for first, last in offsets if first < self.block_size)
+
+        # block -> (starts, ends) of its free intervals, touched blocks only
+        self._blocks: Dict[int, Tuple[List[int], List[int]]] = {}
+        self._open: List[int] = []      # touched blocks with free offsets, sorted
+        self._untouched = 0             # no untouched block lies below this
+
+    def _block(self, block: int) -> Tuple[List[int], List[int]]:
+        """Free intervals of `block`, materializing it on first use"""
+        free = self._blocks.get(block)
+        if free is None:
+            base = block * self.block_size
+            starts, ends = [], []
+            for first, last in self._offsets:
+                start = max(base + first, self._first_usable)
+                end = min(base + last, self._last_usable)
+                if start <= end:
+                    starts.append(start)
+                    ends.append(end)
+            free = self._blocks[block] = (starts, ends)
+            if starts:
+                insort(self._open, block)
+        return free
+
+    def _close(self, block: int):
+        """Drop a block that has no free offsets left from the open list"""
+        i = bisect_left(self._open, block)
+        if i < len(self._open) and self._open[i] == block:
+            del self._open[i]
+
+    def contains(self, offset: int) -> bool:
+        """Whether `offset` belongs to this pool (free or not)"""
+        if not self._first_usable <= offset <= self._last_usable:
+            return False
+        within = offset % self.block_size
+        return any(first <= within <= last for first, last in self._offsets)
+
+    def reserve(self, offset: int) -> bool:
+        """Mark `offset` as taken. Returns False if it isn't in this pool."""
+        if not self.contains(offset):
+            return False
+        block = offset // self.block_size
+        starts, ends = self._block(block)
+
+        i = bisect_right(starts, offset) - 1
+        if i < 0 or ends[i] < offset:
+            return True     # already taken
+        start, end = starts[i], ends[i]
+        if start == end:
+            del starts[i], ends[i]
+        elif offset == start:
+            starts[i] = offset + 1
+        elif offset == end:
+            ends[i] = offset - 1
+        else:
+            ends[i] = offset - 1
+            starts.insert(i + 1, offset + 1)
+            ends.insert(i + 1, end)
+        if not starts:
+            self._close(block)
+        return True
+
+    def release(self, offset: int) -> bool:
+        """Mark `offset` as free again. Returns False if it isn't in this pool."""
+        if not self.contains(offset):
+            return False
+        block = offset // self.block_size
+        starts, ends = self._block(block)
+
+        i = bisect_right(starts, offset) - 1
+        if i >= 0 and ends[i] >= offset:
+            return True     # already free
+        was_full = not starts
+        joins_left = i >= 0 and ends[i] == offset - 1
+        joins_right = i + 1 < len(starts) and starts[i + 1] == offset + 1
+        if joins_left and joins_right:
+            ends[i] = ends[i + 1]
+            del starts[i + 1], ends[i + 1]
+        elif joins_left:
+            ends[i] = offset
+        elif joins_right:
+            starts[i + 1] = offset
+        else:
+            starts.insert(i + 1, offset)
+            ends.insert(i + 1, offset)
+        if was_full:
+            insort(self._open, block)
+        return True
+
+    def allocate(self) -> Optional[int]:
+        """Take the lowest free offset, or None if the pool is exhausted"""
+        if not self._offsets:
+            return None
+        while True:
+            while self._untouched in self._blocks:
+                self._untouched += 1
+            lowest = self._open[0] if self._open else self.blocks
+            block = min(lowest, self._untouched)
+            if block >= self.blocks:
+                return None
+            starts, ends = self._block(block)
+            if starts:
+                break
+
+        offset = starts[0]
+        if offset == ends[0]:
+            del starts[0], ends[0]
+            if not starts:
+                self._close(block)
+        else:
+            starts[0] = offset + 1
+        return offset
+
+    def copy(self) -> 'AddressPool':
+        """Independent pool with the same free addresses"""
+        clone = copy.copy(self)
+        clone._blocks = {block: (starts[:], ends[:]) for block, (starts, ends) in self._blocks.items()}
+        clone._open = self._open[:]
+        return clone
+
+    def nth(self, index: int) -> Optional[int]:
+        """Offset of the index-th address of the pool (free or not)"""
+        size = sum(last - first + 1 for first, last in self._offsets)
+        if size == 0:
+            return None
+        block, index = divmod(index, size)
+        for first, last in self._offsets:
+            if index <= last - first:
+                offset = block * self.block_size + first + index
+                return offset if self.contains(offset) else None
+            index -= last - first + 1
+        return None
+
+    def address(self, offset: int):
+        return self.network.network_address + offset
+
+
+class IPAM:
+    """
+    Address allocator for one VPN (one coordination server's networks).
+
+    Build it once with every address in use reserved, then allocate as many
+    addresses as needed; each allocation is reserved immediately, so one
+    IPAM can assign a whole batch of new peers.
+    """
+
+    def __init__(self, network_ipv4: str, network_ipv6: str,
+                 pools: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+                 block_size: int = BLOCK_SIZE):
+        self.network_ipv4 = ipaddress.ip_network(network_ipv4, strict=False)
+        self.network_ipv6 = ipaddress.ip_network(network_ipv6, strict=False)
+        self.pools = pools or DEFAULT_POOLS
+
+        # Default pools shrink to fit a network smaller than one block
+        ipv4_pools, ipv6_pools = self.pools, self.pools
+        if pools is None:
+            if self.network_ipv4.num_addresses < block_size:
+                ipv4_pools = scale_pools(self.pools, self.network_ipv4.num_addresses)
+            if self.network_ipv6.num_addresses < block_size:
+                ipv6_pools = scale_pools(self.pools, self.network_ipv6.num_addresses)
+
+        self._pools = {
+            role: (AddressPool(self.network_ipv4, ipv4_pools[role], block_size),
+                   AddressPool(self.network_ipv6, ipv6_pools[role], block_size))
+            for role in self.pools
+        }
+
+    @classmethod
+    def from_db(cls, db, pools: Optional[Dict[str, List[Tuple[int, int]]]] = None) -> 'IPAM':
+        """
+        IPAM for the database's coordination server, with used addresses reserved.
+
+        The first call reads every address table; later calls replay only the
+        address_change entries logged since onto a cached IPAM and return a
+        copy of it, so allocations that are never stored do not leak into
+        the next call.
+        """
+        with db._connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+
+            cursor.execute("SELECT network_ipv4, network_ipv6 FROM coordination_server LIMIT 1")
+            row = cursor.fetchone()
+            if not row:
+                raise ValueError("No coordination server found in database")
+            networks = tuple(row)
+
+            log = _log_range(cursor)
+            key = _cache_key(conn, pools)
+            if log is None or key is None or conn.in_transaction:
+                return cls._load(cursor, networks, pools)
+
+            first, last = log
+            with _cache_lock:
+                cached = _cache.get(key)
+                if cached and cached[0] == networks and first - 1 <= cached[1] <= last:
+                    _replay(cursor, cached[2], cached[1])
+                    _cache[key] = (networks, last, cached[2])
+                    return cached[2].copy()
+
+            # Log position first: entries racing the scan are replayed, harmlessly
+            ipam = cls._load(cursor, networks, pools)
+            with _cache_lock:
+                _cache[key] = (networks, last, ipam)
+            return ipam.copy()
+
+    @classmethod
+    def _load(cls, cursor, networks: Tuple[str, str], pools) -> 'IPAM':
+        """Fresh IPAM with the addresses of every entity table reserved"""
+        ipam = cls(networks[0], networks[1], pools)
+        for table in ADDRESS_TABLES:
+            cursor.execute(f"SELECT ipv4_address, ipv6_address FROM {table}")
+            for ipv4_address, ipv6_address in cursor.fetchall():
+                ipam.reserve(ipv4_address)
+                ipam.reserve(ipv6_address)
+        return ipam
+
+    def copy(self) -> 'IPAM':
+        """Independent IPAM with the same free addresses"""
+        clone = copy.copy(self)
+        clone._pools = {role: (pool4.copy(), pool6.copy())
+                        for role, (pool4, pool6) in self._pools.items()}
+        return clone
+
+    def _role_pools(self, role: str) -> Tuple[AddressPool, AddressPool]:
+        if role not in self._pools:
+            raise ValueError(f"Unknown address pool: {role} (expected one of "
+                             f"{', '.join(self._pools)})")
+        return self._pools[role]
+
+    def _offset(self, address: Optional[str]) -> Optional[Tuple[int, int]]:
+        """(0 for IPv4 / 1 for IPv6, offset) of an address in our networks"""
+        if not address:
+            return None
+        try:
+            ip = ipaddress.ip_interface(address).ip
+        except ValueError:
+            return None
+        network = self.network_ipv4 if ip.version == 4 else self.network_ipv6
+        if ip not in network:
+            return None
+        return (0 if ip.version == 4 else 1), int(ip) - int(network.network_address)
+
+    def reserve(self, address: Optional[str]):
+        """Mark an address (with or without prefix) as in use, in every pool"""
+        found = self._offset(address)
+        if found:
+            index, offset = found
+            for pools in self._pools.values():
+                pools[index].reserve(offset)
+
+    def release(self, address: Optional[str]):
+        """Mark an address (with or without prefix) as free, in every pool"""
+        found = self._offset(address)
+        if found:
+            index, offset = found
+            for pools in self._pools.values():
+                pools[index].release(offset)
+
+    def allocate(self, role: str) -> Tuple[str, str]:
+        """
+        Take the next free IPv4 and IPv6 addresses for a peer.
+
+        Args:
+            role: 'router', 'remote' or 'exit_node'
+
+        Returns:
+            (ipv4_address, ipv6_address) with CIDR notation
+        """
+        pool4, pool6 = self._role_pools(role)
+        offset4, offset6 = pool4.allocate(), pool6.allocate()
+        if offset4 is None:
+            raise ValueError(f"No available IPv4 addresses for {role} in {self.network_ipv4}")
+        if offset6 is None:
+            raise ValueError(f"No available IPv6 addresses for {role} in {self.network_ipv6}")
+
+        # Reserve in the other pools too, in case custom pools overlap
+        ipv4_address = f"{pool4.address(offset4)}/32"
+        ipv6_address = f"{pool6.address(offset6)}/128"
+        self.reserve(ipv4_address)
+        self.reserve(ipv6_address)
+        return ipv4_address, ipv6_address
+
+    def address_at(self, role: str, index: int) -> Tuple[str, str]:
+        """
+        The index-th address pair of a role's pool, whether free or not.
+
+        For planning a network before it has a database (setup wizard).
+        """
+        pool4, pool6 = self._role_pools(role)
+        offset4, offset6 = pool4.nth(index), pool6.nth(index)
+        if offset4 is None or offset6 is None:
+            raise ValueError(f"{role} pool has fewer than {index + 1} addresses")
+        return f"{pool4.address(offset4)}/32", f"{pool6.address(offset6)}/128"
+
+
+# (database path, file id, pools) -> (networks, last replayed log entry, IPAM)
+_cache: Dict[tuple, Tuple[Tuple[str, str], int, IPAM]] = {}
+_cache_lock = threading.Lock()
+
+
+def _cache_key(conn, pools) -> Optional[tuple]:
+    """Cache key for a connection's main database file, None when in-memory"""
+    layout = tuple(sorted((role, tuple(map(tuple, offsets)))
+                          for role, offsets in (pools or DEFAULT_POOLS).items()))
+    for _, name, path in conn.execute("PRAGMA database_list").fetchall():
+        if name == 'main' and path:
+            return (os.path.abspath(path), _file_id(path), layout)
+    return None
+
+
+def _log_range(cursor) -> Optional[Tuple[int, int]]:
+    """(first, last) sequence numbers still in address_change, None before the log exists"""
+    try:
+        cursor.execute("SELECT COALESCE(MIN(seq), 1), COALESCE(MAX(seq), 0) FROM address_change")
+    except sqlite3.OperationalError:
+        return None
+    return tuple(cursor.fetchone())
+
+
+def _in_use(cursor, column: str, address: str) -> bool:
+    """Whether any entity still holds `address` (indexed lookups)"""
+    probes = " UNION ALL ".join(f"SELECT 1 FROM {table} WHERE {column} = ?"
+                                for table in ADDRESS_TABLES)
+    cursor.execute(f"{probes} LIMIT 1", (address,) * len(ADDRESS_TABLES))
+    return cursor.fetchone() is not None
+
+
+def _replay(cursor, ipam: IPAM, after: int):
+    """Apply the address_change entries logged after sequence number `after`"""
+    cursor.execute("""
+        SELECT ipv4_address, ipv6_address, taken FROM address_change
+        WHERE seq > ? ORDER BY seq
+    """, (after,))
+    for ipv4_address, ipv6_address, taken in cursor.fetchall():
+        for column, address in (('ipv4_address', ipv4_address), ('ipv6_address', ipv6_address)):
+            if taken:
+                ipam.reserve(address)
+            elif address and not _in_use(cursor, column, address):
+                ipam.release(address)
+
+
+def clear_ipam_cache():
+    """Drop every cached IPAM (tests, restores)"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def create_address_log_schema(cursor):
+    """Migration 16: address change log, its triggers and address indexes"""
+    execute_script(cursor, ADDRESS_LOG_SCHEMA.format(keep=ADDRESS_LOG_KEEP))
+    for table in ADDRESS_TABLES:
+        execute_script(cursor, ADDRESS_LOG_TRIGGERS.format(table=table))
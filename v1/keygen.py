@@ -3,11 +3,17 @@
 
 Public keys are DERIVED from private keys (not stored separately).
 This is fundamental to WireGuard's design.
+
+Keys are generated in-process (X25519 via PyNaCl), so bulk operations need
+no `wg genkey`/`wg genpsk` subprocess per key:
+
+    keypairs = generate_keypairs(500)
 """
 
 import base64
-import subprocess
-from typing import Tuple
+import os
+import threading
+from typing import List, Optional, Tuple
 
 
 def derive_public_key(private_key_base64: str) -> str:
@@ -33,39 +39,61 @@ def derive_public_key(private_key_base64: str) -> str:
     return base64.b64encode(public_bytes).decode('ascii')
 
 
-def generate_keypair() -> Tuple[str, str]:
+def _clamp(private_bytes: bytearray) -> bytes:
+    """Curve25519 scalar clamping, as `wg genkey` applies to its output"""
+    private_bytes[0] &= 248
+    private_bytes[31] = (private_bytes[31] & 127) | 64
+    return bytes(private_bytes)
+
+
+def _generate_keypairs(n: int) -> List[Tuple[str, str]]:
+    """n fresh keypairs: one urandom read, one X25519 base-point multiply each"""
+    from nacl.bindings import crypto_scalarmult_base
+
+    entropy = os.urandom(32 * n)
+    keypairs = []
+    for i in range(n):
+        private_bytes = _clamp(bytearray(entropy[32 * i:32 * (i + 1)]))
+        keypairs.append((
+            base64.b64encode(private_bytes).decode('ascii'),
+            base64.b64encode(crypto_scalarmult_base(private_bytes)).decode('ascii'),
+        ))
+    return keypairs
+
+
+def generate_keypairs(n: int) -> List[Tuple[str, str]]:
     """
-    Generate a WireGuard keypair.
+    Generate n WireGuard keypairs in-process.
+
+    Uses X25519 via PyNaCl (libsodium) - the same clamped keys `wg genkey`
+    produces, without starting a process per key. Draws from the key pool
+    when one is enabled (see enable_key_pool()).
 
     Returns:
-        (private_key_base64, public_key_base64)
+        List of (private_key_base64, public_key_base64)
     """
-    try:
-        # Generate private key
-        result = subprocess.run(
-            ['wg', 'genkey'],
-            capture_output=True,
-            check=True
-        )
-        private_key = result.stdout.decode().strip()
-
-        # Derive public key
-        public_key = derive_public_key(private_key)
+    if n <= 0:
+        return []
+    pool = _key_pool
+    if pool is not None:
+        return pool.take(n)
+    return _generate_keypairs(n)
 
-        return private_key, public_key
 
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        # Fallback to PyNaCl
-        from nacl.public import PrivateKey as NaClPrivateKey
+def generate_keypair() -> Tuple[str, str]:
+    """
+    Generate a WireGuard keypair.
 
-        private = NaClPrivateKey.generate()
-        private_bytes = bytes(private)
-        public_bytes = bytes(private.public_key)
+    Returns:
+        (private_key_base64, public_key_base64)
+    """
+    return generate_keypairs(1)[0]
 
-        private_key = base64.b64encode(private_bytes).decode('ascii')
-        public_key = base64.b64encode(public_bytes).decode('ascii')
 
-        return private_key, public_key
+def generate_preshared_keys(n: int) -> List[str]:
+    """Generate n WireGuard preshared keys (32 random bytes each)"""
+    entropy = os.urandom(32 * n)
+    return [base64.b64encode(entropy[32 * i:32 * (i + 1)]).decode('ascii') for i in range(n)]
 
 
 def generate_preshared_key() -> str:
@@ -77,22 +105,91 @@ def generate_preshared_key() -> str:
     Returns:
         Base64-encoded preshared key
     """
-    try:
-        # Use wg genpsk command
-        result = subprocess.run(
-            ['wg', 'genpsk'],
-            capture_output=True,
-            check=True
-        )
-        preshared_key = result.stdout.decode().strip()
-        return preshared_key
-
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        # Fallback to generating random 32 bytes
-        import os
-        preshared_bytes = os.urandom(32)
-        preshared_key = base64.b64encode(preshared_bytes).decode('ascii')
-        return preshared_key
+    return generate_preshared_keys(1)[0]
+
+
+class KeyPool:
+    """
+    Pre-generated keypairs, refilled by a background thread.
+
+    Onboarding and rotation runs take keys from the pool instead of
+    generating them while the user waits. When fewer than `low_water` keys
+    remain, a refill to `size` starts in the background; a request larger
+    than the pool holds is topped up inline.
+
+    Private keys sit in memory until used, so the pool is off by default.
+    """
+
+    def __init__(self, size: int = 256, low_water: Optional[int] = None):
+        self.size = size
+        self.low_water = size // 4 if low_water is None else low_water
+        self._keys: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self._refilling: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def fill(self):
+        """Generate keys until the pool holds `size`"""
+        missing = self.size - len(self._keys)
+        if missing > 0:
+            keypairs = _generate_keypairs(missing)
+            with self._lock:
+                self._keys.extend(keypairs[:self.size - len(self._keys)])
+
+    def _refill_in_background(self):
+        with self._lock:
+            if self._refilling is not None and self._refilling.is_alive():
+                return
+            self._refilling = threading.Thread(target=self.fill, name='key-pool-refill',
+                                               daemon=True)
+            self._refilling.start()
+
+    def take(self, n: int) -> List[Tuple[str, str]]:
+        """Remove and return n keypairs (each handed out exactly once)"""
+        with self._lock:
+            keypairs = self._keys[:n]
+            del self._keys[:n]
+            remaining = len(self._keys)
+        if len(keypairs) < n:
+            keypairs.extend(_generate_keypairs(n - len(keypairs)))
+        if remaining < self.low_water:
+            self._refill_in_background()
+        return keypairs
+
+    def wait(self):
+        """Wait for a running refill to finish"""
+        thread = self._refilling
+        if thread is not None:
+            thread.join()
+
+    def clear(self):
+        """Drop every pre-generated key"""
+        self.wait()
+        with self._lock:
+            self._keys.clear()
+
+
+_key_pool: Optional[KeyPool] = None
+
+
+def enable_key_pool(size: int = 256, low_water: Optional[int] = None) -> KeyPool:
+    """Serve generate_keypair(s) from a background-filled pool of `size` keys"""
+    global _key_pool
+    disable_key_pool()
+    pool = KeyPool(size, low_water)
+    pool._refill_in_background()
+    _key_pool = pool
+    return pool
+
+
+def disable_key_pool():
+    """Stop using the key pool and discard its unused keys"""
+    global _key_pool
+    pool, _key_pool = _key_pool, None
+    if pool is not None:
+        pool.clear()
 
 
 def test_key_derivation():
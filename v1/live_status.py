@@ -0,0 +1,298 @@
+"""
+Live Status Collector - Network-Wide View From Every Reachable Host
+
+The coordination server only sees its own tunnels. Routers, exit nodes and
+extramural hosts have their own interfaces (a router's tunnel to the hub, a
+laptop's tunnel to a commercial VPN). This module polls every host with SSH
+access at once and merges what they report into one view.
+
+Design:
+- Hosts: coordination server (ssh_host, else its endpoint), subnet routers
+  and exit nodes with an ssh_host, and the extramural `ssh_host` table.
+- Each host is read with one `wg show all dump` (wg_dump.get_snapshot),
+  over the active transport (shared SSH sessions by default).
+- asyncio runs the sweep: every host starts at once (bounded by
+  `concurrency`), each gets its own timeout, and a slow or dead host only
+  costs its own slot. Transports are blocking, so each read runs on a
+  worker thread sized to the concurrency - a sweep takes about as long as
+  the slowest host, not the sum.
+- Peers are merged by public key and named from the database; a peer is
+  up if any host saw a recent handshake with it.
+
+Usage:
+    from v1.live_status import collect_live_status
+
+    view = collect_live_status(db_path, timeout=10)
+    for host in view.unreachable:
+        print(host.target.name, host.error)
+    for peer in view.peers:
+        print(peer.name, peer.is_up, [h.name for h in peer.seen_by])
+"""
+
+import asyncio
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.db_pool import get_read_connection
+from v1.wg_dump import DEFAULT_MAX_AGE, WgPeer, WgSnapshot, get_snapshot
+
+# Seconds each host gets to answer
+DEFAULT_TIMEOUT = 10.0
+
+# Hosts polled at the same time
+DEFAULT_CONCURRENCY = 64
+
+
+@dataclass(frozen=True)
+class PollTarget:
+    """A host with SSH access, and the entity it belongs to"""
+    entity_type: str          # coordination_server, subnet_router, exit_node, ssh_host
+    entity_id: int
+    name: str
+    ssh_host: str
+    ssh_user: str = 'root'
+    ssh_port: int = 22
+    key_path: Optional[str] = None      # dedicated SSH key (extramural hosts)
+
+
+@dataclass
+class HostStatus:
+    """What one host reported (or why it didn't)"""
+    target: PollTarget
+    snapshot: Optional[WgSnapshot] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.snapshot is not None
+
+
+@dataclass
+class LivePeer:
+    """One public key as seen from every host that has it as a peer"""
+    public_key: str
+    entity_type: str
+    name: str
+    seen_by: List[PollTarget] = field(default_factory=list)
+    records: List[WgPeer] = field(default_factory=list)
+    up: bool = False
+
+    @property
+    def is_up(self) -> bool:
+        return self.up
+
+    @property
+    def latest(self) -> WgPeer:
+        """The record with the most recent handshake"""
+        return max(self.records, key=lambda r: r.latest_handshake)
+
+
+@dataclass
+class LiveView:
+    """Merged result of a sweep"""
+    hosts: List[HostStatus]
+    peers: List[LivePeer]
+    elapsed: float
+    taken_at: float
+
+    @property
+    def reachable(self) -> List[HostStatus]:
+        return [h for h in self.hosts if h.ok]
+
+    @property
+    def unreachable(self) -> List[HostStatus]:
+        return [h for h in self.hosts if not h.ok]
+
+    def peer(self, public_key: str) -> Optional[LivePeer]:
+        for peer in self.peers:
+            if peer.public_key == public_key:
+                return peer
+        return None
+
+
+# =============================================================================
+# DISCOVERY
+# =============================================================================
+
+def _rows(conn: sqlite3.Connection, query: str) -> List[sqlite3.Row]:
+    try:
+        return conn.execute(query).fetchall()
+    except sqlite3.OperationalError:
+        return []       # table not created yet (extramural schema)
+
+
+def discover_targets(db_path: Path | str, default_user: str = 'root') -> List[PollTarget]:
+    """Every host with SSH access, coordination server first"""
+    targets = []
+    conn = get_read_connection(db_path)
+    try:
+        for row in _rows(conn, """
+            SELECT id, hostname, endpoint, ssh_host, ssh_user, ssh_port FROM coordination_server
+        """):
+            # The endpoint's port is WireGuard's, not SSH's
+            host = row['ssh_host'] or (row['endpoint'] or '').split(':')[0]
+            if host and host != 'UNKNOWN':
+                targets.append(PollTarget('coordination_server', row['id'], row['hostname'] or 'hub',
+                                          host, row['ssh_user'] or default_user, row['ssh_port'] or 22))
+
+        for table in ('subnet_router', 'exit_node'):
+            for row in _rows(conn, f"""
+                SELECT id, hostname, permanent_guid, ssh_host, ssh_user, ssh_port FROM {table}
+                WHERE ssh_host IS NOT NULL AND ssh_host != ''
+                ORDER BY id
+            """):
+                targets.append(PollTarget(table, row['id'], row['hostname'] or row['permanent_guid'][:16],
+                                          row['ssh_host'], row['ssh_user'] or default_user,
+                                          row['ssh_port'] or 22))
+
+        for row in _rows(conn, """
+            SELECT id, name, ssh_host, ssh_user, ssh_port, ssh_key_path FROM ssh_host ORDER BY id
+        """):
+            targets.append(PollTarget('ssh_host', row['id'], row['name'], row['ssh_host'],
+                                      row['ssh_user'] or default_user, row['ssh_port'] or 22,
+                                      row['ssh_key_path'] or None))
+    finally:
+        conn.close()
+
+    # A host listed twice (e.g. an exit node that is also an extramural ssh_host)
+    # is polled once, with the SSH key if either entry has one
+    unique = {}
+    for target in targets:
+        key = (target.ssh_host, target.ssh_port, target.ssh_user)
+        first = unique.setdefault(key, target)
+        if first.key_path is None and target.key_path:
+            unique[key] = replace(first, key_path=target.key_path)
+    return list(unique.values())
+
+
+def peer_names(db_path: Path | str) -> Dict[str, Tuple[str, str]]:
+    """Public key -> (entity_type, name) for every key the database knows"""
+    names = {}
+    conn = get_read_connection(db_path)
+    try:
+        for table in ('coordination_server', 'subnet_router', 'remote', 'exit_node'):
+            for row in _rows(conn, f"SELECT current_public_key, hostname, permanent_guid FROM {table}"):
+                names[row['current_public_key']] = (table, row['hostname'] or row['permanent_guid'][:16])
+        for row in _rows(conn, """
+            SELECT ep.public_key, COALESCE(ep.name, s.name) AS name
+            FROM extramural_peer ep
+            JOIN extramural_config ec ON ec.id = ep.config_id
+            JOIN sponsor s ON s.id = ec.sponsor_id
+        """):
+            names[row['public_key']] = ('extramural_peer', row['name'])
+    finally:
+        conn.close()
+    return names
+
+
+# =============================================================================
+# SWEEP
+# =============================================================================
+
+async def _poll(target: PollTarget, loop: asyncio.AbstractEventLoop, executor: ThreadPoolExecutor,
+                semaphore: asyncio.Semaphore, timeout: float, max_age: float) -> HostStatus:
+    async with semaphore:
+        start = time.monotonic()
+        read = loop.run_in_executor(
+            executor,
+            lambda: get_snapshot(target.ssh_host, target.ssh_user, target.ssh_port,
+                                 max_age=max_age, timeout=timeout,
+                                 sudo=target.ssh_user != 'root', key_path=target.key_path))
+        try:
+            snapshot = await asyncio.wait_for(read, timeout)
+        except asyncio.TimeoutError:
+            return HostStatus(target, error=f"no answer within {timeout:g}s",
+                              elapsed=time.monotonic() - start)
+        except Exception as e:
+            return HostStatus(target, error=str(e), elapsed=time.monotonic() - start)
+        elapsed = time.monotonic() - start
+        if snapshot is None:
+            return HostStatus(target, error="wg show failed", elapsed=elapsed)
+        return HostStatus(target, snapshot, elapsed=elapsed)
+
+
+async def poll_hosts(targets: List[PollTarget], timeout: float = DEFAULT_TIMEOUT,
+                     concurrency: int = DEFAULT_CONCURRENCY,
+                     max_age: float = DEFAULT_MAX_AGE) -> List[HostStatus]:
+    """Read every target concurrently; results in target order"""
+    if not targets:
+        return []
+    workers = max(1, min(concurrency, len(targets)))
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(workers)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='live-status')
+    try:
+        return list(await asyncio.gather(*(
+            _poll(target, loop, executor, semaphore, timeout, max_age) for target in targets)))
+    finally:
+        # Timed-out reads finish on their own (wg_dump passes the timeout on)
+        executor.shutdown(wait=False)
+
+
+def merge(hosts: List[HostStatus], names: Dict[str, Tuple[str, str]],
+          interface: Optional[str] = None) -> List[LivePeer]:
+    """
+    One LivePeer per public key, up ones first, then by name.
+
+    Polled hosts appear as peers of each other (a router is a peer of the
+    hub); that's the tunnel between them, so they're kept.
+    """
+    peers: Dict[str, LivePeer] = {}
+    for host in hosts:
+        if not host.ok:
+            continue
+        for record in host.snapshot.peers_on(interface):
+            peer = peers.get(record.public_key)
+            if peer is None:
+                entity_type, name = names.get(record.public_key,
+                                              ('unknown', f"Unknown ({record.public_key[:10]}...)"))
+                peer = peers[record.public_key] = LivePeer(record.public_key, entity_type, name)
+            peer.seen_by.append(host.target)
+            peer.records.append(record)
+            peer.up = peer.up or record.is_up(host.snapshot.taken_at)
+    return sorted(peers.values(), key=lambda p: (not p.up, p.name))
+
+
+async def collect_live_status_async(db_path: Path | str, timeout: float = DEFAULT_TIMEOUT,
+                                    concurrency: int = DEFAULT_CONCURRENCY,
+                                    interface: Optional[str] = None, default_user: str = 'root',
+                                    targets: Optional[List[PollTarget]] = None,
+                                    max_age: float = DEFAULT_MAX_AGE) -> LiveView:
+    """collect_live_status() for callers already running an event loop"""
+    start = time.monotonic()
+    if targets is None:
+        targets = discover_targets(db_path, default_user)
+    hosts = await poll_hosts(targets, timeout, concurrency, max_age)
+    peers = merge(hosts, peer_names(db_path), interface)
+    return LiveView(hosts, peers, elapsed=time.monotonic() - start, taken_at=time.time())
+
+
+def collect_live_status(db_path: Path | str, timeout: float = DEFAULT_TIMEOUT,
+                        concurrency: int = DEFAULT_CONCURRENCY, interface: Optional[str] = None,
+                        default_user: str = 'root', targets: Optional[List[PollTarget]] = None,
+                        max_age: float = DEFAULT_MAX_AGE) -> LiveView:
+    """
+    Poll every SSH-reachable host and merge their peers.
+
+    Args:
+        db_path: Database with the hosts and keys
+        timeout: Seconds each host gets
+        concurrency: Hosts polled at once
+        interface: Only peers of this interface (None = all interfaces)
+        default_user: SSH user for hosts without one
+        targets: Hosts to poll (default: discover_targets())
+        max_age: Reuse wg_dump snapshots up to this many seconds old
+
+    Returns:
+        LiveView
+    """
+    return asyncio.run(collect_live_status_async(db_path, timeout, concurrency, interface,
+                                                 default_user, targets, max_age))
@@ -0,0 +1,148 @@
+"""
+Schema Migrations
+
+Central, ordered registry of schema migrations. The schema version lives in
+`PRAGMA user_version`, so opening a database that is already current costs a
+single pragma read instead of dozens of CREATE TABLE/INDEX IF NOT EXISTS
+statements per constructor.
+
+Each migration is a module-level function that receives a cursor and only
+issues DDL (plus data fixes when needed). The DDL stays next to the code that
+owns the tables; this module only decides *when* it runs. Migration targets
+are imported lazily to avoid import cycles (schema_semantic imports this
+module, and many owners import schema_semantic).
+
+The baseline migrations (1-10) are idempotent (IF NOT EXISTS, guarded ALTER
+TABLE), because databases created before versioning report user_version 0
+while already containing some or all of these tables. Migrations added after
+the baseline run exactly once and don't need to be idempotent.
+
+Usage:
+    from v1.migrations import ensure_schema
+
+    ensure_schema(db_path)   # no-op (one pragma read) when current
+
+Adding a migration:
+    1. Write `def migrate_xyz(cursor)` in the owning module
+    2. Append Migration(<next version>, "description", "v1.module", "migrate_xyz")
+"""
+
+import importlib
+import logging
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from v1.db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A single schema migration step"""
+    version: int
+    description: str
+    module: str
+    function: str
+
+    def resolve(self) -> Callable:
+        return getattr(importlib.import_module(self.module), self.function)
+
+
+# Ordered registry - append only, never renumber
+MIGRATIONS: List[Migration] = [
+    Migration(1, "core semantic schema", "v1.schema_semantic", "create_core_schema"),
+    Migration(2, "extramural schema", "v1.schema_semantic", "create_extramural_schema"),
+    Migration(3, "bandwidth tracking", "v1.bandwidth_tracking", "create_bandwidth_schema"),
+    Migration(4, "audit log", "v1.audit_log", "create_audit_schema"),
+    Migration(5, "alerting", "v1.alerting", "create_alerting_schema"),
+    Migration(6, "webhook notifications", "v1.webhook_notifications", "create_webhook_schema"),
+    Migration(7, "exit node failover", "v1.exit_failover", "create_failover_schema"),
+    Migration(8, "disaster recovery", "v1.disaster_recovery", "create_recovery_schema"),
+    Migration(9, "rotation policies", "v1.rotation_policies", "create_rotation_schema"),
+    Migration(10, "drift detection", "v1.drift_detection", "create_drift_schema"),
+    Migration(11, "generated config manifest", "v1.generation_manifest", "create_manifest_schema"),
+    Migration(12, "compact bandwidth samples", "v1.bandwidth_tracking", "migrate_compact_samples"),
+    Migration(13, "incremental bandwidth rollups", "v1.bandwidth_rollup", "create_rollup_schema"),
+    Migration(14, "day-partitioned bandwidth samples", "v1.bandwidth_partitions", "partition_samples"),
+    Migration(15, "entity identity change counter", "v1.entity_names", "create_entity_change_schema"),
+    Migration(16, "address change log", "v1.ipam", "create_address_log_schema"),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def execute_script(cursor, script: str):
+    """
+    Run a multi-statement SQL script inside the current transaction.
+
+    sqlite3's executescript() issues an implicit COMMIT first, which would
+    split a migration across transactions; this executes statement by
+    statement instead.
+    """
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            cursor.execute(statement)
+            statement = ""
+    if statement.strip():
+        cursor.execute(statement)
+
+
+def get_schema_version(conn) -> int:
+    """Read the schema version stored in PRAGMA user_version"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _apply_pending(conn) -> Tuple[int, List[Migration]]:
+    """Run the migrations above the stored version; returns (from version, applied)"""
+    current = get_schema_version(conn)
+    pending = [m for m in MIGRATIONS if m.version > current]
+    cursor = conn.cursor()
+    for migration in pending:
+        logger.info(f"Applying migration {migration.version}: {migration.description}")
+        migration.resolve()(cursor)
+    if pending:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return current, pending
+
+
+def ensure_schema(db_path: Path | str) -> int:
+    """
+    Bring a database up to SCHEMA_VERSION.
+
+    Normally runs in its own BEGIN IMMEDIATE transaction and commits. When
+    the calling thread already has a transaction open on its pooled
+    connection, the migrations run inside the pool's savepoint of that
+    transaction instead and the caller's commit (or rollback) decides
+    their fate.
+
+    Returns:
+        Number of migrations applied (0 when already current)
+    """
+    conn = get_connection(db_path)
+    try:
+        if get_schema_version(conn) >= SCHEMA_VERSION:
+            return 0
+
+        if not conn.in_transaction:
+            # Serialize concurrent migrators, then re-check under the write lock
+            conn.execute("BEGIN IMMEDIATE")
+        # Inside a caller's transaction this is a nested acquire fenced by a
+        # pool savepoint: commit() keeps the migrations in the caller's
+        # transaction and rollback() undoes only them
+        try:
+            current, pending = _apply_pending(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if pending:
+            logger.info(f"Schema at {db_path} migrated from v{current} to v{SCHEMA_VERSION}")
+        return len(pending)
+    finally:
+        conn.close()
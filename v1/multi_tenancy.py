@@ -41,6 +41,8 @@
 from typing import Optional, Dict, List, Any
 import re
 
+from v1.db_pool import checkpoint
+
 
 @dataclass
 class Tenant:
@@ -545,6 +547,7 @@ def clone_tenant(
         source_db = self.get_db_path(source_id)
         target_db = self.get_db_path(target_id)
         if Path(source_db).exists():
+            checkpoint(source_db)
             shutil.copy2(source_db, target_db)
 
         return target
@@ -16,6 +16,7 @@
 - wireguard_drift_items_total (gauge): Number of detected drift items
 - wireguard_alerts_active (gauge): Number of active alerts by severity
 - wireguard_entity_count (gauge): Count of entities by type
+- wgfriend_db_pool_hits_total / _misses_total (counter): Connection pool reuse
 """
 
 import sqlite3
@@ -26,9 +27,11 @@
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from enum import Enum
-import subprocess
 import re
 
+from v1.db_pool import get_read_connection, pool_stats
+from v1.wg_dump import get_snapshot
+
 
 class MetricType(Enum):
     """Prometheus metric types."""
@@ -68,10 +71,8 @@ def __init__(self, db_path: str):
         self._lock = threading.Lock()
 
     def _get_connection(self) -> sqlite3.Connection:
-        """Get a database connection."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """Get a pooled read-only database connection."""
+        return get_read_connection(self.db_path)
 
     def collect_all_metrics(self) -> List[Metric]:
         """Collect all available metrics.
@@ -89,6 +90,7 @@ def collect_all_metrics(self) -> List[Metric]:
         metrics.extend(self._collect_drift_metrics())
         metrics.extend(self._collect_alert_metrics())
         metrics.extend(self._collect_bandwidth_metrics())
+        metrics.extend(self._collect_pool_metrics())
 
         return metrics
 
@@ -149,61 +151,48 @@ def _collect_peer_status_metrics(self) -> List[Metric]:
             metric_type=MetricType.GAUGE
         )
 
-        # Try to get live status from wg show
-        try:
-            result = subprocess.run(
-                ["wg", "show", "all", "dump"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-
-            if result.returncode == 0:
-                now = time.time()
-                for line in result.stdout.strip().split('\n'):
-                    parts = line.split('\t')
-                    if len(parts) >= 9:
-                        interface = parts[0]
-                        public_key = parts[1]
-                        # Parts: interface, public_key, psk, endpoint, allowed_ips,
-                        #        last_handshake, rx, tx, keepalive
-                        try:
-                            last_handshake = int(parts[5])
-                            rx_bytes = int(parts[6])
-                            tx_bytes = int(parts[7])
-
-                            # Peer is "up" if handshake within last 3 minutes
-                            handshake_age = now - last_handshake if last_handshake > 0 else float('inf')
-                            is_up = 1.0 if handshake_age < 180 else 0.0
-
-                            short_key = public_key[:8] + "..."
-
-                            status_metric.values.append(MetricValue(
-                                value=is_up,
-                                labels={
-                                    "interface": interface,
-                                    "public_key": short_key
-                                }
-                            ))
-
-                            if last_handshake > 0:
-                                handshake_metric.values.append(MetricValue(
-                                    value=handshake_age,
-                                    labels={
-                                        "interface": interface,
-                                        "public_key": short_key
-                                    }
-                                ))
-                        except (ValueError, IndexError):
-                            pass
-
-        except (subprocess.TimeoutExpired, FileNotFoundError, PermissionError):
-            pass
+        rx_metric = Metric(
+            name="wireguard_peer_rx_bytes",
+            help_text="Total bytes received from peer",
+            metric_type=MetricType.COUNTER
+        )
+
+        tx_metric = Metric(
+            name="wireguard_peer_tx_bytes",
+            help_text="Total bytes transmitted to peer",
+            metric_type=MetricType.COUNTER
+        )
+
+        # One `wg show all dump` snapshot, shared with status and bandwidth
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            for peer in snapshot.peers:
+                labels = {
+                    "interface": peer.interface,
+                    "public_key": peer.public_key[:8] + "..."
+                }
+
+                # Peer is "up" if handshake within last 3 minutes
+                status_metric.values.append(MetricValue(
+                    value=1.0 if peer.is_up(snapshot.taken_at) else 0.0,
+                    labels=labels
+                ))
+
+                age = peer.handshake_age(snapshot.taken_at)
+                if age is not None:
+                    handshake_metric.values.append(MetricValue(value=age, labels=labels))
+
+                rx_metric.values.append(MetricValue(value=peer.rx_bytes, labels=labels))
+                tx_metric.values.append(MetricValue(value=peer.tx_bytes, labels=labels))
 
         if status_metric.values:
             metrics.append(status_metric)
         if handshake_metric.values:
             metrics.append(handshake_metric)
+        if rx_metric.values:
+            metrics.append(rx_metric)
+        if tx_metric.values:
+            metrics.append(tx_metric)
 
         return metrics
 
@@ -469,6 +458,28 @@ def _collect_bandwidth_metrics(self) -> List[Metric]:
 
         return metrics
 
+    def _collect_pool_metrics(self) -> List[Metric]:
+        """Collect SQLite connection pool hit/miss counters."""
+        hits = Metric(
+            name="wgfriend_db_pool_hits_total",
+            help_text="Connection pool acquisitions served by an existing connection",
+            metric_type=MetricType.COUNTER
+        )
+        misses = Metric(
+            name="wgfriend_db_pool_misses_total",
+            help_text="Connection pool acquisitions that opened a new connection",
+            metric_type=MetricType.COUNTER
+        )
+
+        for pool_name, stats in pool_stats().items():
+            read_only = pool_name.endswith(":ro")
+            db_file = pool_name[:-3] if read_only else pool_name
+            labels = {"database": db_file.rsplit("/", 1)[-1], "mode": "ro" if read_only else "rw"}
+            hits.values.append(MetricValue(value=float(stats['hits']), labels=labels))
+            misses.values.append(MetricValue(value=float(stats['misses']), labels=labels))
+
+        return [m for m in (hits, misses) if m.values]
+
     def format_prometheus(self, metrics: List[Metric]) -> str:
         """Format metrics in Prometheus exposition format.
 
@@ -44,6 +44,9 @@
 from urllib.parse import urlparse, parse_qs
 import ssl
 
+from v1.db_pool import get_connection, get_read_connection
+from v1.encryption import get_active_encryption_manager
+
 
 @dataclass
 class APIConfig:
@@ -56,6 +59,8 @@ class APIConfig:
     rate_limit: int = 100  # requests per minute per IP
     ssl_cert: Optional[str] = None
     ssl_key: Optional[str] = None
+    secret_cache_size: int = 256  # decrypted keys kept for config requests
+    secret_cache_ttl: float = 30.0  # seconds (0 disables the cache)
 
 
 class RateLimiter:
@@ -103,11 +108,25 @@ def __init__(self, config: APIConfig):
         self.db_path = config.db_path
         self.rate_limiter = RateLimiter(config.rate_limit)
 
+        # Config requests decrypt the same keys over and over; keep recent
+        # plaintexts briefly (wiped by close())
+        self._encryption = get_active_encryption_manager()
+        if self._encryption and self._encryption.is_unlocked and config.secret_cache_ttl > 0:
+            self._encryption.enable_plaintext_cache(config.secret_cache_size,
+                                                    config.secret_cache_ttl)
+
+    def close(self):
+        """Wipe cached plaintext keys"""
+        if self._encryption:
+            self._encryption.disable_plaintext_cache()
+
     def _get_conn(self) -> sqlite3.Connection:
-        """Get database connection."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """Get pooled database connection."""
+        return get_connection(self.db_path)
+
+    def _get_read_conn(self) -> sqlite3.Connection:
+        """Get pooled read-only connection for query-only endpoints."""
+        return get_read_connection(self.db_path)
 
     def authenticate(self, headers: Dict[str, str]) -> bool:
         """Verify authentication."""
@@ -127,7 +146,7 @@ def authenticate(self, headers: Dict[str, str]) -> bool:
 
     def get_status(self) -> Dict:
         """Get network status overview."""
-        conn = self._get_conn()
+        conn = self._get_read_conn()
         try:
             # Count entities
             cs_count = conn.execute("SELECT COUNT(*) FROM coordination_server").fetchone()[0]
@@ -172,7 +191,7 @@ def get_status(self) -> Dict:
     def get_health(self) -> Dict:
         """Health check endpoint."""
         try:
-            conn = self._get_conn()
+            conn = self._get_read_conn()
             conn.execute("SELECT 1").fetchone()
             conn.close()
             return {"status": "healthy", "database": "connected"}
@@ -185,7 +204,7 @@ def get_health(self) -> Dict:
 
     def list_peers(self, peer_type: Optional[str] = None) -> Dict:
         """List all peers."""
-        conn = self._get_conn()
+        conn = self._get_read_conn()
         try:
             peers = []
 
@@ -257,7 +276,7 @@ def _filter_sensitive(self, row_dict: Dict) -> Dict:
 
     def get_peer(self, peer_type: str, peer_id: int) -> Dict:
         """Get peer details (excludes private keys for security)."""
-        conn = self._get_conn()
+        conn = self._get_read_conn()
         try:
             table_map = {
                 'remote': 'remote',
@@ -414,7 +433,12 @@ def rotate_peer_keys(self, peer_type: str, peer_id: int) -> Dict:
             raise APIError(f"Rotation failed: {e}", 500)
 
     def get_peer_config(self, peer_type: str, peer_id: int) -> Dict:
-        """Get generated config for peer."""
+        """
+        Get generated config for peer.
+
+        Keys are decrypted through the active encryption manager, so repeat
+        requests within secret_cache_ttl are served from its plaintext cache.
+        """
         from v1.schema_semantic import WireGuardDBv2
         from v1.cli.config_generator import generate_remote_config, generate_router_config, generate_cs_config
 
@@ -740,6 +764,8 @@ def run_api_server(config: APIConfig) -> None:
     except KeyboardInterrupt:
         print("\nShutting down...")
         server.shutdown()
+    finally:
+        api.close()
 
 
 def main():
@@ -43,6 +43,10 @@
 from typing import Optional, List, Dict, Any, Tuple
 from dataclasses import dataclass
 
+from v1.db_pool import get_connection
+from v1.entity_names import EntityNames, entity_names
+from v1.migrations import ensure_schema
+
 logger = logging.getLogger(__name__)
 
 
@@ -109,6 +113,77 @@ class RotationResult:
     error_message: Optional[str]
 
 
+def create_rotation_schema(cursor):
+    """Migration 9: rotation policies, schedules and execution history"""
+    # Rotation policies table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rotation_policy (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            policy_type TEXT NOT NULL,
+            threshold_value INTEGER NOT NULL,
+            threshold_unit TEXT NOT NULL,
+            applies_to TEXT NOT NULL,
+            specific_entities TEXT,
+            enabled BOOLEAN DEFAULT 1,
+            auto_deploy BOOLEAN DEFAULT 0,
+            notify_before_days INTEGER DEFAULT 7,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_applied_at TIMESTAMP
+        )
+    """)
+
+    # Per-entity rotation schedules
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rotation_schedule (
+            id INTEGER PRIMARY KEY,
+            policy_id INTEGER NOT NULL,
+            entity_type TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            entity_permanent_guid TEXT NOT NULL,
+            next_rotation_at TIMESTAMP NOT NULL,
+            last_rotation_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (policy_id) REFERENCES rotation_policy(id) ON DELETE CASCADE,
+            UNIQUE(policy_id, entity_type, entity_id)
+        )
+    """)
+
+    # Rotation execution history
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rotation_execution (
+            id INTEGER PRIMARY KEY,
+            policy_id INTEGER,
+            entity_type TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            entity_permanent_guid TEXT NOT NULL,
+            old_public_key TEXT NOT NULL,
+            new_public_key TEXT,
+            success BOOLEAN NOT NULL,
+            error_message TEXT,
+            executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            deployed BOOLEAN DEFAULT 0,
+            FOREIGN KEY (policy_id) REFERENCES rotation_policy(id) ON DELETE SET NULL
+        )
+    """)
+
+    # Indexes
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_rotation_schedule_next
+        ON rotation_schedule(next_rotation_at)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_rotation_schedule_entity
+        ON rotation_schedule(entity_type, entity_id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_rotation_execution_entity
+        ON rotation_execution(entity_permanent_guid, executed_at DESC)
+    """)
+
+    logger.debug("Rotation policy schema initialized")
+
+
 class RotationPolicyManager:
     """
     Manages key rotation policies and schedules.
@@ -119,92 +194,11 @@ class RotationPolicyManager:
 
     def __init__(self, db_path: Path | str):
         self.db_path = Path(db_path) if isinstance(db_path, str) else db_path
-        self._init_schema()
+        ensure_schema(self.db_path)
 
     def _get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
-
-    def _init_schema(self):
-        """Initialize rotation policy schema"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        try:
-            # Rotation policies table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS rotation_policy (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL UNIQUE,
-                    policy_type TEXT NOT NULL,
-                    threshold_value INTEGER NOT NULL,
-                    threshold_unit TEXT NOT NULL,
-                    applies_to TEXT NOT NULL,
-                    specific_entities TEXT,
-                    enabled BOOLEAN DEFAULT 1,
-                    auto_deploy BOOLEAN DEFAULT 0,
-                    notify_before_days INTEGER DEFAULT 7,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_applied_at TIMESTAMP
-                )
-            """)
-
-            # Per-entity rotation schedules
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS rotation_schedule (
-                    id INTEGER PRIMARY KEY,
-                    policy_id INTEGER NOT NULL,
-                    entity_type TEXT NOT NULL,
-                    entity_id INTEGER NOT NULL,
-                    entity_permanent_guid TEXT NOT NULL,
-                    next_rotation_at TIMESTAMP NOT NULL,
-                    last_rotation_at TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (policy_id) REFERENCES rotation_policy(id) ON DELETE CASCADE,
-                    UNIQUE(policy_id, entity_type, entity_id)
-                )
-            """)
-
-            # Rotation execution history
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS rotation_execution (
-                    id INTEGER PRIMARY KEY,
-                    policy_id INTEGER,
-                    entity_type TEXT NOT NULL,
-                    entity_id INTEGER NOT NULL,
-                    entity_permanent_guid TEXT NOT NULL,
-                    old_public_key TEXT NOT NULL,
-                    new_public_key TEXT,
-                    success BOOLEAN NOT NULL,
-                    error_message TEXT,
-                    executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    deployed BOOLEAN DEFAULT 0,
-                    FOREIGN KEY (policy_id) REFERENCES rotation_policy(id) ON DELETE SET NULL
-                )
-            """)
-
-            # Indexes
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_rotation_schedule_next
-                ON rotation_schedule(next_rotation_at)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_rotation_schedule_entity
-                ON rotation_schedule(entity_type, entity_id)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_rotation_execution_entity
-                ON rotation_execution(entity_permanent_guid, executed_at DESC)
-            """)
-
-            conn.commit()
-            logger.debug("Rotation policy schema initialized")
-
-        finally:
-            conn.close()
+        """Get pooled database connection (close() returns it to the pool)"""
+        return get_connection(self.db_path)
 
     def create_policy(
         self,
@@ -543,11 +537,12 @@ def get_pending_rotations(self, include_upcoming_days: int = 0) -> List[Schedule
                 ORDER BY rs.next_rotation_at ASC
             """, (cutoff.isoformat(),))
 
+            names = entity_names(conn)
             rotations = []
             for row in cursor.fetchall():
                 # Get hostname for entity
                 hostname = self._get_entity_hostname(
-                    cursor, row['entity_type'], row['entity_id']
+                    names, row['entity_type'], row['entity_id']
                 )
 
                 next_dt = datetime.fromisoformat(row['next_rotation_at'].replace('Z', '+00:00'))
@@ -572,22 +567,9 @@ def get_pending_rotations(self, include_upcoming_days: int = 0) -> List[Schedule
         finally:
             conn.close()
 
-    def _get_entity_hostname(self, cursor, entity_type: str, entity_id: int) -> Optional[str]:
+    def _get_entity_hostname(self, names: EntityNames, entity_type: str, entity_id: int) -> Optional[str]:
         """Get hostname for an entity"""
-        table_map = {
-            'coordination_server': 'coordination_server',
-            'subnet_router': 'subnet_router',
-            'remote': 'remote',
-            'exit_node': 'exit_node'
-        }
-
-        table = table_map.get(entity_type)
-        if not table:
-            return None
-
-        cursor.execute(f"SELECT hostname FROM {table} WHERE id = ?", (entity_id,))
-        row = cursor.fetchone()
-        return row['hostname'] if row else None
+        return names.name(entity_type, entity_id)
 
     def get_rotation_schedule_for_entity(
         self,
@@ -611,11 +593,12 @@ def get_rotation_schedule_for_entity(
             """, (entity_type, entity_id))
 
             now = datetime.utcnow()
+            names = entity_names(conn)
             rotations = []
 
             for row in cursor.fetchall():
                 hostname = self._get_entity_hostname(
-                    cursor, row['entity_type'], row['entity_id']
+                    names, row['entity_type'], row['entity_id']
                 )
 
                 next_dt = datetime.fromisoformat(row['next_rotation_at'].replace('Z', '+00:00'))
@@ -644,12 +627,15 @@ def execute_rotation(
         self,
         entity_type: str,
         entity_id: int,
-        policy_id: Optional[int] = None
+        policy_id: Optional[int] = None,
+        keypair: Optional[Tuple[str, str]] = None
     ) -> RotationResult:
         """
         Execute key rotation for a specific entity.
 
         This method integrates with the existing keygen and database modules.
+        `keypair` is a pre-generated (private, public) pair; one is generated
+        if not given.
         """
         conn = self._get_connection()
         cursor = conn.cursor()
@@ -700,8 +686,8 @@ def execute_rotation(
 
             # Generate new keypair
             try:
-                from keygen import generate_keypair
-                new_private_key, new_public_key = generate_keypair()
+                from v1.keygen import generate_keypair
+                new_private_key, new_public_key = keypair or generate_keypair()
             except Exception as e:
                 return RotationResult(
                     entity_type=entity_type,
@@ -716,7 +702,7 @@ def execute_rotation(
 
             # Check if encryption is enabled
             try:
-                from encryption import get_active_encryption_manager
+                from v1.encryption import get_active_encryption_manager
                 manager = get_active_encryption_manager()
                 if manager and manager.is_unlocked:
                     new_private_key = manager.encrypt(new_private_key)
@@ -842,12 +828,17 @@ def execute_pending_rotations(
                 ))
             return results
 
+        # One batch of keys for the whole run
+        from v1.keygen import generate_keypairs
+        keypairs = generate_keypairs(len(pending))
+
         results = []
-        for rotation in pending:
+        for rotation, keypair in zip(pending, keypairs):
             result = self.execute_rotation(
                 rotation.entity_type,
                 rotation.entity_id,
-                rotation.policy_id
+                rotation.policy_id,
+                keypair=keypair
             )
             results.append(result)
 
@@ -871,12 +862,7 @@ def _deploy_after_rotation(self) -> Optional[Dict[str, Any]]:
         try:
             # Import deploy modules here to avoid circular imports
             from v1.schema_semantic import WireGuardDBv2
-            from v1.cli.config_generator import (
-                generate_cs_config,
-                generate_router_config,
-                generate_remote_config,
-                generate_exit_node_config
-            )
+            from v1.generation_engine import load_topology, render_all
             from v1.cli.deploy import deploy_all
 
             db = WireGuardDBv2(self.db_path)
@@ -885,43 +871,11 @@ def _deploy_after_rotation(self) -> Optional[Dict[str, Any]]:
             output_dir = Path(tempfile.mkdtemp(prefix='wgf-rotation-deploy-'))
 
             try:
-                # Generate all configs
+                # Generate all configs from a single topology snapshot
                 configs_written = []
-
-                # Coordination server config
-                cs_config = generate_cs_config(db)
-                cs_file = output_dir / "coordination.conf"
-                cs_file.write_text(cs_config)
-                configs_written.append('coordination.conf')
-
-                # Subnet router configs
-                with db._connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT id, hostname FROM subnet_router")
-                    for row in cursor.fetchall():
-                        router_id, hostname = row['id'], row['hostname']
-                        config = generate_router_config(db, router_id)
-                        config_file = output_dir / f"{hostname}.conf"
-                        config_file.write_text(config)
-                        configs_written.append(f"{hostname}.conf")
-
-                    # Remote configs
-                    cursor.execute("SELECT id, hostname FROM remote")
-                    for row in cursor.fetchall():
-                        remote_id, hostname = row['id'], row['hostname']
-                        config = generate_remote_config(db, remote_id)
-                        config_file = output_dir / f"{hostname}.conf"
-                        config_file.write_text(config)
-                        configs_written.append(f"{hostname}.conf")
-
-                    # Exit node configs
-                    cursor.execute("SELECT id, hostname FROM exit_node")
-                    for row in cursor.fetchall():
-                        exit_id, hostname = row['id'], row['hostname']
-                        config = generate_exit_node_config(db, exit_id)
-                        config_file = output_dir / f"{hostname}.conf"
-                        config_file.write_text(config)
-                        configs_written.append(f"{hostname}.conf")
+                for config in render_all(load_topology(db)):
+                    (output_dir / config.filename).write_text(config.content)
+                    configs_written.append(config.filename)
 
                 logger.info(f"Generated {len(configs_written)} configs for deployment")
 
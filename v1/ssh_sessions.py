@@ -0,0 +1,369 @@
+"""
+SSH Session Manager - Multiplexed Connections for Remote Operations
+
+Deploy, status, bandwidth collection, drift detection and backup upload all
+talk to the same handful of hosts. Opening a fresh SSH session per command
+costs a TCP connect plus a full key exchange and authentication each time;
+a single deploy used to do four or more handshakes per host.
+
+Design:
+- One OpenSSH master connection per (host, port, user), shared through a
+  ControlMaster socket. Later ssh/scp invocations ride the existing
+  connection and start in a few milliseconds.
+- Masters expire after `idle_timeout` seconds without use (ControlPersist),
+  so nothing lingers on either side. The socket outlives the process, so
+  back-to-back CLI invocations reuse it as well.
+- Failures to establish a master fall back to a plain connection: callers
+  still get the real ssh error in stderr.
+- SessionStats counts new versus reused sessions.
+- WG_FRIEND_SSH_MUX=0 disables multiplexing (e.g. for ssh builds without
+  ControlMaster support).
+- The control directory must be a real directory owned by us with mode
+  0700, inside a parent only we (or root) can write; otherwise sessions are
+  not multiplexed. A leftover socket is reused only after `ssh -O check`
+  confirms its master is alive, and is removed when it is not.
+
+Usage:
+    from v1.ssh_sessions import SSHTarget, get_session_manager
+
+    ssh = get_session_manager()
+    target = SSHTarget.parse('admin@vpn.example.com:2222')
+    result = ssh.run(target, 'wg show wg0 dump', timeout=30)
+    ssh.put('generated/hub.conf', target, '/etc/wireguard/wg0.conf')
+"""
+
+import hashlib
+import logging
+import os
+import stat
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from v1.unlock_agent import private_directory
+
+logger = logging.getLogger(__name__)
+
+# Seconds an unused master connection stays open
+DEFAULT_IDLE_TIMEOUT = 300
+
+
+@dataclass(frozen=True)
+class SSHTarget:
+    """Where to connect: the key of a shared session"""
+    host: str
+    port: int = 22
+    user: str = 'root'
+
+    @classmethod
+    def parse(cls, endpoint: str, user: str = 'root', port: int = 22) -> 'SSHTarget':
+        """
+        Parse '[user@]host[:port]' (IPv6: '[addr]:port').
+
+        A bare IPv6 address without brackets is taken as the host.
+        """
+        if '@' in endpoint:
+            user, endpoint = endpoint.rsplit('@', 1)
+        if endpoint.startswith('['):
+            host, _, rest = endpoint[1:].partition(']')
+            if rest.startswith(':') and rest[1:].isdigit():
+                port = int(rest[1:])
+        elif endpoint.count(':') == 1:
+            host, _, port_str = endpoint.partition(':')
+            if port_str.isdigit():
+                port = int(port_str)
+        else:
+            host = endpoint
+        return cls(host, int(port), user)
+
+    @property
+    def destination(self) -> str:
+        return f'{self.user}@{self.host}'
+
+    def __str__(self) -> str:
+        return self.destination if self.port == 22 else f'{self.destination}:{self.port}'
+
+
+@dataclass
+class SessionStats:
+    """Counters for the session manager"""
+    new: int = 0          # commands that had to open a connection
+    reused: int = 0       # commands served by an existing master
+    failed: int = 0       # master could not be started (plain connection used)
+    expired: int = 0      # masters closed after idling
+    commands: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.new + self.reused
+        return self.reused / total if total else 0.0
+
+
+def default_control_dir() -> Path:
+    """Per-user runtime directory for the master sockets"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return Path(runtime_dir) / 'wg-friend' / 'ssh'
+    return Path(f'/tmp/wg-friend-{os.getuid()}') / 'ssh'
+
+
+def safe_control_dir(control_dir: Path) -> bool:
+    """
+    Create `control_dir` if needed and check nobody else can plant sockets in it.
+
+    The directory must pass private_directory(); its parent must be a real
+    directory owned by us or root and not writable by group or others, so
+    the control directory cannot be swapped out after the check.
+    """
+    try:
+        control_dir.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        control_dir.mkdir(exist_ok=True, mode=0o700)
+        parent = os.lstat(control_dir.parent)
+    except OSError:
+        return False
+    return (stat.S_ISDIR(parent.st_mode) and parent.st_uid in (os.getuid(), 0)
+            and not parent.st_mode & 0o022 and private_directory(control_dir))
+
+
+class SSHSessionManager:
+    """
+    Shared, multiplexed SSH sessions keyed by SSHTarget.
+
+    run() and put() take the same arguments as before (timeouts, key file)
+    and return subprocess.CompletedProcess, raising TimeoutExpired and
+    FileNotFoundError like subprocess.run, so call sites keep their error
+    handling.
+    """
+
+    def __init__(self, control_dir: Optional[Path | str] = None,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 multiplex: bool = True,
+                 ssh_binary: str = 'ssh', scp_binary: str = 'scp'):
+        self.control_dir = Path(control_dir) if control_dir else default_control_dir()
+        self.idle_timeout = idle_timeout
+        self.multiplex = multiplex
+        self.ssh_binary = ssh_binary
+        self.scp_binary = scp_binary
+        self.stats = SessionStats()
+        self._last_used: Dict[SSHTarget, float] = {}
+        self._locks: Dict[SSHTarget, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Sessions
+    # -------------------------------------------------------------------------
+
+    def control_path(self, target: SSHTarget) -> Path:
+        """Master socket of a target (short: unix socket paths are limited)"""
+        digest = hashlib.sha256(f'{target.user}@{target.host}:{target.port}'.encode()).hexdigest()
+        return self.control_dir / digest[:20]
+
+    def is_open(self, target: SSHTarget) -> bool:
+        return self.multiplex and self.control_path(target).exists()
+
+    def _target_lock(self, target: SSHTarget) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(target, threading.Lock())
+
+    def _options(self, target: SSHTarget, key_path: Optional[str], connect_timeout: Optional[float],
+                 batch_mode: bool) -> List[str]:
+        opts = []
+        if key_path:
+            opts += ['-i', str(key_path)]
+        if connect_timeout:
+            opts += ['-o', f'ConnectTimeout={int(connect_timeout)}']
+        if batch_mode:
+            opts += ['-o', 'BatchMode=yes']
+        return opts
+
+    def _mux_options(self, target: SSHTarget) -> List[str]:
+        if not self.multiplex:
+            return []
+        return ['-o', 'ControlMaster=no', '-o', f'ControlPath={self.control_path(target)}']
+
+    def _ensure_master(self, target: SSHTarget, opts: List[str], timeout: Optional[float]):
+        """Open the target's master connection unless one is alive"""
+        if not self.multiplex:
+            with self._lock:
+                self.stats.new += 1
+            return
+
+        with self._target_lock(target):
+            self.expire_idle()
+            if not safe_control_dir(self.control_dir):
+                logger.warning(f"SSH control directory {self.control_dir} is not private; "
+                               f"connections will not be multiplexed")
+                with self._lock:
+                    self.multiplex = False
+                    self.stats.new += 1
+                return
+
+            path = self.control_path(target)
+            if path.exists():
+                if self._check_master(target):
+                    with self._lock:
+                        self.stats.reused += 1
+                        self._last_used[target] = time.monotonic()
+                    return
+                # Stale socket (master died): remove it so a new master can bind
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+            # -f -N: authenticate, then leave the master in the background.
+            # Its stdio goes to /dev/null: a pipe would be held open by the
+            # backgrounded master and block the caller until it exits.
+            cmd = [self.ssh_binary, '-f', '-N', '-p', str(target.port), *opts,
+                   '-o', 'ControlMaster=yes', '-o', f'ControlPath={path}',
+                   '-o', f'ControlPersist={int(self.idle_timeout)}', target.destination]
+            try:
+                returncode = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                            stderr=subprocess.DEVNULL, timeout=timeout).returncode
+            except subprocess.TimeoutExpired:
+                returncode = -1
+
+            with self._lock:
+                self.stats.new += 1
+                if returncode == 0:
+                    self._last_used[target] = time.monotonic()
+                else:
+                    self.stats.failed += 1
+
+    def _check_master(self, target: SSHTarget) -> bool:
+        """Whether a live master answers on the target's control socket"""
+        try:
+            result = subprocess.run([self.ssh_binary, '-o', f'ControlPath={self.control_path(target)}',
+                                     '-O', 'check', target.destination],
+                                    stdin=subprocess.DEVNULL, capture_output=True, timeout=5)
+        except (subprocess.TimeoutExpired, OSError):
+            return False
+        return result.returncode == 0
+
+    def expire_idle(self) -> int:
+        """Close masters unused for idle_timeout; returns how many were closed"""
+        now = time.monotonic()
+        with self._lock:
+            idle = [t for t, used in self._last_used.items() if now - used >= self.idle_timeout]
+            for target in idle:
+                del self._last_used[target]
+        for target in idle:
+            self._exit_master(target)
+        if idle:
+            with self._lock:
+                self.stats.expired += len(idle)
+        return len(idle)
+
+    def _exit_master(self, target: SSHTarget):
+        path = self.control_path(target)
+        if not path.exists():
+            return
+        try:
+            subprocess.run([self.ssh_binary, '-o', f'ControlPath={path}', '-O', 'exit', target.destination],
+                           stdin=subprocess.DEVNULL, capture_output=True, timeout=5)
+        except (subprocess.TimeoutExpired, OSError):
+            pass
+
+    def close(self, target: SSHTarget):
+        """Close one target's master connection"""
+        with self._lock:
+            self._last_used.pop(target, None)
+        self._exit_master(target)
+
+    def close_all(self):
+        """Close every master connection this manager opened or reused"""
+        with self._lock:
+            targets = list(self._last_used)
+            self._last_used.clear()
+        for target in targets:
+            self._exit_master(target)
+
+    # -------------------------------------------------------------------------
+    # Operations
+    # -------------------------------------------------------------------------
+
+    def run(self, target: SSHTarget, command: str, timeout: Optional[float] = None,
+            key_path: Optional[str] = None, connect_timeout: Optional[float] = None,
+            batch_mode: bool = False, input: Optional[str] = None) -> subprocess.CompletedProcess:
+        """Run a command on the target (text mode, output captured)"""
+        opts = self._options(target, key_path, connect_timeout, batch_mode)
+        self._ensure_master(target, opts, timeout)
+        with self._lock:
+            self.stats.commands += 1
+        cmd = [self.ssh_binary, '-p', str(target.port), *opts, *self._mux_options(target),
+               target.destination, command]
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, input=input)
+
+    def put(self, local_path: Path | str, target: SSHTarget, remote_path: str,
+            timeout: Optional[float] = None, key_path: Optional[str] = None,
+            connect_timeout: Optional[float] = None,
+            batch_mode: bool = False) -> subprocess.CompletedProcess:
+        """Copy a local file to the target over the shared connection"""
+        opts = self._options(target, key_path, connect_timeout, batch_mode)
+        self._ensure_master(target, opts, timeout)
+        with self._lock:
+            self.stats.commands += 1
+        host = f'[{target.host}]' if ':' in target.host else target.host
+        cmd = [self.scp_binary, '-P', str(target.port), *opts, *self._mux_options(target),
+               str(local_path), f'{target.user}@{host}:{remote_path}']
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+
+    def get(self, target: SSHTarget, remote_path: str, local_path: Path | str,
+            timeout: Optional[float] = None, key_path: Optional[str] = None,
+            connect_timeout: Optional[float] = None,
+            batch_mode: bool = False) -> subprocess.CompletedProcess:
+        """Copy a file from the target over the shared connection"""
+        opts = self._options(target, key_path, connect_timeout, batch_mode)
+        self._ensure_master(target, opts, timeout)
+        with self._lock:
+            self.stats.commands += 1
+        host = f'[{target.host}]' if ':' in target.host else target.host
+        cmd = [self.scp_binary, '-P', str(target.port), *opts, *self._mux_options(target),
+               f'{target.user}@{host}:{remote_path}', str(local_path)]
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+
+    def session_stats(self) -> Dict:
+        entry = asdict(self.stats)
+        entry['reuse_ratio'] = round(self.stats.reuse_ratio, 4)
+        entry['open_sessions'] = len(self._last_used)
+        return entry
+
+
+# =============================================================================
+# MODULE-LEVEL MANAGER
+# =============================================================================
+
+_manager: Optional[SSHSessionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager() -> SSHSessionManager:
+    """The process-wide session manager shared by all remote operations"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = SSHSessionManager(
+                    multiplex=os.environ.get('WG_FRIEND_SSH_MUX', '1') != '0')
+    return _manager
+
+
+def ssh_run(endpoint: str, command: str, user: str = 'root', port: int = 22,
+            **kwargs) -> subprocess.CompletedProcess:
+    """Run a command on '[user@]host[:port]' through the shared manager"""
+    return get_session_manager().run(SSHTarget.parse(endpoint, user, port), command, **kwargs)
+
+
+def ssh_put(local_path: Path | str, endpoint: str, remote_path: str, user: str = 'root',
+            port: int = 22, **kwargs) -> subprocess.CompletedProcess:
+    """Copy a file to '[user@]host[:port]' through the shared manager"""
+    return get_session_manager().put(local_path, SSHTarget.parse(endpoint, user, port),
+                                     remote_path, **kwargs)
+
+
+def session_stats() -> Dict:
+    """New/reused counters of the shared manager"""
+    return get_session_manager().session_stats()
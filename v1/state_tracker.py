@@ -9,6 +9,7 @@
 
 from v1.schema_semantic import WireGuardDBv2
 from v1.system_state import SystemStateDB, EntitySnapshot
+from v1.topology_query import fetch_topology
 
 
 def get_state_db_path(main_db_path: str) -> Path:
@@ -29,77 +30,55 @@ def capture_current_topology(db: WireGuardDBv2) -> tuple:
     remote_snapshots = []
 
     with db._connection() as conn:
-        cursor = conn.cursor()
-
-        # Capture coordination server
-        cursor.execute("""
-            SELECT current_public_key, hostname, ipv4_address, ipv6_address, endpoint
-            FROM coordination_server
-            LIMIT 1
-        """)
-        row = cursor.fetchone()
-        if row:
-            cs_snapshot = EntitySnapshot(
-                entity_type='coordination_server',
-                public_key=row[0],
-                hostname=row[1],
-                role_type=None,
-                ipv4_address=row[2],
-                ipv6_address=row[3],
-                allowed_ips=[],
-                endpoint=row[4]
-            )
-
-        # Capture subnet routers
-        cursor.execute("""
-            SELECT sr.current_public_key, sr.hostname, sr.ipv4_address, sr.ipv6_address, sr.endpoint, sr.id
-            FROM subnet_router sr
-            ORDER BY sr.hostname
-        """)
-        for row in cursor.fetchall():
-            pubkey, hostname, ipv4, ipv6, endpoint, router_id = row
-
-            # Get advertised networks for allowed_ips
-            cursor.execute("""
-                SELECT network_cidr FROM advertised_network
-                WHERE subnet_router_id = ?
-            """, (router_id,))
-            networks = [r[0] for r in cursor.fetchall()]
-
-            # Build allowed_ips: VPN address + advertised networks
-            allowed_ips = [ipv4] if ipv4 else []
-            allowed_ips.extend(networks)
-
-            router_snapshots.append(EntitySnapshot(
-                entity_type='subnet_router',
-                public_key=pubkey,
-                hostname=hostname,
-                role_type='subnet_router',
-                ipv4_address=ipv4,
-                ipv6_address=ipv6,
-                allowed_ips=allowed_ips,
-                endpoint=endpoint
-            ))
-
-        # Capture remotes
-        cursor.execute("""
-            SELECT current_public_key, hostname, ipv4_address, ipv6_address, access_level
-            FROM remote
-            ORDER BY hostname
-        """)
-        for row in cursor.fetchall():
-            pubkey, hostname, ipv4, ipv6, access_level = row
-
-            remote_snapshots.append(EntitySnapshot(
-                entity_type='remote',
-                public_key=pubkey,
-                hostname=hostname,
-                role_type=access_level,
-                ipv4_address=ipv4,
-                ipv6_address=ipv6,
-                allowed_ips=[ipv4] if ipv4 else [],
-                endpoint=None  # Remotes don't have endpoints (they're clients)
-            ))
+        topology = fetch_topology(conn)
+
+    # Capture coordination server
+    cs = topology.cs
+    if cs:
+        cs_snapshot = EntitySnapshot(
+            entity_type='coordination_server',
+            public_key=cs['current_public_key'],
+            hostname=cs['hostname'],
+            role_type=None,
+            ipv4_address=cs['ipv4_address'],
+            ipv6_address=cs['ipv6_address'],
+            allowed_ips=[],
+            endpoint=cs['endpoint']
+        )
+
+    # Capture subnet routers
+    for router in topology.routers:
+        ipv4 = router['ipv4_address']
+
+        # Build allowed_ips: VPN address + advertised networks
+        allowed_ips = [ipv4] if ipv4 else []
+        allowed_ips.extend(n['network_cidr'] for n in router['advertised_networks'])
+
+        router_snapshots.append(EntitySnapshot(
+            entity_type='subnet_router',
+            public_key=router['current_public_key'],
+            hostname=router['hostname'],
+            role_type='subnet_router',
+            ipv4_address=ipv4,
+            ipv6_address=router['ipv6_address'],
+            allowed_ips=allowed_ips,
+            endpoint=router['endpoint']
+        ))
+
+    # Capture remotes
+    for remote in topology.remotes:
+        ipv4 = remote['ipv4_address']
+
+        remote_snapshots.append(EntitySnapshot(
+            entity_type='remote',
+            public_key=remote['current_public_key'],
+            hostname=remote['hostname'],
+            role_type=remote['access_level'],
+            ipv4_address=ipv4,
+            ipv6_address=remote['ipv6_address'],
+            allowed_ips=[ipv4] if ipv4 else [],
+            endpoint=None  # Remotes don't have endpoints (they're clients)
+        ))
 
     return cs_snapshot, router_snapshots, remote_snapshots
 
@@ -0,0 +1,211 @@
+"""
+Tests for Vectorized Bandwidth Analytics
+
+Covers:
+1. Figures - reset-aware deltas, peak/p95 rates, daily statistics
+2. Paths - NumPy and pure Python agree
+3. Baselines - bandwidth_baseline filled, spike alert compares against it
+
+Run with: python3 v1/test_bandwidth_analytics.py
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.bandwidth_analytics import DAY, NUMPY_AVAILABLE, analyze
+from v1.bandwidth_tracking import BandwidthSample, BandwidthTracker, _epoch
+from v1.db_pool import get_connection
+from v1.test_db_pool import create_temp_db_path, cleanup_db
+
+
+START = datetime(2026, 3, 30)
+
+
+def _sample(entity_id, at, rx, tx, connected=True):
+    return BandwidthSample('remote', entity_id, f'guid-{entity_id}', f'remote-{entity_id}',
+                           at, rx, tx, None, None, connected)
+
+
+def _paths():
+    return [False, True] if NUMPY_AVAILABLE else [False]
+
+
+# =============================================================================
+# FIGURE TESTS
+# =============================================================================
+
+def test_known_figures():
+    """Deltas survive a counter reset; rates, percentiles and daily stats are exact"""
+    db_path = create_temp_db_path('-analytics-known')
+    try:
+        tracker = BandwidthTracker(db_path)
+        # Day 1: +100 rx/min for 3 minutes; day 2: counter reset to 50, then +400 in 2 minutes
+        points = [(0, 0), (60, 100), (120, 200), (180, 300),
+                  (DAY + 60, 50), (DAY + 180, 450)]
+        for offset, rx in points:
+            tracker.store_samples([_sample(1, START + timedelta(seconds=offset), rx, rx // 10)])
+        tracker.store_samples([_sample(2, START, 5, 5, connected=False)])
+
+        conn = get_connection(db_path)
+        try:
+            for use_numpy in _paths():
+                one, two = analyze(conn, use_numpy=use_numpy)
+                assert one.samples == 6 and one.counter_resets == 1
+                assert one.rx_bytes == 300 + 50 + 400, one.rx_bytes
+                assert one.peak_rx_rate == 100 / 60 * 2 and one.p95_rx_rate > 100 / 60
+                assert one.days == 2
+                assert one.avg_daily_bytes == (330 + 495) / 2, one.avg_daily_bytes
+                assert one.stddev_daily_bytes == (495 - 330) / 2
+                assert abs(one.p95_daily_bytes - (330 + 0.95 * 165)) < 1e-9
+                assert (two.samples, two.connected_samples, two.rx_bytes, two.peak_rx_rate) == (1, 0, 0, 0)
+
+                # Window from day 2: the first delta comes from the last sample of day 1
+                day_two = _epoch(START + timedelta(days=1))
+                window = analyze(conn, since=day_two, use_numpy=use_numpy)
+                assert [(w.entity_id, w.samples, w.rx_bytes, w.days) for w in window] == [(1, 2, 450, 1)], window
+        finally:
+            conn.close()
+        print("  [PASS] test_known_figures")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# PATH TESTS
+# =============================================================================
+
+def test_numpy_matches_python():
+    """Random traffic with resets and gaps: both paths give the same figures"""
+    if not NUMPY_AVAILABLE:
+        print("  [SKIP] test_numpy_matches_python (NumPy not installed)")
+        return
+    db_path = create_temp_db_path('-analytics-paths')
+    try:
+        tracker = BandwidthTracker(db_path)
+        rng = random.Random(7)
+        counters = {i: [0, 0] for i in range(1, 31)}
+        for minute in range(0, 4 * 1440, 7):
+            sweep = []
+            for entity_id, counter in counters.items():
+                if rng.random() < 0.1:
+                    continue            # missed sample
+                if rng.random() < 0.01:
+                    counter[:] = [0, 0]  # reset
+                counter[0] += rng.randrange(0, 10 ** 6)
+                counter[1] += rng.randrange(0, 10 ** 5)
+                sweep.append(_sample(entity_id, START + timedelta(minutes=minute), *counter,
+                                     connected=rng.random() < 0.9))
+            tracker.store_samples(sweep)
+
+        conn = get_connection(db_path)
+        try:
+            vectorized = analyze(conn, chunk=7, use_numpy=True)
+            python = analyze(conn, chunk=7, use_numpy=False)
+        finally:
+            conn.close()
+        assert len(vectorized) == len(python) == 30
+        for v, p in zip(vectorized, python):
+            for name in v.__dataclass_fields__:
+                a, b = getattr(v, name), getattr(p, name)
+                if isinstance(a, float):
+                    assert abs(a - b) <= 1e-6 * max(1.0, abs(b)), (name, a, b)
+                else:
+                    assert a == b, (name, a, b)
+        assert sum(v.counter_resets for v in vectorized) > 0
+        print("  [PASS] test_numpy_matches_python")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# BASELINE TESTS
+# =============================================================================
+
+def test_baselines_and_spike_alert():
+    """Complete days fill bandwidth_baseline; a day at 10x the average raises a spike"""
+    from v1.alerting import AlertManager, AlertType
+
+    db_path = create_temp_db_path('-analytics-baseline')
+    try:
+        tracker = BandwidthTracker(db_path)
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        rx = 0
+        for hour in range(-10 * 24, 0):
+            rx += 1000
+            tracker.store_samples([_sample(1, today + timedelta(hours=hour), rx, 0)])
+        assert tracker.update_baselines(days=7) == 1
+
+        conn = get_connection(db_path)
+        row = conn.execute("SELECT * FROM bandwidth_baseline").fetchone()
+        conn.close()
+        assert (row['avg_daily_bytes'], row['stddev_daily_bytes'], row['p95_daily_bytes']) == (24000, 0, 24000)
+        assert row['samples_count'] == 7 * 24
+
+        # The last 24 hours: 10x the usual traffic
+        now = datetime.utcnow()
+        for hour in range(-23, 1):
+            rx += 10000
+            tracker.store_samples([_sample(1, now + timedelta(hours=hour) - timedelta(minutes=1), rx, 0)])
+        tracker.compute_aggregates()
+
+        manager = AlertManager(db_path)
+        manager.create_rule('Spike', AlertType.BANDWIDTH_SPIKE, threshold_value=300,
+                            threshold_unit='percent')
+        spikes = [a for a in manager.check_alerts() if a.alert_type == AlertType.BANDWIDTH_SPIKE]
+        assert len(spikes) == 1 and spikes[0].details['baseline_bytes'] == 24000, spikes
+        print("  [PASS] test_baselines_and_spike_alert")
+    finally:
+        cleanup_db(db_path)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("BANDWIDTH ANALYTICS TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Figures", [
+            test_known_figures,
+        ]),
+        ("Paths", [
+            test_numpy_matches_python,
+        ]),
+        ("Baselines", [
+            test_baselines_and_spike_alert,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Tests for Day-Partitioned Bandwidth Samples
+
+Covers:
+1. Migration - an unpartitioned sample table split into days behind a view
+2. Writes - sweeps routed to their day, new days created in the same transaction
+3. Retention - whole days dropped, readers and the offline alert unaffected
+4. Windows - reports read only the partitions they cover
+
+Run with: python3 v1/test_bandwidth_partitions.py
+"""
+
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.bandwidth_partitions import partition_samples, partitions, sample_source
+from v1.bandwidth_tracking import (
+    BandwidthSample, BandwidthTracker, create_bandwidth_schema, migrate_compact_samples
+)
+from v1.db_pool import get_connection
+from v1.migrations import ensure_schema
+from v1.test_db_pool import create_temp_db_path, cleanup_db
+
+
+DAY_ONE = 1_774_828_800     # 2026-03-30 00:00 UTC
+
+
+def _sweep(sampled_at, entities=3, rx=1000):
+    return [
+        BandwidthSample('remote', i, f'guid-{i}', f'remote-{i}', sampled_at,
+                        rx * i, rx * i // 2, None, None, True)
+        for i in range(1, entities + 1)
+    ]
+
+
+def _table_names(conn):
+    return sorted(row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'bandwidth_sample%'"))
+
+
+# =============================================================================
+# MIGRATION TESTS
+# =============================================================================
+
+def test_migration_splits_days():
+    """Rows land in one table per UTC day; the view still reads every row"""
+    db_path = create_temp_db_path('-part-migrate')
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        create_bandwidth_schema(cursor)
+        migrate_compact_samples(cursor)
+        cursor.execute("INSERT INTO bandwidth_entity (id, entity_type, entity_id, entity_permanent_guid) "
+                       "VALUES (1, 'remote', 1, 'guid-1')")
+        for offset in (0, 3600, 86399, 86400, 3 * 86400):
+            cursor.execute("INSERT INTO bandwidth_sample (entity, sampled_at, rx_bytes, tx_bytes, connected) "
+                           "VALUES (1, ?, ?, 0, 1)", (DAY_ONE + offset, offset))
+
+        partition_samples(cursor)
+        partition_samples(cursor)       # re-run is a no-op
+        conn.commit()
+
+        assert _table_names(conn) == ['bandwidth_sample_20260330', 'bandwidth_sample_20260331',
+                                      'bandwidth_sample_20260402'], _table_names(conn)
+        kind = cursor.execute("SELECT type FROM sqlite_master WHERE name = 'bandwidth_sample'").fetchone()[0]
+        assert kind == 'view'
+        assert cursor.execute("SELECT COUNT(*) FROM bandwidth_sample_20260330").fetchone()[0] == 3
+        rows = cursor.execute("SELECT sampled_at - ? FROM bandwidth_sample ORDER BY 1", (DAY_ONE,)).fetchall()
+        assert [row[0] for row in rows] == [0, 3600, 86399, 86400, 3 * 86400]
+        conn.close()
+        print("  [PASS] test_migration_splits_days")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_more_days_than_compound_limit():
+    """Over 500 days of partitions: migration, view, windows and new days all still work"""
+    from v1.bandwidth_analytics import analyze
+
+    db_path = create_temp_db_path('-part-many')
+    days = 520
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        create_bandwidth_schema(cursor)
+        migrate_compact_samples(cursor)
+        cursor.execute("INSERT INTO bandwidth_entity (id, entity_type, entity_id, entity_permanent_guid) "
+                       "VALUES (1, 'remote', 1, 'guid-1')")
+        cursor.executemany("INSERT INTO bandwidth_sample (entity, sampled_at, rx_bytes, tx_bytes, connected) "
+                           "VALUES (1, ?, ?, 0, 1)", [(DAY_ONE + d * 86400, d * 10) for d in range(days)])
+        partition_samples(cursor)
+        conn.commit()
+
+        assert len(partitions(conn)) == days
+        assert cursor.execute("SELECT COUNT(*) FROM bandwidth_sample").fetchone()[0] == days
+        assert cursor.execute(f"SELECT SUM(rx_bytes) FROM {sample_source(conn)}").fetchone()[0] == \
+            sum(d * 10 for d in range(days))
+        assert analyze(conn, since=DAY_ONE, use_numpy=False)[0].rx_bytes == (days - 1) * 10
+        conn.close()
+
+        # A sweep on a new day rebuilds the view over every partition
+        tracker = BandwidthTracker(db_path)
+        tracker.store_samples(_sweep(datetime.utcfromtimestamp(DAY_ONE + days * 86400), entities=1))
+        conn = get_connection(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM bandwidth_sample").fetchone()[0] == days + 1
+        conn.close()
+        print("  [PASS] test_more_days_than_compound_limit")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# WRITE TESTS
+# =============================================================================
+
+def test_sweeps_routed_to_their_day():
+    """A sweep on a new day creates its partition inside the sweep's transaction"""
+    db_path = create_temp_db_path('-part-write')
+    try:
+        tracker = BandwidthTracker(db_path)
+        midnight = datetime.utcfromtimestamp(DAY_ONE + 86400)
+        tracker.store_samples(_sweep(midnight - timedelta(minutes=1)))
+
+        statements = []
+        conn = get_connection(db_path)
+        conn.set_trace_callback(statements.append)
+        try:
+            tracker.store_samples(_sweep(midnight))
+        finally:
+            conn.set_trace_callback(None)
+
+        assert statements.count('BEGIN ') == 1 and statements.count('COMMIT') == 1, statements
+        assert partitions(conn) == ['bandwidth_sample_20260330', 'bandwidth_sample_20260331']
+        counts = [conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0] for name in partitions(conn)]
+        assert counts == [3, 3], counts
+        assert conn.execute("SELECT COUNT(*) FROM bandwidth_sample").fetchone()[0] == 6
+        conn.close()
+        print("  [PASS] test_sweeps_routed_to_their_day")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# RETENTION TESTS
+# =============================================================================
+
+def test_retention_drops_whole_days():
+    """Days entirely past retention are dropped; latest samples and offline checks still work"""
+    from v1.alerting import AlertManager, AlertType
+
+    db_path = create_temp_db_path('-part-retention')
+    try:
+        tracker = BandwidthTracker(db_path)
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        retention = tracker.RAW_SAMPLE_RETENTION_DAYS
+        for days_ago in (retention + 3, retention + 1, retention, 1):
+            tracker.store_samples(_sweep(today - timedelta(days=days_ago), entities=2))
+        # Entity 3 was only ever seen long ago
+        tracker.store_samples(_sweep(today - timedelta(days=retention + 3), entities=3)[2:])
+
+        conn = get_connection(db_path)
+        conn.execute("""
+            INSERT INTO coordination_server (
+                id, permanent_guid, current_public_key, hostname, endpoint, listen_port,
+                network_ipv4, network_ipv6, ipv4_address, ipv6_address, private_key
+            ) VALUES (1, 'cs', 'cs', 'cs', 'cs.example.com', 51820,
+                      '10.66.0.0/24', 'fd66::/64', '10.66.0.1/32', 'fd66::1/128', 'key')
+        """)
+        conn.executemany("""
+            INSERT INTO remote (
+                id, cs_id, permanent_guid, current_public_key, hostname,
+                ipv4_address, ipv6_address, access_level
+            ) VALUES (?, 1, ?, ?, ?, ?, ?, 'full_access')
+        """, [(i, f'guid-{i}', f'key-{i}', name, f'10.66.0.{i + 1}/32', f'fd66::{i + 1:x}/128')
+              for i, name in ((1, 'alice'), (2, 'bob'), (3, 'carol'))])
+        conn.commit()
+        conn.close()
+
+        tracker.cleanup_old_samples()
+
+        conn = get_connection(db_path)
+        kept = partitions(conn)
+        conn.close()
+        assert len(kept) == 2, kept     # the retention-day partition is not complete yet
+        stats = tracker.get_statistics()
+        assert stats['total_samples'] == 4 and stats['sample_days'] == 2, stats
+        assert {s.entity_id for s in tracker.get_latest_samples()} == {1, 2}
+
+        manager = AlertManager(db_path)
+        manager.create_rule('Offline', AlertType.PEER_OFFLINE, threshold_value=3 * 24 * 60)
+        offline = [a for a in manager.check_alerts() if a.alert_type == AlertType.PEER_OFFLINE]
+        assert [(a.entity_id, a.details['last_seen']) for a in offline] == [(3, None)], offline
+        print("  [PASS] test_retention_drops_whole_days")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# WINDOW TESTS
+# =============================================================================
+
+def test_report_reads_only_its_window():
+    """A 24-hour report names today's and yesterday's partitions, not older ones"""
+    db_path = create_temp_db_path('-part-window')
+    try:
+        tracker = BandwidthTracker(db_path)
+        now = datetime.utcnow().replace(microsecond=0)
+        for days_ago, rx in ((5, 100), (1, 1000), (0, 3000)):
+            tracker.store_samples(_sweep(now - timedelta(days=days_ago), rx=rx))
+
+        statements = []
+        conn = get_connection(db_path)
+        conn.set_trace_callback(statements.append)
+        try:
+            report = tracker.get_bandwidth_report(hours=24)
+        finally:
+            conn.set_trace_callback(None)
+            oldest = partitions(conn)[0]
+            conn.close()
+
+        query = next(s for s in statements if 'GROUP BY' in s)
+        assert oldest not in query and 'FROM bandwidth_sample ' not in query, query
+        assert report['total_rx_bytes'] == (3000 - 1000) * (1 + 2 + 3), report
+        print("  [PASS] test_report_reads_only_its_window")
+    finally:
+        cleanup_db(db_path)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("BANDWIDTH PARTITION TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Migration", [
+            test_migration_splits_days,
+            test_more_days_than_compound_limit,
+        ]),
+        ("Writes", [
+            test_sweeps_routed_to_their_day,
+        ]),
+        ("Retention", [
+            test_retention_drops_whole_days,
+        ]),
+        ("Windows", [
+            test_report_reads_only_its_window,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Tests for Incremental Bandwidth Aggregation
+
+Covers:
+1. Hourly folding - watermark, open buckets, counter resets
+2. Cascade - daily/weekly/monthly built from aggregates
+3. Backfill - missed runs and pre-existing hourly rows
+
+Run with: python3 v1/test_bandwidth_rollup.py
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.bandwidth_rollup import period_bounds
+from v1.bandwidth_tracking import BandwidthSample, BandwidthTracker
+from v1.db_pool import get_connection
+from v1.test_db_pool import create_temp_db_path, cleanup_db
+
+
+# Monday
+START = datetime(2026, 3, 30)
+
+
+def _store(tracker, minutes, rx_per_sample=600, entity_id=1, connected=True, counter=None):
+    """One sample at each minute offset; returns the final counter"""
+    counter = counter or {}
+    for minute in minutes:
+        counter[entity_id] = counter.get(entity_id, 0) + rx_per_sample
+        tracker.store_samples([BandwidthSample(
+            'remote', entity_id, f'guid-{entity_id}', f'remote-{entity_id}',
+            START + timedelta(minutes=minute), counter[entity_id], counter[entity_id] // 2,
+            None, None, connected)])
+    return counter
+
+
+def _aggregates(db_path, period_type):
+    conn = get_connection(db_path)
+    rows = conn.execute("""
+        SELECT period_start, total_rx_bytes, total_tx_bytes, peak_rx_rate,
+               sample_count, connected_samples, availability_percent
+        FROM bandwidth_aggregate WHERE period_type = ? ORDER BY entity_id, period_start
+    """, (period_type,)).fetchall()
+    conn.close()
+    return [tuple(row) for row in rows]
+
+
+# =============================================================================
+# HOURLY FOLDING TESTS
+# =============================================================================
+
+def test_runs_split_anywhere_give_same_result():
+    """Folding in several runs matches folding once; deltas span run and hour boundaries"""
+    once_path = create_temp_db_path('-rollup-once')
+    split_path = create_temp_db_path('-rollup-split')
+    try:
+        once = BandwidthTracker(once_path)
+        _store(once, range(0, 150))
+        once.compute_aggregates()
+
+        split = BandwidthTracker(split_path)
+        counter = _store(split, range(0, 37))
+        assert split.compute_aggregates()['hourly'] == 1
+        counter = _store(split, range(37, 90), counter=counter)
+        assert split.compute_aggregates()['hourly'] == 2
+        assert split.compute_aggregates() == {'hourly': 0, 'daily': 0, 'weekly': 0, 'monthly': 0}
+        _store(split, range(90, 150), counter=counter)
+        split.compute_aggregates()
+
+        hourly = _aggregates(once_path, 'hourly')
+        assert hourly == _aggregates(split_path, 'hourly')
+        # 149 one-minute deltas of 600 bytes; the first sample has nothing before it
+        assert [row[1] for row in hourly] == [59 * 600, 60 * 600, 30 * 600]
+        assert [row[4] for row in hourly] == [60, 60, 30]
+        assert hourly[0][3] == 10       # 600 bytes / 60 s
+        print("  [PASS] test_runs_split_anywhere_give_same_result")
+    finally:
+        cleanup_db(once_path)
+        cleanup_db(split_path)
+
+
+def test_counter_reset_counts_from_zero():
+    """A counter that goes backwards contributes its new value, not a negative delta"""
+    db_path = create_temp_db_path('-rollup-reset')
+    try:
+        tracker = BandwidthTracker(db_path)
+        counter = _store(tracker, range(0, 10))
+        counter[1] = 0      # interface restarted
+        _store(tracker, range(10, 20), counter=counter, connected=False)
+        tracker.compute_aggregates()
+
+        (_, rx, tx, _, count, connected, availability), = _aggregates(db_path, 'hourly')
+        assert rx == 19 * 600 and tx == 19 * 300, (rx, tx)
+        assert (count, connected, availability) == (20, 10, 50.0)
+        print("  [PASS] test_counter_reset_counts_from_zero")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# CASCADE TESTS
+# =============================================================================
+
+def test_cascade_from_aggregates():
+    """Daily sums hourly, weekly and monthly sum daily; open periods are extended"""
+    db_path = create_temp_db_path('-rollup-cascade')
+    try:
+        tracker = BandwidthTracker(db_path)
+        # Mon 30 Mar .. Thu 2 Apr, one sample every 30 minutes
+        counter = _store(tracker, range(0, 3 * 1440, 30), rx_per_sample=1000)
+        tracker.compute_aggregates()
+        _store(tracker, range(3 * 1440, 4 * 1440, 30), rx_per_sample=1000, counter=counter)
+        written = tracker.compute_aggregates()
+        assert written['daily'] == 2 and written['weekly'] == 1 and written['monthly'] == 1, written
+
+        daily = _aggregates(db_path, 'daily')
+        assert [row[0] for row in daily] == ['2026-03-30T00:00:00', '2026-03-31T00:00:00',
+                                             '2026-04-01T00:00:00', '2026-04-02T00:00:00']
+        assert [row[1] for row in daily] == [47000, 48000, 48000, 48000]
+        assert [row[4] for row in daily] == [48] * 4
+
+        weekly = _aggregates(db_path, 'weekly')
+        assert weekly == [('2026-03-30T00:00:00', 191000, 95500, 0, 192, 192, 100.0)], weekly
+
+        monthly = _aggregates(db_path, 'monthly')
+        assert [(row[0], row[1]) for row in monthly] == [('2026-03-01T00:00:00', 95000),
+                                                        ('2026-04-01T00:00:00', 96000)]
+        assert period_bounds('monthly', datetime(2026, 12, 31, 23)) == (datetime(2026, 12, 1),
+                                                                        datetime(2027, 1, 1))
+        print("  [PASS] test_cascade_from_aggregates")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# BACKFILL TESTS
+# =============================================================================
+
+def test_backfill_after_missed_runs():
+    """Days of samples with no run in between are all aggregated; old hourly rows roll up"""
+    db_path = create_temp_db_path('-rollup-backfill')
+    try:
+        tracker = BandwidthTracker(db_path)
+        conn = get_connection(db_path)
+        # An hourly row written by the old compute_aggregates, before any samples
+        conn.execute("""
+            INSERT INTO bandwidth_aggregate (
+                entity_type, entity_id, entity_permanent_guid, period_type,
+                period_start, period_end, total_rx_bytes, total_tx_bytes,
+                uptime_seconds, downtime_seconds, availability_percent, sample_count
+            ) VALUES ('remote', 1, 'guid-1', 'hourly', '2026-03-29T23:00:00',
+                      '2026-03-30T00:00:00', 5000, 2500, 1800, 1800, 50.0, 12)
+        """)
+        conn.commit()
+        conn.close()
+
+        _store(tracker, range(0, 3 * 1440, 60))
+        written = tracker.compute_aggregates()
+        assert written['hourly'] == 72 and written['daily'] == 4, written
+
+        daily = _aggregates(db_path, 'daily')
+        assert daily[0] == ('2026-03-29T00:00:00', 5000, 2500, 0, 12, 6, 50.0), daily[0]
+        assert [row[1] for row in daily[1:]] == [23 * 600, 24 * 600, 24 * 600]
+        print("  [PASS] test_backfill_after_missed_runs")
+    finally:
+        cleanup_db(db_path)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("BANDWIDTH ROLLUP TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Hourly folding", [
+            test_runs_split_anywhere_give_same_result,
+            test_counter_reset_counts_from_zero,
+        ]),
+        ("Cascade", [
+            test_cascade_from_aggregates,
+        ]),
+        ("Backfill", [
+            test_backfill_after_missed_runs,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Tests for the Compact Bandwidth Sample Store
+
+Covers:
+1. Migration - legacy rows converted to entity keys and epoch times
+2. Writes - one transaction per sweep, re-collects de-duplicated
+3. Reads - latest samples, reports and statistics on the compact layout
+
+Run with: python3 v1/test_bandwidth_storage.py
+"""
+
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.bandwidth_tracking import (
+    BandwidthSample, BandwidthTracker, create_bandwidth_schema, migrate_compact_samples
+)
+from v1.db_pool import get_connection
+from v1.migrations import SCHEMA_VERSION, ensure_schema
+from v1.test_db_pool import create_temp_db_path, cleanup_db
+
+
+NOW = 1_750_000_000
+
+
+def _sweep(sampled_at, entities=3, rx=1000, connected=True):
+    return [
+        BandwidthSample('remote', i, f'guid-{i}', f'remote-{i}', sampled_at,
+                        rx * (i + 1), rx * (i + 1) // 2, None, '203.0.113.1:51820', connected)
+        for i in range(1, entities + 1)
+    ]
+
+
+# =============================================================================
+# MIGRATION TESTS
+# =============================================================================
+
+def test_migration_converts_legacy_rows():
+    """ISO text rows become (entity, epoch) rows; one dictionary row per entity"""
+    db_path = create_temp_db_path('-bw-migrate')
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        create_bandwidth_schema(cursor)
+        sampled_at = datetime.utcfromtimestamp(NOW)
+        for minutes in (0, 1):
+            cursor.execute("""
+                INSERT INTO bandwidth_sample (
+                    entity_type, entity_id, entity_permanent_guid, sampled_at,
+                    rx_bytes, tx_bytes, latest_handshake, endpoint, connected
+                ) VALUES ('remote', 7, 'guid-7', ?, ?, 20, ?, '203.0.113.7:51820', 1)
+            """, ((sampled_at + timedelta(minutes=minutes)).isoformat(), 100 + minutes,
+                  datetime.fromtimestamp(NOW - 30).isoformat()))
+        cursor.execute("""
+            INSERT INTO bandwidth_sample (entity_type, entity_id, entity_permanent_guid,
+                                          sampled_at, rx_bytes, tx_bytes, connected)
+            VALUES ('subnet_router', 7, 'guid-r7', ?, 5, 6, 0)
+        """, (sampled_at.isoformat(),))
+
+        migrate_compact_samples(cursor)
+        migrate_compact_samples(cursor)     # re-run is a no-op
+        conn.commit()
+
+        entities = cursor.execute(
+            "SELECT entity_type, entity_id, entity_permanent_guid FROM bandwidth_entity ORDER BY id"
+        ).fetchall()
+        assert sorted(entities) == [('remote', 7, 'guid-7'), ('subnet_router', 7, 'guid-r7')], entities
+
+        rows = cursor.execute("""
+            SELECT e.entity_type, s.sampled_at, s.rx_bytes, s.latest_handshake, s.connected
+            FROM bandwidth_sample s JOIN bandwidth_entity e ON e.id = s.entity
+            ORDER BY e.entity_type, s.sampled_at
+        """).fetchall()
+        assert rows == [
+            ('remote', NOW, 100, NOW - 30, 1),
+            ('remote', NOW + 60, 101, NOW - 30, 1),
+            ('subnet_router', NOW, 5, None, 0),
+        ], rows
+
+        sql = cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'bandwidth_sample'").fetchone()[0]
+        assert 'WITHOUT ROWID' in sql
+        conn.close()
+        print("  [PASS] test_migration_converts_legacy_rows")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_adopted_database_keeps_samples():
+    """Re-running every migration on a compact database leaves samples alone"""
+    db_path = create_temp_db_path('-bw-adopt')
+    try:
+        BandwidthTracker(db_path).store_samples(_sweep(datetime(2026, 1, 1)))
+        conn = get_connection(db_path)
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+        conn.close()
+
+        ensure_schema(db_path)
+
+        conn = get_connection(db_path)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert conn.execute("SELECT COUNT(*) FROM bandwidth_sample").fetchone()[0] == 3
+        conn.close()
+        print("  [PASS] test_adopted_database_keeps_samples")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# WRITE TESTS
+# =============================================================================
+
+def test_one_transaction_per_sweep():
+    """A sweep is one BEGIN/COMMIT; known entities are not re-inserted"""
+    db_path = create_temp_db_path('-bw-sweep')
+    try:
+        tracker = BandwidthTracker(db_path)
+        start = datetime(2026, 1, 1)
+        tracker.store_samples(_sweep(start))
+
+        statements = []
+        conn = get_connection(db_path)
+        conn.set_trace_callback(statements.append)
+        try:
+            assert tracker.store_samples(_sweep(start + timedelta(minutes=1), entities=50)) == 50
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+
+        assert statements.count('BEGIN ') == 1 and statements.count('COMMIT') == 1, statements
+        entity_inserts = [s for s in statements if 'INTO bandwidth_entity' in s]
+        assert len(entity_inserts) == 47, len(entity_inserts)
+
+        # Same entity and second: the later sample wins
+        tracker.store_samples(_sweep(start + timedelta(minutes=1), entities=1, rx=5000))
+        conn = get_connection(db_path)
+        rows = conn.execute("SELECT COUNT(*), SUM(rx_bytes) FROM bandwidth_sample WHERE entity = 1").fetchone()
+        conn.close()
+        assert tuple(rows) == (2, 2000 + 10000), tuple(rows)
+        print("  [PASS] test_one_transaction_per_sweep")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# READ TESTS
+# =============================================================================
+
+def test_reads_on_compact_layout():
+    """Latest samples, the report and statistics see epoch rows as UTC datetimes"""
+    db_path = create_temp_db_path('-bw-read')
+    try:
+        tracker = BandwidthTracker(db_path)
+        now = datetime.utcnow().replace(microsecond=0)
+        tracker.store_samples(_sweep(now - timedelta(hours=2), rx=1000))
+        tracker.store_samples(_sweep(now - timedelta(hours=1), rx=3000, connected=False))
+
+        latest = {s.entity_id: s for s in tracker.get_latest_samples()}
+        assert latest[2].sampled_at == now - timedelta(hours=1)
+        assert latest[2].rx_bytes == 9000 and not latest[2].connected
+        assert latest[2].entity_guid == 'guid-2'
+
+        report = tracker.get_bandwidth_report(hours=24, entity_type='remote', entity_id=3)
+        assert len(report['entities']) == 1
+        assert report['entities'][0]['rx_bytes'] == 12000 - 4000
+        assert report['entities'][0]['availability_pct'] == 50.0
+
+        stats = tracker.get_statistics()
+        assert stats['oldest_sample'] == (now - timedelta(hours=2)).isoformat(), stats
+        print("  [PASS] test_reads_on_compact_layout")
+    finally:
+        cleanup_db(db_path)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("BANDWIDTH STORAGE TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Migration", [
+            test_migration_converts_legacy_rows,
+            test_adopted_database_keeps_samples,
+        ]),
+        ("Writes", [
+            test_one_transaction_per_sweep,
+        ]),
+        ("Reads", [
+            test_reads_on_compact_layout,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
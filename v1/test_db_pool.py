@@ -0,0 +1,428 @@
+"""
+Tests for the Database Layer
+
+Covers:
+1. db_pool.py - Per-thread pooled connections, read-only pool, statistics
+2. migrations.py - PRAGMA user_version schema versioning
+
+Run with: python3 v1/test_db_pool.py
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.db_pool import (
+    get_pool, get_connection, get_read_connection, close_pools, pool_stats,
+)
+from v1.migrations import ensure_schema, SCHEMA_VERSION, MIGRATIONS
+from v1.schema_semantic import WireGuardDBv2
+from v1.bandwidth_tracking import BandwidthTracker
+
+
+# =============================================================================
+# TEST FIXTURES
+# =============================================================================
+
+def create_temp_db_path(suffix=''):
+    """Reserve a temporary database path"""
+    with tempfile.NamedTemporaryFile(suffix=f'{suffix}.db', delete=False) as f:
+        db_path = str(f.name)
+    os.unlink(db_path)
+    return db_path
+
+
+def cleanup_db(db_path):
+    """Close pooled handles and remove the database files"""
+    close_pools(db_path)
+    for path in (db_path, db_path + '-wal', db_path + '-shm'):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+# =============================================================================
+# CONNECTION POOL TESTS
+# =============================================================================
+
+def test_pool_reuses_connection_per_thread():
+    """Repeated acquires on one thread return the same connection"""
+    db_path = create_temp_db_path('-pool-reuse')
+    try:
+        conn1 = get_connection(db_path)
+        conn1.close()
+        conn2 = get_connection(db_path)
+        conn2.close()
+
+        assert conn1 is conn2, "Expected the pooled connection to be reused"
+        stats = get_pool(db_path).stats
+        assert stats.misses == 1, f"Expected 1 miss, got {stats.misses}"
+        assert stats.hits == 1, f"Expected 1 hit, got {stats.hits}"
+        print("  [PASS] test_pool_reuses_connection_per_thread")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_pool_wal_and_pragmas():
+    """Read-write connections run in WAL mode with foreign keys on"""
+    db_path = create_temp_db_path('-pool-wal')
+    try:
+        conn = get_connection(db_path)
+        try:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            fk = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+            sync = conn.execute("PRAGMA synchronous").fetchone()[0]
+        finally:
+            conn.close()
+
+        assert mode == 'wal', f"Expected WAL, got {mode}"
+        assert fk == 1, "Expected foreign_keys enabled"
+        assert sync == 1, f"Expected synchronous=NORMAL (1), got {sync}"
+        print("  [PASS] test_pool_wal_and_pragmas")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_pool_separate_connection_per_thread():
+    """Each thread gets its own connection"""
+    db_path = create_temp_db_path('-pool-threads')
+    try:
+        main_conn = get_connection(db_path)
+        main_conn.close()
+
+        seen = []
+
+        def worker():
+            conn = get_connection(db_path)
+            seen.append(conn)
+            conn.execute("SELECT 1").fetchone()
+            conn.close()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert seen and seen[0] is not main_conn, "Threads must not share connections"
+        print("  [PASS] test_pool_separate_connection_per_thread")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_pool_release_rolls_back_uncommitted():
+    """close() without commit discards pending work, like sqlite3"""
+    db_path = create_temp_db_path('-pool-rollback')
+    try:
+        conn = get_connection(db_path)
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.close()
+
+        conn = get_connection(db_path)
+        count = conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+        conn.close()
+
+        assert count == 0, f"Expected uncommitted insert to be rolled back, got {count}"
+        print("  [PASS] test_pool_release_rolls_back_uncommitted")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_pool_nested_acquire_keeps_outer_transaction():
+    """An inner release does not roll back the outer caller's work"""
+    db_path = create_temp_db_path('-pool-nested')
+    try:
+        outer = get_connection(db_path)
+        outer.execute("CREATE TABLE t (x INTEGER)")
+        outer.commit()
+        outer.execute("INSERT INTO t VALUES (1)")
+
+        inner = get_connection(db_path, row_factory=None)
+        inner.execute("SELECT 1").fetchone()
+        inner.close()
+
+        assert outer.row_factory is sqlite3.Row, "Outer row factory must be restored"
+        outer.commit()
+        count = outer.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+        outer.close()
+
+        assert count == 1, f"Expected outer insert to survive, got {count}"
+        print("  [PASS] test_pool_nested_acquire_keeps_outer_transaction")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_pool_nested_commit_and_rollback_scoped():
+    """An inner commit/rollback only affects the inner caller's own work"""
+    db_path = create_temp_db_path('-pool-savepoint')
+    try:
+        outer = get_connection(db_path)
+        outer.execute("CREATE TABLE t (x INTEGER)")
+        outer.commit()
+        outer.execute("INSERT INTO t VALUES (1)")
+
+        inner = get_connection(db_path)
+        inner.execute("INSERT INTO t VALUES (2)")
+        inner.rollback()
+        inner.execute("INSERT INTO t VALUES (3)")
+        inner.commit()
+        inner.execute("INSERT INTO t VALUES (4)")
+        inner.close()                   # uncommitted: discarded
+
+        assert outer.in_transaction, "Inner commit must not end the outer transaction"
+        outer.rollback()
+        assert outer.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+        outer.execute("INSERT INTO t VALUES (1)")
+        with get_pool(db_path).connection() as inner:
+            inner.execute("INSERT INTO t VALUES (3)")
+        outer.commit()
+        rows = [r[0] for r in outer.execute("SELECT x FROM t ORDER BY x")]
+        outer.close()
+
+        assert rows == [1, 3], rows
+        print("  [PASS] test_pool_nested_commit_and_rollback_scoped")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_read_only_pool_rejects_writes():
+    """Read-only connections cannot modify the database"""
+    db_path = create_temp_db_path('-pool-ro')
+    try:
+        WireGuardDBv2(db_path)
+
+        conn = get_read_connection(db_path)
+        try:
+            conn.execute("SELECT COUNT(*) FROM remote").fetchone()
+            try:
+                conn.execute("DELETE FROM remote")
+                raised = False
+            except sqlite3.OperationalError:
+                raised = True
+        finally:
+            conn.close()
+
+        assert raised, "Expected write on read-only connection to fail"
+        assert (os.path.abspath(db_path) + ':ro') in pool_stats()
+        print("  [PASS] test_read_only_pool_rejects_writes")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_pool_file_copy_sees_committed_data():
+    """Copying the database file after a write captures the write"""
+    db_path = create_temp_db_path('-pool-copy')
+    copy_path = db_path + '.copy'
+    try:
+        db = WireGuardDBv2(db_path)
+        with db._connection() as conn:
+            conn.execute("INSERT INTO sponsor (name) VALUES ('Mullvad')")
+
+        shutil.copy2(db_path, copy_path)
+
+        copy_conn = sqlite3.connect(copy_path)
+        count = copy_conn.execute("SELECT COUNT(*) FROM sponsor").fetchone()[0]
+        copy_conn.close()
+
+        assert count == 1, f"Expected copied file to contain the sponsor, got {count}"
+        print("  [PASS] test_pool_file_copy_sees_committed_data")
+    finally:
+        cleanup_db(db_path)
+        cleanup_db(copy_path)
+
+
+def test_pool_reopens_after_file_replaced():
+    """A pooled handle to a deleted database is discarded"""
+    db_path = create_temp_db_path('-pool-replace')
+    try:
+        WireGuardDBv2(db_path)
+        for path in (db_path, db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(path):
+                os.unlink(path)
+
+        # Recreate with the pool's stale handle still cached
+        conn = get_connection(db_path)
+        conn.execute("CREATE TABLE fresh (x INTEGER)")
+        conn.commit()
+        conn.close()
+
+        conn = get_connection(db_path)
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        conn.close()
+
+        assert tables == ['fresh'], f"Expected only the new table, got {tables}"
+        assert get_pool(db_path).stats.invalidations >= 1, "Expected stale handle to be discarded"
+        print("  [PASS] test_pool_reopens_after_file_replaced")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# MIGRATION TESTS
+# =============================================================================
+
+def test_fresh_database_reaches_schema_version():
+    """A new database gets every migration and the current user_version"""
+    db_path = create_temp_db_path('-mig-fresh')
+    try:
+        WireGuardDBv2(db_path)
+
+        conn = get_connection(db_path)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+        conn.close()
+
+        assert version == SCHEMA_VERSION, f"Expected v{SCHEMA_VERSION}, got v{version}"
+        for table in ('remote', 'sponsor', 'bandwidth_sample', 'audit_log', 'alert_rule',
+                      'webhook_endpoint', 'exit_node_group', 'backup_history',
+                      'rotation_policy', 'drift_scan'):
+            assert table in tables, f"Missing table {table}"
+        print("  [PASS] test_fresh_database_reaches_schema_version")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_schema_inside_caller_transaction():
+    """Migrating inside an open transaction leaves commit/rollback to the caller"""
+    db_path = create_temp_db_path('-mig-nested')
+    try:
+        outer = get_connection(db_path)
+        outer.execute("CREATE TABLE t (x INTEGER)")
+        outer.commit()
+        outer.execute("INSERT INTO t VALUES (1)")
+
+        assert ensure_schema(db_path) == len(MIGRATIONS)
+        assert outer.in_transaction, "ensure_schema must not end the caller's transaction"
+        outer.rollback()
+
+        version = outer.execute("PRAGMA user_version").fetchone()[0]
+        count = outer.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+        outer.close()
+
+        assert (version, count) == (0, 0), (version, count)
+
+        # Committed by the caller, the migrations stick
+        outer = get_connection(db_path)
+        outer.execute("INSERT INTO t VALUES (2)")
+        assert ensure_schema(db_path) == len(MIGRATIONS)
+        outer.commit()
+        version = outer.execute("PRAGMA user_version").fetchone()[0]
+        tables = {row[0] for row in outer.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        count = outer.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+        outer.close()
+
+        assert (version, count) == (SCHEMA_VERSION, 1), (version, count)
+        assert {'t', 'remote', 'audit_log'} <= tables, tables
+        assert ensure_schema(db_path) == 0
+        print("  [PASS] test_schema_inside_caller_transaction")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_current_database_skips_migrations():
+    """Opening a current database applies nothing"""
+    db_path = create_temp_db_path('-mig-current')
+    try:
+        assert ensure_schema(db_path) == len(MIGRATIONS)
+        assert ensure_schema(db_path) == 0, "Expected no migrations on second open"
+
+        # Manager constructors no longer run DDL either
+        BandwidthTracker(db_path)
+        assert ensure_schema(db_path) == 0
+        print("  [PASS] test_current_database_skips_migrations")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_unversioned_database_is_adopted():
+    """A pre-versioning database (user_version 0) migrates in place"""
+    db_path = create_temp_db_path('-mig-legacy')
+    try:
+        WireGuardDBv2(db_path)
+        conn = get_connection(db_path)
+        conn.execute("INSERT INTO sponsor (name) VALUES ('Legacy')")
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+        conn.close()
+
+        applied = ensure_schema(db_path)
+
+        conn = get_connection(db_path)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        sponsors = conn.execute("SELECT COUNT(*) FROM sponsor").fetchone()[0]
+        conn.close()
+
+        assert applied == len(MIGRATIONS), f"Expected baseline re-applied, got {applied}"
+        assert version == SCHEMA_VERSION
+        assert sponsors == 1, "Existing data must survive the baseline migrations"
+        print("  [PASS] test_unversioned_database_is_adopted")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# TEST RUNNER
+# =============================================================================
+
+def main():
+    print("=" * 60)
+    print("DATABASE LAYER TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Connection Pool", [
+            test_pool_reuses_connection_per_thread,
+            test_pool_wal_and_pragmas,
+            test_pool_separate_connection_per_thread,
+            test_pool_release_rolls_back_uncommitted,
+            test_pool_nested_acquire_keeps_outer_transaction,
+            test_pool_nested_commit_and_rollback_scoped,
+            test_read_only_pool_rejects_writes,
+            test_pool_file_copy_sees_committed_data,
+            test_pool_reopens_after_file_replaced,
+        ]),
+        ("Schema Migrations", [
+            test_fresh_database_reaches_schema_version,
+            test_schema_inside_caller_transaction,
+            test_current_database_skips_migrations,
+            test_unversioned_database_is_adopted,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
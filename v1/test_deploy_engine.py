@@ -0,0 +1,627 @@
+"""
+Tests for the Deploy Engine
+
+Covers:
+1. Scheduling - bounded parallelism, coordination server last, result order
+2. Failures - per-host timeouts, exceptions, skipped coordination server
+3. Output - per-host capture in parallel workers
+4. Targets - collect_targets from a database
+5. Skip unchanged - remote checksum comparison before upload
+6. Live apply - peer diff, restart decision, wg syncconf
+7. Waves - canary planning, health gates, stop and roll back
+
+Run with: python3 v1/test_deploy_engine.py
+"""
+
+import hashlib
+import os
+import stat
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import datetime, timedelta
+
+from v1.deploy_engine import (
+    Deadline, DeployTarget, HostResult, emit, format_results, plan_waves, remaining, run_deployments,
+    run_waves,
+)
+from v1.deploy_health import HandshakeCheck, HealthGate
+from v1.cli.deploy import collect_targets, deploy_host, remote_config_hash, rollback_host
+from v1.config_diff import diff_configs
+from v1.test_generation_engine import create_test_network, cleanup_db
+from v1.test_ssh_sessions import FakeSSH
+
+
+def make_targets(peers=6, hub=True):
+    """A coordination server followed by N subnet routers"""
+    targets = []
+    if hub:
+        targets.append(DeployTarget('coordination_server', 'hub', Path('coordination.conf'), 'hub.example.com'))
+    for i in range(peers):
+        targets.append(DeployTarget('subnet_router', f'router-{i}', Path(f'router-{i}.conf'), f'10.0.0.{i}'))
+    return targets
+
+
+# =============================================================================
+# SCHEDULING TESTS
+# =============================================================================
+
+def test_parallel_is_bounded():
+    """At most `parallel` hosts are deployed at once"""
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def deploy(target, deadline):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.02)
+        with lock:
+            state['running'] -= 1
+        return 'deployed', ''
+
+    results = run_deployments(make_targets(peers=10), deploy, parallel=3)
+    assert all(r.ok for r in results)
+    assert state['peak'] == 3, f"Expected 3 hosts in flight, saw {state['peak']}"
+    print("  [PASS] test_parallel_is_bounded")
+
+
+def test_parallel_is_faster_than_serial():
+    """Wall time follows the slowest wave, not the sum of hosts"""
+    def deploy(target, deadline):
+        time.sleep(0.05)
+        return 'deployed', ''
+
+    start = time.monotonic()
+    run_deployments(make_targets(peers=8, hub=False), deploy, parallel=8)
+    elapsed = time.monotonic() - start
+    assert elapsed < 0.05 * 8 / 2, f"8 parallel hosts took {elapsed:.2f}s"
+    print("  [PASS] test_parallel_is_faster_than_serial")
+
+
+def test_coordination_server_last():
+    """The coordination server is deployed after every peer, results keep target order"""
+    order = []
+    lock = threading.Lock()
+
+    def deploy(target, deadline):
+        time.sleep(0.01)
+        with lock:
+            order.append(target.hostname)
+        return 'deployed', ''
+
+    targets = make_targets(peers=5)
+    results = run_deployments(targets, deploy, parallel=4)
+    assert order[-1] == 'hub'
+    assert [r.target.hostname for r in results] == [t.hostname for t in targets]
+    print("  [PASS] test_coordination_server_last")
+
+
+# =============================================================================
+# FAILURE TESTS
+# =============================================================================
+
+def test_failed_peer_skips_coordination_server():
+    """A failed peer keeps the hub on its old config"""
+    def deploy(target, deadline):
+        if target.hostname == 'router-2':
+            raise RuntimeError("connection refused")
+        return 'deployed', ''
+
+    results = {r.target.hostname: r for r in run_deployments(make_targets(peers=4), deploy, parallel=2)}
+    assert results['router-2'].status == 'failed'
+    assert 'connection refused' in results['router-2'].message
+    assert results['hub'].status == 'skipped'
+    assert results['router-1'].ok
+    print("  [PASS] test_failed_peer_skips_coordination_server")
+
+
+def test_host_timeout():
+    """A host past its deadline is reported as 'timeout', others carry on"""
+    def deploy(target, deadline):
+        if target.hostname == 'router-0':
+            # Simulates a hung ssh started with the remaining budget
+            subprocess.run(['sleep', '5'], timeout=remaining(deadline))
+        return 'deployed', ''
+
+    start = time.monotonic()
+    results = run_deployments(make_targets(peers=3, hub=False), deploy, parallel=3, timeout=0.2)
+    assert time.monotonic() - start < 2
+    assert [r.status for r in results] == ['timeout', 'deployed', 'deployed']
+    print("  [PASS] test_host_timeout")
+
+
+def test_deadline_expires():
+    """Deadline.remaining() raises once the budget is spent"""
+    assert remaining(None) is None
+    assert Deadline(None).remaining() is None
+
+    deadline = Deadline(0.01)
+    assert 0 < deadline.remaining() <= 0.01
+
+    def deploy(target, deadline):
+        time.sleep(0.02)
+        remaining(deadline)
+        return 'deployed', ''
+
+    results = run_deployments(make_targets(peers=1, hub=False), deploy, timeout=0.01)
+    assert results[0].status == 'timeout'
+    print("  [PASS] test_deadline_expires")
+
+
+# =============================================================================
+# OUTPUT TESTS
+# =============================================================================
+
+def test_output_captured_per_host():
+    """Parallel workers log to their own host instead of stdout"""
+    def deploy(target, deadline):
+        for step in range(3):
+            emit(f"{target.hostname} step {step}")
+            time.sleep(0.001)
+        return 'deployed', ''
+
+    results = run_deployments(make_targets(peers=4, hub=False), deploy, parallel=4)
+    for r in results:
+        assert r.log == [f"{r.target.hostname} step {i}" for i in range(3)]
+
+    table = format_results(results)
+    assert 'router-3' in table and 'deployed' in table
+    print("  [PASS] test_output_captured_per_host")
+
+
+def test_serial_output_not_captured():
+    """With parallel=1 output is printed live, as before"""
+    def deploy(target, deadline):
+        emit(f"  Deploy: {target.hostname}")
+        return 'deployed', ''
+
+    results = run_deployments(make_targets(peers=1, hub=False), deploy)
+    assert results[0].log == []
+    print("  [PASS] test_serial_output_not_captured")
+
+
+# =============================================================================
+# TARGET TESTS
+# =============================================================================
+
+def test_collect_targets():
+    """Hosts with an SSH endpoint become targets, coordination server first"""
+    db, db_path = create_test_network(remotes=2, suffix='_deploy')
+    try:
+        with db._connection() as conn:
+            conn.execute("UPDATE subnet_router SET endpoint = 'gw.example.com' WHERE hostname = 'router-1'")
+            conn.execute("UPDATE exit_node SET ssh_host = 'exit.example.com', ssh_user = 'admin', ssh_port = 2222")
+
+        targets = collect_targets(db, Path('generated'), user='deployer')
+        assert [(t.entity_type, t.hostname) for t in targets] == [
+            ('coordination_server', 'hub'),
+            ('subnet_router', 'router-1'),
+            ('exit_node', 'exit-1'),
+        ]
+        assert targets[0].user == 'deployer'
+        assert targets[1].config_file == Path('generated') / 'router-1.conf'
+        assert targets[2].endpoint == 'exit.example.com:2222'
+        assert targets[2].user == 'admin'
+    finally:
+        cleanup_db(db_path)
+    print("  [PASS] test_collect_targets")
+
+
+# =============================================================================
+# SKIP UNCHANGED TESTS
+# =============================================================================
+
+def test_remote_config_hash():
+    """One SSH command reports the installed config's sha256 (or its absence)"""
+    fake = FakeSSH(remote=True)
+    fake.install()
+    try:
+        assert remote_config_hash('gw.example.com', '/etc/wireguard/wg0.conf') == ''
+        (fake.remote / 'wg0.conf').write_text('[Interface]\n')
+        digest = remote_config_hash('gw.example.com', '/etc/wireguard/wg0.conf')
+        assert digest == hashlib.sha256(b'[Interface]\n').hexdigest()
+        assert len([c for c in fake.calls() if c[0] == 'ssh' and c[1] not in ('master', 'check')]) == 2
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_remote_config_hash")
+
+
+def test_unchanged_host_skipped():
+    """Identical config: no backup, upload or restart"""
+    fake = FakeSSH(remote=True)
+    fake.install()
+    try:
+        config = fake.root / 'gw.conf'
+        config.write_text('[Interface]\nPrivateKey = abc\n')
+        target = DeployTarget('subnet_router', 'gw', config, 'gw.example.com')
+
+        status, _ = deploy_host(target)
+        assert status == 'deployed'
+        assert (fake.remote / 'wg0.conf').read_text() == config.read_text()
+
+        before = len(fake.calls())
+        status, message = deploy_host(target, restart=True)
+        assert (status, message) == ('unchanged', 'identical config')
+        commands = [c[2] for c in fake.calls()[before:] if c[1] not in ('master', 'check')]
+        assert len(commands) == 1 and 'sha256sum' in commands[0], commands
+        assert not any(f.name.startswith('wg0.conf.backup') for f in fake.remote.iterdir())
+
+        # --force redeploys anyway (and backs up the installed config)
+        status, _ = deploy_host(target, force=True)
+        assert status == 'deployed'
+        assert any(f.name.startswith('wg0.conf.backup') for f in fake.remote.iterdir())
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_unchanged_host_skipped")
+
+
+def test_changed_host_updated():
+    """A differing config is backed up and replaced"""
+    fake = FakeSSH(remote=True)
+    fake.install()
+    try:
+        (fake.remote / 'wg0.conf').write_text('[Interface]\nPrivateKey = old\n')
+        config = fake.root / 'gw.conf'
+        config.write_text('[Interface]\nPrivateKey = new\n')
+
+        status, _ = deploy_host(DeployTarget('subnet_router', 'gw', config, 'gw.example.com'))
+        assert status == 'deployed'
+        assert (fake.remote / 'wg0.conf').read_text() == config.read_text()
+        backups = [f for f in fake.remote.iterdir() if f.name.startswith('wg0.conf.backup')]
+        assert len(backups) == 1 and 'old' in backups[0].read_text()
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_changed_host_updated")
+
+
+# =============================================================================
+# LIVE APPLY TESTS
+# =============================================================================
+
+HUB_CONFIG = """[Interface]
+Address = 10.66.0.1/24, fd66::1/64
+PrivateKey = cs-priv
+ListenPort = 51820
+
+[Peer]
+# router-1
+PublicKey = router-pub-1
+AllowedIPs = 10.66.0.2/32, 192.168.1.0/24
+
+[Peer]
+# laptop
+PublicKey = laptop-pub
+AllowedIPs = 10.66.0.30/32
+"""
+
+# What `wg showconf` prints for HUB_CONFIG: no wg-quick fields, roamed endpoints
+HUB_RUNNING = """[Interface]
+ListenPort = 51820
+PrivateKey = cs-priv
+
+[Peer]
+PublicKey = router-pub-1
+AllowedIPs = 10.66.0.2/32, 192.168.1.0/24
+Endpoint = 203.0.113.7:41234
+
+[Peer]
+PublicKey = laptop-pub
+AllowedIPs = 10.66.0.30/32
+Endpoint = 198.51.100.2:50000
+"""
+
+
+def test_peer_diff():
+    """Added, removed and changed peers; roamed endpoints are not changes"""
+    new = HUB_CONFIG.replace("10.66.0.30/32", "10.66.0.30/32, fd66::30/128").replace(
+        "# router-1\nPublicKey = router-pub-1\nAllowedIPs = 10.66.0.2/32, 192.168.1.0/24\n\n", "")
+    new += "\n[Peer]\n# phone\nPublicKey = phone-pub\nAllowedIPs = 10.66.0.31/32\n"
+
+    # Same config: nothing to apply
+    diff = diff_configs(HUB_CONFIG, HUB_RUNNING, HUB_CONFIG)
+    assert not diff.has_peer_changes and not diff.needs_restart, diff
+
+    diff = diff_configs(HUB_CONFIG, HUB_RUNNING, new)
+    assert [p.name for p in diff.added] == ['phone']
+    assert [p.name for p in diff.removed] == ['router-1']
+    assert [(p.name, p.fields) for p in diff.changed] == [('laptop', ['allowed-ips'])]
+    assert diff.summary() == "1 added, 1 removed, 1 changed"
+    assert diff.report_lines() == ['+ phone', '- router-1', '~ laptop (allowed-ips)']
+    # Removing router-1 drops its LAN route: wg-quick has to re-run
+    assert diff.restart_reasons == ['routes changed']
+    print("  [PASS] test_peer_diff")
+
+
+def test_restart_only_for_interface_changes():
+    """VPN-subnet peers apply live; [Interface] and route changes need a restart"""
+    new = HUB_CONFIG + "\n[Peer]\n# phone\nPublicKey = phone-pub\nAllowedIPs = 10.66.0.31/32, fd66::31/128\n"
+    diff = diff_configs(HUB_CONFIG, HUB_RUNNING, new)
+    assert not diff.needs_restart and [p.name for p in diff.added] == ['phone']
+
+    diff = diff_configs(HUB_CONFIG, HUB_RUNNING, new.replace("ListenPort = 51820", "ListenPort = 51821"))
+    assert diff.restart_reasons == ["[Interface] changed (listenport)"]
+
+    diff = diff_configs(HUB_CONFIG, HUB_RUNNING, new.replace("10.66.0.31/32,", "10.66.0.31/32, 192.168.50.0/24,"))
+    assert diff.restart_reasons == ["routes changed"]
+
+    diff = diff_configs(HUB_CONFIG, "", new)
+    assert diff.restart_reasons == ["interface not running"]
+    assert len(diff.added) == 3
+    print("  [PASS] test_restart_only_for_interface_changes")
+
+
+FAKE_WG = """#!/bin/sh
+echo "$(basename $0) $*" >> "$FAKE_REMOTE_ROOT/wg.log"
+case "$(basename $0) $1" in
+    "wg showconf") cat "$FAKE_REMOTE_ROOT/running.conf" 2>/dev/null || exit 1 ;;
+    "wg-quick strip") grep -v '^Address' "$FAKE_REMOTE_ROOT/$2.conf" ;;
+    "wg show") cat "$FAKE_REMOTE_ROOT/dump.txt" ;;
+esac
+"""
+
+
+def install_fake_wg(fake: FakeSSH):
+    """wg / wg-quick stand-ins for the fake remote, logging to remote/wg.log"""
+    bin_dir = fake.root / 'bin'
+    bin_dir.mkdir()
+    for name in ('wg', 'wg-quick'):
+        binary = bin_dir / name
+        binary.write_text(FAKE_WG)
+        binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    return f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+
+
+def test_hot_deploy_applies_live():
+    """--hot uploads, then syncs peers without wg-quick down/up"""
+    fake = FakeSSH(remote=True)
+    fake.install()
+    saved_path = os.environ['PATH']
+    os.environ['PATH'] = install_fake_wg(fake)
+    try:
+        (fake.remote / 'wg0.conf').write_text(HUB_CONFIG)
+        (fake.remote / 'running.conf').write_text(HUB_RUNNING)
+        config = fake.root / 'coordination.conf'
+        config.write_text(HUB_CONFIG + "\n[Peer]\n# phone\nPublicKey = phone-pub\nAllowedIPs = 10.66.0.31/32\n")
+        target = DeployTarget('coordination_server', 'hub', config, 'hub.example.com')
+
+        status, message = deploy_host(target, hot=True)
+        assert (status, message) == ('deployed', 'live: 1 added, 0 removed, 0 changed'), message
+        wg_log = (fake.remote / 'wg.log').read_text()
+        assert 'wg syncconf wg0' in wg_log and 'wg-quick strip wg0' in wg_log
+        assert 'wg-quick up' not in wg_log
+        assert (fake.remote / 'wg0.conf').read_text() == config.read_text()
+
+        # An [Interface] change falls back to a restart
+        config.write_text(config.read_text().replace("ListenPort = 51820", "ListenPort = 51821"))
+        status, message = deploy_host(target, hot=True)
+        assert status == 'deployed' and message.startswith('restarted: [Interface] changed')
+        assert 'wg-quick up wg0' in (fake.remote / 'wg.log').read_text()
+    finally:
+        os.environ['PATH'] = saved_path
+        fake.cleanup()
+    print("  [PASS] test_hot_deploy_applies_live")
+
+
+# =============================================================================
+# WAVE TESTS
+# =============================================================================
+
+def test_plan_waves():
+    """Canary, fixed-size waves, coordination server alone at the end"""
+    names = lambda waves: [[t.hostname for t in wave] for wave in waves]
+    targets = make_targets(peers=7)
+    assert names(plan_waves(targets, canary=1, wave_size=3)) == [
+        ['router-0'], ['router-1', 'router-2', 'router-3'], ['router-4', 'router-5', 'router-6'], ['hub']]
+    assert names(plan_waves(targets, canary=0, wave_size=5))[1:] == [
+        ['router-0', 'router-1', 'router-2', 'router-3', 'router-4'], ['router-5', 'router-6'], ['hub']]
+    print("  [PASS] test_plan_waves")
+
+
+def test_unhealthy_wave_rolls_back():
+    """A wave failing its gate is rolled back; later waves and the hub are skipped"""
+    rolled_back = []
+
+    def health_check(results, since):
+        names = [r.target.hostname for r in results]
+        return ["router-2: no recent handshake"] if 'router-2' in names else []
+
+    def rollback(target):
+        rolled_back.append(target.hostname)
+        return True, "rolled back"
+
+    targets = make_targets(peers=6)
+    results, waves = run_waves(targets, lambda t, d: ('deployed', ''), health_check, rollback,
+                               canary=1, wave_size=2, parallel=2)
+    status = {r.target.hostname: r.status for r in results}
+    assert status == {
+        'hub': 'skipped', 'router-0': 'deployed',
+        'router-1': 'rolled_back', 'router-2': 'rolled_back',
+        'router-3': 'skipped', 'router-4': 'skipped', 'router-5': 'skipped',
+    }, status
+    assert sorted(rolled_back) == ['router-1', 'router-2']
+    assert [w.ok for w in waves] == [True, False, True, True, True]
+    assert waves[1].problems == ["router-2: no recent handshake"]
+    assert results[0].message == "rollout stopped after wave 1"
+    print("  [PASS] test_unhealthy_wave_rolls_back")
+
+
+def test_failed_canary_stops_rollout():
+    """A host failing in the canary stops everything; its backup is restored"""
+    def deploy(target, deadline):
+        if target.hostname == 'router-0':
+            return 'failed', 'restart failed'
+        return 'deployed', ''
+
+    results, waves = run_waves(make_targets(peers=3), deploy, None, lambda t: (True, "rolled back"),
+                               canary=1, wave_size=5)
+    assert [r.status for r in results] == ['skipped', 'failed', 'skipped', 'skipped']
+    assert results[1].message == "restart failed; rolled back"
+    assert waves[0].problems == ["router-0: failed restart failed"]
+    print("  [PASS] test_failed_canary_stops_rollout")
+
+
+def test_health_gate_waits_to_settle():
+    """Problems that clear within the settle time don't fail the wave"""
+    class Flaky:
+        calls = 0
+
+        def baseline(self):
+            pass
+
+        def problems(self, results, since):
+            self.calls += 1
+            return ["router-0: no handshake since restart"] if self.calls < 3 else []
+
+    sleeps = []
+    gate = HealthGate([Flaky()], settle=10, poll_interval=2, sleep=sleeps.append)
+    assert gate.check([], datetime.now()) == []
+    assert sleeps == [2, 2]
+
+    gate = HealthGate([Flaky()], settle=0)
+    assert gate.check([], datetime.now()) == ["router-0: no handshake since restart"]
+    print("  [PASS] test_health_gate_waits_to_settle")
+
+
+def write_dump(path: Path, handshakes: dict):
+    """`wg show all dump` with the given public key -> handshake time"""
+    lines = ["wg0\tcs-priv\tcs-pub\t51820\toff"]
+    for key, when in handshakes.items():
+        ts = int(when.timestamp()) if when else 0
+        lines.append(f"wg0\t{key}\t(none)\t(none)\t10.66.0.2/32\t{ts}\t100\t200\t25")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_handshake_check():
+    """Connected peers must stay connected; restarted ones must re-handshake"""
+    db, db_path = create_test_network(remotes=1, suffix='_waves')
+    fake = FakeSSH(remote=True)
+    fake.install()
+    saved_path = os.environ['PATH']
+    os.environ['PATH'] = install_fake_wg(fake)
+    try:
+        hub = DeployTarget('coordination_server', 'hub', Path('coordination.conf'), 'vpn.example.com')
+        now = datetime.now()
+        write_dump(fake.remote / 'dump.txt', {
+            'router-pub-1': now - timedelta(seconds=30),
+            'router-pub-2': None,                         # down before the rollout
+        })
+        check = HandshakeCheck(db_path, hub)
+        check.baseline()
+        assert check.connected == {('subnet_router', 'router-1')}
+
+        router_1 = DeployTarget('subnet_router', 'router-1', Path('router-1.conf'), 'gw1')
+        router_2 = DeployTarget('subnet_router', 'router-2', Path('router-2.conf'), 'gw2')
+        wave = [HostResult(router_1, 'deployed', message='restarted'), HostResult(router_2, 'deployed')]
+
+        # router-1 restarted but its last handshake predates the wave
+        assert check.problems(wave, since=now) == ["router-1: no handshake since restart"]
+
+        write_dump(fake.remote / 'dump.txt', {'router-pub-1': now + timedelta(seconds=2)})
+        assert check.problems(wave, since=now) == []
+    finally:
+        os.environ['PATH'] = saved_path
+        fake.cleanup()
+        cleanup_db(db_path)
+    print("  [PASS] test_handshake_check")
+
+
+def test_rollback_restores_backup():
+    """rollback_host restores the backup the rollout made"""
+    fake = FakeSSH(remote=True)
+    fake.install()
+    try:
+        (fake.remote / 'wg0.conf').write_text('[Interface]\nPrivateKey = old\n')
+        config = fake.root / 'gw.conf'
+        config.write_text('[Interface]\nPrivateKey = new\n')
+        target = DeployTarget('subnet_router', 'gw', config, 'gw.example.com')
+
+        assert deploy_host(target, backup_id='rollout1')[0] == 'deployed'
+        assert (fake.remote / 'wg0.conf.backup.rollout1').exists()
+
+        assert rollback_host(target, 'rollout1') == (True, "rolled back to backup rollout1")
+        assert 'old' in (fake.remote / 'wg0.conf').read_text()
+        assert rollback_host(target, 'missing') == (False, "no backup to restore")
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_rollback_restores_backup")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("DEPLOY ENGINE TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Scheduling", [
+            test_parallel_is_bounded,
+            test_parallel_is_faster_than_serial,
+            test_coordination_server_last,
+        ]),
+        ("Failures", [
+            test_failed_peer_skips_coordination_server,
+            test_host_timeout,
+            test_deadline_expires,
+        ]),
+        ("Output", [
+            test_output_captured_per_host,
+            test_serial_output_not_captured,
+        ]),
+        ("Targets", [
+            test_collect_targets,
+        ]),
+        ("Skip Unchanged", [
+            test_remote_config_hash,
+            test_unchanged_host_skipped,
+            test_changed_host_updated,
+        ]),
+        ("Live Apply", [
+            test_peer_diff,
+            test_restart_only_for_interface_changes,
+            test_hot_deploy_applies_live,
+        ]),
+        ("Waves", [
+            test_plan_waves,
+            test_unhealthy_wave_rolls_back,
+            test_failed_canary_stops_rollout,
+            test_health_gate_waits_to_settle,
+            test_handshake_check,
+            test_rollback_restores_backup,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,705 @@
+"""
+Tests for Key Encryption
+
+Covers:
+1. SecureColumn - cached cipher, batch encrypt/decrypt, pickling
+2. EncryptionManager - decrypt_many, plaintext cache, lock()
+3. Callers - config generation and key export on an encrypted database
+4. unlock_agent.py - key caching daemon (TTL, idle timeout, fallback)
+5. Envelope encryption - passphrase rewrap, resumable data key rotation
+
+Key derivation (Scrypt, n=2^20) takes seconds, so one unlocked manager is
+created per run and cloned with pickle for each test.
+
+Run with: python3 v1/test_encryption.py
+"""
+
+import atexit
+import json
+import os
+import pickle
+import shutil
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.db_pool import get_connection
+from v1.encryption import (
+    EncryptionManager, SecureColumn, PlaintextCache, ENCRYPTED_PREFIX, SENSITIVE_COLUMNS,
+    set_active_encryption_manager, decrypt_many, plaintext_cache,
+)
+from v1.disaster_recovery import DisasterRecovery
+from v1.unlock_agent import AgentClient, UnlockAgent, peer_uid
+from v1.test_generation_engine import create_test_network, cleanup_db, run_generate, read_tree
+
+
+# =============================================================================
+# TEST FIXTURES
+# =============================================================================
+
+PASSPHRASE = 'test-passphrase'
+
+_encrypted = None
+
+
+def add_preshared_keys(db_path):
+    """Give every other remote a preshared key"""
+    conn = get_connection(db_path)
+    try:
+        conn.execute("UPDATE remote SET preshared_key = 'psk-' || id WHERE id % 2 = 0")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def encrypted_network():
+    """
+    (plain_db_path, encrypted_db_path, unlocked manager) - built once.
+
+    Both databases hold the same keys; the second has encryption enabled.
+    Callers get their own copy of the manager.
+    """
+    global _encrypted
+    if _encrypted is None:
+        from v1.encryption import EncryptionManager
+
+        _, plain_path = create_test_network(remotes=10, suffix='-enc-plain')
+        add_preshared_keys(plain_path)
+        _, encrypted_path = create_test_network(remotes=10, suffix='-enc')
+        add_preshared_keys(encrypted_path)
+
+        manager = EncryptionManager(encrypted_path)
+        manager.enable_encryption(PASSPHRASE)
+        _encrypted = (plain_path, encrypted_path, manager)
+        atexit.register(cleanup_db, plain_path)
+        atexit.register(cleanup_db, encrypted_path)
+
+    plain_path, encrypted_path, manager = _encrypted
+    return plain_path, encrypted_path, pickle.loads(pickle.dumps(manager))
+
+
+def stored_values(db_path, column, table='remote'):
+    conn = get_connection(db_path)
+    try:
+        rows = conn.execute(f"SELECT {column} FROM {table} ORDER BY id").fetchall()
+        return [row[0] for row in rows]
+    finally:
+        conn.close()
+
+
+# =============================================================================
+# SECURE COLUMN TESTS
+# =============================================================================
+
+def test_cipher_is_reused():
+    """One AESGCM object per key, not one per value"""
+    column = SecureColumn(os.urandom(32))
+    first = column.encrypt("value")
+    assert column._get_cipher() is column._get_cipher()
+    assert column.decrypt(first) == "value"
+    print("  [PASS] test_cipher_is_reused")
+
+
+def test_batch_roundtrip():
+    """encrypt_many/decrypt_many round-trip in order, empty values untouched"""
+    column = SecureColumn(os.urandom(32))
+    values = ["a", "", None, "key-" * 10, "a"]
+    encrypted = column.encrypt_many(values)
+
+    assert encrypted[1] == "" and encrypted[2] is None
+    assert encrypted[0].startswith(ENCRYPTED_PREFIX)
+    assert encrypted[0] != encrypted[4], "Each value needs a fresh nonce"
+    assert column.decrypt_many(encrypted) == values
+    print("  [PASS] test_batch_roundtrip")
+
+
+def test_secure_column_pickles():
+    """The cached cipher is dropped on pickle and rebuilt on use"""
+    column = SecureColumn(os.urandom(32))
+    encrypted = column.encrypt("secret")
+
+    clone = pickle.loads(pickle.dumps(column))
+    assert clone._cipher is None
+    assert clone.decrypt(encrypted) == "secret"
+    print("  [PASS] test_secure_column_pickles")
+
+
+# =============================================================================
+# MANAGER TESTS
+# =============================================================================
+
+def test_manager_decrypt_many():
+    """decrypt_many matches decrypt() value by value"""
+    plain_path, encrypted_path, manager = encrypted_network()
+    stored = stored_values(encrypted_path, 'preshared_key')
+    assert any(v and v.startswith(ENCRYPTED_PREFIX) for v in stored)
+
+    mixed = stored + ["plain-value", None]
+    assert manager.decrypt_many(mixed) == [manager.decrypt(v) for v in mixed]
+    assert manager.decrypt_many(stored) == stored_values(plain_path, 'preshared_key')
+    print("  [PASS] test_manager_decrypt_many")
+
+
+def test_plaintext_cache_bounds():
+    """Cache evicts least recently used entries and expires by TTL"""
+    cache = PlaintextCache(max_entries=2, ttl=60)
+    cache.put("c1", "p1")
+    cache.put("c2", "p2")
+    assert cache.get("c1") == "p1"      # c1 now most recent
+    cache.put("c3", "p3")
+    assert cache.get("c2") is None, "Least recently used entry should be evicted"
+    assert cache.get("c1") == "p1" and cache.get("c3") == "p3"
+
+    short = PlaintextCache(max_entries=10, ttl=0.05)
+    short.put("c", "p")
+    time.sleep(0.1)
+    assert short.get("c") is None, "Expired entries must not be returned"
+    assert len(short) == 0
+    print("  [PASS] test_plaintext_cache_bounds")
+
+
+def test_cache_serves_repeats_and_lock_wipes():
+    """Repeat decrypts hit the cache; lock() wipes it and forgets the key"""
+    _, encrypted_path, manager = encrypted_network()
+    stored = [v for v in stored_values(encrypted_path, 'preshared_key') if v]
+
+    manager.enable_plaintext_cache(max_entries=100, ttl=60)
+    first = manager.decrypt_many(stored)
+    assert manager.decrypt_many(stored) == first
+    cache = manager._plaintext_cache
+    assert cache.hits == len(stored) and cache.misses == len(stored)
+
+    manager.lock()
+    assert len(cache) == 0, "lock() must wipe cached plaintexts"
+    assert not manager.is_unlocked
+    try:
+        manager.decrypt_many(stored)
+        assert False, "Expected locked manager to refuse decryption"
+    except ValueError:
+        pass
+    print("  [PASS] test_cache_serves_repeats_and_lock_wipes")
+
+
+def test_manager_pickle_excludes_plaintexts():
+    """A pickled manager (as sent to worker processes) carries no cached plaintexts"""
+    _, encrypted_path, manager = encrypted_network()
+    stored = [v for v in stored_values(encrypted_path, 'preshared_key') if v]
+
+    manager.enable_plaintext_cache(max_entries=100, ttl=60)
+    expected = manager.decrypt_many(stored)
+
+    clone = pickle.loads(pickle.dumps(manager))
+    assert len(clone._plaintext_cache) == 0
+    assert clone.decrypt_many(stored) == expected
+    print("  [PASS] test_manager_pickle_excludes_plaintexts")
+
+
+def test_plaintext_cache_context_wipes():
+    """plaintext_cache() caches on the active manager only for the block"""
+    _, encrypted_path, manager = encrypted_network()
+    stored = [v for v in stored_values(encrypted_path, 'preshared_key') if v]
+    set_active_encryption_manager(manager)
+    try:
+        with plaintext_cache(max_entries=100):
+            cache = manager._plaintext_cache
+            decrypt_many(stored)
+            assert len(cache) == len(stored)
+        assert manager._plaintext_cache is None and len(cache) == 0
+        print("  [PASS] test_plaintext_cache_context_wipes")
+    finally:
+        set_active_encryption_manager(None)
+
+
+# =============================================================================
+# CALLER TESTS
+# =============================================================================
+
+def test_generate_encrypted_matches_plain():
+    """Generated configs are identical for encrypted and plaintext databases"""
+    plain_path, encrypted_path, manager = encrypted_network()
+    work_dir = Path(tempfile.mkdtemp(prefix='wgf-enc-'))
+    try:
+        run_generate(plain_path, work_dir / 'plain', force=True)
+
+        set_active_encryption_manager(manager)
+        run_generate(encrypted_path, work_dir / 'serial', force=True)
+        run_generate(encrypted_path, work_dir / 'parallel', force=True, jobs=2)
+
+        expected = read_tree(work_dir / 'plain')
+        assert b'PresharedKey = psk-2' in expected['coordination.conf']
+        assert read_tree(work_dir / 'serial') == expected
+        assert read_tree(work_dir / 'parallel') == expected
+        assert manager._plaintext_cache is None, "Run-scoped cache must be removed"
+        print("  [PASS] test_generate_encrypted_matches_plain")
+    finally:
+        set_active_encryption_manager(None)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_generate_refuses_locked_database():
+    """A locked run writes and records nothing, so the next unlocked run renders every config"""
+    _, encrypted_path, manager = encrypted_network()
+    work_dir = Path(tempfile.mkdtemp(prefix='wgf-locked-'))
+    try:
+        set_active_encryption_manager(EncryptionManager(encrypted_path))     # locked
+        assert run_generate(encrypted_path, work_dir) == 1
+        assert not any(work_dir.iterdir())
+
+        set_active_encryption_manager(manager)
+        assert run_generate(encrypted_path, work_dir) == 0
+        configs = read_tree(work_dir)
+        assert len(configs) == 13 and b'PrivateKey = cs-priv' in configs['coordination.conf']
+        assert not any(ENCRYPTED_PREFIX.encode() in data for data in configs.values())
+        print("  [PASS] test_generate_refuses_locked_database")
+    finally:
+        set_active_encryption_manager(None)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_export_keys_decrypts_in_batch():
+    """Key export writes plaintext keys (inside the password-encrypted file)"""
+    plain_path, encrypted_path, manager = encrypted_network()
+    work_dir = Path(tempfile.mkdtemp(prefix='wgf-keys-'))
+    try:
+        set_active_encryption_manager(manager)
+        dr = DisasterRecovery(encrypted_path, str(work_dir / 'backups'))
+        dr._export_keys(work_dir / 'keys', 'backup-password')
+
+        data = (work_dir / 'keys' / 'keys.enc').read_bytes()
+        keys = json.loads(dr._decrypt_data(data, 'backup-password'))
+        assert keys['cs-hub']['private_key'] == 'cs-priv'
+        assert keys['cs-hub']['guid'] == 'cs-guid'
+        assert keys['sr-router-2']['private_key'] == 'router-priv-2'
+        assert not any(k['private_key'].startswith(ENCRYPTED_PREFIX) for k in keys.values())
+        print("  [PASS] test_export_keys_decrypts_in_batch")
+    finally:
+        set_active_encryption_manager(None)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# =============================================================================
+# UNLOCK AGENT TESTS
+# =============================================================================
+
+def running_agent(**options):
+    """(agent, client, thread) for an agent serving a private temp socket"""
+    socket_path = Path(tempfile.mkdtemp(prefix='wgf-agent-')) / 'sock' / 'agent.sock'
+    agent = UnlockAgent(socket_path, **options)
+    agent.bind()
+    thread = threading.Thread(target=agent.serve_forever, daemon=True)
+    thread.start()
+    return agent, AgentClient(socket_path), thread
+
+
+def stop_agent(client, thread):
+    client.stop()
+    thread.join(timeout=5)
+    shutil.rmtree(client.socket_path.parent.parent, ignore_errors=True)
+
+
+def test_agent_stores_keys_privately():
+    """Agent round-trips keys over a socket only this user can reach"""
+    agent, client, thread = running_agent()
+    try:
+        assert (client.socket_path.parent.stat().st_mode & 0o777) == 0o700
+        assert (client.socket_path.stat().st_mode & 0o777) == 0o600
+
+        key = os.urandom(32)
+        assert client.add_key('db-1', key)
+        assert client.get_key('db-1') == key
+        assert client.get_key('db-2') is None
+        assert client.status()['keys'] == 1
+
+        assert client.forget()
+        assert client.get_key('db-1') is None
+        print("  [PASS] test_agent_stores_keys_privately")
+    finally:
+        stop_agent(client, thread)
+    assert not client.socket_path.exists(), "Stopped agent must remove its socket"
+
+
+def test_agent_ttl_and_idle_timeout():
+    """Keys are dropped after the TTL, or earlier when left unused"""
+    agent, client, thread = running_agent(ttl=0.6, idle_timeout=0.3)
+    try:
+        key = os.urandom(32)
+        client.add_key('busy', key)
+        client.add_key('idle', key)
+        for _ in range(3):
+            time.sleep(0.15)
+            assert client.get_key('busy') == key, "Use should keep the key alive"
+        assert client.get_key('idle') is None, "Unused key should hit the idle timeout"
+
+        time.sleep(0.3)
+        assert client.get_key('busy') is None, "TTL applies even to keys in use"
+        print("  [PASS] test_agent_ttl_and_idle_timeout")
+    finally:
+        stop_agent(client, thread)
+
+
+def test_set_active_manager_unlocks_from_agent():
+    """A fresh manager is unlocked from the agent without Scrypt"""
+    from v1.encryption import EncryptionManager, get_active_encryption_manager
+
+    plain_path, encrypted_path, manager = encrypted_network()
+    agent, client, thread = running_agent()
+    os.environ['WG_FRIEND_AGENT_SOCK'] = str(client.socket_path)
+    try:
+        assert manager.add_to_agent()
+
+        fresh = EncryptionManager(encrypted_path)
+        start = time.perf_counter()
+        set_active_encryption_manager(fresh)
+        elapsed = time.perf_counter() - start
+        assert fresh.is_unlocked and get_active_encryption_manager() is fresh
+        assert elapsed < 0.5, f"Agent unlock took {elapsed:.3f}s"
+        stored = stored_values(encrypted_path, 'private_key')
+        assert decrypt_many(stored) == stored_values(plain_path, 'private_key')
+
+        # A wrong key (e.g. left over from an old passphrase) is rejected and forgotten
+        key_id = fresh._agent_key_id()
+        client.add_key(key_id, os.urandom(32))
+        other = EncryptionManager(encrypted_path)
+        assert not other.unlock_from_agent()
+        assert client.get_key(key_id) is None
+        print("  [PASS] test_set_active_manager_unlocks_from_agent")
+    finally:
+        del os.environ['WG_FRIEND_AGENT_SOCK']
+        set_active_encryption_manager(None)
+        stop_agent(client, thread)
+
+
+def test_client_refuses_untrusted_socket():
+    """A socket outside a private directory of ours is never talked to"""
+    agent, client, thread = running_agent()
+    directory = client.socket_path.parent
+    link = directory.parent / 'link'
+    try:
+        assert client.add_key('db-1', os.urandom(32))
+
+        directory.chmod(0o755)
+        assert client.status() is None and not client.add_key('db-2', os.urandom(32))
+        directory.chmod(0o700)
+
+        link.symlink_to(directory)
+        assert AgentClient(link / 'agent.sock').status() is None, "Symlinked directory must be refused"
+
+        a, b = socket.socketpair()
+        with a, b:
+            assert peer_uid(a) in (None, os.getuid())
+        assert client.status()['keys'] == 1
+        print("  [PASS] test_client_refuses_untrusted_socket")
+    finally:
+        directory.chmod(0o700)
+        stop_agent(client, thread)
+
+
+def test_prompt_does_not_push_key_to_agent():
+    """Unlocking at the passphrase prompt leaves the agent empty"""
+    import getpass
+    from v1.encryption import unlock_database
+
+    plain_path, encrypted_path, manager = encrypted_network()
+    agent, client, thread = running_agent()
+    os.environ['WG_FRIEND_AGENT_SOCK'] = str(client.socket_path)
+
+    class Terminal:
+        def isatty(self):
+            return True
+
+    saved = getpass.getpass, sys.stdin
+    getpass.getpass, sys.stdin = (lambda prompt='': PASSPHRASE), Terminal()
+    try:
+        unlocked = unlock_database(encrypted_path)
+        assert unlocked.is_unlocked
+        assert client.status()['keys'] == 0, "Only 'agent add' may hand keys to the agent"
+        print("  [PASS] test_prompt_does_not_push_key_to_agent")
+    finally:
+        getpass.getpass, sys.stdin = saved
+        del os.environ['WG_FRIEND_AGENT_SOCK']
+        set_active_encryption_manager(None)
+        stop_agent(client, thread)
+
+
+def test_no_agent_falls_back():
+    """Without an agent the client answers immediately with nothing"""
+    client = AgentClient(Path(tempfile.gettempdir()) / 'wgf-no-agent' / 'agent.sock')
+    start = time.perf_counter()
+    assert client.get_key('anything') is None
+    assert client.status() is None and not client.forget()
+    assert time.perf_counter() - start < 0.1
+    print("  [PASS] test_no_agent_falls_back")
+
+
+# =============================================================================
+# ENVELOPE ENCRYPTION TESTS
+# =============================================================================
+
+def copy_encrypted_network():
+    """(plain_path, copy of the encrypted db, manager unlocked on the copy)"""
+    plain_path, encrypted_path, manager = encrypted_network()
+    copy_path = tempfile.mktemp(suffix='-envelope.db')
+    source, target = sqlite3.connect(encrypted_path), sqlite3.connect(copy_path)
+    try:
+        source.backup(target)   # includes pages still in the WAL
+    finally:
+        source.close()
+        target.close()
+    atexit.register(cleanup_db, copy_path)
+    copy = EncryptionManager(copy_path)
+    assert copy.unlock_with_key(manager._kek)
+    return plain_path, copy_path, copy
+
+
+def test_passphrase_change_rewraps_only():
+    """A passphrase change leaves every encrypted row byte-for-byte alone"""
+    plain_path, db_path, manager = copy_encrypted_network()
+    before = stored_values(db_path, 'private_key')
+
+    assert manager.change_passphrase(PASSPHRASE, 'another-passphrase')
+    assert stored_values(db_path, 'private_key') == before
+
+    reopened = EncryptionManager(db_path)
+    assert reopened.unlock_with_key(manager._kek)
+    assert reopened.decrypt_many(before) == stored_values(plain_path, 'private_key')
+    print("  [PASS] test_passphrase_change_rewraps_only")
+
+
+def test_dek_rotation_resumes():
+    """Rotation runs in batches, rows stay readable mid-way, and it resumes"""
+    plain_path, db_path, manager = copy_encrypted_network()
+    expected = stored_values(plain_path, 'preshared_key')
+    before = stored_values(db_path, 'preshared_key')
+
+    generation = manager.begin_dek_rotation()
+    progress = manager.rotate_dek_batch(batch_size=5)
+    assert not progress.done and progress.rows_done == 5
+    assert manager.dek_rotation_status().last_id == progress.last_id
+
+    # Another process reads a half-rotated database
+    reader = EncryptionManager(db_path)
+    assert reader.unlock_with_key(manager._kek)
+    assert reader.decrypt_many(stored_values(db_path, 'preshared_key')) == expected
+
+    # ...and finishes the rotation it finds in progress
+    batches = []
+    final = reader.rotate_dek(batch_size=4, progress_callback=batches.append)
+    assert final.done and final.target_generation == generation and len(batches) > 1
+    assert reader.dek_rotation_status() is None
+
+    after = stored_values(db_path, 'preshared_key')
+    assert all(a != b for a, b in zip(after, before) if b)
+    assert manager.decrypt_many(after) == expected
+    assert EncryptionManager(db_path).unlock_with_key(manager._kek)
+    print("  [PASS] test_dek_rotation_resumes")
+
+
+def test_rotation_reencrypts_late_old_key_writes():
+    """A value committed with the old DEK behind the rotation cursor survives the rotation"""
+    plain_path, db_path, manager = copy_encrypted_network()
+    expected = stored_values(plain_path, 'private_key')
+    old_dek = SecureColumn(manager._secure_column._key)
+
+    conn = get_connection(db_path)
+    ids = [row[0] for row in conn.execute("SELECT id FROM remote ORDER BY id")]
+    conn.close()
+    index = next(i for i, value in enumerate(expected) if value)
+
+    manager.begin_dek_rotation()
+    progress = manager.rotate_dek_batch(batch_size=1)
+    while not (progress.table_name == 'remote' and progress.last_id >= ids[index]):
+        progress = manager.rotate_dek_batch(batch_size=1)
+
+    # A writer that checked the generation before the rotation began
+    conn = get_connection(db_path)
+    try:
+        conn.execute("UPDATE remote SET private_key = ? WHERE id = ?",
+                     (old_dek.encrypt(expected[index]), ids[index]))
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert manager.rotate_dek().done
+    fresh = EncryptionManager(db_path)
+    assert fresh.unlock_with_key(manager._kek)
+    assert fresh.decrypt_many(stored_values(db_path, 'private_key')) == expected
+    print("  [PASS] test_rotation_reencrypts_late_old_key_writes")
+
+
+def test_rotation_final_batch_is_bounded():
+    """The last batch re-checks only rows written during the rotation, not every table"""
+    plain_path, db_path, manager = copy_encrypted_network()
+    conn = get_connection(db_path)
+    last_remote = conn.execute("SELECT MAX(id) FROM remote").fetchone()[0]
+    manager.begin_dek_rotation()
+    progress = manager.rotate_dek_batch(batch_size=1)
+    while not (progress.table_name == 'remote' and progress.last_id == last_remote):
+        progress = manager.rotate_dek_batch(batch_size=1)
+
+    conn.execute("UPDATE remote SET preshared_key = ? WHERE id = 2", (manager.encrypt('psk-late'),))
+    conn.commit()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        while not progress.done:
+            progress = manager.rotate_dek_batch(batch_size=1000)
+    finally:
+        conn.set_trace_callback(None)
+
+    full_scans = [s for s in statements if 'SELECT' in s and 'FROM remote' in s and 'WHERE' not in s]
+    assert statements and not full_scans, full_scans
+    leftovers = conn.execute("SELECT COUNT(*) FROM encryption_rewrite").fetchone()[0]
+    triggers = conn.execute("SELECT COUNT(*) FROM sqlite_master "
+                            "WHERE type = 'trigger' AND name LIKE '%_rotation_%'").fetchone()[0]
+    psk = conn.execute("SELECT preshared_key FROM remote WHERE id = 2").fetchone()[0]
+    conn.close()
+    assert (leftovers, triggers) == (0, 0), (leftovers, triggers)
+    assert manager.decrypt(psk) == 'psk-late'
+    print("  [PASS] test_rotation_final_batch_is_bounded")
+
+
+def test_encrypt_checks_generation_without_queries():
+    """Repeated encrypts read encryption_key once, until another connection writes"""
+    plain_path, db_path, manager = copy_encrypted_network()
+    opened = []
+    connect = manager._connect
+    manager._connect = lambda: opened.append(1) or connect()
+    statements = []
+    conn = get_connection(db_path)
+    conn.set_trace_callback(statements.append)
+    try:
+        for i in range(50):
+            manager.encrypt(f'value-{i}')
+        reads = [s for s in statements if 'FROM encryption_key' in s]
+        assert len(reads) <= 1 and not opened, (reads, len(opened))
+
+        other = EncryptionManager(db_path)
+        assert other.unlock_with_key(manager._kek)
+        generation = other.begin_dek_rotation()
+        value = manager.encrypt('after-rotation')
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+
+    assert manager._dek_generation == generation
+    assert other.decrypt(value) == 'after-rotation'
+    print("  [PASS] test_encrypt_checks_generation_without_queries")
+
+
+def test_pre_envelope_database_upgrades():
+    """Values encrypted with the KEK itself stay readable and rotate to a DEK"""
+    plain_path, db_path, manager = copy_encrypted_network()
+    expected = stored_values(plain_path, 'private_key')
+    legacy = SecureColumn(manager._kek)
+
+    conn = get_connection(db_path)
+    try:
+        for table, columns in SENSITIVE_COLUMNS:
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (table,))
+            if not exists.fetchone():
+                continue
+            for row in conn.execute(f"SELECT id, {', '.join(columns)} FROM {table}").fetchall():
+                values = legacy.encrypt_many(manager.decrypt_many(row[1:]))
+                conn.execute(f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in columns)} "
+                             f"WHERE id = ?", (*values, row[0]))
+        conn.execute("DROP TABLE encryption_key")
+        conn.commit()
+    finally:
+        conn.close()
+
+    old = EncryptionManager(db_path)
+    assert old.unlock_with_key(manager._kek) and old._dek_generation is None
+    assert old.decrypt_many(stored_values(db_path, 'private_key')) == expected
+
+    old.rotate_dek()
+    assert old._dek_generation == 2
+    rotated = stored_values(db_path, 'private_key')
+    try:
+        legacy.decrypt(next(v for v in rotated if v))
+        assert False, "Rotated values must no longer use the KEK"
+    except ValueError:
+        pass
+    assert old.decrypt_many(rotated) == expected
+    print("  [PASS] test_pre_envelope_database_upgrades")
+
+
+# =============================================================================
+# TEST RUNNER
+# =============================================================================
+
+def main():
+    print("=" * 60)
+    print("KEY ENCRYPTION TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Secure Column", [
+            test_cipher_is_reused,
+            test_batch_roundtrip,
+            test_secure_column_pickles,
+        ]),
+        ("Encryption Manager", [
+            test_manager_decrypt_many,
+            test_plaintext_cache_bounds,
+            test_cache_serves_repeats_and_lock_wipes,
+            test_manager_pickle_excludes_plaintexts,
+            test_plaintext_cache_context_wipes,
+        ]),
+        ("Callers", [
+            test_generate_encrypted_matches_plain,
+            test_generate_refuses_locked_database,
+            test_export_keys_decrypts_in_batch,
+        ]),
+        ("Unlock Agent", [
+            test_agent_stores_keys_privately,
+            test_agent_ttl_and_idle_timeout,
+            test_set_active_manager_unlocks_from_agent,
+            test_client_refuses_untrusted_socket,
+            test_prompt_does_not_push_key_to_agent,
+            test_no_agent_falls_back,
+        ]),
+        ("Envelope Encryption", [
+            test_passphrase_change_rewraps_only,
+            test_dek_rotation_resumes,
+            test_rotation_reencrypts_late_old_key_writes,
+            test_rotation_final_batch_is_bounded,
+            test_encrypt_checks_generation_without_queries,
+            test_pre_envelope_database_upgrades,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
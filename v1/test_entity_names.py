@@ -0,0 +1,234 @@
+"""
+Tests for the Shared Entity Identity Cache
+
+Covers:
+1. Change counter - bumped by identity changes only
+2. Cache - warm lookups skip the entity tables, changes reload them
+3. Callers - reports and the rotation schedule name rows without per-row queries
+
+Run with: python3 v1/test_entity_names.py
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.bandwidth_tracking import BandwidthSample, BandwidthTracker
+from v1.db_pool import get_connection
+from v1.entity_names import change_version, clear_entity_names, entity_names
+from v1.test_db_pool import create_temp_db_path, cleanup_db
+
+
+def _network(db_path, remotes=3):
+    """A coordination server and `remotes` remotes named remote-1, remote-2, ..."""
+    BandwidthTracker(db_path)       # migrates the schema
+    conn = get_connection(db_path)
+    conn.execute("""
+        INSERT INTO coordination_server (
+            id, permanent_guid, current_public_key, hostname, endpoint, listen_port,
+            network_ipv4, network_ipv6, ipv4_address, ipv6_address, private_key
+        ) VALUES (1, 'cs-guid', 'cs-key', 'hub', 'cs.example.com', 51820,
+                  '10.66.0.0/16', 'fd66::/64', '10.66.0.1/32', 'fd66::1/128', 'key')
+    """)
+    conn.executemany("""
+        INSERT INTO remote (
+            id, cs_id, permanent_guid, current_public_key, hostname,
+            ipv4_address, ipv6_address, access_level
+        ) VALUES (?, 1, ?, ?, ?, ?, ?, 'full_access')
+    """, [(i, f'guid-{i}', f'key-{i}', f'remote-{i}', f'10.66.{i // 250}.{i % 250 + 2}/32', f'fd66::{i + 1:x}/128')
+          for i in range(1, remotes + 1)])
+    conn.commit()
+    conn.close()
+
+
+def _entity_reads(statements):
+    return [s for s in statements if 'FROM remote' in s or 'FROM coordination_server' in s]
+
+
+# =============================================================================
+# CHANGE COUNTER TESTS
+# =============================================================================
+
+def test_counter_tracks_identity_changes():
+    """Renames and re-keys bump the counter; other column updates do not"""
+    db_path = create_temp_db_path('-names-counter')
+    try:
+        _network(db_path)
+        conn = get_connection(db_path)
+        start = change_version(conn)
+
+        conn.execute("UPDATE remote SET access_level = 'vpn_only' WHERE id = 1")
+        assert change_version(conn) == start
+
+        conn.execute("UPDATE remote SET hostname = 'laptop' WHERE id = 1")
+        conn.execute("UPDATE remote SET current_public_key = 'key-1b' WHERE id = 2")
+        conn.execute("DELETE FROM remote WHERE id = 3")
+        assert change_version(conn) == start + 3
+        conn.commit()
+        conn.close()
+        print("  [PASS] test_counter_tracks_identity_changes")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# CACHE TESTS
+# =============================================================================
+
+def test_cache_reused_until_change():
+    """A warm lookup reads only the counter; a rename reloads the names"""
+    db_path = create_temp_db_path('-names-cache')
+    try:
+        _network(db_path)
+        clear_entity_names()
+        conn = get_connection(db_path)
+        first = entity_names(conn)
+        assert first.name('remote', 2) == 'remote-2'
+        assert first.name('cs', 1) == first.name('coordination_server', 1) == 'hub'
+        assert first.by_guid('guid-3').entity_id == 3
+        assert first.name('remote', 99) is None
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            assert entity_names(conn) is first
+            assert not _entity_reads(statements), statements
+
+            conn.execute("UPDATE remote SET current_public_key = 'key-2b', hostname = NULL WHERE id = 2")
+            conn.commit()
+            names = entity_names(conn)
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+
+        assert names is not first
+        assert names.by_public_key('key-2') is None
+        assert names.by_public_key('key-2b').entity_id == 2
+        assert names.name('remote', 2) == 'guid-2'      # unnamed: GUID prefix
+        print("  [PASS] test_cache_reused_until_change")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_uncommitted_names_not_cached():
+    """Names read inside a transaction that rolls back never reach the cache"""
+    db_path = create_temp_db_path('-names-rollback')
+    try:
+        _network(db_path)
+        clear_entity_names()
+        conn = get_connection(db_path)
+        conn.execute("UPDATE remote SET hostname = 'draft' WHERE id = 1")
+        assert entity_names(conn).name('remote', 1) == 'draft'
+        conn.rollback()
+        assert entity_names(conn).name('remote', 1) == 'remote-1'
+        conn.close()
+        print("  [PASS] test_uncommitted_names_not_cached")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# CALLER TESTS
+# =============================================================================
+
+def test_report_names_rows_without_per_row_queries():
+    """A bandwidth report over many peers reads each entity table at most once"""
+    db_path = create_temp_db_path('-names-report')
+    try:
+        _network(db_path, remotes=200)
+        clear_entity_names()
+        tracker = BandwidthTracker(db_path)
+        now = datetime.utcnow().replace(microsecond=0)
+        for minutes_ago, rx in ((30, 1000), (0, 5000)):
+            tracker.store_samples([
+                BandwidthSample('remote', i, f'guid-{i}', f'remote-{i}', now - timedelta(minutes=minutes_ago),
+                                rx * i, rx, None, None, True)
+                for i in range(1, 201)
+            ])
+
+        statements = []
+        conn = get_connection(db_path)
+        conn.set_trace_callback(statements.append)
+        try:
+            report = tracker.get_bandwidth_report(hours=1)
+            latest = tracker.get_latest_samples()
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+
+        assert len(_entity_reads(statements)) <= 2, _entity_reads(statements)
+        assert {e['hostname'] for e in report['entities']} == {f'remote-{i}' for i in range(1, 201)}
+        assert latest[0].hostname == 'remote-200'
+        print("  [PASS] test_report_names_rows_without_per_row_queries")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_rotation_schedule_uses_shared_names():
+    """Scheduled rotations carry the cached hostname"""
+    from v1.rotation_policies import RotationPolicyManager, PolicyType
+
+    db_path = create_temp_db_path('-names-rotation')
+    try:
+        _network(db_path, remotes=2)
+        manager = RotationPolicyManager(db_path)
+        manager.create_policy('Monthly', PolicyType.TIME_BASED, 30)
+
+        schedule = manager.get_pending_rotations(include_upcoming_days=60)
+        assert {r.entity_hostname for r in schedule} >= {'remote-1', 'remote-2'}, schedule
+        print("  [PASS] test_rotation_schedule_uses_shared_names")
+    finally:
+        cleanup_db(db_path)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("ENTITY NAME CACHE TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Change Counter", [
+            test_counter_tracks_identity_changes,
+        ]),
+        ("Cache", [
+            test_cache_reused_until_change,
+            test_uncommitted_names_not_cached,
+        ]),
+        ("Callers", [
+            test_report_names_rows_without_per_row_queries,
+            test_rotation_schedule_uses_shared_names,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
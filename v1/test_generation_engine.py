@@ -0,0 +1,544 @@
+"""
+Tests for the Config Generation Engine
+
+Covers:
+1. generation_engine.py - Single-pass topology load and rendering
+2. cli/config_generator.py - Per-entity wrappers over the engine
+3. generation_manifest.py - Incremental regeneration
+4. Parallel rendering - process pool output matches serial output
+
+Run with: python3 v1/test_generation_engine.py
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.db_pool import get_connection, get_read_connection, close_pools
+from v1.schema_semantic import WireGuardDBv2
+from v1.generation_engine import (
+    load_topology, render_all, render_remote_config, render_exit_node_config,
+    config_targets, render_targets, render_cs_config, stream_cs_config, content_hash,
+    CS, ROUTER, REMOTE, EXIT_NODE,
+)
+from v1.disaster_recovery import DisasterRecovery
+from v1.generation_manifest import GenerationManifest
+from v1.cli.config_generator import (
+    generate_cs_config, generate_router_config, generate_remote_config,
+    generate_exit_node_config, generate_configs,
+)
+
+
+# =============================================================================
+# TEST FIXTURES
+# =============================================================================
+
+def create_test_network(remotes=3, suffix=''):
+    """
+    Create a database with a CS, two routers, one exit node and N remotes.
+
+    Remote 1 is provisional (no private key); odd remotes use the exit node.
+    """
+    with tempfile.NamedTemporaryFile(suffix=f'{suffix}.db', delete=False) as f:
+        db_path = str(f.name)
+    os.unlink(db_path)
+
+    db = WireGuardDBv2(db_path)
+    with db._connection() as conn:
+        conn.execute("""
+            INSERT INTO coordination_server (
+                permanent_guid, current_public_key, hostname, endpoint, listen_port,
+                network_ipv4, network_ipv6, ipv4_address, ipv6_address, private_key
+            ) VALUES ('cs-guid', 'cs-pub', 'hub', 'vpn.example.com', 51820,
+                      '10.66.0.0/24', 'fd66::/64', '10.66.0.1/24', 'fd66::1/64', 'cs-priv')
+        """)
+        for i in (1, 2):
+            conn.execute("""
+                INSERT INTO subnet_router (
+                    cs_id, permanent_guid, current_public_key, hostname,
+                    ipv4_address, ipv6_address, private_key
+                ) VALUES (1, ?, ?, ?, ?, ?, ?)
+            """, (f'router-guid-{i}', f'router-pub-{i}', f'router-{i}',
+                  f'10.66.0.{1 + i}/32', f'fd66::{1 + i}/128', f'router-priv-{i}'))
+        for router_id, network in ((2, '192.168.20.0/24'), (1, '192.168.10.0/24'),
+                                   (1, '192.168.1.0/24')):
+            conn.execute("""
+                INSERT INTO advertised_network (subnet_router_id, network_cidr)
+                VALUES (?, ?)
+            """, (router_id, network))
+        conn.execute("""
+            INSERT INTO command_pair (
+                entity_type, entity_id, pattern_name, rationale, scope,
+                up_commands, down_commands, execution_order
+            ) VALUES ('subnet_router', 1, 'nat', 'NAT', 'peer-specific', ?, ?, 1)
+        """, (json.dumps(['iptables -t nat -A POSTROUTING -j MASQUERADE']),
+              json.dumps(['iptables -t nat -D POSTROUTING -j MASQUERADE'])))
+        conn.execute("""
+            INSERT INTO exit_node (
+                cs_id, permanent_guid, current_public_key, hostname, endpoint,
+                ipv4_address, ipv6_address, private_key
+            ) VALUES (1, 'exit-guid', 'exit-pub', 'exit-1', 'exit.example.com',
+                      '10.66.0.100/32', 'fd66::64/128', 'exit-priv')
+        """)
+        for i in range(1, remotes + 1):
+            conn.execute("""
+                INSERT INTO remote (
+                    cs_id, permanent_guid, current_public_key, hostname,
+                    ipv4_address, ipv6_address, private_key, access_level, exit_node_id
+                ) VALUES (1, ?, ?, ?, ?, ?, ?, 'full_access', ?)
+            """, (f'remote-guid-{i}', f'remote-pub-{i}', f'remote-{remotes - i:04d}',
+                  f'10.66.1.{i % 250}/32', f'fd66::1:{i:x}/128',
+                  None if i == 1 else f'remote-priv-{i}',
+                  1 if i % 2 else None))
+    return db, db_path
+
+
+def cleanup_db(db_path):
+    """Close pooled handles and remove the database files"""
+    close_pools(db_path)
+    for path in (db_path, db_path + '-wal', db_path + '-shm'):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def count_queries(db_path, func, selects_only=False):
+    """
+    Run func() and count the statements it executes on this thread's
+    connections (read-write and read-only pools)
+    """
+    statements = []
+    conns = [get_connection(db_path), get_read_connection(db_path)]
+    try:
+        for conn in conns:
+            conn.set_trace_callback(statements.append)
+        func()
+    finally:
+        for conn in conns:
+            conn.set_trace_callback(None)
+            conn.close()
+    if selects_only:
+        statements = [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+    return len(statements)
+
+
+# =============================================================================
+# TOPOLOGY TESTS
+# =============================================================================
+
+def test_topology_load_is_constant_queries():
+    """Loading the topology costs the same number of queries at any size"""
+    small_db, small_path = create_test_network(remotes=3, suffix='-gen-small')
+    large_db, large_path = create_test_network(remotes=60, suffix='-gen-large')
+    try:
+        small = count_queries(small_path, lambda: load_topology(small_db))
+        large = count_queries(large_path, lambda: load_topology(large_db))
+
+        assert small == large, f"Query count grew with network size: {small} vs {large}"
+        assert len(load_topology(large_db).remotes) == 60
+        print("  [PASS] test_topology_load_is_constant_queries")
+    finally:
+        cleanup_db(small_path)
+        cleanup_db(large_path)
+
+
+def test_topology_indexes():
+    """Advertised networks and exit node memberships are indexed once"""
+    db, db_path = create_test_network(remotes=5, suffix='-gen-index')
+    try:
+        topology = load_topology(db)
+
+        assert topology.router(1)['advertised_networks'] == ['192.168.1.0/24', '192.168.10.0/24']
+        assert topology.advertised_networks == [
+            '192.168.20.0/24', '192.168.10.0/24', '192.168.1.0/24'
+        ], f"Unexpected network order: {topology.advertised_networks}"
+
+        exit_hostnames = [r['hostname'] for r in topology.remotes_for_exit(1)]
+        assert exit_hostnames == sorted(exit_hostnames), "Exit node peers must be sorted by hostname"
+        assert len(exit_hostnames) == 3
+
+        assert len(topology.pairs_for(ROUTER, 1)) == 1
+        assert topology.pairs_for(ROUTER, 2) == []
+        print("  [PASS] test_topology_indexes")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_topology_remote_filter():
+    """remote_ids limits which remotes are read"""
+    db, db_path = create_test_network(remotes=5, suffix='-gen-filter')
+    try:
+        topology = load_topology(db, remote_ids=(3,))
+        assert [r['id'] for r in topology.remotes] == [3]
+
+        topology = load_topology(db, remote_ids=())
+        assert topology.remotes == []
+        print("  [PASS] test_topology_remote_filter")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# RENDERING TESTS
+# =============================================================================
+
+def test_render_all_covers_network():
+    """render_all yields one config per entity, skipping provisional remotes"""
+    db, db_path = create_test_network(remotes=4, suffix='-gen-all')
+    try:
+        configs = list(render_all(load_topology(db)))
+        kinds = [c.entity_type for c in configs]
+
+        assert kinds == [CS, ROUTER, ROUTER, REMOTE, REMOTE, REMOTE, EXIT_NODE], kinds
+        assert configs[0].filename == 'coordination.conf'
+        assert all(c.content.startswith('[Interface]\n') for c in configs)
+        assert 1 not in [c.entity_id for c in configs if c.entity_type == REMOTE], \
+            "Provisional remote must not get a config"
+
+        # Provisional remote is still a peer on the hub
+        assert '# remote-0003' in configs[0].content
+        print("  [PASS] test_render_all_covers_network")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_wrappers_match_engine():
+    """Per-entity generators return exactly what the engine renders"""
+    db, db_path = create_test_network(remotes=4, suffix='-gen-wrap')
+    try:
+        rendered = {(c.entity_type, c.entity_id): c.content for c in render_all(load_topology(db))}
+
+        assert generate_cs_config(db) == rendered[(CS, 1)]
+        assert generate_router_config(db, 1) == rendered[(ROUTER, 1)]
+        assert generate_remote_config(db, 3) == rendered[(REMOTE, 3)]
+        assert generate_exit_node_config(db, 1) == rendered[(EXIT_NODE, 1)]
+        print("  [PASS] test_wrappers_match_engine")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_remote_config_uses_snapshot():
+    """Remote and exit node configs are rendered from the loaded snapshot"""
+    db, db_path = create_test_network(remotes=3, suffix='-gen-remote')
+    try:
+        topology = load_topology(db)
+
+        config = render_remote_config(topology, topology.remote(3))
+        assert 'AllowedIPs = 10.66.0.0/24, fd66::/64, 192.168.20.0/24, 192.168.10.0/24, 192.168.1.0/24' in config
+        assert '# exit-node: exit-1' in config
+        assert 'DNS = 1.1.1.1, 8.8.8.8' in config
+
+        config = render_exit_node_config(topology, topology.exit_node(1))
+        assert config.count('[Peer]') == 2, "Exit node should peer with remotes 1 and 3"
+        print("  [PASS] test_remote_config_uses_snapshot")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# INCREMENTAL GENERATION TESTS
+# =============================================================================
+
+def run_generate(db_path, output_dir, **options):
+    """Run `wg-friend generate` quietly"""
+    args = argparse.Namespace(db=db_path, output=str(output_dir), qr=False,
+                              dry_run=False, force=False, jobs=1)
+    for name, value in options.items():
+        setattr(args, name, value)
+    with redirect_stdout(io.StringIO()):
+        return generate_configs(args)
+
+
+def plan_filenames(db, db_path, output_dir):
+    """(regenerate, skipped) filenames for the next run"""
+    plan = GenerationManifest(db_path).plan(load_topology(db), output_dir)
+    return ({t.filename for t in plan.regenerate}, {t.filename for t in plan.skipped})
+
+
+def test_unchanged_network_is_skipped():
+    """A second run with no DB changes writes nothing"""
+    db, db_path = create_test_network(remotes=4, suffix='-inc-noop')
+    output_dir = Path(tempfile.mkdtemp(prefix='wgf-inc-'))
+    try:
+        assert run_generate(db_path, output_dir) == 0
+        regenerate, skipped = plan_filenames(db, db_path, output_dir)
+
+        assert regenerate == set(), f"Expected nothing to regenerate, got {regenerate}"
+        assert len(skipped) == 7
+        print("  [PASS] test_unchanged_network_is_skipped")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        cleanup_db(db_path)
+
+
+def test_remote_change_regenerates_dependents():
+    """Changing one remote touches only it, the CS and its exit node"""
+    db, db_path = create_test_network(remotes=6, suffix='-inc-remote')
+    output_dir = Path(tempfile.mkdtemp(prefix='wgf-inc-'))
+    try:
+        run_generate(db_path, output_dir)
+        with db._connection() as conn:
+            conn.execute("UPDATE remote SET dns_servers = '9.9.9.9' WHERE id = 3")
+        hostname = load_topology(db).remote(3)['hostname']
+
+        regenerate, _ = plan_filenames(db, db_path, output_dir)
+        assert regenerate == {'coordination.conf', f'{hostname}.conf', 'exit-1.conf'}, regenerate
+
+        # A remote without an exit node does not touch the exit node config
+        with db._connection() as conn:
+            conn.execute("UPDATE remote SET dns_servers = '9.9.9.9' WHERE id = 4")
+        run_generate(db_path, output_dir)
+        with db._connection() as conn:
+            conn.execute("UPDATE remote SET persistent_keepalive = 25 WHERE id = 4")
+        regenerate, _ = plan_filenames(db, db_path, output_dir)
+        assert regenerate == {'coordination.conf', 'remote-0002.conf'}, regenerate
+
+        assert 'DNS = 9.9.9.9' in (output_dir / 'remote-0002.conf').read_text()
+        print("  [PASS] test_remote_change_regenerates_dependents")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        cleanup_db(db_path)
+
+
+def test_exit_reassignment_regenerates_both_exits():
+    """Moving a remote between exit nodes rewrites both exit configs"""
+    db, db_path = create_test_network(remotes=3, suffix='-inc-exit')
+    output_dir = Path(tempfile.mkdtemp(prefix='wgf-inc-'))
+    try:
+        with db._connection() as conn:
+            conn.execute("""
+                INSERT INTO exit_node (
+                    cs_id, permanent_guid, current_public_key, hostname, endpoint,
+                    ipv4_address, ipv6_address, private_key
+                ) VALUES (1, 'exit-guid-2', 'exit-pub-2', 'exit-2', 'exit2.example.com',
+                          '10.66.0.101/32', 'fd66::65/128', 'exit-priv-2')
+            """)
+        run_generate(db_path, output_dir)
+
+        with db._connection() as conn:
+            conn.execute("UPDATE remote SET exit_node_id = 2 WHERE id = 3")
+
+        regenerate, _ = plan_filenames(db, db_path, output_dir)
+        assert {'exit-1.conf', 'exit-2.conf'} <= regenerate, regenerate
+        assert 'router-1.conf' not in regenerate
+        print("  [PASS] test_exit_reassignment_regenerates_both_exits")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        cleanup_db(db_path)
+
+
+def test_missing_or_edited_file_is_regenerated():
+    """Deleted or hand-edited files are rewritten; --force rewrites all"""
+    db, db_path = create_test_network(remotes=3, suffix='-inc-files')
+    output_dir = Path(tempfile.mkdtemp(prefix='wgf-inc-'))
+    try:
+        run_generate(db_path, output_dir)
+        original = (output_dir / 'router-2.conf').read_text()
+
+        (output_dir / 'router-1.conf').unlink()
+        (output_dir / 'router-2.conf').write_text(original + "# local edit\n")
+
+        regenerate, _ = plan_filenames(db, db_path, output_dir)
+        assert regenerate == {'router-1.conf', 'router-2.conf'}, regenerate
+
+        run_generate(db_path, output_dir)
+        assert (output_dir / 'router-1.conf').exists()
+        assert (output_dir / 'router-2.conf').read_text() == original
+
+        plan = GenerationManifest(db_path).plan(load_topology(db), output_dir, force=True)
+        assert len(plan.regenerate) == 6 and not plan.skipped
+        print("  [PASS] test_missing_or_edited_file_is_regenerated")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# PARALLEL RENDERING TESTS
+# =============================================================================
+
+def read_tree(directory):
+    """{filename: bytes} for every file in a directory"""
+    return {p.name: p.read_bytes() for p in sorted(Path(directory).iterdir())}
+
+
+def test_parallel_render_matches_serial():
+    """render_targets with workers returns exactly the serial output"""
+    db, db_path = create_test_network(remotes=20, suffix='-par-render')
+    try:
+        topology = load_topology(db)
+        targets = config_targets(topology)
+
+        serial = render_targets(topology, targets, jobs=1)
+        parallel = render_targets(topology, targets, jobs=3)
+
+        assert parallel == serial, "Parallel rendering must be byte-identical"
+        assert len(serial) == len(targets)
+        print("  [PASS] test_parallel_render_matches_serial")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_generate_jobs_matches_serial():
+    """`generate --jobs N` writes the same files as a serial run"""
+    db, db_path = create_test_network(remotes=12, suffix='-par-generate')
+    serial_dir = Path(tempfile.mkdtemp(prefix='wgf-serial-'))
+    parallel_dir = Path(tempfile.mkdtemp(prefix='wgf-parallel-'))
+    try:
+        run_generate(db_path, serial_dir, jobs=1)
+        run_generate(db_path, parallel_dir, jobs=4)
+
+        assert read_tree(parallel_dir) == read_tree(serial_dir)
+        print("  [PASS] test_generate_jobs_matches_serial")
+    finally:
+        shutil.rmtree(serial_dir, ignore_errors=True)
+        shutil.rmtree(parallel_dir, ignore_errors=True)
+        cleanup_db(db_path)
+
+
+def test_backup_export_jobs_matches_serial():
+    """DisasterRecovery config export is identical with and without workers"""
+    db, db_path = create_test_network(remotes=8, suffix='-par-backup')
+    work_dir = Path(tempfile.mkdtemp(prefix='wgf-export-'))
+    try:
+        dr = DisasterRecovery(db_path, str(work_dir / 'backups'))
+        dr._export_configs(work_dir / 'serial', jobs=1)
+        dr._export_configs(work_dir / 'parallel', jobs=2)
+
+        serial = read_tree(work_dir / 'serial')
+        assert 'cs-hub.conf' in serial and 'sr-router-1.conf' in serial
+        assert read_tree(work_dir / 'parallel') == serial
+        print("  [PASS] test_backup_export_jobs_matches_serial")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# STREAMING TESTS
+# =============================================================================
+
+def test_stream_cs_matches_render():
+    """stream_cs_config writes exactly what render_cs_config returns"""
+    db, db_path = create_test_network(remotes=25, suffix='-stream')
+    work_dir = Path(tempfile.mkdtemp(prefix='wgf-stream-'))
+    try:
+        path = work_dir / 'coordination.conf'
+        digest = stream_cs_config(db, path)
+
+        expected = render_cs_config(load_topology(db))
+        assert path.read_text() == expected, "Streamed config must be byte-identical"
+        assert digest == content_hash(expected)
+        print("  [PASS] test_stream_cs_matches_render")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        cleanup_db(db_path)
+
+
+def test_stream_cs_is_atomic():
+    """Streamed config replaces the old file in one rename, mode 600"""
+    db, db_path = create_test_network(remotes=5, suffix='-stream-atomic')
+    work_dir = Path(tempfile.mkdtemp(prefix='wgf-stream-'))
+    try:
+        path = work_dir / 'coordination.conf'
+        path.write_text("old contents\n")
+        stream_cs_config(db, path)
+
+        assert path.read_text().startswith("[Interface]")
+        assert (path.stat().st_mode & 0o777) == 0o600
+        assert [p.name for p in work_dir.iterdir()] == ['coordination.conf'], \
+            "Temporary file must not be left behind"
+
+        # A failed write leaves the previous config in place
+        conn = get_connection(db_path)
+        conn.execute("DELETE FROM coordination_server")
+        conn.commit()
+        conn.close()
+        try:
+            stream_cs_config(db, path)
+            assert False, "Expected failure without a coordination server"
+        except ValueError:
+            pass
+        assert path.read_text().startswith("[Interface]")
+        assert [p.name for p in work_dir.iterdir()] == ['coordination.conf']
+        print("  [PASS] test_stream_cs_is_atomic")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# TEST RUNNER
+# =============================================================================
+
+def main():
+    print("=" * 60)
+    print("CONFIG GENERATION ENGINE TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Topology", [
+            test_topology_load_is_constant_queries,
+            test_topology_indexes,
+            test_topology_remote_filter,
+        ]),
+        ("Rendering", [
+            test_render_all_covers_network,
+            test_wrappers_match_engine,
+            test_remote_config_uses_snapshot,
+        ]),
+        ("Incremental Generation", [
+            test_unchanged_network_is_skipped,
+            test_remote_change_regenerates_dependents,
+            test_exit_reassignment_regenerates_both_exits,
+            test_missing_or_edited_file_is_regenerated,
+        ]),
+        ("Parallel Rendering", [
+            test_parallel_render_matches_serial,
+            test_generate_jobs_matches_serial,
+            test_backup_export_jobs_matches_serial,
+        ]),
+        ("Streaming", [
+            test_stream_cs_matches_render,
+            test_stream_cs_is_atomic,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""
+Tests for IP Address Management
+
+Covers:
+1. AddressPool - per-block free intervals, lazy blocks, reserve and release
+2. IPAM - prefix-aware allocation, per-role pools, independent IPv6
+3. Callers - peer manager and exit node allocation from a database, change log replay
+
+Run with: python3 v1/test_ipam.py
+"""
+
+import ipaddress
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.ipam import IPAM, AddressPool, clear_ipam_cache
+from v1.exit_node_ops import ExitNodeOps
+from v1.cli.peer_manager import get_next_available_ip
+from v1.test_generation_engine import create_test_network, cleanup_db
+
+
+# =============================================================================
+# ADDRESS POOL TESTS
+# =============================================================================
+
+def test_pool_allocates_lowest_free():
+    """Reserved offsets split intervals; allocation takes the lowest gap"""
+    pool = AddressPool(ipaddress.ip_network('10.0.0.0/24'), [(20, 29)])
+    for offset in (20, 21, 23, 29):
+        assert pool.reserve(offset)
+    assert not pool.reserve(30), "Offsets outside the pool are not reserved"
+
+    assert [pool.allocate() for _ in range(6)] == [22, 24, 25, 26, 27, 28]
+    assert pool.allocate() is None
+    print("  [PASS] test_pool_allocates_lowest_free")
+
+
+def test_pool_is_lazy_for_large_networks():
+    """A /64 pool only materializes the blocks it touches"""
+    pool = AddressPool(ipaddress.ip_network('fd66::/64'), [(30, 99), (120, 254)])
+    assert pool.blocks == 2 ** 56
+
+    pool.reserve(5 * 256 + 40)
+    assert set(pool._blocks) == {5}, "Only the reserved block is materialized"
+    assert pool.allocate() == 30
+    assert set(pool._blocks) == {0, 5}
+    print("  [PASS] test_pool_is_lazy_for_large_networks")
+
+
+def test_pool_reserves_deep_addresses_quickly():
+    """Reserving near the end of a /64 touches one block, not every block before it"""
+    pool = AddressPool(ipaddress.ip_network('fd66::/64'), [(30, 99), (120, 254)])
+    deep = (pool.blocks - 1) * 256 + 30
+    started = time.time()
+    for offset in range(deep, deep + 70):
+        assert pool.reserve(offset)
+    assert time.time() - started < 1.0
+    assert len(pool._blocks) == 1
+    assert pool.allocate() == 30
+    print("  [PASS] test_pool_reserves_deep_addresses_quickly")
+
+
+def test_pool_release_merges_intervals():
+    """Released offsets are handed out again, lowest first"""
+    pool = AddressPool(ipaddress.ip_network('10.0.0.0/24'), [(20, 29)])
+    assert [pool.allocate() for _ in range(10)] == list(range(20, 30))
+    assert pool.allocate() is None
+
+    for offset in (25, 23, 24):
+        assert pool.release(offset)
+    assert not pool.release(30)
+    assert pool._blocks[0] == ([23], [25])
+    assert [pool.allocate() for _ in range(4)] == [23, 24, 25, None]
+    print("  [PASS] test_pool_release_merges_intervals")
+
+
+def test_pool_skips_network_and_broadcast():
+    """Networks smaller than a block clip the pool to usable addresses"""
+    pool = AddressPool(ipaddress.ip_network('10.0.0.0/27'), [(20, 254)])
+    offsets = []
+    while (offset := pool.allocate()) is not None:
+        offsets.append(offset)
+    assert offsets == list(range(20, 31)), "Broadcast (.31) must never be handed out"
+    print("  [PASS] test_pool_skips_network_and_broadcast")
+
+
+# =============================================================================
+# IPAM TESTS
+# =============================================================================
+
+def test_slash24_keeps_familiar_numbering():
+    """A /24 allocates .20 routers, .30 remotes and .100 exit nodes"""
+    ipam = IPAM('10.66.0.0/24', 'fd66::/64')
+    ipam.reserve('10.66.0.1/24')
+    ipam.reserve('fd66::1/64')
+
+    assert ipam.allocate('router') == ('10.66.0.20/32', 'fd66::14/128')
+    assert ipam.allocate('remote') == ('10.66.0.30/32', 'fd66::1e/128')
+    assert ipam.allocate('exit_node') == ('10.66.0.100/32', 'fd66::64/128')
+    assert ipam.address_at('router', 1) == ('10.66.0.21/32', 'fd66::15/128')
+    print("  [PASS] test_slash24_keeps_familiar_numbering")
+
+
+def test_prefix_length_sets_capacity():
+    """A /20 holds far more than 225 remotes and 10 routers, all unique"""
+    ipam = IPAM('10.66.0.0/20', 'fd66::/64')
+    remotes = [ipam.allocate('remote')[0] for _ in range(3000)]
+    routers = [ipam.allocate('router')[0] for _ in range(50)]
+
+    addresses = [ipaddress.ip_interface(a).ip for a in remotes + routers]
+    assert len(set(addresses)) == len(addresses)
+    network = ipaddress.ip_network('10.66.0.0/20')
+    assert all(ip in network for ip in addresses)
+    assert all(20 <= int(ip) % 256 <= 254 for ip in addresses)
+    assert not any(100 <= int(ip) % 256 <= 119 for ip in addresses), \
+        "Remotes and routers must stay out of the exit node pool"
+    assert routers[10] == '10.66.1.20/32'
+    print("  [PASS] test_prefix_length_sets_capacity")
+
+
+def test_small_network_scales_pools():
+    """A /28 still gives every role addresses inside it, clear of .1 and broadcast"""
+    ipam = IPAM('10.66.0.0/28', 'fd66::/124')
+    ipam.reserve('10.66.0.1/28')
+    ipam.reserve('fd66::1/124')
+
+    assert ipam.allocate('router') == ('10.66.0.2/32', 'fd66::2/128')
+    assert ipam.allocate('exit_node') == ('10.66.0.6/32', 'fd66::6/128')
+    remotes = [ipam.allocate('remote')[0] for _ in range(11)]
+    assert remotes[:4] == ['10.66.0.3/32', '10.66.0.4/32', '10.66.0.5/32', '10.66.0.7/32']
+    assert remotes[-1] == '10.66.0.14/32', "Broadcast must never be allocated"
+    try:
+        ipam.allocate('remote')
+        assert False, "Expected ValueError"
+    except ValueError as e:
+        assert '10.66.0.0/28' in str(e)
+    print("  [PASS] test_small_network_scales_pools")
+
+
+def test_exhausted_pool_raises():
+    """Running out of a role's pool is a ValueError naming the network"""
+    ipam = IPAM('10.66.0.0/24', 'fd66::/64')
+    for _ in range(10):
+        ipam.allocate('router')
+    try:
+        ipam.allocate('router')
+        assert False, "Expected ValueError"
+    except ValueError as e:
+        assert '10.66.0.0/24' in str(e)
+    print("  [PASS] test_exhausted_pool_raises")
+
+
+def test_ipv6_allocated_independently():
+    """IPv6 addresses come from their own pool, not the IPv4 octet"""
+    ipam = IPAM('10.66.0.0/24', 'fd66:1:2::/48')
+    ipam.reserve('10.66.0.30/32')
+    ipam.reserve('fd66:1:2::1f/128')
+
+    assert ipam.allocate('remote') == ('10.66.0.31/32', 'fd66:1:2::1e/128')
+    assert ipam.allocate('remote') == ('10.66.0.32/32', 'fd66:1:2::20/128')
+    print("  [PASS] test_ipv6_allocated_independently")
+
+
+def test_custom_pools():
+    """Pools are configurable per role"""
+    ipam = IPAM('10.66.0.0/24', 'fd66::/64', pools={'remote': [(200, 201)]})
+    assert ipam.allocate('remote')[0] == '10.66.0.200/32'
+    try:
+        ipam.allocate('router')
+        assert False, "Expected ValueError"
+    except ValueError as e:
+        assert 'Unknown address pool' in str(e)
+    print("  [PASS] test_custom_pools")
+
+
+# =============================================================================
+# CALLER TESTS
+# =============================================================================
+
+def test_callers_reserve_every_table():
+    """Allocation from a database avoids addresses used by any entity"""
+    db, db_path = create_test_network(remotes=3, suffix='-ipam')
+    try:
+        with db._connection() as conn:
+            # A remote placed by hand inside the exit node pool
+            conn.execute("""
+                INSERT INTO remote (
+                    cs_id, permanent_guid, current_public_key, hostname,
+                    ipv4_address, ipv6_address, access_level
+                ) VALUES (1, 'manual-guid', 'manual-pub', 'manual',
+                          '10.66.0.101/32', 'fd66::65/128', 'full_access')
+            """)
+
+        assert get_next_available_ip(db, 'router') == ('10.66.0.20/32', 'fd66::14/128')
+        assert get_next_available_ip(db, 'remote') == ('10.66.0.30/32', 'fd66::1e/128')
+        assert ExitNodeOps(db).get_next_exit_node_ip() == ('10.66.0.102/32', 'fd66::66/128')
+        print("  [PASS] test_callers_reserve_every_table")
+    finally:
+        cleanup_db(db_path)
+
+
+def test_from_db_replays_changes_without_rescanning():
+    """Warm loads read only the change log; adds, moves and deletes all apply"""
+    db, db_path = create_test_network(remotes=3, suffix='-ipam-cache')
+    try:
+        clear_ipam_cache()
+        first = IPAM.from_db(db).allocate('remote')
+        assert IPAM.from_db(db).allocate('remote') == first, "Unstored allocations must not leak"
+
+        with db._connection() as conn:
+            conn.execute("""
+                INSERT INTO remote (
+                    cs_id, permanent_guid, current_public_key, hostname,
+                    ipv4_address, ipv6_address, access_level
+                ) VALUES (1, 'new-guid', 'new-pub', 'new', ?, ?, 'full_access')
+            """, first)
+
+        statements = []
+        with db._connection() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            second = IPAM.from_db(db).allocate('remote')
+        finally:
+            with db._connection() as conn:
+                conn.set_trace_callback(None)
+        assert second != first and statements
+        assert not [s for s in statements if 'FROM remote' in s and 'WHERE' not in s], statements
+
+        with db._connection() as conn:
+            conn.execute("UPDATE remote SET ipv4_address = '10.66.0.200/32' WHERE permanent_guid = 'new-guid'")
+        assert IPAM.from_db(db).allocate('remote')[0] == first[0], "Moved-away address is free again"
+
+        with db._connection() as conn:
+            conn.execute("DELETE FROM remote WHERE permanent_guid = 'new-guid'")
+        assert IPAM.from_db(db).allocate('remote') == first
+        print("  [PASS] test_from_db_replays_changes_without_rescanning")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# TEST RUNNER
+# =============================================================================
+
+def main():
+    print("=" * 60)
+    print("IP ADDRESS MANAGEMENT TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Address Pool", [
+            test_pool_allocates_lowest_free,
+            test_pool_is_lazy_for_large_networks,
+            test_pool_reserves_deep_addresses_quickly,
+            test_pool_release_merges_intervals,
+            test_pool_skips_network_and_broadcast,
+        ]),
+        ("IPAM", [
+            test_slash24_keeps_familiar_numbering,
+            test_prefix_length_sets_capacity,
+            test_small_network_scales_pools,
+            test_exhausted_pool_raises,
+            test_ipv6_allocated_independently,
+            test_custom_pools,
+        ]),
+        ("Callers", [
+            test_callers_reserve_every_table,
+            test_from_db_replays_changes_without_rescanning,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Tests for Key Generation
+
+Covers:
+1. generate_keypairs() - valid, clamped, unique X25519 keys in-process
+2. KeyPool - background refill, single use of every key
+3. Callers - rotation runs draw one batch of keys
+
+Run with: python3 v1/test_keygen.py
+"""
+
+import base64
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1 import keygen
+from v1.keygen import (
+    KeyPool, derive_public_key, disable_key_pool, enable_key_pool,
+    generate_keypair, generate_keypairs, generate_preshared_keys,
+)
+
+
+# =============================================================================
+# KEY GENERATION TESTS
+# =============================================================================
+
+def test_keypairs_are_valid_wireguard_keys():
+    """Public keys derive from the private keys, which are clamped like wg genkey"""
+    keypairs = generate_keypairs(50)
+    assert len({private for private, _ in keypairs}) == 50
+
+    for private, public in keypairs:
+        raw = base64.b64decode(private)
+        assert len(raw) == 32 and len(private) == 44
+        assert raw[0] & 7 == 0 and raw[31] & 128 == 0 and raw[31] & 64
+        assert derive_public_key(private) == public
+    print("  [PASS] test_keypairs_are_valid_wireguard_keys")
+
+
+def test_no_subprocess_per_key():
+    """Key generation never starts `wg`"""
+    import subprocess
+    original = subprocess.run
+    subprocess.run = lambda *a, **k: (_ for _ in ()).throw(AssertionError("subprocess used"))
+    try:
+        generate_keypair()
+        generate_keypairs(3)
+        keygen.generate_preshared_key()
+    finally:
+        subprocess.run = original
+    print("  [PASS] test_no_subprocess_per_key")
+
+
+def test_preshared_keys():
+    """Preshared keys are 32 random bytes, base64"""
+    keys = generate_preshared_keys(20)
+    assert len(set(keys)) == 20
+    assert all(len(base64.b64decode(k)) == 32 for k in keys)
+    assert generate_keypairs(0) == [] and generate_preshared_keys(0) == []
+    print("  [PASS] test_preshared_keys")
+
+
+# =============================================================================
+# KEY POOL TESTS
+# =============================================================================
+
+def test_pool_refills_in_background():
+    """Dropping below low water starts a refill; keys are never handed out twice"""
+    pool = KeyPool(size=40, low_water=10)
+    pool.fill()
+    assert len(pool) == 40
+
+    first = pool.take(35)
+    pool.wait()
+    assert len(pool) == 40, "Pool should refill to its size"
+
+    second = pool.take(60)   # more than the pool holds: topped up inline
+    assert len(second) == 60
+    privates = [private for private, _ in first + second]
+    assert len(set(privates)) == len(privates)
+
+    pool.clear()
+    assert len(pool) == 0
+    print("  [PASS] test_pool_refills_in_background")
+
+
+def test_enabled_pool_serves_generate_keypair():
+    """generate_keypair(s) draw from the module pool while it is enabled"""
+    pool = enable_key_pool(size=20)
+    try:
+        pool.wait()
+        pooled = set(pool._keys)
+        assert generate_keypair() in pooled
+        assert set(generate_keypairs(5)) <= pooled
+    finally:
+        disable_key_pool()
+    assert keygen._key_pool is None and len(pool) == 0
+    print("  [PASS] test_enabled_pool_serves_generate_keypair")
+
+
+# =============================================================================
+# CALLER TESTS
+# =============================================================================
+
+def test_rotation_run_uses_one_batch():
+    """execute_pending_rotations generates all its keys with one call"""
+    from v1.rotation_policies import RotationPolicyManager, PolicyType
+    from v1.test_generation_engine import create_test_network, cleanup_db
+
+    _, db_path = create_test_network(remotes=5, suffix='-keygen')
+    calls = []
+    original = keygen.generate_keypairs
+
+    def counting(n):
+        calls.append(n)
+        return original(n)
+
+    keygen.generate_keypairs = counting
+    try:
+        manager = RotationPolicyManager(db_path)
+        policy_id = manager.create_policy("Rotate now", PolicyType.TIME_BASED, 0)
+        pending = manager.get_pending_rotations()
+        assert pending, "Zero-day policy should make every entity due"
+
+        results = manager.execute_pending_rotations()
+        assert calls == [len(pending)]
+        assert all(r.success for r in results), [r.error_message for r in results]
+        assert len({r.new_public_key for r in results}) == len(results)
+        print("  [PASS] test_rotation_run_uses_one_batch")
+    finally:
+        keygen.generate_keypairs = original
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# TEST RUNNER
+# =============================================================================
+
+def main():
+    print("=" * 60)
+    print("KEY GENERATION TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Key Generation", [
+            test_keypairs_are_valid_wireguard_keys,
+            test_no_subprocess_per_key,
+            test_preshared_keys,
+        ]),
+        ("Key Pool", [
+            test_pool_refills_in_background,
+            test_enabled_pool_serves_generate_keypair,
+        ]),
+        ("Callers", [
+            test_rotation_run_uses_one_batch,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Tests for the Network-Wide Live Status Collector
+
+Covers:
+1. Discovery - which hosts get polled
+2. Sweep - concurrency, per-host timeouts and failures
+3. Merged view - peers named from the database, seen from several hosts
+
+Run with: python3 v1/test_live_status.py
+"""
+
+import contextlib
+import io
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.ssh_sessions import SSHTarget
+from v1.extramural_ops import ExtramuralOps
+from v1.extramural_schema import ExtramuralDB
+from v1.live_status import PollTarget, collect_live_status, discover_targets
+from v1.transport import LocalTransport
+from v1.wg_dump import clear_snapshots
+from v1.test_generation_engine import create_test_network, cleanup_db
+from v1.test_transport import Sandbox
+
+
+def _set_ssh_hosts(db_path, **hosts):
+    """hostname -> ssh_host on routers and exit nodes"""
+    conn = sqlite3.connect(db_path)
+    for hostname, ssh_host in hosts.items():
+        for table in ('subnet_router', 'exit_node'):
+            conn.execute(f"UPDATE {table} SET ssh_host = ? WHERE hostname = ?", (ssh_host, hostname))
+    conn.commit()
+    conn.close()
+
+
+def _add_laptop(db_path, ssh_host='laptop.sim'):
+    """An extramural laptop with a commercial VPN peer"""
+    ExtramuralDB(Path(db_path))
+    ops = ExtramuralOps(Path(db_path))
+    host_id = ops.add_ssh_host('laptop', ssh_host, ssh_user='admin')
+    peer_id = ops.add_local_peer('laptop', ssh_host_id=host_id)
+    sponsor_id = ops.add_sponsor('Mullvad')
+    config_id = ops.add_extramural_config(peer_id, sponsor_id, 'laptop-priv', 'laptop-pub')
+    ops.add_extramural_peer(config_id, 'mullvad-pub', '0.0.0.0/0', name='se-got-wg-001')
+
+
+# =============================================================================
+# DISCOVERY TESTS
+# =============================================================================
+
+def test_discover_targets():
+    """CS by endpoint, entities with ssh_host, extramural hosts; duplicates polled once"""
+    db, db_path = create_test_network(remotes=1, suffix='_live_discover')
+    try:
+        _set_ssh_hosts(db_path, **{'router-1': 'router-1.sim', 'exit-1': 'exit.sim'})
+        targets = discover_targets(db_path)
+        assert [(t.entity_type, t.name, t.ssh_host) for t in targets] == [
+            ('coordination_server', 'hub', 'vpn.example.com'),
+            ('subnet_router', 'router-1', 'router-1.sim'),
+            ('exit_node', 'exit-1', 'exit.sim'),
+        ], targets
+
+        _add_laptop(db_path)
+        ExtramuralOps(Path(db_path)).add_ssh_host('exit-again', 'exit.sim', ssh_key_path='/keys/exit')
+        targets = discover_targets(db_path, default_user='ops')
+        assert [t.name for t in targets] == ['hub', 'router-1', 'exit-1', 'laptop']
+        assert targets[3].ssh_user == 'admin' and targets[0].ssh_user == 'ops'
+        assert [t.key_path for t in targets] == [None, None, '/keys/exit', None]
+    finally:
+        cleanup_db(db_path)
+    print("  [PASS] test_discover_targets")
+
+
+# =============================================================================
+# SWEEP TESTS
+# =============================================================================
+
+def test_sweep_takes_slowest_host():
+    """100 hosts at 0.3s each finish in about the time of one, not the sum"""
+    db, db_path = create_test_network(remotes=1, suffix='_live_sweep')
+    sandbox = Sandbox(latency=0.3)
+    clear_snapshots()
+    try:
+        targets = [PollTarget('subnet_router', i, f'host-{i}', f'host-{i}.sim') for i in range(100)]
+        start = time.monotonic()
+        view = collect_live_status(db_path, timeout=5, concurrency=100, targets=targets)
+        elapsed = time.monotonic() - start
+        assert len(view.reachable) == 100, [h.error for h in view.unreachable][:3]
+        # Serially this is 30s
+        assert elapsed < 5, f"sweep took {elapsed:.1f}s"
+        assert sandbox.transport.stats()['exec'] == 100
+    finally:
+        clear_snapshots()
+        sandbox.cleanup()
+        cleanup_db(db_path)
+    print("  [PASS] test_sweep_takes_slowest_host")
+
+
+class StuckTransport(LocalTransport):
+    """Hosts named stuck.* hang past any timeout"""
+
+    def exec(self, target, command, timeout=None, input=None, **options):
+        if target.host.startswith('stuck.'):
+            time.sleep(2)
+            return subprocess.CompletedProcess([], 255, '', 'stuck\n')
+        return super().exec(target, command, timeout=timeout, input=input, **options)
+
+
+def test_per_host_timeout():
+    """A hung or unreachable host is reported; the others still answer in time"""
+    from v1.transport import set_transport
+
+    db, db_path = create_test_network(remotes=1, suffix='_live_timeout')
+    sandbox = Sandbox()
+    sandbox.transport = StuckTransport(sandbox.root / 'hosts', fail_hosts=['down.sim'])
+    set_transport(sandbox.transport)
+    clear_snapshots()
+    try:
+        targets = [PollTarget('subnet_router', i, name, f'{name}.sim')
+                   for i, name in enumerate(['a', 'stuck', 'down', 'b'])]
+        start = time.monotonic()
+        view = collect_live_status(db_path, timeout=0.5, targets=targets)
+        assert time.monotonic() - start < 1.5
+
+        by_name = {h.target.name: h for h in view.hosts}
+        assert by_name['a'].ok and by_name['b'].ok
+        assert by_name['stuck'].error == 'no answer within 0.5s'
+        assert not by_name['down'].ok
+        assert [h.target.name for h in view.hosts] == ['a', 'stuck', 'down', 'b']
+    finally:
+        clear_snapshots()
+        sandbox.cleanup()
+        cleanup_db(db_path)
+    print("  [PASS] test_per_host_timeout")
+
+
+class KeyRecordingTransport(LocalTransport):
+    """Records the SSH key each exec was given"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.keys = []
+
+    def exec(self, target, command, timeout=None, input=None, **options):
+        self.keys.append((target.host, options.get('key_path')))
+        return super().exec(target, command, timeout=timeout, input=input, **options)
+
+
+def test_key_path_reaches_transport():
+    """A host's dedicated SSH key is used for its read, and keyed reads are cached apart"""
+    from v1.transport import set_transport
+    from v1.wg_dump import get_snapshot
+
+    db, db_path = create_test_network(remotes=1, suffix='_live_keys')
+    sandbox = Sandbox()
+    sandbox.transport = KeyRecordingTransport(sandbox.root / 'hosts')
+    set_transport(sandbox.transport)
+    clear_snapshots()
+    try:
+        targets = [PollTarget('ssh_host', 1, 'laptop', 'laptop.sim', key_path='/keys/laptop'),
+                   PollTarget('subnet_router', 2, 'router', 'router.sim')]
+        view = collect_live_status(db_path, timeout=5, targets=targets)
+        assert len(view.reachable) == 2, [h.error for h in view.unreachable]
+        assert sorted(sandbox.transport.keys) == [('laptop.sim', '/keys/laptop'), ('router.sim', None)]
+
+        get_snapshot('laptop.sim', 'root', 22, key_path='/keys/other')
+        assert sandbox.transport.keys[-1] == ('laptop.sim', '/keys/other'), "Must not reuse another key's read"
+    finally:
+        clear_snapshots()
+        sandbox.cleanup()
+        cleanup_db(db_path)
+    print("  [PASS] test_key_path_reaches_transport")
+
+
+# =============================================================================
+# MERGED VIEW TESTS
+# =============================================================================
+
+def _bring_up(transport, host, config):
+    (transport.host_root(host) / 'etc/wireguard').mkdir(parents=True, exist_ok=True)
+    (transport.host_root(host) / 'etc/wireguard/wg0.conf').write_text(config)
+    transport.exec(SSHTarget(host), 'wg-quick up wg0')
+
+
+def _config(address, *peers):
+    lines = ["[Interface]", f"Address = {address}", "PrivateKey = priv", ""]
+    for key, allowed in peers:
+        lines += ["[Peer]", f"PublicKey = {key}", f"AllowedIPs = {allowed}", ""]
+    return "\n".join(lines)
+
+
+def test_merged_view():
+    """Peers merged by key across hosts, named from entities and extramural peers"""
+    from v1.cli.status import show_network_live_status
+
+    db, db_path = create_test_network(remotes=1, suffix='_live_merge')
+    sandbox = Sandbox()
+    clear_snapshots()
+    try:
+        _set_ssh_hosts(db_path, **{'router-1': 'router-1.sim', 'router-2': 'router-2.sim'})
+        _add_laptop(db_path)
+        transport = sandbox.transport
+        _bring_up(transport, 'vpn.example.com', _config(
+            '10.66.0.1/24', ('router-pub-1', '10.66.0.2/32'), ('remote-pub-1', '10.66.1.2/32')))
+        _bring_up(transport, 'router-1.sim', _config('10.66.0.2/24', ('cs-pub', '10.66.0.0/24')))
+        _bring_up(transport, 'laptop.sim', _config('10.8.0.2/32', ('mullvad-pub', '0.0.0.0/0'),
+                                                   ('stranger-pub', '10.9.0.1/32')))
+        # router-2.sim has no WireGuard running: reachable, no peers
+
+        view = collect_live_status(db_path, timeout=5)
+        assert len(view.reachable) == 4, [h.error for h in view.unreachable]
+        names = {p.name: p for p in view.peers}
+        assert set(names) == {'hub', 'router-1', 'remote-0000', 'se-got-wg-001', 'Unknown (stranger-p...)'}, names
+        assert [t.name for t in names['hub'].seen_by] == ['router-1']
+        assert names['se-got-wg-001'].entity_type == 'extramural_peer'
+        assert names['router-1'].entity_type == 'subnet_router' and names['router-1'].is_up
+        assert view.peer('mullvad-pub').seen_by[0].entity_type == 'ssh_host'
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            show_network_live_status(db_path)
+        text = output.getvalue()
+        assert '4/4 reachable' in text and '✓ laptop' in text and '● se-got-wg-001' in text, text
+    finally:
+        clear_snapshots()
+        sandbox.cleanup()
+        cleanup_db(db_path)
+    print("  [PASS] test_merged_view")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("LIVE STATUS COLLECTOR TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Discovery", [
+            test_discover_targets,
+        ]),
+        ("Sweep", [
+            test_sweep_takes_slowest_host,
+            test_per_host_timeout,
+            test_key_path_reaches_transport,
+        ]),
+        ("Merged view", [
+            test_merged_view,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -206,7 +206,7 @@ def test_bandwidth_tables_created():
 
         conn = sqlite3.connect(db_path)
         tables = conn.execute("""
-            SELECT name FROM sqlite_master WHERE type='table'
+            SELECT name FROM sqlite_master WHERE type IN ('table', 'view')
             AND name LIKE 'bandwidth_%'
         """).fetchall()
         conn.close()
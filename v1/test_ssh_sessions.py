@@ -0,0 +1,345 @@
+"""
+Tests for the SSH Session Manager
+
+Covers:
+1. Targets - parsing '[user@]host[:port]' endpoints
+2. Sessions - one master per (host, port, user), reuse, idle expiry, fallback,
+   stale sockets, untrusted control directories
+3. Callers - deploy and status commands ride the shared session
+
+Uses a stand-in `ssh`/`scp` executable that records its invocations and
+creates/checks/removes the control socket file like OpenSSH does.
+
+Run with: python3 v1/test_ssh_sessions.py
+"""
+
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import v1.ssh_sessions as ssh_sessions
+from v1.ssh_sessions import SSHSessionManager, SSHTarget
+
+
+FAKE_SSH = '''#!/usr/bin/env python3
+import os, shutil, subprocess, sys
+args = sys.argv[1:]
+opts = {}
+for i, arg in enumerate(args[:-1]):
+    if args[i - 1] == '-o' and '=' in arg:
+        key, value = arg.split('=', 1)
+        opts[key] = value
+path = opts.get('ControlPath')
+mode = 'direct'
+status = 0
+if '-O' in args:
+    mode = args[args.index('-O') + 1]
+    if mode == 'exit' and path and os.path.exists(path):
+        os.remove(path)
+    elif mode == 'check':
+        alive = path and os.path.exists(path) and open(path).read() == 'live'
+        status = 0 if alive else 255
+elif '-N' in args:
+    if os.environ.get('FAKE_SSH_FAIL'):
+        sys.exit(255)
+    mode = 'master'
+    with open(path, 'w') as sock:
+        sock.write('live')
+elif path and os.path.exists(path):
+    mode = 'mux'
+with open(os.environ['FAKE_SSH_LOG'], 'a') as log:
+    log.write(f"{os.path.basename(sys.argv[0])} {mode} {args[-1]}\\n")
+if status:
+    sys.exit(status)
+if mode in ('direct', 'mux'):
+    root = os.environ.get('FAKE_REMOTE_ROOT')
+    if not root:
+        print(args[-1])
+    elif os.path.basename(sys.argv[0]) == 'scp':
+        src, dst = args[-2], args[-1]
+        remote = lambda path: path.split(':', 1)[1].replace('/etc/wireguard', root)
+        if '@' in src:
+            shutil.copy(remote(src), dst)
+        else:
+            shutil.copy(src, remote(dst))
+    else:
+        command = args[-1].replace('/etc/wireguard', root)
+        sys.exit(subprocess.run(['sh', '-c', command]).returncode)
+'''
+
+
+class FakeSSH:
+    """
+    Temporary directory with fake ssh/scp binaries, a log and a control dir.
+
+    With remote=True, commands run locally against `self.remote` standing
+    in for /etc/wireguard, so deploys can be exercised end to end.
+    """
+
+    def __init__(self, remote: bool = False):
+        self.root = Path(tempfile.mkdtemp(prefix='wgf-ssh-'))
+        self.log = self.root / 'log'
+        self.log.touch()
+        self.remote = self.root / 'remote'
+        if remote:
+            self.remote.mkdir()
+            os.environ['FAKE_REMOTE_ROOT'] = str(self.remote)
+        for name in ('ssh', 'scp'):
+            binary = self.root / name
+            binary.write_text(FAKE_SSH)
+            binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+        os.environ['FAKE_SSH_LOG'] = str(self.log)
+        self._installed = False
+        self._saved_manager = None
+
+    def install(self) -> SSHSessionManager:
+        """Make a fake-backed manager the shared one (restored by cleanup)"""
+        self._installed = True
+        self._saved_manager = ssh_sessions._manager
+        ssh_sessions._manager = self.manager()
+        return ssh_sessions._manager
+
+    def manager(self, **kwargs) -> SSHSessionManager:
+        kwargs.setdefault('control_dir', self.root / 'ctl')
+        return SSHSessionManager(ssh_binary=str(self.root / 'ssh'), scp_binary=str(self.root / 'scp'),
+                                 **kwargs)
+
+    def calls(self):
+        return [line.split(' ', 2) for line in self.log.read_text().splitlines()]
+
+    def cleanup(self):
+        if self._installed:
+            ssh_sessions._manager = self._saved_manager
+        os.environ.pop('FAKE_SSH_LOG', None)
+        os.environ.pop('FAKE_SSH_FAIL', None)
+        os.environ.pop('FAKE_REMOTE_ROOT', None)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+# =============================================================================
+# TARGET TESTS
+# =============================================================================
+
+def test_parse_targets():
+    """Endpoints parse into (host, port, user)"""
+    assert SSHTarget.parse('vpn.example.com') == SSHTarget('vpn.example.com', 22, 'root')
+    assert SSHTarget.parse('exit.example.com:2222', user='admin') == SSHTarget('exit.example.com', 2222, 'admin')
+    assert SSHTarget.parse('ops@10.0.0.1:2200') == SSHTarget('10.0.0.1', 2200, 'ops')
+    assert SSHTarget.parse('[2001:db8::1]:2222') == SSHTarget('2001:db8::1', 2222, 'root')
+    assert SSHTarget.parse('2001:db8::1') == SSHTarget('2001:db8::1', 22, 'root')
+    assert str(SSHTarget('gw', 2222, 'ops')) == 'ops@gw:2222'
+    print("  [PASS] test_parse_targets")
+
+
+# =============================================================================
+# SESSION TESTS
+# =============================================================================
+
+def test_one_master_per_target():
+    """Commands to one host share a master; other ports/users get their own"""
+    fake = FakeSSH()
+    try:
+        ssh = fake.manager()
+        target = SSHTarget('gw.example.com', 22, 'root')
+        for i in range(3):
+            result = ssh.run(target, f'echo {i}')
+            assert result.returncode == 0 and result.stdout.strip() == f'echo {i}'
+        ssh.put(__file__, target, '/tmp/x')
+        ssh.run(SSHTarget('gw.example.com', 2222, 'root'), 'true')
+        ssh.run(SSHTarget('gw.example.com', 22, 'admin'), 'true')
+
+        modes = [(binary, mode) for binary, mode, _ in fake.calls()]
+        assert modes.count(('ssh', 'master')) == 3
+        assert modes.count(('ssh', 'mux')) == 5
+        assert ('scp', 'mux') in modes
+        assert ssh.stats.new == 3 and ssh.stats.reused == 3
+        assert ssh.session_stats()['reuse_ratio'] == 0.5
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_one_master_per_target")
+
+
+def test_idle_sessions_expire():
+    """Masters unused for idle_timeout are closed and reopened on demand"""
+    fake = FakeSSH()
+    try:
+        ssh = fake.manager(idle_timeout=0.05)
+        target = SSHTarget('gw.example.com')
+        ssh.run(target, 'true')
+        assert ssh.is_open(target)
+
+        time.sleep(0.06)
+        assert ssh.expire_idle() == 1
+        assert not ssh.is_open(target)
+
+        ssh.run(target, 'true')
+        assert ssh.stats.new == 2 and ssh.stats.expired == 1
+        ssh.close_all()
+        assert not ssh.is_open(target)
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_idle_sessions_expire")
+
+
+def test_failed_master_falls_back():
+    """Without a master the command still runs over a plain connection"""
+    fake = FakeSSH()
+    try:
+        os.environ['FAKE_SSH_FAIL'] = '1'
+        ssh = fake.manager()
+        result = ssh.run(SSHTarget('gw.example.com'), 'wg show')
+        assert result.returncode == 0
+        assert [mode for _, mode, _ in fake.calls()] == ['direct']
+        assert ssh.stats.failed == 1 and ssh.stats.new == 1
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_failed_master_falls_back")
+
+
+def test_multiplex_disabled():
+    """multiplex=False runs plain ssh without control options"""
+    fake = FakeSSH()
+    try:
+        ssh = fake.manager(multiplex=False)
+        target = SSHTarget('gw.example.com')
+        ssh.run(target, 'true')
+        ssh.run(target, 'true')
+        assert [mode for _, mode, _ in fake.calls()] == ['direct', 'direct']
+        assert ssh.stats.new == 2 and ssh.stats.reused == 0
+        assert not (fake.root / 'ctl').exists()
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_multiplex_disabled")
+
+
+def test_stale_socket_replaced():
+    """A socket whose master is gone is not counted as reused; a new master replaces it"""
+    fake = FakeSSH()
+    try:
+        ssh = fake.manager()
+        target = SSHTarget('gw.example.com')
+        ssh.control_dir.mkdir(mode=0o700)
+        ssh.control_path(target).touch()        # left behind by a dead master
+
+        ssh.run(target, 'true')
+        assert [mode for _, mode, _ in fake.calls()] == ['check', 'master', 'mux']
+        assert ssh.stats.new == 1 and ssh.stats.reused == 0
+        assert ssh.control_path(target).read_text() == 'live'
+
+        ssh.run(target, 'true')
+        assert ssh.stats.reused == 1
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_stale_socket_replaced")
+
+
+def test_untrusted_control_dir_refused():
+    """A world-writable or symlinked control directory disables multiplexing"""
+    fake = FakeSSH()
+    try:
+        ssh = fake.manager()
+        ssh.control_dir.mkdir()
+        ssh.control_dir.chmod(0o777)
+        ssh.run(SSHTarget('gw.example.com'), 'true')
+        assert [mode for _, mode, _ in fake.calls()] == ['direct']
+        assert not ssh.multiplex and not any(ssh.control_dir.iterdir())
+
+        private = fake.root / 'private'
+        private.mkdir(mode=0o700)
+        linked = fake.manager(control_dir=fake.root / 'link')
+        (fake.root / 'link').symlink_to(private)
+        linked.run(SSHTarget('gw.example.com'), 'true')
+        assert [mode for _, mode, _ in fake.calls()] == ['direct', 'direct']
+        assert not any(private.iterdir())
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_untrusted_control_dir_refused")
+
+
+# =============================================================================
+# CALLER TESTS
+# =============================================================================
+
+def test_deploy_and_status_share_sessions():
+    """deploy's ssh/scp helpers and status reuse one connection per host"""
+    from v1.cli.deploy import scp_file, ssh_command
+    from v1.wg_dump import read_dump
+
+    fake = FakeSSH()
+    fake.install()
+    try:
+        config = fake.root / 'hub.conf'
+        config.write_text('[Interface]\n')
+        assert ssh_command('vpn.example.com', 'test -f /etc/wireguard/wg0.conf')[0] == 0
+        assert scp_file(config, 'vpn.example.com', '/etc/wireguard/wg0.conf') == 0
+        assert ssh_command('vpn.example.com', 'wg-quick up wg0')[0] == 0
+        assert read_dump('vpn.example.com') is not None
+
+        # Exit node endpoints carry their SSH port
+        ssh_command('exit.example.com:2222', 'true', user='admin')
+
+        stats = ssh_sessions.session_stats()
+        assert stats['new'] == 2 and stats['reused'] == 3, stats
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_deploy_and_status_share_sessions")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("SSH SESSION MANAGER TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Targets", [
+            test_parse_targets,
+        ]),
+        ("Sessions", [
+            test_one_master_per_target,
+            test_idle_sessions_expire,
+            test_failed_master_falls_back,
+            test_multiplex_disabled,
+            test_stale_socket_replaced,
+            test_untrusted_control_dir_refused,
+        ]),
+        ("Callers", [
+            test_deploy_and_status_share_sessions,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
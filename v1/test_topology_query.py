@@ -0,0 +1,173 @@
+"""
+Tests for the Batched Topology Query API
+
+Covers:
+1. fetch_topology - relations joined from one query per table
+2. Views - status, peer manager, dashboards and state tracker issue the
+   same number of queries at any network size
+
+Run with: python3 v1/test_topology_query.py
+"""
+
+import io
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.topology_query import fetch_topology
+from v1.test_generation_engine import create_test_network, cleanup_db, count_queries
+
+
+def _grow(db, routers):
+    """Add routers (each advertising a LAN) and a comment on every remote"""
+    with db._connection() as conn:
+        for i in range(3, routers + 1):
+            cursor = conn.execute("""
+                INSERT INTO subnet_router (
+                    cs_id, permanent_guid, current_public_key, hostname,
+                    ipv4_address, ipv6_address, private_key
+                ) VALUES (1, ?, ?, ?, ?, ?, ?)
+            """, (f'router-guid-{i}', f'router-pub-{i}', f'router-{i}',
+                  f'10.66.2.{i}/32', f'fd66::2:{i:x}/128', f'router-priv-{i}'))
+            conn.execute("""
+                INSERT INTO advertised_network (subnet_router_id, network_cidr, description)
+                VALUES (?, ?, 'lan')
+            """, (cursor.lastrowid, f'192.168.{100 + i}.0/24'))
+        conn.execute("""
+            INSERT INTO comment (entity_permanent_guid, entity_type, category, text, display_order)
+            SELECT permanent_guid, 'remote', 'custom', 'note for ' || hostname, 999 FROM remote
+        """)
+
+
+# =============================================================================
+# QUERY API TESTS
+# =============================================================================
+
+def test_fetch_topology():
+    """Advertised networks, exit assignments, remote counts and comments are joined"""
+    db, db_path = create_test_network(remotes=5, suffix='-topo-fetch')
+    try:
+        _grow(db, routers=3)
+        with db._connection() as conn:
+            topology = fetch_topology(conn)
+
+        assert topology.cs['hostname'] == 'hub'
+        assert [r['hostname'] for r in topology.routers] == ['router-1', 'router-2', 'router-3']
+        assert [n['network_cidr'] for n in topology.routers[0]['advertised_networks']] == [
+            '192.168.10.0/24', '192.168.1.0/24'
+        ]
+        assert topology.routers[2]['advertised_networks'][0]['description'] == 'lan'
+
+        hostnames = [r['hostname'] for r in topology.remotes]
+        assert hostnames == sorted(hostnames)
+        on_exit = [r for r in topology.remotes if r['exit_node']]
+        assert len(on_exit) == 3 and on_exit[0]['exit_node']['hostname'] == 'exit-1'
+        assert topology.exit_nodes[0]['remote_count'] == 3
+        assert topology.remotes_for_exit(1) == on_exit
+
+        remote = topology.remotes[0]
+        comments = topology.comments_for('remote', remote['permanent_guid'])
+        assert [c['text'] for c in comments] == [f"note for {remote['hostname']}"]
+        print("  [PASS] test_fetch_topology")
+    finally:
+        cleanup_db(db_path)
+
+
+# =============================================================================
+# VIEW TESTS
+# =============================================================================
+
+def _views(db, db_path):
+    """Every view that lists the network, as name -> callable"""
+    from v1.cli.dashboard import render_topology_tree
+    from v1.cli.manage_peers import get_all_peers
+    from v1.cli.status import show_network_overview
+    from v1.state_tracker import capture_current_topology
+    from v1.web_dashboard import DashboardData
+
+    def overview():
+        with redirect_stdout(io.StringIO()):
+            show_network_overview(db)
+
+    return {
+        'status overview': overview,
+        'peer manager': lambda: get_all_peers(db),
+        'state tracker': lambda: capture_current_topology(db),
+        'web topology': lambda: DashboardData(db_path).get_topology(),
+        'web peers': lambda: DashboardData(db_path).get_all_peers(),
+        'topology tree': lambda: render_topology_tree(db_path),
+    }
+
+
+def test_views_are_constant_queries():
+    """Each view runs the same SELECTs for 2 routers/3 remotes as for 40/120"""
+    small_db, small_path = create_test_network(remotes=3, suffix='-topo-small')
+    large_db, large_path = create_test_network(remotes=120, suffix='-topo-large')
+    try:
+        _grow(small_db, routers=2)
+        _grow(large_db, routers=40)
+        small_views = _views(small_db, small_path)
+        large_views = _views(large_db, large_path)
+
+        for name in small_views:
+            small = count_queries(small_path, small_views[name], selects_only=True)
+            large = count_queries(large_path, large_views[name], selects_only=True)
+            assert small == large, f"{name}: query count grew with network size ({small} vs {large})"
+            assert large <= 6, f"{name}: {large} queries"
+
+        peers = large_views['peer manager']()
+        router = next(p for p in peers if p.hostname == 'router-7')
+        assert router.extras['advertised_networks'] == [('192.168.107.0/24', 'lan')]
+        assert sum(1 for p in peers if p.extras.get('exit_node_info')) == 60
+        print("  [PASS] test_views_are_constant_queries")
+    finally:
+        cleanup_db(small_path)
+        cleanup_db(large_path)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("TOPOLOGY QUERY TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Query API", [
+            test_fetch_topology,
+        ]),
+        ("Views", [
+            test_views_are_constant_queries,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
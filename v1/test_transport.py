@@ -0,0 +1,276 @@
+"""
+Tests for the Remote Transport Layer
+
+Covers:
+1. Batching - several commands in one round trip, per-command results
+2. Sandbox - simulated hosts, wg stand-ins, latency and failure injection
+3. Callers - deploy, drift and live state (wg show) go through the transport
+
+Run with: python3 v1/test_transport.py
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.ssh_sessions import SSHTarget
+from v1.transport import LocalTransport, SSHTransport, batch_script, set_transport, split_batch
+from v1.deploy_engine import DeployTarget, run_deployments
+from v1.test_ssh_sessions import FakeSSH
+
+
+HOST_CONFIG = """[Interface]
+Address = 10.66.0.1/24
+PrivateKey = cs-priv
+ListenPort = 51820
+
+[Peer]
+# laptop
+PublicKey = laptop-pub
+AllowedIPs = 10.66.0.30/32
+"""
+
+
+class Sandbox:
+    """LocalTransport in a temporary directory, installed as the active transport"""
+
+    def __init__(self, **kwargs):
+        self.root = Path(tempfile.mkdtemp(prefix='wgf-sandbox-'))
+        self.transport = LocalTransport(self.root / 'hosts', **kwargs)
+        self._saved = set_transport(self.transport)
+
+    def cleanup(self):
+        set_transport(self._saved)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+# =============================================================================
+# BATCH TESTS
+# =============================================================================
+
+def test_split_batch():
+    """Each batched command gets its own output and exit code"""
+    script = batch_script(['echo one', 'false', 'printf "two\\nlines\\n"'])
+    result = subprocess.run(['sh', '-c', script], capture_output=True, text=True)
+    one, failed, two = split_batch(result, 3)
+    assert (one.returncode, one.stdout) == (0, 'one\n')
+    assert (failed.returncode, failed.stdout) == (1, '')
+    assert (two.returncode, two.stdout) == (0, 'two\nlines\n')
+
+    # A connection failure: every command reports it
+    broken = subprocess.CompletedProcess([], 255, '', 'ssh: connect to host gw port 22: Connection refused\n')
+    assert [r.returncode for r in split_batch(broken, 2)] == [255, 255]
+    print("  [PASS] test_split_batch")
+
+
+def test_ssh_batch_is_one_round_trip():
+    """SSHTransport.batch runs every command in a single ssh invocation"""
+    fake = FakeSSH(remote=True)
+    fake.install()
+    try:
+        (fake.remote / 'wg0.conf').write_text(HOST_CONFIG)
+        transport = SSHTransport()
+        target = SSHTarget('gw.example.com')
+        found, missing = transport.batch(target, ['cat /etc/wireguard/wg0.conf', 'cat /etc/wireguard/nope'])
+        assert found.returncode == 0 and found.stdout == HOST_CONFIG
+        assert missing.returncode != 0
+        assert [mode for _, mode, _ in fake.calls()] == ['master', 'mux']
+
+        copy = fake.root / 'copy.conf'
+        assert transport.get(target, '/etc/wireguard/wg0.conf', copy).returncode == 0
+        assert copy.read_text() == HOST_CONFIG
+    finally:
+        fake.cleanup()
+    print("  [PASS] test_ssh_batch_is_one_round_trip")
+
+
+# =============================================================================
+# SANDBOX TESTS
+# =============================================================================
+
+def test_sandbox_hosts():
+    """Each simulated host has its own /etc/wireguard; put/get/exec map into it"""
+    sandbox = Sandbox()
+    try:
+        transport = sandbox.transport
+        config = sandbox.root / 'hub.conf'
+        config.write_text(HOST_CONFIG)
+        a, b = SSHTarget('a.example.com'), SSHTarget('b.example.com')
+
+        assert transport.put(config, a, '/etc/wireguard/wg0.conf').returncode == 0
+        assert transport.exec(a, 'test -f /etc/wireguard/wg0.conf').returncode == 0
+        assert transport.exec(b, 'test -f /etc/wireguard/wg0.conf').returncode != 0
+        assert (transport.host_root('a.example.com') / 'etc/wireguard/wg0.conf').read_text() == HOST_CONFIG
+
+        copy = sandbox.root / 'copy.conf'
+        assert transport.get(a, '/etc/wireguard/wg0.conf', copy).returncode == 0
+        assert copy.read_text() == HOST_CONFIG
+        assert transport.get(b, '/etc/wireguard/wg0.conf', copy).returncode == 1
+
+        # Stand-in WireGuard: wg-quick up, showconf without wg-quick fields, dump
+        assert transport.exec(a, 'sudo wg-quick up wg0').returncode == 0
+        assert transport.exec(a, 'wg-quick up wg0').returncode == 1
+        running = transport.exec(a, 'wg showconf wg0').stdout
+        assert 'Address' not in running and 'PublicKey = laptop-pub' in running
+        dump = transport.exec(a, 'wg show wg0 dump').stdout.splitlines()
+        assert dump[1].split('\t')[:4] == ['laptop-pub', '(none)', '(none)', '10.66.0.30/32']
+        assert transport.exec(b, 'wg showconf wg0').returncode == 1
+
+        stats = transport.stats()
+        assert stats['hosts'] == 2 and stats['put'] == 1 and stats['get'] == 2, stats
+    finally:
+        sandbox.cleanup()
+    print("  [PASS] test_sandbox_hosts")
+
+
+def test_sandbox_latency_and_failures():
+    """Latency applies per operation; failures look like unreachable hosts"""
+    sandbox = Sandbox(latency=0.05, fail_hosts=['down.example.com'])
+    try:
+        transport = sandbox.transport
+        start = time.monotonic()
+        transport.exec(SSHTarget('up.example.com'), 'true')
+        assert time.monotonic() - start >= 0.05
+
+        result = transport.exec(SSHTarget('down.example.com'), 'true')
+        assert result.returncode == 255 and 'Connection refused' in result.stderr
+
+        try:
+            transport.exec(SSHTarget('up.example.com'), 'true', timeout=0.01)
+            assert False, "expected a timeout"
+        except subprocess.TimeoutExpired:
+            pass
+        assert transport.stats()['failures'] == 1
+    finally:
+        sandbox.cleanup()
+
+    # Random failures are reproducible with a seed
+    counts = []
+    for _ in range(2):
+        sandbox = Sandbox(failure_rate=0.3, seed=7)
+        try:
+            for i in range(20):
+                sandbox.transport.exec(SSHTarget(f'h{i}.example.com'), 'true')
+            counts.append(sandbox.transport.stats()['failures'])
+        finally:
+            sandbox.cleanup()
+    assert counts[0] == counts[1] and 0 < counts[0] < 20, counts
+    print("  [PASS] test_sandbox_latency_and_failures")
+
+
+# =============================================================================
+# CALLER TESTS
+# =============================================================================
+
+def test_deploy_fleet_in_sandbox():
+    """A parallel deploy to simulated hosts: restart, then skip, then hot apply"""
+    from v1.cli.deploy import deploy_host
+
+    sandbox = Sandbox()
+    try:
+        configs = sandbox.root / 'generated'
+        configs.mkdir()
+        targets = []
+        for i in range(12):
+            config = configs / f'router-{i}.conf'
+            config.write_text(HOST_CONFIG.replace('10.66.0.1/24', f'10.66.0.{i + 2}/24'))
+            targets.append(DeployTarget('subnet_router', f'router-{i}', config, f'router-{i}.sim'))
+
+        results = run_deployments(targets, lambda t, d: deploy_host(t, restart=True, deadline=d),
+                                  parallel=4)
+        assert [r.status for r in results] == ['deployed'] * 12, [r.message for r in results]
+        assert sandbox.transport.running_config('router-3.sim') is not None
+
+        results = run_deployments(targets, lambda t, d: deploy_host(t, deadline=d), parallel=4)
+        assert [r.status for r in results] == ['unchanged'] * 12
+
+        config = targets[0].config_file
+        config.write_text(config.read_text() + "\n[Peer]\n# phone\nPublicKey = phone-pub\nAllowedIPs = 10.66.0.31/32\n")
+        status, message = deploy_host(targets[0], hot=True)
+        assert (status, message) == ('deployed', 'live: 1 added, 0 removed, 0 changed'), message
+        assert 'phone-pub' in sandbox.transport.running_config('router-0.sim')
+    finally:
+        sandbox.cleanup()
+    print("  [PASS] test_deploy_fleet_in_sandbox")
+
+
+def test_readers_use_transport():
+    """Live state (wg show all dump) and drift checks go through the transport"""
+    from v1.drift_detection import DriftDetector
+    from v1.wg_dump import read_dump
+
+    sandbox = Sandbox()
+    try:
+        transport = sandbox.transport
+        config = sandbox.root / 'hub.conf'
+        config.write_text(HOST_CONFIG)
+        hub = SSHTarget('hub.sim')
+        transport.put(config, hub, '/etc/wireguard/wg0.conf')
+        transport.exec(hub, 'wg-quick up wg0')
+
+        assert 'laptop-pub' in read_dump('hub.sim').by_key('wg0')
+
+        detector = DriftDetector.__new__(DriftDetector)
+        running = detector._fetch_live_config('hub.sim', 22, 'root', None)
+        assert 'PublicKey = laptop-pub' in running
+        assert transport.stats()['exec'] == 3
+    finally:
+        sandbox.cleanup()
+    print("  [PASS] test_readers_use_transport")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("REMOTE TRANSPORT TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Batching", [
+            test_split_batch,
+            test_ssh_batch_is_one_round_trip,
+        ]),
+        ("Sandbox", [
+            test_sandbox_hosts,
+            test_sandbox_latency_and_failures,
+        ]),
+        ("Callers", [
+            test_deploy_fleet_in_sandbox,
+            test_readers_use_transport,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
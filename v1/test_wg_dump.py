@@ -0,0 +1,227 @@
+"""
+Tests for the Shared `wg show all dump` Parser
+
+Covers:
+1. Parsing - all-interface and single-interface dumps, exact counters
+2. Snapshots - one `wg` run shared by status, bandwidth and metrics
+
+Run with: python3 v1/test_wg_dump.py
+"""
+
+import contextlib
+import io
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.ssh_sessions import SSHTarget
+from v1.wg_dump import clear_snapshots, parse_dump
+from v1.test_generation_engine import create_test_network, cleanup_db
+from v1.test_transport import Sandbox
+
+
+NOW = 1_750_000_000
+
+ALL_DUMP = "\n".join([
+    "wg0\tcs-priv\tcs-pub\t51820\toff",
+    f"wg0\trouter-pub-1\t(none)\t203.0.113.7:41234\t10.66.0.2/32,192.168.1.0/24\t{NOW - 30}\t6442450944\t1099511627776\t25",
+    "wg0\tremote-pub-1\tpsk-secret\t(none)\t10.66.1.2/32\t0\t0\t0\toff",
+    "wg1\tlab-priv\tlab-pub\t51821\t0x1234",
+    f"wg1\texit-pub\t(none)\t198.51.100.9:51820\t0.0.0.0/0\t{NOW - 600}\t10\t20\toff",
+]) + "\n"
+
+
+# =============================================================================
+# PARSING TESTS
+# =============================================================================
+
+def test_parse_all_interfaces():
+    """Every interface and peer, with exact byte counters and epoch handshakes"""
+    snapshot = parse_dump(ALL_DUMP, taken_at=NOW)
+    assert sorted(snapshot.interfaces) == ['wg0', 'wg1']
+    assert snapshot.interfaces['wg1'].listen_port == 51821
+    assert snapshot.interfaces['wg1'].fwmark == '0x1234'
+    assert snapshot.interfaces['wg0'].fwmark is None
+    assert not hasattr(snapshot.interfaces['wg0'], 'private_key')
+
+    router = snapshot.by_key('wg0')['router-pub-1']
+    assert router.rx_bytes == 6442450944 and router.tx_bytes == 1099511627776
+    assert router.allowed_ips == ('10.66.0.2/32', '192.168.1.0/24')
+    assert router.persistent_keepalive == 25 and not router.has_preshared_key
+    assert router.handshake_age(NOW) == 30 and router.is_up(NOW)
+
+    remote = snapshot.by_key('wg0')['remote-pub-1']
+    assert remote.has_preshared_key and remote.endpoint is None
+    assert remote.handshake_time is None and not remote.is_up(NOW)
+
+    assert [p.public_key for p in snapshot.peers_on('wg1')] == ['exit-pub']
+    assert not snapshot.by_key('wg1')['exit-pub'].is_up(NOW)
+    assert len(snapshot.peers_on()) == 3
+    print("  [PASS] test_parse_all_interfaces")
+
+
+def test_parse_single_interface():
+    """`wg show wg0 dump` (no interface column); malformed lines are skipped"""
+    single = "\n".join(line.split('\t', 1)[1] for line in ALL_DUMP.splitlines()[:3])
+    single += "\nnot a dump line\nbroken\t(none)\t(none)\t10.0.0.9/32\tsoon\t0\t0\toff\n"
+    snapshot = parse_dump(single, interface='wg0', taken_at=NOW)
+    assert list(snapshot.interfaces) == ['wg0']
+    assert sorted(snapshot.by_key()) == ['remote-pub-1', 'router-pub-1']
+    assert snapshot.peers[0].interface == 'wg0'
+    print("  [PASS] test_parse_single_interface")
+
+
+# =============================================================================
+# SNAPSHOT TESTS
+# =============================================================================
+
+HUB_CONFIG = """[Interface]
+Address = 10.66.0.1/24
+PrivateKey = cs-priv
+ListenPort = 51820
+
+[Peer]
+# router-1
+PublicKey = router-pub-1
+AllowedIPs = 10.66.0.2/32, 192.168.1.0/24
+
+[Peer]
+# exit-1
+PublicKey = exit-pub
+AllowedIPs = 10.66.0.5/32
+"""
+
+
+def test_one_snapshot_per_cycle():
+    """Status and bandwidth collection in one cycle run wg once on the hub"""
+    from v1.bandwidth_tracking import BandwidthTracker
+    from v1.cli.status import show_live_peer_status
+
+    db, db_path = create_test_network(remotes=1, suffix='_wgdump')
+    sandbox = Sandbox()
+    clear_snapshots()
+    try:
+        transport = sandbox.transport
+        (transport.host_root('vpn.example.com') / 'etc/wireguard/wg0.conf').write_text(HUB_CONFIG)
+        transport.exec(SSHTarget('vpn.example.com'), 'wg-quick up wg0')
+        before = transport.stats()['exec']
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            show_live_peer_status(db)
+        assert '● router-1' in output.getvalue() and '1.0 KB' in output.getvalue(), output.getvalue()
+
+        samples = BandwidthTracker(db_path).collect_samples(ssh_host='vpn.example.com')
+        by_host = {s.hostname: s for s in samples}
+        assert by_host['router-1'].rx_bytes == 1024 and by_host['router-1'].connected
+        assert 'exit-1' in by_host
+        assert transport.stats()['exec'] - before == 1
+
+        # max_age=0 always runs wg
+        BandwidthTracker(db_path).collect_samples(ssh_host='vpn.example.com', max_age=0)
+        assert transport.stats()['exec'] - before == 2
+    finally:
+        clear_snapshots()
+        sandbox.cleanup()
+        cleanup_db(db_path)
+    print("  [PASS] test_one_snapshot_per_cycle")
+
+
+FAKE_WG = """#!/bin/sh
+echo "$*" >> "$FAKE_WG_LOG"
+cat "$FAKE_WG_DUMP"
+"""
+
+
+def test_metrics_from_snapshot():
+    """Prometheus peer metrics come from the local snapshot, with byte counters"""
+    from v1.prometheus_metrics import PrometheusMetricsCollector
+
+    db, db_path = create_test_network(remotes=1, suffix='_wgdump_metrics')
+    bin_dir = Path(db_path).parent / 'wgdump-bin'
+    bin_dir.mkdir(exist_ok=True)
+    wg = bin_dir / 'wg'
+    wg.write_text(FAKE_WG)
+    wg.chmod(wg.stat().st_mode | stat.S_IEXEC)
+    dump = bin_dir / 'dump.txt'
+    now = int(time.time())
+    dump.write_text(ALL_DUMP.replace(str(NOW - 30), str(now - 30)))
+    log = bin_dir / 'log'
+
+    saved_path = os.environ['PATH']
+    os.environ.update(PATH=f"{bin_dir}{os.pathsep}{saved_path}", FAKE_WG_DUMP=str(dump), FAKE_WG_LOG=str(log))
+    clear_snapshots()
+    try:
+        collector = PrometheusMetricsCollector(db_path)
+        metrics = {m.name: m for m in collector._collect_peer_status_metrics()}
+        collector._collect_peer_status_metrics()
+
+        status = {v.labels['public_key']: v.value for v in metrics['wireguard_peer_status'].values}
+        assert status == {'router-p...': 1.0, 'remote-p...': 0.0, 'exit-pub...': 0.0}
+        rx = {v.labels['public_key']: v.value for v in metrics['wireguard_peer_rx_bytes'].values}
+        assert rx['router-p...'] == 6442450944
+        assert metrics['wireguard_peer_tx_bytes'].metric_type.value == 'counter'
+        assert len(metrics['wireguard_peer_last_handshake_seconds'].values) == 2
+        assert log.read_text().splitlines() == ['show all dump']
+    finally:
+        os.environ['PATH'] = saved_path
+        os.environ.pop('FAKE_WG_DUMP', None)
+        os.environ.pop('FAKE_WG_LOG', None)
+        clear_snapshots()
+        for path in (wg, dump, log):
+            path.unlink(missing_ok=True)
+        bin_dir.rmdir()
+        cleanup_db(db_path)
+    print("  [PASS] test_metrics_from_snapshot")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("WG DUMP PARSER TESTS")
+    print("=" * 60)
+
+    all_tests = [
+        ("Parsing", [
+            test_parse_all_interfaces,
+            test_parse_single_interface,
+        ]),
+        ("Snapshots", [
+            test_one_snapshot_per_cycle,
+            test_metrics_from_snapshot,
+        ]),
+    ]
+
+    total_passed = 0
+    total_failed = 0
+
+    for category_name, tests in all_tests:
+        print(f"\n{category_name}:")
+        for test in tests:
+            try:
+                test()
+                total_passed += 1
+            except AssertionError as e:
+                print(f"  [FAIL] {test.__name__}: {e}")
+                total_failed += 1
+            except Exception as e:
+                print(f"  [ERROR] {test.__name__}: {e}")
+                total_failed += 1
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total: {total_passed + total_failed}")
+    print(f"Passed: {total_passed}")
+    print(f"Failed: {total_failed}")
+
+    return 0 if total_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Topology Query - Every Entity and Its Relations in a Fixed Number of Queries
+
+Status, the peer manager, the dashboards and the state tracker all list the
+network: routers with their advertised networks, remotes with their exit
+node and comments, exit nodes with how many remotes use them. Each used to
+look the relations up per entity (one advertised_network query per router,
+one exit_node query per remote, ...), so a 2,000-remote network cost
+thousands of queries per screen.
+
+fetch_topology() reads each table once (six SELECTs, however large the
+network) and joins in Python. It is the read-side sibling of
+generation_engine.load_topology(), which carries what config rendering
+needs (command pairs, decrypted keys); this one carries what views need
+(descriptions, comments, exit assignments, remote counts).
+
+Rows are plain dicts of the full table row, ordered by hostname like the
+per-view queries were.
+
+Usage:
+    from v1.topology_query import fetch_topology
+
+    with db._connection() as conn:
+        topology = fetch_topology(conn)
+    for router in topology.routers:
+        print(router['hostname'], [n['network_cidr'] for n in router['advertised_networks']])
+"""
+
+import sqlite3
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+Row = Dict[str, Any]
+
+
+@dataclass
+class NetworkTopology:
+    """
+    The whole network as plain dicts.
+
+    Routers carry 'advertised_networks' (dicts with network_cidr and
+    description, in insertion order). Remotes carry 'exit_node' (the exit
+    node row or None). Exit nodes carry 'remote_count'.
+    """
+    cs: Optional[Row]
+    routers: List[Row]
+    remotes: List[Row]
+    exit_nodes: List[Row]
+    comments: Dict[Tuple[str, str], List[Row]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._remotes_by_exit: Dict[int, List[Row]] = {}
+        for remote in self.remotes:
+            if remote.get('exit_node_id'):
+                self._remotes_by_exit.setdefault(remote['exit_node_id'], []).append(remote)
+
+    def remotes_for_exit(self, exit_node_id: int) -> List[Row]:
+        """Remotes routed through an exit node, ordered by hostname"""
+        return self._remotes_by_exit.get(exit_node_id, [])
+
+    def comments_for(self, entity_type: str, permanent_guid: str) -> List[Row]:
+        """Comments of an entity, in display order"""
+        return self.comments.get((entity_type, permanent_guid), [])
+
+
+def _dicts(cursor: sqlite3.Cursor, query: str) -> List[Row]:
+    """Rows as dicts, whatever the connection's row factory"""
+    try:
+        cursor.execute(query)
+    except sqlite3.OperationalError:
+        return []       # table missing in an older database (exit_node, comment)
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def fetch_topology(conn: sqlite3.Connection) -> NetworkTopology:
+    """
+    Read the network with one query per table.
+
+    Args:
+        conn: Open connection to the main database (any row factory)
+    """
+    cursor = conn.cursor()
+
+    cs_rows = _dicts(cursor, "SELECT * FROM coordination_server ORDER BY id LIMIT 1")
+    routers = _dicts(cursor, "SELECT * FROM subnet_router ORDER BY hostname")
+    networks = _dicts(cursor, "SELECT * FROM advertised_network ORDER BY id")
+    remotes = _dicts(cursor, "SELECT * FROM remote ORDER BY hostname")
+    exit_nodes = _dicts(cursor, "SELECT * FROM exit_node ORDER BY hostname")
+    comment_rows = _dicts(cursor, "SELECT * FROM comment ORDER BY display_order, id")
+
+    by_router: Dict[int, List[Row]] = {}
+    for network in networks:
+        by_router.setdefault(network['subnet_router_id'], []).append(network)
+    for router in routers:
+        router['advertised_networks'] = by_router.get(router['id'], [])
+
+    exits_by_id = {e['id']: e for e in exit_nodes}
+    remote_counts: Dict[int, int] = {}
+    for remote in remotes:
+        exit_node_id = remote.get('exit_node_id')
+        remote['exit_node'] = exits_by_id.get(exit_node_id) if exit_node_id else None
+        if exit_node_id:
+            remote_counts[exit_node_id] = remote_counts.get(exit_node_id, 0) + 1
+    for exit_node in exit_nodes:
+        exit_node['remote_count'] = remote_counts.get(exit_node['id'], 0)
+
+    comments: Dict[Tuple[str, str], List[Row]] = {}
+    for comment in comment_rows:
+        comments.setdefault((comment['entity_type'], comment['entity_permanent_guid']), []).append(comment)
+
+    return NetworkTopology(
+        cs=cs_rows[0] if cs_rows else None,
+        routers=routers,
+        remotes=remotes,
+        exit_nodes=exit_nodes,
+        comments=comments,
+    )
@@ -0,0 +1,452 @@
+"""
+Remote Transport - How Commands and Files Reach Managed Hosts
+
+Deploy, drift detection, bandwidth collection and status all need the same
+four operations on a host: run a command, upload a file, download a file,
+and run several commands in one round trip. They go through a Transport
+instead of calling ssh/scp themselves, so the backend can be swapped:
+
+- SSHTransport (default): the shared multiplexed sessions of ssh_sessions.
+- LocalTransport: simulates any number of hosts on the local filesystem.
+  Each host is a directory standing in for its root (/etc/wireguard lives
+  under <root>/<host>/etc/wireguard); commands run in a subprocess inside
+  it, with stand-in `wg`, `wg-quick` and `sudo` on PATH. Per-operation
+  latency and failure injection make it possible to load-test a 500-host
+  rollout offline (see benchmarks/bench_deploy.py).
+
+Every operation returns subprocess.CompletedProcess and raises
+subprocess.TimeoutExpired like subprocess.run, whichever backend is used.
+
+WG_FRIEND_TRANSPORT=local:<dir> makes the CLI use a LocalTransport rooted
+at <dir>.
+
+Usage:
+    from v1.transport import get_transport
+    from v1.ssh_sessions import SSHTarget
+
+    transport = get_transport()
+    target = SSHTarget.parse('vpn.example.com')
+    transport.put('generated/hub.conf', target, '/etc/wireguard/wg0.conf')
+    hashed, shown = transport.batch(target, ['sha256sum /etc/wireguard/wg0.conf', 'wg show wg0'])
+"""
+
+import os
+import random
+import shutil
+import stat
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.network_utils import is_local_host
+from v1.ssh_sessions import SSHSessionManager, SSHTarget, get_session_manager
+
+# Separates the outputs of batched commands
+BATCH_MARKER = '#--- wg-friend batch ---#'
+
+
+def batch_script(commands: List[str]) -> str:
+    """One shell script running each command and recording its exit code"""
+    return '; '.join(f"{{ {command.rstrip('; ')} ; }}; echo \"{BATCH_MARKER} $?\"" for command in commands)
+
+
+def split_batch(result: subprocess.CompletedProcess, count: int) -> List[subprocess.CompletedProcess]:
+    """
+    Per-command results from the output of batch_script().
+
+    Commands whose marker is missing (the connection failed, or the script
+    was cut short) get the batch's return code, or 255 if it succeeded.
+    stderr is shared: it can't be split per command.
+    """
+    results = []
+    rest = result.stdout
+    for _ in range(count):
+        output, sep, tail = rest.partition(BATCH_MARKER)
+        if not sep:
+            break
+        code, _, rest = tail.partition('\n')
+        try:
+            returncode = int(code.strip())
+        except ValueError:
+            returncode = 255
+        results.append(subprocess.CompletedProcess(result.args, returncode, output, result.stderr))
+    missing = result.returncode or 255
+    while len(results) < count:
+        results.append(subprocess.CompletedProcess(result.args, missing, '', result.stderr))
+    return results
+
+
+class Transport:
+    """
+    Operations on managed hosts.
+
+    Backends implement exec, put and get. batch() runs several commands in
+    one exec; backends with a cheaper way to do it may override it.
+
+    SSH options (key_path, connect_timeout, batch_mode) are accepted by
+    every backend and ignored where they don't apply.
+    """
+
+    name = 'transport'
+
+    def is_local(self, host: str) -> bool:
+        """Whether `host` is this machine (callers then act on it directly)"""
+        return False
+
+    def exec(self, target: SSHTarget, command: str, timeout: Optional[float] = None,
+             input: Optional[str] = None, **options) -> subprocess.CompletedProcess:
+        raise NotImplementedError
+
+    def put(self, local_path: Path | str, target: SSHTarget, remote_path: str,
+            timeout: Optional[float] = None, **options) -> subprocess.CompletedProcess:
+        raise NotImplementedError
+
+    def get(self, target: SSHTarget, remote_path: str, local_path: Path | str,
+            timeout: Optional[float] = None, **options) -> subprocess.CompletedProcess:
+        raise NotImplementedError
+
+    def batch(self, target: SSHTarget, commands: List[str], timeout: Optional[float] = None,
+              **options) -> List[subprocess.CompletedProcess]:
+        """Run commands in order in one round trip; one result per command"""
+        if not commands:
+            return []
+        result = self.exec(target, batch_script(commands), timeout=timeout, **options)
+        return split_batch(result, len(commands))
+
+    def stats(self) -> Dict:
+        return {}
+
+    def summary(self) -> str:
+        """One line for deploy summaries"""
+        return ''
+
+    def close(self):
+        pass
+
+
+class SSHTransport(Transport):
+    """Commands and copies over shared multiplexed SSH sessions"""
+
+    name = 'SSH'
+
+    def __init__(self, manager: Optional[SSHSessionManager] = None):
+        self._manager = manager
+
+    @property
+    def manager(self) -> SSHSessionManager:
+        # Resolved per call, so a replaced shared manager takes effect
+        return self._manager or get_session_manager()
+
+    def is_local(self, host: str) -> bool:
+        return is_local_host(host)
+
+    def exec(self, target, command, timeout=None, input=None, **options):
+        return self.manager.run(target, command, timeout=timeout, input=input, **options)
+
+    def put(self, local_path, target, remote_path, timeout=None, **options):
+        return self.manager.put(local_path, target, remote_path, timeout=timeout, **options)
+
+    def get(self, target, remote_path, local_path, timeout=None, **options):
+        return self.manager.get(target, remote_path, local_path, timeout=timeout, **options)
+
+    def stats(self) -> Dict:
+        return self.manager.session_stats()
+
+    def summary(self) -> str:
+        stats = self.manager.stats
+        return f"{stats.new} new session(s), {stats.reused} reused"
+
+    def close(self):
+        self.manager.close_all()
+
+
+# =============================================================================
+# LOCAL SANDBOX
+# =============================================================================
+
+# Stand-in for wg/wg-quick on a simulated host (plain sh: it runs several
+# times per deployed host). The running interface is a stripped copy of the
+# config under $SANDBOX_HOST/run/wireguard.
+SANDBOX_WG = r'''#!/bin/sh
+conf_dir="$SANDBOX_HOST/etc/wireguard"
+run_dir="$SANDBOX_HOST/run/wireguard"
+
+strip() {
+    grep -viE '^[[:space:]]*(Address|DNS|MTU|Table|PreUp|PostUp|PreDown|PostDown|SaveConfig)[[:space:]]*=' "$1"
+    return 0
+}
+
+running() {
+    if [ ! -f "$run_dir/$1.conf" ]; then
+        echo "Unable to access interface: No such device" >&2
+        exit 1
+    fi
+}
+
+case "$(basename "$0") $1" in
+    "wg-quick strip")
+        strip "$conf_dir/$2.conf" ;;
+    "wg-quick up")
+        if [ -f "$run_dir/$2.conf" ]; then
+            echo "wg-quick: \`$2' already exists" >&2
+            exit 1
+        fi
+        mkdir -p "$run_dir" && strip "$conf_dir/$2.conf" > "$run_dir/$2.conf" ;;
+    "wg-quick down")
+        if [ ! -f "$run_dir/$2.conf" ]; then
+            echo "wg-quick: \`$2' is not a WireGuard interface" >&2
+            exit 1
+        fi
+        rm "$run_dir/$2.conf" ;;
+    "wg showconf")
+        running "$2"
+        cat "$run_dir/$2.conf" ;;
+    "wg syncconf")
+        running "$2"
+        cat "$3" > "$run_dir/$2.conf.new" && mv "$run_dir/$2.conf.new" "$run_dir/$2.conf" ;;
+    "wg show")
+        # `wg show all dump` prefixes every line with the interface name
+        if [ "$2" = all ]; then
+            interfaces=$(ls "$run_dir" 2>/dev/null | sed -n 's/\.conf$//p')
+            all=1
+        else
+            interfaces="${2:-wg0}"
+            running "$interfaces"
+            all=
+        fi
+        now=$(date +%s)
+        for interface in $interfaces; do
+            awk -v mode="$3" -v iface="$interface" -v now="$now" -v all="$all" '
+                function key(s) { sub(/[ \t]*=.*/, "", s); gsub(/[ \t]/, "", s); return tolower(s) }
+                function val(s) { sub(/^[^=]*=[ \t]*/, "", s); sub(/[ \t]+$/, "", s); return s }
+                function either(s, d) { return s == "" ? d : s }
+                /^[ \t]*#/ { next }
+                /^\[Interface\]/ { section = "interface"; next }
+                /^\[Peer\]/ { section = "peer"; n++; next }
+                /=/ {
+                    if (section == "interface") i[key($0)] = val($0)
+                    else if (section == "peer") p[n, key($0)] = val($0)
+                }
+                END {
+                    prefix = all ? iface "\t" : ""
+                    if (mode == "dump") {
+                        print prefix either(i["privatekey"], "(none)") "\t(none)\t" either(i["listenport"], "0") "\toff"
+                        for (k = 1; k <= n; k++)
+                            print prefix p[k, "publickey"] "\t" either(p[k, "presharedkey"], "(none)") "\t" \
+                                  either(p[k, "endpoint"], "(none)") "\t" either(p[k, "allowedips"], "(none)") "\t" \
+                                  now "\t1024\t2048\t" either(p[k, "persistentkeepalive"], "off")
+                    } else {
+                        print "interface: " iface
+                        for (k = 1; k <= n; k++) {
+                            print "\npeer: " p[k, "publickey"]
+                            print "  allowed ips: " either(p[k, "allowedips"], "(none)")
+                            print "  latest handshake: 1 second ago"
+                        }
+                    }
+                }' "$run_dir/$interface.conf"
+        done ;;
+    *)
+        echo "sandbox wg: unsupported command: $*" >&2
+        exit 1 ;;
+esac
+'''
+
+SANDBOX_SUDO = '#!/bin/sh\nexec "$@"\n'
+
+# Remote paths mapped into a simulated host's directory
+SANDBOX_PATHS = ('/etc/wireguard',)
+
+
+@dataclass
+class SandboxStats:
+    """Counters for the local sandbox"""
+    exec: int = 0
+    put: int = 0
+    get: int = 0
+    failures: int = 0     # injected failures
+    hosts: int = 0        # distinct hosts contacted
+
+    @property
+    def operations(self) -> int:
+        return self.exec + self.put + self.get
+
+
+class LocalTransport(Transport):
+    """
+    Simulated hosts on the local filesystem.
+
+    Args:
+        root: Directory holding one subdirectory per simulated host
+        latency: Seconds added to every operation (network round trip)
+        jitter: Up to this many extra seconds, random per operation
+        failure_rate: Probability that an operation fails like an
+            unreachable host (exit 255)
+        fail_hosts: Hosts that are always unreachable
+        seed: Seed for jitter and failure injection (reproducible runs)
+    """
+
+    name = 'Sandbox'
+
+    # is_local() stays False: every host is simulated, even 'localhost', so
+    # a sandboxed deploy never touches this machine's /etc/wireguard
+
+    def __init__(self, root: Path | str, latency: float = 0.0, jitter: float = 0.0,
+                 failure_rate: float = 0.0, fail_hosts: Iterable[str] = (),
+                 seed: Optional[int] = None):
+        self.root = Path(root)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.fail_hosts: Set[str] = set(fail_hosts)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._seen: Set[str] = set()
+        self._stats = SandboxStats()
+
+        self.bin_dir = self.root / '.bin'
+        self.bin_dir.mkdir(parents=True, exist_ok=True)
+        for name, script in (('wg', SANDBOX_WG), ('wg-quick', SANDBOX_WG), ('sudo', SANDBOX_SUDO)):
+            path = self.bin_dir / name
+            path.write_text(script)
+            path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+    # -------------------------------------------------------------------------
+    # Hosts
+    # -------------------------------------------------------------------------
+
+    def host_root(self, host: str | SSHTarget) -> Path:
+        """Directory standing in for a host's / (created on first use)"""
+        name = host.host if isinstance(host, SSHTarget) else host
+        path = self.root / name.replace('/', '_')
+        (path / 'etc' / 'wireguard').mkdir(parents=True, exist_ok=True)
+        return path
+
+    def local_path(self, target: SSHTarget, remote_path: str) -> Path:
+        """Where a remote path of the target lives in the sandbox"""
+        return Path(self._map_paths(target, remote_path))
+
+    def running_config(self, host: str, interface: str = 'wg0') -> Optional[str]:
+        """The simulated interface's config, None if it isn't up"""
+        path = self.host_root(host) / 'run' / 'wireguard' / f'{interface}.conf'
+        return path.read_text() if path.exists() else None
+
+    def _map_paths(self, target: SSHTarget, text: str) -> str:
+        host_root = self.host_root(target)
+        for prefix in SANDBOX_PATHS:
+            text = text.replace(prefix, f'{host_root}{prefix}')
+        return text
+
+    # -------------------------------------------------------------------------
+    # Simulation
+    # -------------------------------------------------------------------------
+
+    def _simulate(self, target: SSHTarget, kind: str,
+                  timeout: Optional[float]) -> Optional[subprocess.CompletedProcess]:
+        """Count, delay and maybe fail an operation (returns the failure)"""
+        with self._lock:
+            setattr(self._stats, kind, getattr(self._stats, kind) + 1)
+            if target.host not in self._seen:
+                self._seen.add(target.host)
+                self._stats.hosts += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = target.host in self.fail_hosts or (
+                self.failure_rate > 0 and self._random.random() < self.failure_rate)
+            if failed:
+                self._stats.failures += 1
+
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise subprocess.TimeoutExpired(f'{kind} {target}', timeout)
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return subprocess.CompletedProcess(
+                [kind, str(target)], 255, '',
+                f"ssh: connect to host {target.host} port {target.port}: Connection refused\n")
+        return None
+
+    # -------------------------------------------------------------------------
+    # Operations
+    # -------------------------------------------------------------------------
+
+    def exec(self, target, command, timeout=None, input=None, **options):
+        failure = self._simulate(target, 'exec', timeout)
+        if failure:
+            return failure
+        host_root = self.host_root(target)
+        env = dict(os.environ, SANDBOX_HOST=str(host_root),
+                   PATH=f"{self.bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+        # bash, like a login shell on the hosts (deploy uses process substitution)
+        shell = shutil.which('bash') or 'sh'
+        return subprocess.run([shell, '-c', self._map_paths(target, command)], cwd=host_root,
+                              env=env, capture_output=True, text=True, timeout=timeout,
+                              input=input)
+
+    def put(self, local_path, target, remote_path, timeout=None, **options):
+        failure = self._simulate(target, 'put', timeout)
+        if failure:
+            return failure
+        try:
+            shutil.copy(local_path, self.local_path(target, remote_path))
+        except OSError as e:
+            return subprocess.CompletedProcess(['put', str(target)], 1, '', f"scp: {e}\n")
+        return subprocess.CompletedProcess(['put', str(target)], 0, '', '')
+
+    def get(self, target, remote_path, local_path, timeout=None, **options):
+        failure = self._simulate(target, 'get', timeout)
+        if failure:
+            return failure
+        try:
+            shutil.copy(self.local_path(target, remote_path), local_path)
+        except OSError as e:
+            return subprocess.CompletedProcess(['get', str(target)], 1, '', f"scp: {e}\n")
+        return subprocess.CompletedProcess(['get', str(target)], 0, '', '')
+
+    def stats(self) -> Dict:
+        entry = asdict(self._stats)
+        entry['operations'] = self._stats.operations
+        return entry
+
+    def summary(self) -> str:
+        return (f"{self._stats.operations} operation(s) on {self._stats.hosts} simulated host(s), "
+                f"{self._stats.failures} injected failure(s)")
+
+
+# =============================================================================
+# MODULE-LEVEL TRANSPORT
+# =============================================================================
+
+_transport: Optional[Transport] = None
+_transport_lock = threading.Lock()
+
+
+def transport_from_env() -> Transport:
+    """SSHTransport, or LocalTransport for WG_FRIEND_TRANSPORT=local:<dir>"""
+    spec = os.environ.get('WG_FRIEND_TRANSPORT', 'ssh')
+    if spec.startswith('local:'):
+        return LocalTransport(spec.split(':', 1)[1])
+    return SSHTransport()
+
+
+def get_transport() -> Transport:
+    """The process-wide transport used by all remote operations"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = transport_from_env()
+    return _transport
+
+
+def set_transport(transport: Optional[Transport]) -> Optional[Transport]:
+    """Replace the process-wide transport (None = back to the default); returns the old one"""
+    global _transport
+    with _transport_lock:
+        previous, _transport = _transport, transport
+    return previous
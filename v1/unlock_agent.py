@@ -0,0 +1,370 @@
+"""
+Unlock Agent - Derived Key Cache for Encrypted Databases
+
+Unlocking an encrypted database runs Scrypt (n=2^20, r=8): about a second
+and 1 GB of memory traffic per process. Cron-driven collectors, rotation
+runs and scripts each paid that. The agent is a small local daemon that
+holds derived keys in memory so later `wg-friend` processes unlock in well
+under a millisecond.
+
+Security model:
+- Listens on a Unix socket in a 0700 directory owned by the user; the
+  socket itself is 0600. Every connection is also checked with
+  SO_PEERCRED (Linux) or LOCAL_PEERCRED (BSD/macOS) and refused unless it
+  comes from the same uid.
+- Clients apply the same checks the other way round before sending
+  anything: the socket's directory must be a real directory owned by the
+  user with mode 0700, the socket must be owned by the user, and the peer
+  must run as the same uid. Anything else (e.g. a directory another local
+  user pre-created under /tmp) is treated as "no agent".
+- Keys reach the agent only through an explicit `wg-friend agent add`;
+  a passphrase prompt never hands its key over on its own.
+- Holds derived keys only - the passphrase is never sent to it.
+- Each key has a TTL (absolute lifetime) and an idle timeout (dropped if
+  not used); `wg-friend agent lock` forgets every key at once.
+- Keys are identified by sha256(db path + salt), so a passphrase change
+  (new salt) never matches an old key. Clients verify a key against the
+  database's canary before using it.
+
+Protocol: one JSON request per connection, newline-terminated, and one JSON
+response: {"op": "get", "id": ...} -> {"ok": true, "key": "<base64>"}.
+
+Usage:
+    wg-friend agent start          # background daemon
+    wg-friend agent add            # prompt once, cache the derived key
+    wg-friend generate             # unlocks from the agent, no prompt
+    wg-friend agent lock           # forget all keys
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import select
+import socket
+import stat
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default lifetime of a cached key, and how long it may go unused
+DEFAULT_TTL = 8 * 3600
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+
+# How long a client waits for the agent before falling back to a prompt
+CLIENT_TIMEOUT = 0.5
+
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+def default_socket_path() -> Path:
+    """$WG_FRIEND_AGENT_SOCK, else a per-user runtime directory"""
+    if os.environ.get('WG_FRIEND_AGENT_SOCK'):
+        return Path(os.environ['WG_FRIEND_AGENT_SOCK'])
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return Path(runtime_dir) / 'wg-friend' / 'agent.sock'
+    return Path(f'/tmp/wg-friend-{os.getuid()}') / 'agent.sock'
+
+
+def private_directory(directory: Path) -> bool:
+    """True if `directory` is a real directory (no symlink) owned by us with mode 0700"""
+    try:
+        st = os.lstat(directory)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def peer_uid(conn: socket.socket) -> Optional[int]:
+    """uid of the process at the other end of a Unix socket, None if the platform can't tell"""
+    if hasattr(socket, 'SO_PEERCRED'):
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        return struct.unpack('3i', creds)[1]
+    if hasattr(socket, 'LOCAL_PEERCRED'):
+        # struct xucred: u_int cr_version, uid_t cr_uid, ...
+        creds = conn.getsockopt(0, socket.LOCAL_PEERCRED, struct.calcsize('2I') + 64)
+        return struct.unpack_from('2I', creds)[1]
+    return None
+
+
+def agent_key_id(db_path: Path | str, salt: bytes) -> str:
+    """Identifier for a database's derived key (changes with the salt)"""
+    resolved = str(Path(db_path).resolve()).encode('utf-8')
+    return hashlib.sha256(resolved + b'\0' + salt).hexdigest()
+
+
+@dataclass
+class AgentEntry:
+    """A derived key held by the agent"""
+    key: bytes
+    expires_at: float
+    idle_timeout: float
+    last_used: float
+
+    def expired(self, now: float) -> bool:
+        return now >= self.expires_at or now - self.last_used >= self.idle_timeout
+
+
+class UnlockAgent:
+    """
+    The agent daemon.
+
+    Usage:
+        agent = UnlockAgent(default_socket_path())
+        agent.serve_forever()
+    """
+
+    def __init__(self, socket_path: Path | str, ttl: float = DEFAULT_TTL,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.socket_path = Path(socket_path)
+        self.ttl = ttl
+        self.idle_timeout = idle_timeout
+        self._keys: Dict[str, AgentEntry] = {}
+        self._sock: Optional[socket.socket] = None
+        self._running = False
+        self.started_at = time.time()
+
+    def bind(self):
+        """Create the socket directory (0700) and listen on the socket (0600)"""
+        directory = self.socket_path.parent
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if not private_directory(directory):
+            raise PermissionError(f"Agent directory {directory} must be private to this user")
+
+        if self.socket_path.exists():
+            if AgentClient(self.socket_path).status() is not None:
+                raise RuntimeError(f"An agent is already running on {self.socket_path}")
+            self.socket_path.unlink()   # stale socket from a dead agent
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            sock.bind(str(self.socket_path))
+        finally:
+            os.umask(old_umask)
+        sock.listen(16)
+        self._sock = sock
+
+    def serve_forever(self):
+        """Handle requests until stop() or a "stop" request"""
+        if self._sock is None:
+            self.bind()
+        self._running = True
+        try:
+            while self._running:
+                readable, _, _ = select.select([self._sock], [], [], 1.0)
+                self._purge()
+                if readable:
+                    conn, _ = self._sock.accept()
+                    with conn:
+                        self._handle(conn)
+        finally:
+            self.close()
+
+    def stop(self):
+        self._running = False
+
+    def close(self):
+        """Forget every key and remove the socket"""
+        self._keys.clear()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+    def _purge(self):
+        now = time.monotonic()
+        for key_id in [k for k, entry in self._keys.items() if entry.expired(now)]:
+            del self._keys[key_id]
+
+    def _peer_allowed(self, conn: socket.socket) -> bool:
+        """Same-uid check via peer credentials; directory perms where unsupported"""
+        uid = peer_uid(conn)
+        return uid is None or uid == os.getuid()
+
+    def _handle(self, conn: socket.socket):
+        conn.settimeout(CLIENT_TIMEOUT)
+        try:
+            if not self._peer_allowed(conn):
+                response = {'ok': False, 'error': 'permission denied'}
+            else:
+                response = self._dispatch(json.loads(_read_line(conn)))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            response = {'ok': False, 'error': str(e)}
+        try:
+            conn.sendall(json.dumps(response).encode('utf-8') + b'\n')
+        except OSError:
+            pass
+
+    def _dispatch(self, request: dict) -> dict:
+        op = request.get('op')
+        now = time.monotonic()
+
+        if op == 'get':
+            entry = self._keys.get(request.get('id'))
+            if entry is None or entry.expired(now):
+                self._keys.pop(request.get('id'), None)
+                return {'ok': False, 'error': 'not found'}
+            entry.last_used = now
+            return {'ok': True, 'key': base64.b64encode(entry.key).decode('ascii')}
+
+        if op == 'add':
+            key = base64.b64decode(request['key'])
+            if len(key) != 32:
+                return {'ok': False, 'error': 'key must be 32 bytes'}
+            ttl = min(float(request.get('ttl') or self.ttl), self.ttl)
+            idle = min(float(request.get('idle_timeout') or self.idle_timeout), self.idle_timeout)
+            self._keys[request['id']] = AgentEntry(key, now + ttl, idle, now)
+            return {'ok': True}
+
+        if op == 'forget':
+            if request.get('id'):
+                self._keys.pop(request['id'], None)
+            else:
+                self._keys.clear()
+            return {'ok': True}
+
+        if op == 'status':
+            return {
+                'ok': True,
+                'pid': os.getpid(),
+                'keys': len(self._keys),
+                'ttl': self.ttl,
+                'idle_timeout': self.idle_timeout,
+                'uptime': int(time.time() - self.started_at),
+            }
+
+        if op == 'stop':
+            self._running = False
+            return {'ok': True}
+
+        return {'ok': False, 'error': f'unknown op: {op}'}
+
+
+def _read_line(conn: socket.socket) -> bytes:
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+        if len(data) > MAX_REQUEST_BYTES:
+            raise ValueError("request too large")
+    return data
+
+
+class AgentClient:
+    """
+    Talks to a running agent. Every method returns None/False (never
+    raises) when no agent is listening, so callers can fall back to a prompt.
+    """
+
+    def __init__(self, socket_path: Path | str | None = None):
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+
+    def _trusted_socket(self) -> bool:
+        """The socket sits in our private directory and is owned by us"""
+        if not private_directory(self.socket_path.parent):
+            return False
+        try:
+            st = os.lstat(self.socket_path)
+        except OSError:
+            return False
+        return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+    def _request(self, request: dict) -> Optional[dict]:
+        if not self.socket_path.exists():
+            return None
+        if not self._trusted_socket():
+            logger.warning(f"Ignoring unlock agent socket {self.socket_path}: not private to this user")
+            return None
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(CLIENT_TIMEOUT)
+                sock.connect(str(self.socket_path))
+                uid = peer_uid(sock)
+                if uid is not None and uid != os.getuid():
+                    logger.warning(f"Ignoring unlock agent on {self.socket_path}: runs as uid {uid}")
+                    return None
+                sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+                return json.loads(_read_line(sock))
+        except (OSError, ValueError) as e:
+            logger.debug(f"Unlock agent unavailable: {e}")
+            return None
+
+    def get_key(self, key_id: str) -> Optional[bytes]:
+        response = self._request({'op': 'get', 'id': key_id})
+        if response and response.get('ok'):
+            return base64.b64decode(response['key'])
+        return None
+
+    def add_key(self, key_id: str, key: bytes, ttl: Optional[float] = None,
+                idle_timeout: Optional[float] = None) -> bool:
+        response = self._request({
+            'op': 'add', 'id': key_id, 'key': base64.b64encode(key).decode('ascii'),
+            'ttl': ttl, 'idle_timeout': idle_timeout,
+        })
+        return bool(response and response.get('ok'))
+
+    def forget(self, key_id: Optional[str] = None) -> bool:
+        """Forget one key, or every key"""
+        response = self._request({'op': 'forget', 'id': key_id})
+        return bool(response and response.get('ok'))
+
+    def status(self) -> Optional[dict]:
+        response = self._request({'op': 'status'})
+        return response if response and response.get('ok') else None
+
+    def stop(self) -> bool:
+        response = self._request({'op': 'stop'})
+        return bool(response and response.get('ok'))
+
+
+def start_agent(socket_path: Path | str | None = None, ttl: float = DEFAULT_TTL,
+                idle_timeout: float = DEFAULT_IDLE_TIMEOUT, foreground: bool = False) -> int:
+    """
+    Start the agent, detached unless `foreground`.
+
+    Returns the daemon's pid (foreground: returns when the agent stops).
+    """
+    agent = UnlockAgent(socket_path or default_socket_path(), ttl, idle_timeout)
+    agent.bind()   # fail here, in the caller, if the socket can't be created
+
+    if foreground:
+        agent.serve_forever()
+        return os.getpid()
+
+    pid = os.fork()
+    if pid:
+        agent._sock.close()
+        os.waitpid(pid, 0)
+        # Wait for the grandchild to report in
+        client = AgentClient(agent.socket_path)
+        for _ in range(50):
+            status = client.status()
+            if status:
+                return status['pid']
+            time.sleep(0.02)
+        raise RuntimeError("Unlock agent did not start")
+
+    # Child: detach from the terminal, then fork again so the agent can't
+    # reacquire one
+    os.setsid()
+    if os.fork():
+        os._exit(0)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    try:
+        agent.serve_forever()
+    finally:
+        os._exit(0)
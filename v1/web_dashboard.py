@@ -25,6 +25,9 @@
 import threading
 import time
 
+from v1.db_pool import get_read_connection
+from v1.topology_query import NetworkTopology, fetch_topology
+
 
 @dataclass
 class DashboardConfig:
@@ -48,9 +51,8 @@ def __init__(self, db_path: str):
         self._cache_ttl = 10  # seconds
 
     def _get_conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        # Dashboard only reads - use the read-only pool
+        return get_read_connection(self.db_path)
 
     def _is_cache_valid(self, key: str) -> bool:
         if key not in self._cache_time:
@@ -98,61 +100,40 @@ def get_all_peers(self) -> List[Dict]:
         if self._is_cache_valid('all_peers'):
             return self._cache['all_peers']
 
-        conn = self._get_conn()
-        try:
-            peers = []
-
-            # Routers
-            rows = conn.execute("""
-                SELECT id, hostname, vpn_ip, endpoint, created_at
-                FROM subnet_router ORDER BY hostname
-            """).fetchall()
-            for row in rows:
-                peers.append({
-                    "id": row['id'],
-                    "type": "router",
-                    "hostname": row['hostname'],
-                    "vpn_ip": row['vpn_ip'],
-                    "endpoint": row['endpoint'],
-                })
-
-            # Remotes
-            rows = conn.execute("""
-                SELECT id, hostname, vpn_ip, access_level, sponsor_type, created_at, exit_node_id
-                FROM remote ORDER BY hostname
-            """).fetchall()
-            for row in rows:
-                peers.append({
-                    "id": row['id'],
-                    "type": "remote",
-                    "hostname": row['hostname'],
-                    "vpn_ip": row['vpn_ip'],
-                    "access_level": row['access_level'],
-                    "has_exit": bool(row['exit_node_id']),
-                })
-
-            # Exit nodes
-            try:
-                rows = conn.execute("""
-                    SELECT id, hostname, ipv4_address as vpn_ip, endpoint
-                    FROM exit_node ORDER BY hostname
-                """).fetchall()
-                for row in rows:
-                    peers.append({
-                        "id": row['id'],
-                        "type": "exit_node",
-                        "hostname": row['hostname'],
-                        "vpn_ip": row['vpn_ip'],
-                        "endpoint": row['endpoint'],
-                    })
-            except:
-                pass
-
-            self._cache['all_peers'] = peers
-            self._cache_time['all_peers'] = time.time()
-            return peers
-        finally:
-            conn.close()
+        topology = self._get_topology()
+        peers = []
+
+        for r in topology.routers:
+            peers.append({
+                "id": r['id'],
+                "type": "router",
+                "hostname": r['hostname'],
+                "vpn_ip": r['ipv4_address'],
+                "endpoint": r['endpoint'],
+            })
+
+        for rm in topology.remotes:
+            peers.append({
+                "id": rm['id'],
+                "type": "remote",
+                "hostname": rm['hostname'],
+                "vpn_ip": rm['ipv4_address'],
+                "access_level": rm['access_level'],
+                "has_exit": bool(rm['exit_node_id']),
+            })
+
+        for en in topology.exit_nodes:
+            peers.append({
+                "id": en['id'],
+                "type": "exit_node",
+                "hostname": en['hostname'],
+                "vpn_ip": en['ipv4_address'],
+                "endpoint": en['endpoint'],
+            })
+
+        self._cache['all_peers'] = peers
+        self._cache_time['all_peers'] = time.time()
+        return peers
 
     def get_alerts(self) -> List[Dict]:
         """Get active alerts."""
@@ -178,74 +159,69 @@ def get_alerts(self) -> List[Dict]:
         finally:
             conn.close()
 
-    def get_topology(self) -> Dict:
-        """Get network topology for visualization."""
+    def _get_topology(self) -> NetworkTopology:
+        """Every entity with its relations, in a fixed number of queries"""
         conn = self._get_conn()
         try:
-            nodes = []
-            edges = []
-
-            # CS node
-            cs = conn.execute("""
-                SELECT id, hostname, vpn_ip FROM coordination_server LIMIT 1
-            """).fetchone()
-            if cs:
-                nodes.append({
-                    "id": "cs",
-                    "label": cs['hostname'],
-                    "ip": cs['vpn_ip'],
-                    "type": "cs",
-                    "color": "#4299e1",
-                })
-
-            # Router nodes
-            routers = conn.execute("""
-                SELECT id, hostname, vpn_ip FROM subnet_router ORDER BY hostname
-            """).fetchall()
-            for r in routers:
-                nodes.append({
-                    "id": f"sr_{r['id']}",
-                    "label": r['hostname'],
-                    "ip": r['vpn_ip'],
-                    "type": "router",
-                    "color": "#48bb78",
-                })
-                edges.append({"from": "cs", "to": f"sr_{r['id']}"})
-
-                # Remotes under this router
-                remotes = conn.execute("""
-                    SELECT id, hostname, vpn_ip FROM remote
-                    WHERE sponsor_type = 'sr' AND sponsor_id = ?
-                """, (r['id'],)).fetchall()
-                for rm in remotes:
-                    nodes.append({
-                        "id": f"rm_{rm['id']}",
-                        "label": rm['hostname'],
-                        "ip": rm['vpn_ip'],
-                        "type": "remote",
-                        "color": "#ecc94b",
-                    })
-                    edges.append({"from": f"sr_{r['id']}", "to": f"rm_{rm['id']}"})
-
-            # Remotes directly under CS
-            cs_remotes = conn.execute("""
-                SELECT id, hostname, vpn_ip FROM remote
-                WHERE sponsor_type = 'cs'
-            """).fetchall()
-            for rm in cs_remotes:
-                nodes.append({
-                    "id": f"rm_{rm['id']}",
-                    "label": rm['hostname'],
-                    "ip": rm['vpn_ip'],
-                    "type": "remote",
-                    "color": "#ecc94b",
-                })
-                edges.append({"from": "cs", "to": f"rm_{rm['id']}"})
-
-            return {"nodes": nodes, "edges": edges}
+            return fetch_topology(conn)
         finally:
             conn.close()
 
+    def get_topology(self) -> Dict:
+        """Get network topology for visualization."""
+        topology = self._get_topology()
+        nodes = []
+        edges = []
+
+        # CS node
+        cs = topology.cs
+        if cs:
+            nodes.append({
+                "id": "cs",
+                "label": cs['hostname'],
+                "ip": cs['ipv4_address'],
+                "type": "cs",
+                "color": "#4299e1",
+            })
+
+        # Router nodes
+        for r in topology.routers:
+            nodes.append({
+                "id": f"sr_{r['id']}",
+                "label": r['hostname'],
+                "ip": r['ipv4_address'],
+                "type": "router",
+                "color": "#48bb78",
+                "networks": [n['network_cidr'] for n in r['advertised_networks']],
+            })
+            edges.append({"from": "cs", "to": f"sr_{r['id']}"})
+
+        # Exit nodes
+        for en in topology.exit_nodes:
+            nodes.append({
+                "id": f"en_{en['id']}",
+                "label": en['hostname'],
+                "ip": en['ipv4_address'],
+                "type": "exit_node",
+                "color": "#ed8936",
+            })
+            edges.append({"from": "cs", "to": f"en_{en['id']}"})
+
+        # Remotes: sponsored by the CS, routed out through their exit node if any
+        for rm in topology.remotes:
+            nodes.append({
+                "id": f"rm_{rm['id']}",
+                "label": rm['hostname'],
+                "ip": rm['ipv4_address'],
+                "type": "remote",
+                "color": "#ecc94b",
+            })
+            edges.append({"from": "cs", "to": f"rm_{rm['id']}"})
+            if rm['exit_node']:
+                edges.append({"from": f"rm_{rm['id']}", "to": f"en_{rm['exit_node_id']}"})
+
+        return {"nodes": nodes, "edges": edges}
+
     def get_recent_activity(self) -> List[Dict]:
         """Get recent activity from audit log."""
         conn = self._get_conn()
@@ -28,6 +28,9 @@
 from urllib.parse import urlencode
 import ssl
 
+from v1.db_pool import get_connection
+from v1.migrations import ensure_schema, execute_script
+
 
 class WebhookFormat(Enum):
     """Supported webhook payload formats."""
@@ -80,56 +83,62 @@ class WebhookDelivery:
     delivered_at: Optional[datetime] = None
 
 
+WEBHOOK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS webhook_endpoint (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    format TEXT NOT NULL DEFAULT 'generic',
+    enabled INTEGER NOT NULL DEFAULT 1,
+    secret TEXT,
+    headers TEXT,
+    retry_count INTEGER NOT NULL DEFAULT 3,
+    retry_delay INTEGER NOT NULL DEFAULT 60,
+    rate_limit INTEGER NOT NULL DEFAULT 60,
+    alert_types TEXT,
+    min_severity TEXT NOT NULL DEFAULT 'info',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS webhook_delivery (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    endpoint_id INTEGER NOT NULL,
+    alert_id INTEGER,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_attempt TEXT,
+    next_retry TEXT,
+    response_code INTEGER,
+    error_message TEXT,
+    delivered_at TEXT,
+    created_at TEXT NOT NULL,
+    FOREIGN KEY (endpoint_id) REFERENCES webhook_endpoint(id)
+);
+
+CREATE TABLE IF NOT EXISTS webhook_rate_limit (
+    endpoint_id INTEGER PRIMARY KEY,
+    call_count INTEGER NOT NULL DEFAULT 0,
+    window_start TEXT NOT NULL,
+    FOREIGN KEY (endpoint_id) REFERENCES webhook_endpoint(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_webhook_delivery_status
+    ON webhook_delivery(status);
+CREATE INDEX IF NOT EXISTS idx_webhook_delivery_next_retry
+    ON webhook_delivery(next_retry);
+"""
+
+
+def create_webhook_schema(cursor):
+    """Migration 6: webhook endpoints, deliveries and rate limits"""
+    execute_script(cursor, WEBHOOK_SCHEMA)
+
+
 class WebhookNotifier:
     """Manages webhook notifications with retry and delivery tracking."""
 
-    SCHEMA = """
-    CREATE TABLE IF NOT EXISTS webhook_endpoint (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        url TEXT NOT NULL,
-        format TEXT NOT NULL DEFAULT 'generic',
-        enabled INTEGER NOT NULL DEFAULT 1,
-        secret TEXT,
-        headers TEXT,
-        retry_count INTEGER NOT NULL DEFAULT 3,
-        retry_delay INTEGER NOT NULL DEFAULT 60,
-        rate_limit INTEGER NOT NULL DEFAULT 60,
-        alert_types TEXT,
-        min_severity TEXT NOT NULL DEFAULT 'info',
-        created_at TEXT NOT NULL,
-        updated_at TEXT NOT NULL
-    );
-
-    CREATE TABLE IF NOT EXISTS webhook_delivery (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        endpoint_id INTEGER NOT NULL,
-        alert_id INTEGER,
-        payload TEXT NOT NULL,
-        status TEXT NOT NULL DEFAULT 'pending',
-        attempts INTEGER NOT NULL DEFAULT 0,
-        last_attempt TEXT,
-        next_retry TEXT,
-        response_code INTEGER,
-        error_message TEXT,
-        delivered_at TEXT,
-        created_at TEXT NOT NULL,
-        FOREIGN KEY (endpoint_id) REFERENCES webhook_endpoint(id)
-    );
-
-    CREATE TABLE IF NOT EXISTS webhook_rate_limit (
-        endpoint_id INTEGER PRIMARY KEY,
-        call_count INTEGER NOT NULL DEFAULT 0,
-        window_start TEXT NOT NULL,
-        FOREIGN KEY (endpoint_id) REFERENCES webhook_endpoint(id)
-    );
-
-    CREATE INDEX IF NOT EXISTS idx_webhook_delivery_status
-        ON webhook_delivery(status);
-    CREATE INDEX IF NOT EXISTS idx_webhook_delivery_next_retry
-        ON webhook_delivery(next_retry);
-    """
-
     SEVERITY_ORDER = {"info": 0, "warning": 1, "critical": 2}
 
     def __init__(self, db_path: str):
@@ -140,20 +149,11 @@ def __init__(self, db_path: str):
         """
         self.db_path = db_path
         self._lock = threading.Lock()
-        self._init_schema()
+        ensure_schema(self.db_path)
 
     def _get_connection(self) -> sqlite3.Connection:
-        """Get a database connection."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-
-    def _init_schema(self):
-        """Initialize database schema."""
-        conn = self._get_connection()
-        conn.executescript(self.SCHEMA)
-        conn.commit()
-        conn.close()
+        """Get a pooled database connection."""
+        return get_connection(self.db_path)
 
     def add_endpoint(self, endpoint: WebhookEndpoint) -> int:
         """Add a new webhook endpoint.
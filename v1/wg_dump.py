@@ -0,0 +1,230 @@
+"""
+WireGuard Dump - One Parser for Live Interface State
+
+Status, bandwidth collection and Prometheus metrics all need the same live
+data: per-peer endpoint, allowed IPs, latest handshake and transfer
+counters. They read it from one `wg show all dump` snapshot:
+
+- The dump is WireGuard's machine format: tab-separated, epoch handshake
+  times and exact byte counters (no "1.23 MiB" strings to parse back).
+- `all` covers every interface in one call; records carry the interface.
+- Snapshots are cached per host for a few seconds, so a status view, a
+  bandwidth sample and a metrics scrape in the same cycle run `wg` once.
+- Private and preshared keys are never kept: records only note whether
+  a peer has a preshared key.
+
+Usage:
+    from v1.wg_dump import get_snapshot
+
+    snapshot = get_snapshot('vpn.example.com')      # None = this machine
+    for peer in snapshot.peers_on('wg0'):
+        print(peer.public_key, peer.rx_bytes, peer.is_up(snapshot.taken_at))
+"""
+
+import logging
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from v1.ssh_sessions import SSHTarget
+from v1.transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+DUMP_COMMAND = 'wg show all dump'
+
+# A peer counts as connected with a handshake this recent (WireGuard
+# re-handshakes every 2 minutes while traffic flows)
+HANDSHAKE_WINDOW = 180
+
+# Seconds a snapshot is reused by get_snapshot()
+DEFAULT_MAX_AGE = 5.0
+
+
+@dataclass(frozen=True, slots=True)
+class WgInterface:
+    """Interface line of the dump (private key dropped)"""
+    name: str
+    public_key: str
+    listen_port: int
+    fwmark: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class WgPeer:
+    """Peer line of the dump"""
+    interface: str
+    public_key: str
+    has_preshared_key: bool
+    endpoint: Optional[str]
+    allowed_ips: Tuple[str, ...]
+    latest_handshake: int           # Unix epoch, 0 = never
+    rx_bytes: int
+    tx_bytes: int
+    persistent_keepalive: int       # seconds, 0 = off
+
+    @property
+    def handshake_time(self) -> Optional[datetime]:
+        """Latest handshake as local time, None if never"""
+        return datetime.fromtimestamp(self.latest_handshake) if self.latest_handshake else None
+
+    def handshake_age(self, now: float) -> Optional[float]:
+        """Seconds since the latest handshake, None if never"""
+        return now - self.latest_handshake if self.latest_handshake else None
+
+    def is_up(self, now: float, window: float = HANDSHAKE_WINDOW) -> bool:
+        age = self.handshake_age(now)
+        return age is not None and age < window
+
+
+@dataclass
+class WgSnapshot:
+    """Everything one `wg show ... dump` returned"""
+    taken_at: float                                     # Unix epoch
+    interfaces: Dict[str, WgInterface] = field(default_factory=dict)
+    peers: List[WgPeer] = field(default_factory=list)
+
+    def peers_on(self, interface: Optional[str] = None) -> List[WgPeer]:
+        """Peers of one interface (None = all interfaces)"""
+        if interface is None:
+            return list(self.peers)
+        return [p for p in self.peers if p.interface == interface]
+
+    def by_key(self, interface: Optional[str] = None) -> Dict[str, WgPeer]:
+        """Public key -> peer"""
+        return {p.public_key: p for p in self.peers_on(interface)}
+
+
+def _none(value: str) -> Optional[str]:
+    return None if value in ('(none)', 'off', '') else value
+
+
+def _int(value: str) -> int:
+    return 0 if value in ('(none)', 'off', '') else int(value)
+
+
+def parse_dump(output: str, interface: Optional[str] = None,
+               taken_at: Optional[float] = None) -> WgSnapshot:
+    """
+    Parse `wg show all dump`, or `wg show <interface> dump` when
+    `interface` is given (that format has no interface column).
+
+    Malformed lines are skipped.
+    """
+    snapshot = WgSnapshot(taken_at=time.time() if taken_at is None else taken_at)
+    offset = 0 if interface else 1
+
+    for line in output.splitlines():
+        parts = line.split('\t')
+        name = interface or parts[0]
+        fields = parts[offset:]
+        try:
+            if len(fields) == 4:
+                # private-key public-key listen-port fwmark
+                snapshot.interfaces[name] = WgInterface(
+                    name, fields[1], _int(fields[2]), _none(fields[3]))
+            elif len(fields) == 8:
+                # public-key preshared-key endpoint allowed-ips latest-handshake
+                # transfer-rx transfer-tx persistent-keepalive
+                snapshot.peers.append(WgPeer(
+                    interface=name,
+                    public_key=fields[0],
+                    has_preshared_key=_none(fields[1]) is not None,
+                    endpoint=_none(fields[2]),
+                    allowed_ips=tuple(ip for ip in fields[3].split(',') if ip and ip != '(none)'),
+                    latest_handshake=_int(fields[4]),
+                    rx_bytes=_int(fields[5]),
+                    tx_bytes=_int(fields[6]),
+                    persistent_keepalive=_int(fields[7]),
+                ))
+        except ValueError:
+            logger.debug(f"Skipping malformed dump line: {line[:40]}")
+
+    return snapshot
+
+
+def read_dump(host: Optional[str] = None, user: str = 'root', port: int = 22,
+              timeout: float = 10, sudo: bool = False,
+              key_path: Optional[str] = None) -> Optional[WgSnapshot]:
+    """
+    Run `wg show all dump` once and parse it.
+
+    Args:
+        host: '[user@]host[:port]' to query over the transport, None for
+            this machine
+        user: SSH user
+        port: SSH port (unless host has one)
+        timeout: Seconds to wait for wg
+        sudo: Prefix the command with sudo
+        key_path: SSH identity file for the host (default: ssh's own)
+
+    Returns:
+        WgSnapshot, or None if wg couldn't be run
+    """
+    command = f"sudo {DUMP_COMMAND}" if sudo else DUMP_COMMAND
+    target = SSHTarget.parse(host, user, port) if host else None
+    transport = get_transport()
+    try:
+        if target is None or transport.is_local(target.host):
+            result = subprocess.run(command.split(), capture_output=True, text=True, timeout=timeout)
+        else:
+            result = transport.exec(target, command, timeout=timeout, connect_timeout=5,
+                                    batch_mode=True, key_path=key_path)
+    except subprocess.TimeoutExpired:
+        logger.error(f"wg show timed out on {host or 'localhost'}")
+        return None
+    except FileNotFoundError:
+        logger.error("wg command not found")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to run wg show on {host or 'localhost'}: {e}")
+        return None
+
+    if result.returncode != 0:
+        logger.error(f"wg show failed on {host or 'localhost'}: {result.stderr.strip()}")
+        return None
+    return parse_dump(result.stdout)
+
+
+# =============================================================================
+# SHARED SNAPSHOTS
+# =============================================================================
+
+_snapshots: Dict[Tuple, WgSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(host: Optional[str] = None, user: str = 'root', port: int = 22,
+                 max_age: float = DEFAULT_MAX_AGE, **kwargs) -> Optional[WgSnapshot]:
+    """
+    Latest snapshot of a host, reusing one taken within `max_age` seconds.
+
+    Pass max_age=0 to always run wg (e.g. when polling for a handshake).
+    Failed reads are not cached. Reads with different SSH keys are cached
+    separately; sudo doesn't change the dump, so it shares the snapshot.
+    """
+    key = (host, user, port, kwargs.get('key_path'))
+    now = time.time()
+    with _snapshots_lock:
+        cached = _snapshots.get(key)
+    if cached is not None and max_age > 0 and now - cached.taken_at < max_age:
+        return cached
+
+    snapshot = read_dump(host, user, port, **kwargs)
+    if snapshot is not None:
+        with _snapshots_lock:
+            _snapshots[key] = snapshot
+    return snapshot
+
+
+def clear_snapshots():
+    """Forget cached snapshots"""
+    with _snapshots_lock:
+        _snapshots.clear()